@@ -9,6 +9,8 @@ sys.path.append('/home/ubuntu/pcbf_framework')
 import config
 from utils import extract_bio_features, calculate_follower_following_ratio, normalize_scores
 from llm_client import get_llm_client
+from prompt_budget import compact_bio
+from json_parser import format_example
 from models import DISCResult
 
 logger = logging.getLogger(__name__)
@@ -17,12 +19,38 @@ logger = logging.getLogger(__name__)
 class DISCAgent:
     """Agent für DISC-Persönlichkeitsanalyse"""
     
+    ANALYSIS_PROMPT = """Du bist ein Experte für DISC-Persönlichkeitsanalyse. 
+Analysiere die gegebene Bio und bestimme den DISC-Typ.
+
+DISC-Typen:
+- D (Dominant): Direkt, ergebnisorientiert, entscheidungsfreudig, assertiv
+- I (Influencer): Enthusiastisch, sozial, kreativ, optimistisch
+- S (Supporter): Teamorientiert, geduldig, zuverlässig, harmonisch
+- C (Analyst): Analytisch, präzise, qualitätsorientiert, systematisch
+
+Gib deine Analyse als JSON zurück:
+"""
+    
+    OUTPUT_FIELDS = {
+        'scores': '{"D": 0.0-1.0, "I": 0.0-1.0, "S": 0.0-1.0, "C": 0.0-1.0}',
+        'reasoning': '"Begründung der Klassifikation"'
+    }
+    
+    SYSTEM_PROMPT = ANALYSIS_PROMPT + format_example(OUTPUT_FIELDS)
+    # Variante für config.LLM_SCORES_ONLY: fordert kein Reasoning an
+    SCORES_ONLY_SYSTEM_PROMPT = ANALYSIS_PROMPT + format_example(OUTPUT_FIELDS, ['scores'])
+    
+    RESPONSE_SHAPE = {
+        'scores': {'D': float, 'I': float, 'S': float, 'C': float},
+        'reasoning': str
+    }
+    
     def __init__(self):
         self.llm_client = get_llm_client()
     
     def analyze(self, bio: Optional[str], followers: Optional[int], 
                 following: Optional[int], full_name: Optional[str] = None,
-                nickname: Optional[str] = None) -> DISCResult:
+                nickname: Optional[str] = None, use_llm: bool = True) -> DISCResult:
         """
         Analysiert DISC-Persönlichkeitstyp aus Bio und Behavioral-Daten.
         
@@ -32,9 +60,14 @@ class DISCAgent:
             following: Anzahl Following
             full_name: Vollständiger Name (optional)
             nickname: Nickname (optional)
+            use_llm: LLM-Analyse durchführen (False = nur Keyword-Scores)
             
         Returns:
             DISCResult mit Klassifikation
+            
+        Raises:
+            LLMUnavailableError: LLM-API nicht erreichbar
+            LLMResponseError: LLM-Antwort auch nach Reparatur ungültig
         """
         logger.info("DISC-Analyse gestartet")
         
@@ -51,14 +84,15 @@ class DISCAgent:
         disc_scores = self._calculate_keyword_scores(bio, features, follower_ratio)
         
         # LLM-basierte Analyse
-        llm_result = self._llm_analysis(bio, features, follower_ratio)
+        llm_result = self._llm_analysis(bio, features, follower_ratio) if use_llm else None
         
         if llm_result:
             # LLM-Ergebnis mit Keyword-Scores kombinieren
             disc_scores = self._merge_scores(disc_scores, llm_result.get('scores', {}))
             reasoning = llm_result.get('reasoning', '')
         else:
-            logger.warning("LLM-Analyse fehlgeschlagen - verwende nur Keyword-Scores")
+            if use_llm:
+                logger.warning("LLM-Analyse fehlgeschlagen - verwende nur Keyword-Scores")
             reasoning = "Analyse basiert auf Keyword-Matching (LLM nicht verfügbar)"
         
         # Normalisieren
@@ -161,24 +195,14 @@ class DISCAgent:
                      follower_ratio: float) -> Optional[Dict]:
         """LLM-basierte DISC-Analyse"""
         
-        system_prompt = """Du bist ein Experte für DISC-Persönlichkeitsanalyse. 
-Analysiere die gegebene Bio und bestimme den DISC-Typ.
-
-DISC-Typen:
-- D (Dominant): Direkt, ergebnisorientiert, entscheidungsfreudig, assertiv
-- I (Influencer): Enthusiastisch, sozial, kreativ, optimistisch
-- S (Supporter): Teamorientiert, geduldig, zuverlässig, harmonisch
-- C (Analyst): Analytisch, präzise, qualitätsorientiert, systematisch
-
-Gib deine Analyse als JSON zurück:
-{
-  "scores": {"D": 0.0-1.0, "I": 0.0-1.0, "S": 0.0-1.0, "C": 0.0-1.0},
-  "reasoning": "Begründung der Klassifikation"
-}"""
+        scores_only = config.LLM_SCORES_ONLY
+        output_hint = '' if scores_only else ' und Begründung'
+        
+        compacted = compact_bio(bio)
         
         prompt = f"""Analysiere folgende Bio für DISC-Klassifikation:
 
-Bio: {bio}
+Bio: {compacted.text}
 
 Zusätzliche Metriken:
 - Durchschnittliche Satzlänge: {features['avg_sentence_length']:.1f} Wörter
@@ -187,14 +211,17 @@ Zusätzliche Metriken:
 - Ich/Wir-Verhältnis: {features['i_ratio']:.3f} / {features['we_ratio']:.3f}
 - Follower/Following-Ratio: {follower_ratio:.2f}
 
-Gib DISC-Scores (0.0-1.0) und Begründung als JSON zurück."""
-        
-        response = self.llm_client.call(prompt, system_prompt, temperature=0.3)
+Gib DISC-Scores (0.0-1.0){output_hint} als JSON zurück."""
         
-        if response['success']:
-            return self.llm_client.parse_json_response(response)
+        required_keys = ['scores'] if scores_only else None
+        system_prompt = self.SCORES_ONLY_SYSTEM_PROMPT if scores_only else self.SYSTEM_PROMPT
         
-        return None
+        return self.llm_client.call_json(
+            prompt, system_prompt, self.RESPONSE_SHAPE,
+            schema_name='disc_analysis', temperature=0.3,
+            required_keys=required_keys, tokens_saved=compacted.tokens_saved,
+            raise_on_error=True
+        )
     
     def _merge_scores(self, keyword_scores: Dict[str, float], 
                      llm_scores: Dict[str, float], 
@@ -9,6 +9,8 @@ sys.path.append('/home/ubuntu/pcbf_framework')
 import config
 from utils import extract_bio_features
 from llm_client import get_llm_client
+from prompt_budget import compact_bio
+from json_parser import format_example
 from models import NEOResult
 
 logger = logging.getLogger(__name__)
@@ -17,11 +19,47 @@ logger = logging.getLogger(__name__)
 class NEOAgent:
     """Agent für NEO/OCEAN Big Five Persönlichkeitsanalyse"""
     
+    ANALYSIS_PROMPT = """Du bist ein Experte für Big Five (OCEAN) Persönlichkeitsanalyse.
+Analysiere die gegebene Bio und bewerte die fünf Dimensionen.
+
+OCEAN-Dimensionen (jeweils 0.0-1.0):
+- Openness (Offenheit): Kreativität, Neugier, Intellekt
+- Conscientiousness (Gewissenhaftigkeit): Organisation, Disziplin, Zuverlässigkeit
+- Extraversion: Geselligkeit, Energie, Assertivität
+- Agreeableness (Verträglichkeit): Empathie, Kooperation, Vertrauen
+- Neuroticism (Neurotizismus): Emotionale Stabilität (niedrig) vs. Labilität (hoch)
+
+Gib deine Analyse als JSON zurück:
+"""
+    
+    OUTPUT_FIELDS = {
+        'dimensions': ('{\n'
+                       '    "openness": 0.0-1.0,\n'
+                       '    "conscientiousness": 0.0-1.0,\n'
+                       '    "extraversion": 0.0-1.0,\n'
+                       '    "agreeableness": 0.0-1.0,\n'
+                       '    "neuroticism": 0.0-1.0\n'
+                       '  }'),
+        'reasoning': '"Begründung der Bewertung"'
+    }
+    
+    SYSTEM_PROMPT = ANALYSIS_PROMPT + format_example(OUTPUT_FIELDS)
+    # Variante für config.LLM_SCORES_ONLY: fordert kein Reasoning an
+    SCORES_ONLY_SYSTEM_PROMPT = ANALYSIS_PROMPT + format_example(OUTPUT_FIELDS, ['dimensions'])
+    
+    RESPONSE_SHAPE = {
+        'dimensions': {
+            'openness': float, 'conscientiousness': float, 'extraversion': float,
+            'agreeableness': float, 'neuroticism': float
+        },
+        'reasoning': str
+    }
+    
     def __init__(self):
         self.llm_client = get_llm_client()
     
     def analyze(self, bio: Optional[str], verified: bool = False,
-                business_account: bool = False) -> NEOResult:
+                business_account: bool = False, use_llm: bool = True) -> NEOResult:
         """
         Analysiert OCEAN-Dimensionen aus Bio.
         
@@ -29,9 +67,14 @@ class NEOAgent:
             bio: Profilbeschreibung
             verified: Verifizierter Account
             business_account: Business Account
+            use_llm: LLM-Analyse durchführen (False = nur Keyword-Scores)
             
         Returns:
             NEOResult mit OCEAN-Dimensionen
+            
+        Raises:
+            LLMUnavailableError: LLM-API nicht erreichbar
+            LLMResponseError: LLM-Antwort auch nach Reparatur ungültig
         """
         logger.info("NEO/OCEAN-Analyse gestartet")
         
@@ -47,14 +90,15 @@ class NEOAgent:
         ocean_scores = self._calculate_keyword_scores(bio, features, verified, business_account)
         
         # LLM-basierte Analyse
-        llm_result = self._llm_analysis(bio, features)
+        llm_result = self._llm_analysis(bio, features) if use_llm else None
         
         if llm_result:
             # LLM-Ergebnis mit Keyword-Scores kombinieren
             ocean_scores = self._merge_scores(ocean_scores, llm_result.get('dimensions', {}))
             reasoning = llm_result.get('reasoning', '')
         else:
-            logger.warning("LLM-Analyse fehlgeschlagen - verwende nur Keyword-Scores")
+            if use_llm:
+                logger.warning("LLM-Analyse fehlgeschlagen - verwende nur Keyword-Scores")
             reasoning = "Analyse basiert auf Keyword-Matching (LLM nicht verfügbar)"
         
         # Confidence berechnen
@@ -166,31 +210,14 @@ class NEOAgent:
     def _llm_analysis(self, bio: str, features: Dict) -> Optional[Dict]:
         """LLM-basierte OCEAN-Analyse"""
         
-        system_prompt = """Du bist ein Experte für Big Five (OCEAN) Persönlichkeitsanalyse.
-Analysiere die gegebene Bio und bewerte die fünf Dimensionen.
-
-OCEAN-Dimensionen (jeweils 0.0-1.0):
-- Openness (Offenheit): Kreativität, Neugier, Intellekt
-- Conscientiousness (Gewissenhaftigkeit): Organisation, Disziplin, Zuverlässigkeit
-- Extraversion: Geselligkeit, Energie, Assertivität
-- Agreeableness (Verträglichkeit): Empathie, Kooperation, Vertrauen
-- Neuroticism (Neurotizismus): Emotionale Stabilität (niedrig) vs. Labilität (hoch)
-
-Gib deine Analyse als JSON zurück:
-{
-  "dimensions": {
-    "openness": 0.0-1.0,
-    "conscientiousness": 0.0-1.0,
-    "extraversion": 0.0-1.0,
-    "agreeableness": 0.0-1.0,
-    "neuroticism": 0.0-1.0
-  },
-  "reasoning": "Begründung der Bewertung"
-}"""
+        scores_only = config.LLM_SCORES_ONLY
+        output_hint = '' if scores_only else ' und Begründung'
+        
+        compacted = compact_bio(bio)
         
         prompt = f"""Analysiere folgende Bio für OCEAN-Dimensionen:
 
-Bio: {bio}
+Bio: {compacted.text}
 
 Zusätzliche Metriken:
 - Durchschnittliche Satzlänge: {features['avg_sentence_length']:.1f} Wörter
@@ -200,14 +227,17 @@ Zusätzliche Metriken:
 - Fragezeichen: {features['question_count']}
 - Ich/Wir-Verhältnis: {features['i_ratio']:.3f} / {features['we_ratio']:.3f}
 
-Gib OCEAN-Scores (0.0-1.0) und Begründung als JSON zurück."""
-        
-        response = self.llm_client.call(prompt, system_prompt, temperature=0.3)
+Gib OCEAN-Scores (0.0-1.0){output_hint} als JSON zurück."""
         
-        if response['success']:
-            return self.llm_client.parse_json_response(response)
+        required_keys = ['dimensions'] if scores_only else None
+        system_prompt = self.SCORES_ONLY_SYSTEM_PROMPT if scores_only else self.SYSTEM_PROMPT
         
-        return None
+        return self.llm_client.call_json(
+            prompt, system_prompt, self.RESPONSE_SHAPE,
+            schema_name='neo_analysis', temperature=0.3,
+            required_keys=required_keys, tokens_saved=compacted.tokens_saved,
+            raise_on_error=True
+        )
     
     def _merge_scores(self, keyword_scores: Dict[str, float],
                      llm_scores: Dict[str, float],
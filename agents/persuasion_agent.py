@@ -8,6 +8,8 @@ sys.path.append('/home/ubuntu/pcbf_framework')
 
 import config
 from llm_client import get_llm_client
+from prompt_budget import compact_bio
+from json_parser import format_example
 from models import PersuasionResult
 
 logger = logging.getLogger(__name__)
@@ -16,11 +18,51 @@ logger = logging.getLogger(__name__)
 class PersuasionAgent:
     """Agent für Cialdini Persuasion-Prinzipien-Analyse"""
     
+    ANALYSIS_PROMPT = """Du bist ein Experte für Cialdini's Persuasion-Prinzipien.
+Analysiere die gegebene Bio und bewerte, welche Prinzipien am stärksten ausgeprägt sind.
+
+Cialdini's 7 Prinzipien:
+1. Authority (Autorität): Expertise, Titel, Zertifikate, Status
+2. Social Proof (Soziale Bewährtheit): Referenzen, Kundenzahlen, Erfolge
+3. Scarcity (Knappheit): Exklusivität, Limitierung, Einzigartigkeit
+4. Reciprocity (Reziprozität): Geben, Helfen, Mehrwert bieten
+5. Consistency (Konsistenz): Werte, Prinzipien, Mission, Commitment
+6. Liking (Sympathie): Leidenschaft, Begeisterung, Persönlichkeit
+7. Unity (Einheit): Gemeinschaft, Zugehörigkeit, Wir-Gefühl
+
+Gib deine Analyse als JSON zurück:
+"""
+    
+    OUTPUT_FIELDS = {
+        'scores': ('{\n'
+                   '    "authority": 0.0-1.0,\n'
+                   '    "social_proof": 0.0-1.0,\n'
+                   '    "scarcity": 0.0-1.0,\n'
+                   '    "reciprocity": 0.0-1.0,\n'
+                   '    "consistency": 0.0-1.0,\n'
+                   '    "liking": 0.0-1.0,\n'
+                   '    "unity": 0.0-1.0\n'
+                   '  }'),
+        'reasoning': '"Begründung der Bewertung"'
+    }
+    
+    SYSTEM_PROMPT = ANALYSIS_PROMPT + format_example(OUTPUT_FIELDS)
+    # Variante für config.LLM_SCORES_ONLY: fordert kein Reasoning an
+    SCORES_ONLY_SYSTEM_PROMPT = ANALYSIS_PROMPT + format_example(OUTPUT_FIELDS, ['scores'])
+    
+    RESPONSE_SHAPE = {
+        'scores': {
+            'authority': float, 'social_proof': float, 'scarcity': float,
+            'reciprocity': float, 'consistency': float, 'liking': float, 'unity': float
+        },
+        'reasoning': str
+    }
+    
     def __init__(self):
         self.llm_client = get_llm_client()
     
     def analyze(self, bio: Optional[str], verified: bool = False,
-                business_account: bool = False) -> PersuasionResult:
+                business_account: bool = False, use_llm: bool = True) -> PersuasionResult:
         """
         Analysiert Cialdini-Prinzipien aus Bio.
         
@@ -28,9 +70,14 @@ class PersuasionAgent:
             bio: Profilbeschreibung
             verified: Verifizierter Account
             business_account: Business Account
+            use_llm: LLM-Analyse durchführen (False = nur Keyword-Scores)
             
         Returns:
             PersuasionResult mit Cialdini-Scores
+            
+        Raises:
+            LLMUnavailableError: LLM-API nicht erreichbar
+            LLMResponseError: LLM-Antwort auch nach Reparatur ungültig
         """
         logger.info("Persuasion-Analyse gestartet")
         
@@ -43,14 +90,15 @@ class PersuasionAgent:
         persuasion_scores = self._calculate_keyword_scores(bio, verified, business_account)
         
         # LLM-basierte Analyse
-        llm_result = self._llm_analysis(bio)
+        llm_result = self._llm_analysis(bio) if use_llm else None
         
         if llm_result:
             # LLM-Ergebnis mit Keyword-Scores kombinieren
             persuasion_scores = self._merge_scores(persuasion_scores, llm_result.get('scores', {}))
             reasoning = llm_result.get('reasoning', '')
         else:
-            logger.warning("LLM-Analyse fehlgeschlagen - verwende nur Keyword-Scores")
+            if use_llm:
+                logger.warning("LLM-Analyse fehlgeschlagen - verwende nur Keyword-Scores")
             reasoning = "Analyse basiert auf Keyword-Matching (LLM nicht verfügbar)"
         
         # Primary Prinzip
@@ -134,44 +182,26 @@ class PersuasionAgent:
     def _llm_analysis(self, bio: str) -> Optional[Dict]:
         """LLM-basierte Persuasion-Analyse"""
         
-        system_prompt = """Du bist ein Experte für Cialdini's Persuasion-Prinzipien.
-Analysiere die gegebene Bio und bewerte, welche Prinzipien am stärksten ausgeprägt sind.
-
-Cialdini's 7 Prinzipien:
-1. Authority (Autorität): Expertise, Titel, Zertifikate, Status
-2. Social Proof (Soziale Bewährtheit): Referenzen, Kundenzahlen, Erfolge
-3. Scarcity (Knappheit): Exklusivität, Limitierung, Einzigartigkeit
-4. Reciprocity (Reziprozität): Geben, Helfen, Mehrwert bieten
-5. Consistency (Konsistenz): Werte, Prinzipien, Mission, Commitment
-6. Liking (Sympathie): Leidenschaft, Begeisterung, Persönlichkeit
-7. Unity (Einheit): Gemeinschaft, Zugehörigkeit, Wir-Gefühl
-
-Gib deine Analyse als JSON zurück:
-{
-  "scores": {
-    "authority": 0.0-1.0,
-    "social_proof": 0.0-1.0,
-    "scarcity": 0.0-1.0,
-    "reciprocity": 0.0-1.0,
-    "consistency": 0.0-1.0,
-    "liking": 0.0-1.0,
-    "unity": 0.0-1.0
-  },
-  "reasoning": "Begründung der Bewertung"
-}"""
+        scores_only = config.LLM_SCORES_ONLY
+        output_hint = '' if scores_only else ' und Begründung'
+        
+        compacted = compact_bio(bio)
         
         prompt = f"""Analysiere folgende Bio für Cialdini's Persuasion-Prinzipien:
 
-Bio: {bio}
+Bio: {compacted.text}
 
-Gib Persuasion-Scores (0.0-1.0) und Begründung als JSON zurück."""
+Gib Persuasion-Scores (0.0-1.0){output_hint} als JSON zurück."""
         
-        response = self.llm_client.call(prompt, system_prompt, temperature=0.3)
+        required_keys = ['scores'] if scores_only else None
+        system_prompt = self.SCORES_ONLY_SYSTEM_PROMPT if scores_only else self.SYSTEM_PROMPT
         
-        if response['success']:
-            return self.llm_client.parse_json_response(response)
-        
-        return None
+        return self.llm_client.call_json(
+            prompt, system_prompt, self.RESPONSE_SHAPE,
+            schema_name='persuasion_analysis', temperature=0.3,
+            required_keys=required_keys, tokens_saved=compacted.tokens_saved,
+            raise_on_error=True
+        )
     
     def _merge_scores(self, keyword_scores: Dict[str, float],
                      llm_scores: Dict[str, float],
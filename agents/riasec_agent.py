@@ -9,6 +9,8 @@ sys.path.append('/home/ubuntu/pcbf_framework')
 import config
 from utils import normalize_scores, get_top_n_types
 from llm_client import get_llm_client
+from prompt_budget import compact_bio
+from json_parser import format_example
 from models import RIASECResult
 
 logger = logging.getLogger(__name__)
@@ -17,11 +19,39 @@ logger = logging.getLogger(__name__)
 class RIASECAgent:
     """Agent für RIASEC (Holland-Codes) Interessensanalyse"""
     
+    ANALYSIS_PROMPT = """Du bist ein Experte für RIASEC (Holland-Codes) Interessensanalyse.
+Analysiere die gegebene Bio und bestimme die RIASEC-Typen.
+
+RIASEC-Typen:
+- R (Realistic): Handwerklich, technisch, praktisch orientiert
+- I (Investigative): Forschend, analytisch, wissenschaftlich
+- A (Artistic): Kreativ, künstlerisch, expressiv
+- S (Social): Sozial, helfend, lehrend
+- E (Enterprising): Unternehmerisch, führend, verkaufend
+- C (Conventional): Organisierend, verwaltend, strukturiert
+
+Gib deine Analyse als JSON zurück:
+"""
+    
+    OUTPUT_FIELDS = {
+        'scores': '{"R": 0.0-1.0, "I": 0.0-1.0, "A": 0.0-1.0, "S": 0.0-1.0, "E": 0.0-1.0, "C": 0.0-1.0}',
+        'reasoning': '"Begründung der Klassifikation"'
+    }
+    
+    SYSTEM_PROMPT = ANALYSIS_PROMPT + format_example(OUTPUT_FIELDS)
+    # Variante für config.LLM_SCORES_ONLY: fordert kein Reasoning an
+    SCORES_ONLY_SYSTEM_PROMPT = ANALYSIS_PROMPT + format_example(OUTPUT_FIELDS, ['scores'])
+    
+    RESPONSE_SHAPE = {
+        'scores': {'R': float, 'I': float, 'A': float, 'S': float, 'E': float, 'C': float},
+        'reasoning': str
+    }
+    
     def __init__(self):
         self.llm_client = get_llm_client()
     
     def analyze(self, categories: Optional[str], bio: Optional[str],
-                full_name: Optional[str] = None) -> RIASECResult:
+                full_name: Optional[str] = None, use_llm: bool = True) -> RIASECResult:
         """
         Analysiert RIASEC-Interessensprofil aus Categories und Bio.
         
@@ -29,9 +59,14 @@ class RIASECAgent:
             categories: Kategorien/Interessen (primäre Quelle)
             bio: Profilbeschreibung (Fallback)
             full_name: Vollständiger Name (optional für Kontext)
+            use_llm: LLM-Analyse durchführen (False = nur Keyword-Scores)
             
         Returns:
             RIASECResult mit Holland-Code
+            
+        Raises:
+            LLMUnavailableError: LLM-API nicht erreichbar
+            LLMResponseError: LLM-Antwort auch nach Reparatur ungültig
         """
         logger.info("RIASEC-Analyse gestartet")
         
@@ -43,7 +78,7 @@ class RIASECAgent:
         # Bio als Fallback
         elif bio and bio != 'N/A' and len(bio.strip()) > 20:
             logger.info("Categories fehlen - verwende Bio als Fallback")
-            return self._analyze_from_bio(bio, full_name)
+            return self._analyze_from_bio(bio, full_name, use_llm)
         
         # Keine Daten verfügbar
         else:
@@ -117,21 +152,23 @@ class RIASECAgent:
             reasoning=f"Analyse basiert auf {len(category_list)} Kategorie(n): {', '.join(category_list[:3])}"
         )
     
-    def _analyze_from_bio(self, bio: str, full_name: Optional[str]) -> RIASECResult:
+    def _analyze_from_bio(self, bio: str, full_name: Optional[str],
+                          use_llm: bool = True) -> RIASECResult:
         """Analysiert RIASEC aus Bio (Fallback)"""
         
         # Keyword-basierte Extraktion
         riasec_scores = self._extract_from_bio(bio)
         
         # LLM-basierte Analyse
-        llm_result = self._llm_analysis(bio, full_name)
+        llm_result = self._llm_analysis(bio, full_name) if use_llm else None
         
         if llm_result:
             # LLM-Ergebnis mit Keyword-Scores kombinieren
             riasec_scores = self._merge_scores(riasec_scores, llm_result.get('scores', {}))
             reasoning = llm_result.get('reasoning', '')
         else:
-            logger.warning("LLM-Analyse fehlgeschlagen - verwende nur Keyword-Scores")
+            if use_llm:
+                logger.warning("LLM-Analyse fehlgeschlagen - verwende nur Keyword-Scores")
             reasoning = "Analyse basiert auf Bio-Keywords (LLM nicht verfügbar)"
         
         # Normalisieren
@@ -169,36 +206,27 @@ class RIASECAgent:
     def _llm_analysis(self, bio: str, full_name: Optional[str]) -> Optional[Dict]:
         """LLM-basierte RIASEC-Analyse"""
         
-        system_prompt = """Du bist ein Experte für RIASEC (Holland-Codes) Interessensanalyse.
-Analysiere die gegebene Bio und bestimme die RIASEC-Typen.
-
-RIASEC-Typen:
-- R (Realistic): Handwerklich, technisch, praktisch orientiert
-- I (Investigative): Forschend, analytisch, wissenschaftlich
-- A (Artistic): Kreativ, künstlerisch, expressiv
-- S (Social): Sozial, helfend, lehrend
-- E (Enterprising): Unternehmerisch, führend, verkaufend
-- C (Conventional): Organisierend, verwaltend, strukturiert
-
-Gib deine Analyse als JSON zurück:
-{
-  "scores": {"R": 0.0-1.0, "I": 0.0-1.0, "A": 0.0-1.0, "S": 0.0-1.0, "E": 0.0-1.0, "C": 0.0-1.0},
-  "reasoning": "Begründung der Klassifikation"
-}"""
+        scores_only = config.LLM_SCORES_ONLY
+        output_hint = '' if scores_only else ' und Begründung'
+        
+        compacted = compact_bio(bio)
         
         context = f"Name: {full_name}\n" if full_name else ""
         prompt = f"""Analysiere folgende Bio für RIASEC-Klassifikation:
 
-{context}Bio: {bio}
+{context}Bio: {compacted.text}
 
-Gib RIASEC-Scores (0.0-1.0) und Begründung als JSON zurück."""
-        
-        response = self.llm_client.call(prompt, system_prompt, temperature=0.3)
+Gib RIASEC-Scores (0.0-1.0){output_hint} als JSON zurück."""
         
-        if response['success']:
-            return self.llm_client.parse_json_response(response)
+        required_keys = ['scores'] if scores_only else None
+        system_prompt = self.SCORES_ONLY_SYSTEM_PROMPT if scores_only else self.SYSTEM_PROMPT
         
-        return None
+        return self.llm_client.call_json(
+            prompt, system_prompt, self.RESPONSE_SHAPE,
+            schema_name='riasec_analysis', temperature=0.3,
+            required_keys=required_keys, tokens_saved=compacted.tokens_saved,
+            raise_on_error=True
+        )
     
     def _merge_scores(self, keyword_scores: Dict[str, float],
                      llm_scores: Dict[str, float],
@@ -5,26 +5,41 @@ Orchestriert alle Analyse-Agenten und erstellt vollständige Profile
 import logging
 import time
 import json
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import config
+
 from models import (
     ProfileInput, ProfileAnalysisResult, BioQualityResult,
     WarningMessage, AgentLogEntry
 )
 from utils import (
     calculate_bio_quality, calculate_keywords_match_score,
-    calculate_overall_confidence, generate_warnings
+    calculate_overall_confidence, generate_warnings, compute_input_fingerprint
 )
 from agents.disc_agent import DISCAgent
 from agents.neo_agent import NEOAgent
 from agents.riasec_agent import RIASECAgent
 from agents.persuasion_agent import PersuasionAgent
 from purchase_intent import PurchaseIntentCalculator
+from batch_checkpoint import BatchCheckpoint
+from result_store import ResultStore
 from communication_strategy import CommunicationStrategyGenerator
+from llm_scheduler import submit_with_context
 
 logger = logging.getLogger(__name__)
 
+# Agenten-Name -> Feld in ProfileAnalysisResult
+AGENT_RESULT_FIELDS = {
+    'DISC': 'disc',
+    'NEO': 'neo',
+    'RIASEC': 'riasec',
+    'Persuasion': 'persuasion',
+    'Communication': 'communication_strategy'
+}
+
 
 class ProfileAnalyzer:
     """Hauptklasse für vollständige Profilanalyse"""
@@ -41,7 +56,8 @@ class ProfileAnalyzer:
         self.agent_logs: List[AgentLogEntry] = []
     
     def analyze_profile(self, profile: ProfileInput, target_keywords: List[str],
-                       product_category: str, include_enneagram: bool = False) -> ProfileAnalysisResult:
+                       product_category: str, include_enneagram: bool = False,
+                       on_agent_result: Optional[Callable[[str, Any], None]] = None) -> ProfileAnalysisResult:
         """
         Analysiert ein einzelnes Profil vollständig.
         
@@ -50,6 +66,9 @@ class ProfileAnalyzer:
             target_keywords: Ziel-Keywords für Match-Score
             product_category: Produkt-Kategorie für Purchase Intent
             include_enneagram: Enneagram-Analyse einbeziehen
+            on_agent_result: Callback (Agent-Name, Ergebnis) sobald ein Agent
+                fertig ist, z.B. für progressive Anzeige (optional, wird im
+                aufrufenden Thread ausgeführt)
             
         Returns:
             ProfileAnalysisResult mit vollständiger Analyse
@@ -57,66 +76,48 @@ class ProfileAnalyzer:
         start_time = time.time()
         logger.info(f"Starte Analyse für Profil: {profile.id}")
         
-        # 1. Datenqualität bewerten
-        bio_quality_dict = calculate_bio_quality(profile.bio)
-        bio_quality = BioQualityResult(**bio_quality_dict)
-        
-        keywords_match_score = calculate_keywords_match_score(
-            profile.bio, profile.categories, target_keywords
+        # 1.-2. Datenqualität bewerten, Warnungen generieren
+        bio_quality, keywords_match_score, overall_confidence, warnings = self._assess_data_quality(
+            profile, target_keywords
         )
         
-        categories_available = bool(profile.categories and profile.categories != 'None')
-        
-        overall_confidence = calculate_overall_confidence(
-            bio_quality.score, categories_available, keywords_match_score
-        )
+        # 3. Parallel Analyse-Agenten ausführen (Retry pro Agent, damit ein
+        # transienter Fehler nicht die bereits bezahlten Ergebnisse verwirft)
+        agent_runs = {
+            'DISC': self._run_disc_analysis,
+            'NEO': self._run_neo_analysis,
+            'RIASEC': self._run_riasec_analysis,
+            'Persuasion': self._run_persuasion_analysis
+        }
+        agent_results = {}
+        degraded = set()
+        retries_made = 0
         
-        logger.info(f"Datenqualität - Bio: {bio_quality.score:.1f}, Keywords: {keywords_match_score:.1f}, Overall: {overall_confidence:.1f}")
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                submit_with_context(executor, self._run_agent_with_retry, name, run, profile): name
+                for name, run in agent_runs.items()
+            }
+            
+            # Ergebnisse in Fertigstellungs-Reihenfolge sammeln
+            for future in as_completed(futures):
+                name = futures[future]
+                agent_result, retries, agent_degraded = future.result()
+                agent_results[name] = agent_result
+                retries_made += retries
+                if agent_degraded:
+                    degraded.add(name)
+                if on_agent_result:
+                    on_agent_result(name, agent_result)
         
-        # 2. Warnungen generieren
-        warnings_list = generate_warnings(bio_quality_dict, overall_confidence, categories_available)
-        warnings = [WarningMessage(**w) for w in warnings_list]
+        degraded_agents = [name for name in agent_runs if name in degraded]
         
-        # 3. Parallel Analyse-Agenten ausführen
-        api_calls_made = 0
+        disc_result = agent_results['DISC']
+        neo_result = agent_results['NEO']
+        riasec_result = agent_results['RIASEC']
+        persuasion_result = agent_results['Persuasion']
         
-        try:
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                # DISC-Analyse
-                disc_future = executor.submit(
-                    self._run_disc_analysis,
-                    profile
-                )
-                
-                # NEO-Analyse
-                neo_future = executor.submit(
-                    self._run_neo_analysis,
-                    profile
-                )
-                
-                # RIASEC-Analyse
-                riasec_future = executor.submit(
-                    self._run_riasec_analysis,
-                    profile
-                )
-                
-                # Persuasion-Analyse
-                persuasion_future = executor.submit(
-                    self._run_persuasion_analysis,
-                    profile
-                )
-                
-                # Ergebnisse sammeln
-                disc_result = disc_future.result()
-                neo_result = neo_future.result()
-                riasec_result = riasec_future.result()
-                persuasion_result = persuasion_future.result()
-                
-                api_calls_made = 4  # Mindestens 4 Agenten
-                
-        except Exception as e:
-            logger.error(f"Fehler bei paralleler Agent-Ausführung: {str(e)}")
-            raise
+        api_calls_made = 4 + retries_made  # Mindestens 4 Agenten
         
         # 4. Enneagram (optional)
         enneagram_result = None
@@ -132,12 +133,19 @@ class ProfileAnalyzer:
         )
         
         # 6. Communication Strategy generieren
-        communication_strategy = self.communication_strategy_generator.generate(
-            disc_result, neo_result, riasec_result, persuasion_result,
-            product_category, profile.full_name, None  # company_name aus Bio extrahieren
+        communication_strategy, retries, degraded = self._run_agent_with_retry(
+            'Communication', self._run_communication_strategy, profile,
+            disc_result, neo_result, riasec_result, persuasion_result, product_category
         )
+        if degraded:
+            degraded_agents.append('Communication')
+        if on_agent_result:
+            on_agent_result('Communication', communication_strategy)
         
-        api_calls_made += 1  # Communication Strategy LLM-Call
+        api_calls_made += 1 + retries  # Communication Strategy LLM-Call
+        
+        if degraded_agents:
+            logger.warning(f"Profil {profile.id}: degradierte Agenten {degraded_agents}")
         
         # 7. Verarbeitungszeit
         processing_time = time.time() - start_time
@@ -159,7 +167,11 @@ class ProfileAnalyzer:
             communication_strategy=communication_strategy,
             warnings=warnings,
             processing_time_seconds=processing_time,
-            api_calls_made=api_calls_made
+            api_calls_made=api_calls_made,
+            degraded_agents=degraded_agents,
+            input_fingerprint=self._input_fingerprint(
+                profile, target_keywords, product_category, include_enneagram
+            )
         )
         
         # 9. Kompakten Profil-String generieren
@@ -169,9 +181,105 @@ class ProfileAnalyzer:
         
         return result
     
+    def analyze_profile_keywords(self, profile: ProfileInput, target_keywords: List[str],
+                                 product_category: str) -> ProfileAnalysisResult:
+        """
+        Sofort-Ergebnis aus den lokalen Keyword-Scores aller Agenten (ohne LLM-Calls).
+        
+        Dient als Vorschau, bis analyze_profile die LLM-Ergebnisse liefert
+        (siehe apply_agent_result).
+        
+        Args:
+            profile: Profil-Input-Daten
+            target_keywords: Ziel-Keywords für Match-Score
+            product_category: Produkt-Kategorie für Purchase Intent
+            
+        Returns:
+            ProfileAnalysisResult (Keyword-basiert, api_calls_made=0)
+        """
+        start_time = time.time()
+        
+        bio_quality, keywords_match_score, overall_confidence, warnings = self._assess_data_quality(
+            profile, target_keywords
+        )
+        
+        disc_result = self._run_disc_analysis(profile, use_llm=False)
+        neo_result = self._run_neo_analysis(profile, use_llm=False)
+        riasec_result = self._run_riasec_analysis(profile, use_llm=False)
+        persuasion_result = self._run_persuasion_analysis(profile, use_llm=False)
+        
+        purchase_intent = self.purchase_intent_calculator.calculate(
+            disc_result, neo_result, riasec_result, persuasion_result,
+            bio_quality.score, keywords_match_score, product_category, None
+        )
+        communication_strategy = self._run_communication_strategy(
+            profile, disc_result, neo_result, riasec_result, persuasion_result,
+            product_category, use_llm=False
+        )
+        
+        result = ProfileAnalysisResult(
+            profile_id=profile.id,
+            bio_quality=bio_quality,
+            keywords_match_score=keywords_match_score,
+            overall_confidence=overall_confidence,
+            disc=disc_result,
+            neo=neo_result,
+            riasec=riasec_result,
+            persuasion=persuasion_result,
+            purchase_intent=purchase_intent,
+            communication_strategy=communication_strategy,
+            warnings=warnings,
+            processing_time_seconds=time.time() - start_time,
+            api_calls_made=0
+        )
+        
+        from profile_string_generator import ProfileStringGenerator
+        result.profile_string = ProfileStringGenerator().generate_compact_string(result)
+        
+        return result
+    
+    def apply_agent_result(self, result: ProfileAnalysisResult, agent_name: str, agent_result,
+                           product_category: str) -> ProfileAnalysisResult:
+        """
+        Übernimmt ein einzelnes (LLM-)Agenten-Ergebnis in ein bestehendes Ergebnis.
+        
+        Purchase Intent und Profil-String werden lokal neu berechnet.
+        
+        Args:
+            result: Bestehendes Ergebnis (z.B. aus analyze_profile_keywords)
+            agent_name: 'DISC', 'NEO', 'RIASEC', 'Persuasion' oder 'Communication'
+            agent_result: Ergebnis des Agenten
+            product_category: Produkt-Kategorie für Purchase Intent
+            
+        Returns:
+            Aktualisierte Kopie des Ergebnisses
+        """
+        updated = result.model_copy()
+        setattr(updated, AGENT_RESULT_FIELDS[agent_name], agent_result)
+        
+        if agent_name != 'Communication':
+            updated.purchase_intent = self.purchase_intent_calculator.calculate(
+                updated.disc, updated.neo, updated.riasec, updated.persuasion,
+                updated.bio_quality.score, updated.keywords_match_score, product_category,
+                updated.enneagram
+            )
+            
+            from profile_string_generator import ProfileStringGenerator
+            updated.profile_string = ProfileStringGenerator().generate_compact_string(updated)
+        
+        return updated
+    
     def analyze_batch(self, profiles: List[ProfileInput], target_keywords: List[str],
                      product_category: str, include_enneagram: bool = False,
-                     max_workers: int = 5) -> List[ProfileAnalysisResult]:
+                     max_workers: int = 5,
+                     errors: Optional[List[Dict[str, str]]] = None,
+                     checkpoint: Optional[BatchCheckpoint] = None,
+                     result_store: Optional[ResultStore] = None,
+                     stats: Optional[Dict[str, Any]] = None,
+                     on_result: Optional[Callable[[ProfileAnalysisResult], None]] = None,
+                     keep_results: bool = True,
+                     on_error: Optional[Callable[[str, str], None]] = None,
+                     cancel_event: Optional[threading.Event] = None) -> List[ProfileAnalysisResult]:
         """
         Analysiert mehrere Profile parallel.
         
@@ -181,31 +289,148 @@ class ProfileAnalyzer:
             product_category: Produkt-Kategorie
             include_enneagram: Enneagram einbeziehen
             max_workers: Maximale parallele Worker
+            errors: Liste, in die Profil-Fehler eingetragen werden (optional)
+            checkpoint: Checkpoint, in den fertige Ergebnisse sofort
+                geschrieben werden (optional, siehe resume_batch)
+            result_store: Ergebnis-Store; Profile mit unverändertem
+                Input-Fingerprint werden wiederverwendet statt neu analysiert.
+                Neue Ergebnisse werden gespeichert, degradierte ohne
+                Fingerprint (reusable=False, nur für /retry)
+            stats: Dictionary, in das Wiederverwendungs-Statistiken
+                eingetragen werden (optional)
+            on_result: Callback für jedes fertige Ergebnis, z.B. für
+                Streaming-Exporte (optional, wird im aufrufenden Thread ausgeführt)
+            keep_results: False = Ergebnisse nur an on_result übergeben und
+                nicht zusätzlich als Liste sammeln (spart Speicher bei großen Batches)
+            on_error: Callback (Profil-ID, Fehlermeldung) für fehlgeschlagene
+                Profile (optional, wird im aufrufenden Thread ausgeführt)
+            cancel_event: Abbruch-Signal; noch nicht gestartete Profile werden
+                verworfen, laufende noch gesichert. Der Checkpoint bleibt dann
+                offen und kann fortgesetzt werden (optional)
             
         Returns:
             Liste von ProfileAnalysisResult
         """
         logger.info(f"Starte Batch-Analyse für {len(profiles)} Profile")
         
+        pending = list(enumerate(profiles))
+        reused = []
+        if result_store:
+            pending, reused = self._split_reusable(
+                pending, result_store, target_keywords, product_category, include_enneagram
+            )
+            for index, result in reused:
+                if checkpoint:
+                    checkpoint.record_result(index, result)
+                if on_result:
+                    on_result(result)
+        
+        results = [result for _, result in reused] if keep_results else []
+        results.extend(self._run_batch(
+            pending, target_keywords, product_category,
+            include_enneagram, max_workers, errors, checkpoint, result_store,
+            on_result, keep_results, on_error, cancel_event
+        ))
+        
+        if stats is not None:
+            stats.update({
+                'total_profiles': len(profiles),
+                'reused': len(reused),
+                'analyzed': len(pending),
+                'reuse_ratio': round(len(reused) / len(profiles), 4) if profiles else 0.0
+            })
+        
+        if checkpoint and not (cancel_event and cancel_event.is_set()):
+            checkpoint.mark_finished()
+        
+        return results
+    
+    def resume_batch(self, checkpoint: BatchCheckpoint, max_workers: int = 5,
+                     errors: Optional[List[Dict[str, str]]] = None,
+                     on_result: Optional[Callable[[ProfileAnalysisResult], None]] = None,
+                     on_error: Optional[Callable[[str, str], None]] = None,
+                     cancel_event: Optional[threading.Event] = None) -> List[ProfileAnalysisResult]:
+        """
+        Setzt einen abgebrochenen Batch-Lauf fort.
+        
+        Analysiert nur Profile ohne gesichertes Ergebnis (Parameter aus dem
+        Checkpoint) und gibt alle Ergebnisse des Laufs zurück.
+        
+        Args:
+            checkpoint: Checkpoint des Laufs
+            max_workers: Maximale parallele Worker
+            errors: Liste, in die Profil-Fehler eingetragen werden (optional)
+            on_result: Callback für jedes neu analysierte Ergebnis (optional)
+            on_error: Callback (Profil-ID, Fehlermeldung) für fehlgeschlagene Profile (optional)
+            cancel_event: Abbruch-Signal; der Checkpoint bleibt dann offen (optional)
+            
+        Returns:
+            Alle Ergebnisse des Laufs (gesicherte + neue) in Input-Reihenfolge
+        """
+        # Halb geschriebene Zeile entfernen, bevor neue Ergebnisse angehängt werden
+        checkpoint.truncate_torn_tail()
+        pending = checkpoint.pending_profiles()
+        logger.info(f"Setze Batch {checkpoint.run_id} fort: {len(pending)} Profile ausstehend")
+        
+        self._run_batch(
+            pending, checkpoint.target_keywords, checkpoint.product_category,
+            checkpoint.include_enneagram, max_workers, errors, checkpoint,
+            on_result=on_result, keep_results=False, on_error=on_error, cancel_event=cancel_event
+        )
+        if not (cancel_event and cancel_event.is_set()):
+            checkpoint.mark_finished()
+        
+        return checkpoint.load_results()
+    
+    def _run_batch(self, indexed_profiles: List[Tuple[int, ProfileInput]],
+                   target_keywords: List[str], product_category: str,
+                   include_enneagram: bool, max_workers: int,
+                   errors: Optional[List[Dict[str, str]]],
+                   checkpoint: Optional[BatchCheckpoint],
+                   result_store: Optional[ResultStore] = None,
+                   on_result: Optional[Callable[[ProfileAnalysisResult], None]] = None,
+                   keep_results: bool = True,
+                   on_error: Optional[Callable[[str, str], None]] = None,
+                   cancel_event: Optional[threading.Event] = None) -> List[ProfileAnalysisResult]:
+        """Analysiert (Index, Profil)-Paare parallel und sichert Ergebnisse in Checkpoint/Store"""
         results = []
-        errors = []
+        completed = 0
+        cancelled = None
+        if errors is None:
+            errors = []
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_profile = {
-                executor.submit(
+                submit_with_context(
+                    executor,
                     self.analyze_profile,
                     profile,
                     target_keywords,
                     product_category,
                     include_enneagram
-                ): profile for profile in profiles
+                ): (index, profile) for index, profile in indexed_profiles
             }
             
             for future in as_completed(future_to_profile):
-                profile = future_to_profile[future]
+                if cancel_event is not None and cancel_event.is_set() and cancelled is None:
+                    cancelled = sum(f.cancel() for f in future_to_profile)
+                    logger.warning(f"Batch abgebrochen: {cancelled} Profile verworfen, laufende werden noch gesichert")
+                if future.cancelled():
+                    continue
+                
+                index, profile = future_to_profile[future]
                 try:
                     result = future.result()
-                    results.append(result)
+                    completed += 1
+                    if keep_results:
+                        results.append(result)
+                    if checkpoint:
+                        checkpoint.record_result(index, result)
+                    if result_store:
+                        # Degradierte Ergebnisse nur für /retry, nicht zur Wiederverwendung
+                        result_store.put(result, profile, reusable=not result.degraded_agents)
+                    if on_result:
+                        on_result(result)
                     logger.info(f"✓ Profil {profile.id} erfolgreich analysiert")
                 except Exception as e:
                     error_msg = f"Fehler bei Profil {profile.id}: {str(e)}"
@@ -214,12 +439,82 @@ class ProfileAnalyzer:
                         'profile_id': profile.id,
                         'error': str(e)
                     })
+                    if on_error:
+                        on_error(profile.id, str(e))
         
-        logger.info(f"Batch-Analyse abgeschlossen: {len(results)} erfolgreich, {len(errors)} Fehler")
+        logger.info(f"Batch-Analyse abgeschlossen: {completed} erfolgreich, {len(errors)} Fehler")
         
         return results
     
-    def _run_disc_analysis(self, profile: ProfileInput):
+    def _split_reusable(self, indexed_profiles: List[Tuple[int, ProfileInput]],
+                        result_store: ResultStore, target_keywords: List[str],
+                        product_category: str, include_enneagram: bool):
+        """
+        Trennt Profile mit wiederverwendbarem gespeicherten Ergebnis ab.
+        
+        Returns:
+            Tuple (ausstehende (Index, Profil)-Paare, wiederverwendete (Index, Ergebnis)-Paare)
+        """
+        fingerprints = {
+            index: self._input_fingerprint(profile, target_keywords, product_category, include_enneagram)
+            for index, profile in indexed_profiles
+        }
+        stored_fingerprints = result_store.get_fingerprints([p.id for _, p in indexed_profiles])
+        
+        reusable_ids = [
+            profile.id for index, profile in indexed_profiles
+            if stored_fingerprints.get(profile.id) == fingerprints[index]
+        ]
+        stored = result_store.get_many(reusable_ids) if reusable_ids else {}
+        
+        pending = []
+        reused = []
+        for index, profile in indexed_profiles:
+            if profile.id in stored:
+                reused.append((index, stored[profile.id]))
+            else:
+                pending.append((index, profile))
+        
+        logger.info(f"{len(reused)} Profile unverändert (Ergebnis wiederverwendet), {len(pending)} neu/geändert")
+        return pending, reused
+    
+    def _assess_data_quality(self, profile: ProfileInput, target_keywords: List[str]):
+        """
+        Bewertet Bio-Qualität und Keyword-Match und erzeugt Warnungen.
+        
+        Returns:
+            Tuple (BioQualityResult, Keywords-Match-Score, Overall-Confidence, Warnungen)
+        """
+        bio_quality_dict = calculate_bio_quality(profile.bio)
+        bio_quality = BioQualityResult(**bio_quality_dict)
+        
+        keywords_match_score = calculate_keywords_match_score(
+            profile.bio, profile.categories, target_keywords
+        )
+        
+        categories_available = bool(profile.categories and profile.categories != 'None')
+        
+        overall_confidence = calculate_overall_confidence(
+            bio_quality.score, categories_available, keywords_match_score
+        )
+        
+        logger.info(f"Datenqualität - Bio: {bio_quality.score:.1f}, Keywords: {keywords_match_score:.1f}, Overall: {overall_confidence:.1f}")
+        
+        warnings_list = generate_warnings(bio_quality_dict, overall_confidence, categories_available)
+        warnings = [WarningMessage(**w) for w in warnings_list]
+        
+        return bio_quality, keywords_match_score, overall_confidence, warnings
+    
+    def _input_fingerprint(self, profile: ProfileInput, target_keywords: List[str],
+                           product_category: str, include_enneagram: bool) -> str:
+        """Input-Fingerprint mit Provider und Modell, die im aktuellen Kontext verwendet werden"""
+        provider, model = self.disc_agent.llm_client.effective_model()
+        return compute_input_fingerprint(
+            profile, target_keywords, product_category, include_enneagram,
+            model, provider
+        )
+    
+    def _run_disc_analysis(self, profile: ProfileInput, use_llm: bool = True):
         """Führt DISC-Analyse aus und loggt"""
         start_time = time.time()
         try:
@@ -228,14 +523,15 @@ class ProfileAnalyzer:
                 profile.followers,
                 profile.following,
                 profile.full_name,
-                profile.nickname
+                profile.nickname,
+                use_llm=use_llm
             )
             
             self._log_agent_activity(
                 'DISC',
                 profile.id,
                 {'bio_length': len(profile.bio) if profile.bio else 0},
-                result.dict(),
+                result.model_dump(),
                 time.time() - start_time,
                 True
             )
@@ -253,21 +549,22 @@ class ProfileAnalyzer:
             )
             raise
     
-    def _run_neo_analysis(self, profile: ProfileInput):
+    def _run_neo_analysis(self, profile: ProfileInput, use_llm: bool = True):
         """Führt NEO-Analyse aus und loggt"""
         start_time = time.time()
         try:
             result = self.neo_agent.analyze(
                 profile.bio,
                 profile.verified or False,
-                profile.business_account or False
+                profile.business_account or False,
+                use_llm=use_llm
             )
             
             self._log_agent_activity(
                 'NEO',
                 profile.id,
                 {'bio_length': len(profile.bio) if profile.bio else 0},
-                result.dict(),
+                result.model_dump(),
                 time.time() - start_time,
                 True
             )
@@ -285,14 +582,15 @@ class ProfileAnalyzer:
             )
             raise
     
-    def _run_riasec_analysis(self, profile: ProfileInput):
+    def _run_riasec_analysis(self, profile: ProfileInput, use_llm: bool = True):
         """Führt RIASEC-Analyse aus und loggt"""
         start_time = time.time()
         try:
             result = self.riasec_agent.analyze(
                 profile.categories,
                 profile.bio,
-                profile.full_name
+                profile.full_name,
+                use_llm=use_llm
             )
             
             self._log_agent_activity(
@@ -302,7 +600,7 @@ class ProfileAnalyzer:
                     'categories': profile.categories,
                     'bio_length': len(profile.bio) if profile.bio else 0
                 },
-                result.dict(),
+                result.model_dump(),
                 time.time() - start_time,
                 True
             )
@@ -320,21 +618,22 @@ class ProfileAnalyzer:
             )
             raise
     
-    def _run_persuasion_analysis(self, profile: ProfileInput):
+    def _run_persuasion_analysis(self, profile: ProfileInput, use_llm: bool = True):
         """Führt Persuasion-Analyse aus und loggt"""
         start_time = time.time()
         try:
             result = self.persuasion_agent.analyze(
                 profile.bio,
                 profile.verified or False,
-                profile.business_account or False
+                profile.business_account or False,
+                use_llm=use_llm
             )
             
             self._log_agent_activity(
                 'Persuasion',
                 profile.id,
                 {'bio_length': len(profile.bio) if profile.bio else 0},
-                result.dict(),
+                result.model_dump(),
                 time.time() - start_time,
                 True
             )
@@ -352,6 +651,170 @@ class ProfileAnalyzer:
             )
             raise
     
+    def _run_communication_strategy(self, profile: ProfileInput, disc_result, neo_result,
+                                    riasec_result, persuasion_result, product_category: str,
+                                    use_llm: bool = True):
+        """Generiert Communication Strategy"""
+        return self.communication_strategy_generator.generate(
+            disc_result, neo_result, riasec_result, persuasion_result,
+            product_category, profile.full_name, None,  # company_name aus Bio extrahieren
+            use_llm=use_llm
+        )
+    
+    def _run_agent_with_retry(self, agent_name: str, run, profile: ProfileInput, *args):
+        """
+        Führt einen Agenten mit Retries (exponentielles Backoff) aus.
+        
+        Schlagen alle Versuche fehl, wird der Agent ohne LLM ausgeführt
+        (Keyword-/Fallback-Ergebnis) und als degradiert markiert.
+        
+        Args:
+            agent_name: Name des Agenten (für Logs)
+            run: Agent-Funktion (profile, *args, use_llm=...)
+            profile: Profil-Input-Daten
+            *args: Zusätzliche Argumente für die Agent-Funktion
+            
+        Returns:
+            Tuple (Ergebnis, Anzahl Retries, degradiert)
+        """
+        attempts = config.AGENT_RETRY_ATTEMPTS + 1
+        
+        for attempt in range(attempts):
+            try:
+                return run(profile, *args), attempt, False
+            except Exception as e:
+                logger.warning(
+                    f"Agent {agent_name} für {profile.id} fehlgeschlagen "
+                    f"(Versuch {attempt + 1}/{attempts}): {str(e)}"
+                )
+                if attempt < attempts - 1:
+                    time.sleep(config.AGENT_RETRY_BACKOFF_SECONDS * (2 ** attempt))
+        
+        logger.error(f"Agent {agent_name} für {profile.id} degradiert (nur Keyword-/Fallback-Ergebnis)")
+        return run(profile, *args, use_llm=False), attempts - 1, True
+    
+    def retry_degraded_agents(self, profile: ProfileInput, result: ProfileAnalysisResult,
+                              product_category: str) -> ProfileAnalysisResult:
+        """
+        Wiederholt nur die degradierten Agenten eines bestehenden Ergebnisses.
+        
+        Nicht betroffene Agenten-Ergebnisse werden übernommen; Purchase Intent
+        und Profil-String werden lokal neu berechnet.
+        
+        Args:
+            profile: Profil-Input-Daten
+            result: Bestehendes Analyse-Ergebnis
+            product_category: Produkt-Kategorie für Purchase Intent
+            
+        Returns:
+            Aktualisiertes ProfileAnalysisResult
+        """
+        if not result.degraded_agents:
+            return result
+        
+        logger.info(f"Retry für {profile.id}: {result.degraded_agents}")
+        
+        agent_runs = {
+            'DISC': (self._run_disc_analysis, 'disc'),
+            'NEO': (self._run_neo_analysis, 'neo'),
+            'RIASEC': (self._run_riasec_analysis, 'riasec'),
+            'Persuasion': (self._run_persuasion_analysis, 'persuasion')
+        }
+        
+        updated = result.model_copy(deep=True)
+        still_degraded = []
+        api_calls_made = 0
+        
+        for name in result.degraded_agents:
+            if name not in agent_runs:
+                continue
+            run, attr = agent_runs[name]
+            agent_result, retries, degraded = self._run_agent_with_retry(name, run, profile)
+            setattr(updated, attr, agent_result)
+            api_calls_made += 1 + retries
+            if degraded:
+                still_degraded.append(name)
+        
+        updated.purchase_intent = self.purchase_intent_calculator.calculate(
+            updated.disc, updated.neo, updated.riasec, updated.persuasion,
+            updated.bio_quality.score, updated.keywords_match_score, product_category,
+            updated.enneagram
+        )
+        
+        if 'Communication' in result.degraded_agents:
+            updated.communication_strategy, retries, degraded = self._run_agent_with_retry(
+                'Communication', self._run_communication_strategy, profile,
+                updated.disc, updated.neo, updated.riasec, updated.persuasion, product_category
+            )
+            api_calls_made += 1 + retries
+            if degraded:
+                still_degraded.append('Communication')
+        
+        updated.degraded_agents = still_degraded
+        updated.api_calls_made = (result.api_calls_made or 0) + api_calls_made
+        
+        from profile_string_generator import ProfileStringGenerator
+        updated.profile_string = ProfileStringGenerator().generate_compact_string(updated)
+        
+        return updated
+    
+    def retry_stored_results(self, profile_ids: List[str], result_store: ResultStore,
+                             product_category: str, max_workers: int = 5,
+                             errors: Optional[List[Dict[str, str]]] = None) -> List[ProfileAnalysisResult]:
+        """
+        Wiederholt die degradierten Agenten gespeicherter Ergebnisse parallel.
+        
+        Aktualisierte Ergebnisse werden zurück in den Store geschrieben (erst
+        ohne verbliebene degradierte Agenten wieder wiederverwendbar).
+        
+        Args:
+            profile_ids: Profil-IDs im Ergebnis-Store (z.B. aus agents_to_retry)
+            result_store: Ergebnis-Store mit Ergebnissen und Input-Profilen
+            product_category: Produkt-Kategorie für Purchase Intent
+            max_workers: Maximale parallele Worker
+            errors: Liste, in die Profil-Fehler eingetragen werden (optional)
+            
+        Returns:
+            Ergebnisse in Reihenfolge von profile_ids (fehlende ausgelassen)
+        """
+        if errors is None:
+            errors = []
+        
+        stored = result_store.get_many(profile_ids)
+        profiles = result_store.get_profiles(profile_ids)
+        
+        retryable = []
+        for profile_id in profile_ids:
+            if profile_id not in stored:
+                errors.append({'profile_id': profile_id, 'error': 'Kein gespeichertes Ergebnis'})
+            elif profile_id not in profiles:
+                errors.append({'profile_id': profile_id, 'error': 'Kein gespeichertes Input-Profil'})
+            else:
+                retryable.append(profile_id)
+        
+        updated = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_id = {
+                submit_with_context(
+                    executor, self.retry_degraded_agents,
+                    profiles[profile_id], stored[profile_id], product_category
+                ): profile_id for profile_id in retryable
+            }
+            
+            for future in as_completed(future_to_id):
+                profile_id = future_to_id[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Fehler beim Retry von Profil {profile_id}: {str(e)}")
+                    errors.append({'profile_id': profile_id, 'error': str(e)})
+                    continue
+                if result is not stored[profile_id]:
+                    result_store.put(result, profiles[profile_id], reusable=not result.degraded_agents)
+                updated[profile_id] = result
+        
+        return [updated[profile_id] for profile_id in retryable if profile_id in updated]
+    
     def _log_agent_activity(self, agent_name: str, profile_id: str,
                            input_data: Dict[str, Any], output_data: Optional[Dict[str, Any]],
                            duration: float, success: bool, error_message: Optional[str] = None):
@@ -373,7 +836,7 @@ class ProfileAnalyzer:
     
     def get_agent_logs(self) -> List[Dict[str, Any]]:
         """Gibt alle Agent-Logs zurück"""
-        return [log.dict() for log in self.agent_logs]
+        return [log.model_dump() for log in self.agent_logs]
     
     def clear_logs(self):
         """Löscht Agent-Logs"""
@@ -12,7 +12,10 @@ from fastapi.responses import JSONResponse
 import config
 from models import AnalysisRequest, AnalysisResponse, ProfileAnalysisResult
 from analyzer import ProfileAnalyzer
+from fast_json import FastJSONResponse
 from utils import setup_logging
+from llm_client import get_llm_client
+from llm_scheduler import llm_priority, llm_tenant, priority_for_request
 
 # Logging konfigurieren
 setup_logging()
@@ -22,7 +25,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title=config.API_TITLE,
     version=config.API_VERSION,
-    description=config.API_DESCRIPTION
+    description=config.API_DESCRIPTION,
+    default_response_class=FastJSONResponse
 )
 
 # CORS Middleware
@@ -48,6 +52,7 @@ async def root():
         "endpoints": {
             "analyze": "/analyze",
             "health": "/health",
+            "metrics": "/metrics",
             "logs": "/logs"
         }
     }
@@ -88,22 +93,28 @@ async def analyze_profiles(request: AnalysisRequest, background_tasks: Backgroun
         if len(request.profiles) > 100:
             raise HTTPException(status_code=400, detail="Maximal 100 Profile pro Request")
         
-        # Batch-Analyse
-        results = analyzer.analyze_batch(
-            profiles=request.profiles,
-            target_keywords=request.target_keywords or [],
-            product_category=request.product_category or "Software",
-            include_enneagram=request.include_enneagram,
-            max_workers=5
-        )
-        
-        # Fehler sammeln
+        # Batch-Analyse (Profil-Fehler werden in errors gesammelt)
         errors = []
+        # Einzelprofile laufen als interaktive Anfrage (Vorrang vor Batches),
+        # Batches verschiedener Mandanten werden abwechselnd bedient
+        with llm_priority(priority_for_request(len(request.profiles))), llm_tenant(request.tenant):
+            results = analyzer.analyze_batch(
+                profiles=request.profiles,
+                target_keywords=request.target_keywords or [],
+                product_category=request.product_category or "Software",
+                include_enneagram=request.include_enneagram,
+                max_workers=5,
+                errors=errors
+            )
+        
         successful_results = []
+        agents_to_retry = {}
         
         for result in results:
             if result:
                 successful_results.append(result)
+                if result.degraded_agents:
+                    agents_to_retry[result.profile_id] = result.degraded_agents
         
         # Gesamt-Verarbeitungszeit
         total_time = time.time() - start_time
@@ -113,13 +124,14 @@ async def analyze_profiles(request: AnalysisRequest, background_tasks: Backgroun
         # Logs im Hintergrund speichern
         background_tasks.add_task(save_logs_to_file, analyzer.get_agent_logs())
         
-        return AnalysisResponse(
+        return FastJSONResponse(AnalysisResponse(
             success=True,
             results=successful_results,
             total_profiles=len(request.profiles),
             total_processing_time_seconds=total_time,
-            errors=errors
-        )
+            errors=errors,
+            agents_to_retry=agents_to_retry
+        ))
         
     except HTTPException:
         raise
@@ -128,6 +140,19 @@ async def analyze_profiles(request: AnalysisRequest, background_tasks: Backgroun
         raise HTTPException(status_code=500, detail=f"Interner Fehler: {str(e)}")
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Gibt LLM-Metriken zurück (u.a. JSON-Parse-Fehlerrate).
+    
+    Returns:
+        Dictionary mit Metriken
+    """
+    return {
+        "llm": get_llm_client().get_metrics()
+    }
+
+
 @app.get("/logs")
 async def get_logs():
     """
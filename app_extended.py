@@ -3,16 +3,26 @@ PCBF 2.1 Framework - Extended FastAPI Application
 Erweitert app.py um CSV-Export und Profil-String-Funktionalität
 """
 import time
+import asyncio
 import logging
-from typing import List
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import functools
+import contextvars
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 
 import config
-from models import AnalysisRequest, AnalysisResponse, ProfileAnalysisResult
+from models import AnalysisRequest, AnalysisResponse, ProfileAnalysisResult, RescoreRequest, RetryRequest
 from analyzer import ProfileAnalyzer
+from result_store import ResultStore
+from rescoring import rescore_results
+from columnar_export import ColumnarResultWriter, FORMATS as COLUMNAR_FORMATS
+from fast_json import FastJSONResponse, RawJSON
 from utils import setup_logging
+from llm_client import get_llm_client
+from llm_scheduler import llm_priority, llm_tenant, priority_for_request
+from work_queue import get_work_queue
 from profile_string_generator import (
     ProfileStringGenerator, 
     export_to_csv, 
@@ -27,7 +37,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title=config.API_TITLE + " Extended",
     version=config.API_VERSION,
-    description=config.API_DESCRIPTION + " - Mit CSV-Export und Profil-Strings"
+    description=config.API_DESCRIPTION + " - Mit CSV-Export und Profil-Strings",
+    default_response_class=FastJSONResponse
 )
 
 # CORS Middleware
@@ -42,6 +53,20 @@ app.add_middleware(
 # Globaler Analyzer
 analyzer = ProfileAnalyzer()
 
+# Ergebnis-Store (Wiederverwendung unveränderter Profile, Neuberechnung)
+result_store = ResultStore()
+
+
+async def _run_in_llm_context(profile_count: int, tenant: Optional[str], fn, *args, **kwargs):
+    """
+    Führt fn im Thread-Pool aus (blockiert die Event-Loop nicht), mit der
+    LLM-Priorität passend zur Profil-Anzahl und dem Mandanten des Requests.
+    """
+    with llm_priority(priority_for_request(profile_count)), llm_tenant(tenant):
+        context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(context.run, fn, *args, **kwargs))
+
 
 @app.get("/")
 async def root():
@@ -54,8 +79,13 @@ async def root():
             "analyze": "/analyze",
             "analyze_csv": "/analyze/export-csv",
             "analyze_jsonl": "/analyze/export-jsonl",
+            "analyze_parquet": "/analyze/export-parquet",
+            "analyze_arrow": "/analyze/export-arrow",
             "profile_string": "/profile-string",
+            "rescore": "/rescore",
+            "jobs": "/jobs",
             "health": "/health",
+            "metrics": "/metrics",
             "logs": "/logs"
         }
     }
@@ -97,22 +127,32 @@ async def analyze_profiles(request: AnalysisRequest, background_tasks: Backgroun
         if len(request.profiles) > 100:
             raise HTTPException(status_code=400, detail="Maximal 100 Profile pro Request")
         
-        # Batch-Analyse
-        results = analyzer.analyze_batch(
+        # Batch-Analyse (Profil-Fehler werden in errors gesammelt,
+        # Wiederverwendung gespeicherter Ergebnisse in reuse_stats)
+        errors = []
+        reuse_stats = {}
+        # Einzelprofile laufen als interaktive Anfrage (Vorrang vor Batches),
+        # Batches verschiedener Mandanten werden abwechselnd bedient
+        results = await _run_in_llm_context(
+            len(request.profiles), request.tenant, analyzer.analyze_batch,
             profiles=request.profiles,
             target_keywords=request.target_keywords or [],
             product_category=request.product_category or "Software",
             include_enneagram=request.include_enneagram,
-            max_workers=5
+            max_workers=5,
+            errors=errors,
+            result_store=result_store,
+            stats=reuse_stats
         )
         
-        # Fehler sammeln
-        errors = []
         successful_results = []
+        agents_to_retry = {}
         
         for result in results:
             if result:
                 successful_results.append(result)
+                if result.degraded_agents:
+                    agents_to_retry[result.profile_id] = result.degraded_agents
         
         # Gesamt-Verarbeitungszeit
         total_time = time.time() - start_time
@@ -122,13 +162,15 @@ async def analyze_profiles(request: AnalysisRequest, background_tasks: Backgroun
         # Logs im Hintergrund speichern
         background_tasks.add_task(save_logs_to_file, analyzer.get_agent_logs())
         
-        return AnalysisResponse(
+        return FastJSONResponse(AnalysisResponse(
             success=True,
             results=successful_results,
             total_profiles=len(request.profiles),
             total_processing_time_seconds=total_time,
-            errors=errors
-        )
+            errors=errors,
+            agents_to_retry=agents_to_retry,
+            reuse=reuse_stats
+        ))
         
     except HTTPException:
         raise
@@ -161,7 +203,8 @@ async def analyze_and_export_csv(request: AnalysisRequest):
     
     try:
         # Analyse durchführen
-        results = analyzer.analyze_batch(
+        results = await _run_in_llm_context(
+            len(request.profiles), request.tenant, analyzer.analyze_batch,
             profiles=request.profiles,
             target_keywords=request.target_keywords or [],
             product_category=request.product_category or "Software",
@@ -171,7 +214,7 @@ async def analyze_and_export_csv(request: AnalysisRequest):
         
         # CSV erstellen
         output_file = f"/home/ubuntu/pcbf_framework/logs/export_{int(time.time())}.csv"
-        export_to_csv(results, output_file)
+        await asyncio.get_running_loop().run_in_executor(None, export_to_csv, results, output_file)
         
         logger.info(f"CSV-Export erfolgreich: {output_file}")
         
@@ -204,7 +247,8 @@ async def analyze_and_export_jsonl(request: AnalysisRequest):
     
     try:
         # Analyse durchführen
-        results = analyzer.analyze_batch(
+        results = await _run_in_llm_context(
+            len(request.profiles), request.tenant, analyzer.analyze_batch,
             profiles=request.profiles,
             target_keywords=request.target_keywords or [],
             product_category=request.product_category or "Software",
@@ -214,7 +258,7 @@ async def analyze_and_export_jsonl(request: AnalysisRequest):
         
         # JSON-Lines erstellen
         output_file = f"/home/ubuntu/pcbf_framework/logs/export_{int(time.time())}.jsonl"
-        export_to_json_lines(results, output_file)
+        await asyncio.get_running_loop().run_in_executor(None, export_to_json_lines, results, output_file)
         
         logger.info(f"JSON-Lines-Export erfolgreich: {output_file}")
         
@@ -230,6 +274,73 @@ async def analyze_and_export_jsonl(request: AnalysisRequest):
         raise HTTPException(status_code=500, detail=f"JSON-Lines-Export fehlgeschlagen: {str(e)}")
 
 
+@app.post("/analyze/export-parquet")
+async def analyze_and_export_parquet(request: AnalysisRequest):
+    """
+    Analysiert Profile und exportiert Ergebnisse als Parquet-Datei.
+    
+    Typisiertes, spaltenbasiertes Format mit festem Schema (Spalten wie
+    der CSV-Export) - direkt ins Data Warehouse ladbar.
+    
+    Args:
+        request: AnalysisRequest mit Profilen
+        
+    Returns:
+        Parquet-Datei als Download
+    """
+    return await _analyze_and_export_columnar(request, 'parquet')
+
+
+@app.post("/analyze/export-arrow")
+async def analyze_and_export_arrow(request: AnalysisRequest):
+    """
+    Analysiert Profile und exportiert Ergebnisse als Arrow-IPC-Datei.
+    
+    Args:
+        request: AnalysisRequest mit Profilen
+        
+    Returns:
+        Arrow-Datei als Download
+    """
+    return await _analyze_and_export_columnar(request, 'arrow')
+
+
+async def _analyze_and_export_columnar(request: AnalysisRequest, format: str):
+    """Analysiert Profile und schreibt Ergebnisse beim Eintreffen in Row Groups"""
+    logger.info(f"{format}-Export-Anfrage: {len(request.profiles)} Profile")
+    
+    extension, media_type = COLUMNAR_FORMATS[format]
+    
+    def analyze_and_write(output_file: str):
+        with ColumnarResultWriter(output_file, format) as writer:
+            analyzer.analyze_batch(
+                profiles=request.profiles,
+                target_keywords=request.target_keywords or [],
+                product_category=request.product_category or "Software",
+                include_enneagram=request.include_enneagram,
+                max_workers=5,
+                on_result=writer.write
+            )
+    
+    try:
+        output_file = f"/home/ubuntu/pcbf_framework/logs/export_{int(time.time())}{extension}"
+        await _run_in_llm_context(len(request.profiles), request.tenant, analyze_and_write, output_file)
+        
+        logger.info(f"{format}-Export erfolgreich: {output_file}")
+        
+        return FileResponse(
+            path=output_file,
+            media_type=media_type,
+            filename=f"pcbf_analysis_{int(time.time())}{extension}"
+        )
+        
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        logger.error(f"Fehler bei {format}-Export: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"{format}-Export fehlgeschlagen: {str(e)}")
+
+
 @app.post("/profile-string")
 async def generate_profile_string(result: ProfileAnalysisResult, format: str = "compact"):
     """
@@ -265,6 +376,212 @@ async def generate_profile_string(result: ProfileAnalysisResult, format: str = "
     }
 
 
+@app.post("/rescore", response_model=AnalysisResponse)
+async def rescore_stored_results(request: RescoreRequest):
+    """
+    Berechnet Purchase Intent für gespeicherte Ergebnisse neu (ohne LLM-Calls).
+    
+    Nutzt die im Ergebnis-Store gespeicherten Agenten-Ergebnisse und
+    berechnet Purchase Intent vektorisiert für eine neue Produkt-Kategorie,
+    neue Keywords oder alternative Gewichte. Die Communication Strategy
+    bleibt unverändert.
+    
+    Args:
+        request: RescoreRequest
+        
+    Returns:
+        AnalysisResponse mit neu bewerteten Ergebnissen
+    """
+    start_time = time.time()
+    
+    try:
+        profile_ids = request.profile_ids or result_store.profile_ids()
+        stored = result_store.get_many(profile_ids)
+        profiles = result_store.get_profiles(profile_ids) if request.target_keywords is not None else None
+        
+        errors = [
+            {'profile_id': pid, 'error': 'Kein gespeichertes Ergebnis'}
+            for pid in profile_ids if pid not in stored
+        ]
+        
+        results = rescore_results(
+            [stored[pid] for pid in profile_ids if pid in stored],
+            request.product_category,
+            target_keywords=request.target_keywords,
+            profiles=profiles,
+            product_mapping=request.product_mapping,
+            recompute_profile_string=request.recompute_profile_string
+        )
+        
+        return FastJSONResponse(AnalysisResponse(
+            success=True,
+            results=results,
+            total_profiles=len(profile_ids),
+            total_processing_time_seconds=time.time() - start_time,
+            errors=errors
+        ))
+        
+    except Exception as e:
+        logger.error(f"Fehler bei Neuberechnung: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Neuberechnung fehlgeschlagen: {str(e)}")
+
+
+@app.post("/retry", response_model=AnalysisResponse)
+async def retry_degraded_agents(request: RetryRequest):
+    """
+    Wiederholt die degradierten Agenten gespeicherter Ergebnisse.
+    
+    Für Profile aus agents_to_retry einer Analyse: nur die betroffenen
+    Agenten laufen erneut, Purchase Intent und Profil-String werden lokal
+    neu berechnet und das Ergebnis im Store aktualisiert.
+    
+    Args:
+        request: RetryRequest
+        
+    Returns:
+        AnalysisResponse mit aktualisierten Ergebnissen (agents_to_retry: weiterhin degradiert)
+    """
+    start_time = time.time()
+    
+    if not request.profile_ids:
+        raise HTTPException(status_code=400, detail="Keine Profile angegeben")
+    
+    if len(request.profile_ids) > 100:
+        raise HTTPException(status_code=400, detail="Maximal 100 Profile pro Request")
+    
+    try:
+        errors = []
+        results = await _run_in_llm_context(
+            len(request.profile_ids), request.tenant, analyzer.retry_stored_results,
+            request.profile_ids, result_store, request.product_category or "Software", 5, errors
+        )
+        
+        return FastJSONResponse(AnalysisResponse(
+            success=True,
+            results=results,
+            total_profiles=len(request.profile_ids),
+            total_processing_time_seconds=time.time() - start_time,
+            errors=errors,
+            agents_to_retry={r.profile_id: r.degraded_agents for r in results if r.degraded_agents}
+        ))
+        
+    except Exception as e:
+        logger.error(f"Fehler bei Retry: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Retry fehlgeschlagen: {str(e)}")
+
+
+@app.get("/results")
+async def get_stored_results(profile_ids: List[str] = Query(..., description="Profil-IDs")):
+    """
+    Gibt gespeicherte Ergebnisse aus dem Ergebnis-Store zurück.
+    
+    Die Ergebnisse werden als gespeichertes JSON unverändert in die
+    Antwort übernommen (kein Parsen und erneutes Serialisieren).
+    
+    Args:
+        profile_ids: Profil-IDs (Query-Parameter, mehrfach angebbar)
+        
+    Returns:
+        Gespeicherte Ergebnisse und fehlende Profil-IDs
+    """
+    stored = result_store.get_many_json(profile_ids)
+    
+    return FastJSONResponse({
+        'success': True,
+        'results': [RawJSON(stored[pid]) for pid in profile_ids if pid in stored],
+        'missing': [pid for pid in profile_ids if pid not in stored]
+    })
+
+
+@app.post("/jobs")
+async def submit_job(request: AnalysisRequest):
+    """
+    Stellt die Profile als Job in die Work-Queue (Analyse durch worker.py).
+    
+    Die API bleibt zustandslos; beliebig viele Worker-Prozesse arbeiten
+    die Queue ab. Ergebnisse über /jobs/{job_id}/results abrufen.
+    
+    Args:
+        request: AnalysisRequest mit Profilen und Parametern
+        
+    Returns:
+        Job-ID und Status-URLs
+    """
+    if not request.profiles:
+        raise HTTPException(status_code=400, detail="Keine Profile angegeben")
+    
+    queue = get_work_queue()
+    loop = asyncio.get_running_loop()
+    job_id = await loop.run_in_executor(
+        None, queue.enqueue_job, request.profiles, request.target_keywords or [],
+        request.product_category or "Software", request.include_enneagram, request.tenant
+    )
+    
+    return {
+        'success': True,
+        'job_id': job_id,
+        'total_profiles': len(request.profiles),
+        'status_url': f"/jobs/{job_id}",
+        'results_url': f"/jobs/{job_id}/results"
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Gibt den Fortschritt eines Jobs zurück.
+    
+    Args:
+        job_id: Job-ID
+        
+    Returns:
+        Parameter und Fortschritt (completed/failed/pending)
+    """
+    status = get_work_queue().job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    return {'success': True, **status}
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str):
+    """
+    Gibt die bisher fertigen Ergebnisse eines Jobs zurück.
+    
+    Die Ergebnisse werden als gespeichertes JSON unverändert übernommen.
+    
+    Args:
+        job_id: Job-ID
+        
+    Returns:
+        Fortschritt, Ergebnisse (Profil-Reihenfolge) und fehlgeschlagene Profile
+    """
+    queue = get_work_queue()
+    status = queue.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    
+    return FastJSONResponse({
+        'success': True,
+        **status,
+        'results': [RawJSON(result) for result in queue.job_results_json(job_id)],
+        'errors': queue.job_errors(job_id)
+    })
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Gibt LLM-Metriken zurück (u.a. JSON-Parse-Fehlerrate).
+    
+    Returns:
+        Dictionary mit Metriken
+    """
+    return {
+        "llm": get_llm_client().get_metrics()
+    }
+
+
 @app.get("/logs")
 async def get_logs():
     """
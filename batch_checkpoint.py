@@ -0,0 +1,364 @@
+"""
+PCBF 2.1 Framework - Batch-Checkpoints
+Persistiert Batch-Läufe (Profile, Parameter, fertige Ergebnisse), damit
+abgebrochene Läufe nach Absturz/Redeploy fortgesetzt werden können
+"""
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import config
+from fast_json import dumps_line
+from models import ProfileInput, ProfileAnalysisResult, validate_profiles
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+PROFILES_FILE = 'profiles.jsonl'
+RESULTS_FILE = 'results.jsonl'
+
+# Zulässige Run-IDs (generiert: 12 Hex-Zeichen); Run-IDs kommen auch aus URLs
+# und werden zum Verzeichnisnamen, daher keine Pfad-Trenner oder '..'
+RUN_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Bereits gelesene Ergebnis-Indizes je results.jsonl: (gelesene Bytes, Indizes)
+_completed_cache: Dict[str, Tuple[int, Set[int]]] = {}
+_completed_cache_lock = threading.Lock()
+
+
+class BatchCheckpoint:
+    """
+    Checkpoint eines Batch-Laufs (ein Verzeichnis pro Run).
+
+    - manifest.json: Parameter und Status
+    - profiles.jsonl: Alle Input-Profile (Reihenfolge = Index)
+    - results.jsonl: Fertige Ergebnisse, append-only und nach jedem
+      Ergebnis per fsync gesichert
+
+    Profile ohne Ergebnis gelten als ausstehend; bei einem Absturz gehen
+    damit höchstens die gerade laufenden Profile verloren.
+    """
+
+    def __init__(self, run_id: str, directory: Optional[str] = None):
+        """
+        Öffnet einen bestehenden Checkpoint.
+
+        Args:
+            run_id: Run-ID
+            directory: Basis-Verzeichnis (default: config.BATCH_CHECKPOINT_DIR)
+
+        Raises:
+            FileNotFoundError: wenn kein Checkpoint existiert oder die Run-ID ungültig ist
+        """
+        if not RUN_ID_PATTERN.match(run_id):
+            raise FileNotFoundError(f"Checkpoint {run_id!r} nicht gefunden (ungültige Run-ID)")
+
+        self.run_id = run_id
+        self.path = os.path.join(directory or config.BATCH_CHECKPOINT_DIR, run_id)
+        self._lock = threading.Lock()
+
+        if not os.path.exists(os.path.join(self.path, MANIFEST_FILE)):
+            raise FileNotFoundError(f"Checkpoint {run_id} nicht gefunden")
+
+        with open(os.path.join(self.path, MANIFEST_FILE), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def create(cls, profiles: List[ProfileInput], target_keywords: List[str],
+               product_category: str, include_enneagram: bool = False,
+               run_id: Optional[str] = None,
+               directory: Optional[str] = None,
+               tenant: Optional[str] = None) -> 'BatchCheckpoint':
+        """
+        Legt einen neuen Checkpoint an.
+
+        Args:
+            profiles: Alle Profile des Laufs
+            target_keywords: Ziel-Keywords
+            product_category: Produkt-Kategorie
+            include_enneagram: Enneagram einbeziehen
+            run_id: Run-ID (default: zufällig)
+            directory: Basis-Verzeichnis (default: config.BATCH_CHECKPOINT_DIR)
+            tenant: Mandant des Laufs (gilt auch beim Fortsetzen)
+
+        Returns:
+            BatchCheckpoint
+
+        Raises:
+            ValueError: bei ungültiger Run-ID
+        """
+        run_id = run_id or uuid.uuid4().hex[:12]
+        if not RUN_ID_PATTERN.match(run_id):
+            raise ValueError(f"Ungültige Run-ID: {run_id!r}")
+        path = os.path.join(directory or config.BATCH_CHECKPOINT_DIR, run_id)
+        os.makedirs(path, exist_ok=True)
+
+        with open(os.path.join(path, PROFILES_FILE), 'w', encoding='utf-8') as f:
+            for profile in profiles:
+                f.write(profile.model_dump_json() + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        open(os.path.join(path, RESULTS_FILE), 'a').close()
+
+        manifest = {
+            'run_id': run_id,
+            'created_at': datetime.utcnow().isoformat(),
+            'status': 'running',
+            'total_profiles': len(profiles),
+            'target_keywords': target_keywords,
+            'product_category': product_category,
+            'include_enneagram': include_enneagram,
+            'tenant': tenant
+        }
+        _write_json_atomic(os.path.join(path, MANIFEST_FILE), manifest)
+
+        logger.info(f"Checkpoint {run_id} angelegt ({len(profiles)} Profile)")
+        return cls(run_id, directory)
+
+    @property
+    def target_keywords(self) -> List[str]:
+        return self.manifest.get('target_keywords') or []
+
+    @property
+    def product_category(self) -> str:
+        return self.manifest.get('product_category') or 'Software'
+
+    @property
+    def tenant(self) -> Optional[str]:
+        return self.manifest.get('tenant')
+
+    @property
+    def include_enneagram(self) -> bool:
+        return bool(self.manifest.get('include_enneagram'))
+
+    def load_profiles(self) -> List[ProfileInput]:
+        """Lädt alle Input-Profile in Original-Reihenfolge"""
+        with open(os.path.join(self.path, PROFILES_FILE), encoding='utf-8') as f:
+            return validate_profiles([json.loads(line) for line in f if line.strip()])
+
+    def truncate_torn_tail(self):
+        """
+        Entfernt eine beim Absturz halb geschriebene letzte Zeile aus results.jsonl.
+
+        Nur vor dem Fortsetzen aufrufen (solange kein Writer aktiv ist); Leser
+        überspringen eine unvollständige letzte Zeile ohnehin.
+        """
+        results_path = os.path.join(self.path, RESULTS_FILE)
+        if not os.path.exists(results_path):
+            return
+
+        with open(results_path, 'rb+') as f:
+            content = f.read()
+            if content and not content.endswith(b'\n'):
+                f.truncate(content.rfind(b'\n') + 1)
+                logger.warning(f"Checkpoint {self.run_id}: unvollständige letzte Zeile entfernt")
+
+    def _completed_set(self) -> Set[int]:
+        """
+        Indizes mit gesichertem Ergebnis (gemeinsam genutzte Menge, nicht verändern).
+
+        results.jsonl ist append-only: pro Datei wird gemerkt, bis wohin sie
+        gelesen ist, und nur der seither angehängte Teil geparst (auch über
+        Instanzen hinweg, z.B. Status-Abfragen während eines laufenden Batches).
+        Eine noch nicht abgeschlossene letzte Zeile wird beim nächsten Aufruf
+        erneut gelesen.
+        """
+        results_path = os.path.join(self.path, RESULTS_FILE)
+        with _completed_cache_lock:
+            offset, completed = _completed_cache.get(results_path, (0, set()))
+            with open(results_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < offset:
+                    # Datei gekürzt (truncate_torn_tail) bzw. neu angelegt
+                    offset, completed = 0, set()
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        completed.add(json.loads(line)['index'])
+                    except json.JSONDecodeError:
+                        logger.warning(f"Checkpoint {self.run_id}: unvollständige Zeile übersprungen")
+                    offset += len(line)
+            _completed_cache[results_path] = (offset, completed)
+            return completed
+
+    def completed_indices(self) -> List[int]:
+        """Indizes aller Profile mit gesichertem Ergebnis"""
+        return sorted(self._completed_set())
+
+    def pending_profiles(self) -> List[Tuple[int, ProfileInput]]:
+        """
+        Gibt alle noch ausstehenden Profile zurück.
+
+        Returns:
+            Liste von (Index, ProfileInput)
+        """
+        completed = self._completed_set()
+        return [
+            (index, profile)
+            for index, profile in enumerate(self.load_profiles())
+            if index not in completed
+        ]
+
+    def load_results(self) -> List[ProfileAnalysisResult]:
+        """Lädt alle gesicherten Ergebnisse in Input-Reihenfolge"""
+        return list(self.iter_results())
+
+    def _result_offsets(self) -> Dict[int, int]:
+        """Datei-Offset des (letzten) Ergebnisses je Profil-Index in results.jsonl"""
+        offsets = {}
+        with open(os.path.join(self.path, RESULTS_FILE), 'rb') as f:
+            offset = 0
+            for line in f:
+                try:
+                    offsets[json.loads(line)['index']] = offset
+                except json.JSONDecodeError:
+                    logger.warning(f"Checkpoint {self.run_id}: unvollständige Zeile übersprungen")
+                offset += len(line)
+        return offsets
+
+    def iter_results(self) -> Iterator[ProfileAnalysisResult]:
+        """
+        Liest gesicherte Ergebnisse einzeln in Input-Reihenfolge.
+
+        Merkt sich nur die Datei-Offsets, sodass nie alle Ergebnisse
+        gleichzeitig im Speicher liegen.
+        """
+        offsets = self._result_offsets()
+        with open(os.path.join(self.path, RESULTS_FILE), 'rb') as f:
+            for index in sorted(offsets):
+                f.seek(offsets[index])
+                yield ProfileAnalysisResult.model_validate(json.loads(f.readline())['result'])
+
+    def iter_profile_results(self) -> Iterator[Tuple[ProfileInput, ProfileAnalysisResult]]:
+        """
+        Liest Input-Profile zusammen mit ihrem Ergebnis (Input-Reihenfolge).
+
+        Profile ohne gesichertes Ergebnis werden übersprungen.
+
+        Returns:
+            Iterator über (ProfileInput, ProfileAnalysisResult)
+        """
+        offsets = self._result_offsets()
+        with open(os.path.join(self.path, PROFILES_FILE), encoding='utf-8') as profiles_file, \
+                open(os.path.join(self.path, RESULTS_FILE), 'rb') as results_file:
+            for index, line in enumerate(profiles_file):
+                if index not in offsets:
+                    continue
+                results_file.seek(offsets[index])
+                result = ProfileAnalysisResult.model_validate(json.loads(results_file.readline())['result'])
+                yield ProfileInput.model_validate_json(line), result
+
+    def record_result(self, index: int, result: ProfileAnalysisResult):
+        """
+        Sichert ein fertiges Ergebnis dauerhaft (append + fsync).
+
+        Args:
+            index: Index des Profils im Lauf
+            result: Analyse-Ergebnis
+        """
+        line = dumps_line({'index': index, 'result': result})
+
+        with self._lock:
+            with open(os.path.join(self.path, RESULTS_FILE), 'ab') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def mark_finished(self):
+        """Markiert den Lauf als abgeschlossen, falls keine Profile mehr ausstehen"""
+        completed = len(self._completed_set())
+        status = 'completed' if completed >= self.manifest['total_profiles'] else 'incomplete'
+
+        with self._lock:
+            self.manifest['status'] = status
+            self.manifest['updated_at'] = datetime.utcnow().isoformat()
+            _write_json_atomic(os.path.join(self.path, MANIFEST_FILE), self.manifest)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Gibt den Fortschritt des Laufs zurück.
+
+        Returns:
+            Dictionary mit Status, Gesamtzahl, fertigen und ausstehenden Profilen
+        """
+        completed = len(self._completed_set())
+        total = self.manifest['total_profiles']
+        return {
+            'run_id': self.run_id,
+            'status': self.manifest.get('status'),
+            'created_at': self.manifest.get('created_at'),
+            'tenant': self.tenant,
+            'total_profiles': total,
+            'completed': completed,
+            'pending': total - completed
+        }
+
+
+def list_checkpoints(directory: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Listet alle Checkpoints mit Status.
+
+    Args:
+        directory: Basis-Verzeichnis (default: config.BATCH_CHECKPOINT_DIR)
+
+    Returns:
+        Liste von Status-Dictionaries (neueste zuerst)
+    """
+    base = directory or config.BATCH_CHECKPOINT_DIR
+    if not os.path.isdir(base):
+        return []
+
+    checkpoints = []
+    for run_id in os.listdir(base):
+        try:
+            checkpoints.append(BatchCheckpoint(run_id, base).status())
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+
+    return sorted(checkpoints, key=lambda c: c.get('created_at') or '', reverse=True)
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]):
+    """Schreibt JSON atomar (tmp-Datei + rename)"""
+    tmp_path = f"{path}.{os.getpid()}.{int(time.time() * 1000)}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils import setup_logging
+
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="PCBF Batch-Checkpoints verwalten")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="Checkpoints auflisten")
+    resume_parser = subparsers.add_parser('resume', help="Lauf fortsetzen")
+    resume_parser.add_argument('run_id')
+    resume_parser.add_argument('--workers', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for checkpoint_status in list_checkpoints():
+            print(json.dumps(checkpoint_status, ensure_ascii=False))
+    else:
+        from analyzer import ProfileAnalyzer
+        from llm_scheduler import llm_priority, llm_tenant, BULK
+
+        checkpoint = BatchCheckpoint(args.run_id)
+        errors = []
+        with llm_priority(BULK), llm_tenant(checkpoint.tenant):
+            results = ProfileAnalyzer().resume_batch(checkpoint, max_workers=args.workers, errors=errors)
+        print(json.dumps({**checkpoint.status(), "results": len(results), "errors": errors}, ensure_ascii=False))
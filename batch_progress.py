@@ -0,0 +1,205 @@
+"""
+PCBF 2.1 Framework - Live-Fortschritt für Batch-Läufe
+Zählt fertige Profile, Fehler, Durchsatz und laufende Aggregate (DISC-Verteilung,
+Ø Purchase Intent) und verteilt sie als Events an SSE-Abonnenten
+"""
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from models import ProfileAnalysisResult
+
+logger = logging.getLogger(__name__)
+
+# Events, nach denen ein Abonnent keine weiteren Events erhält
+TERMINAL_EVENTS = ('complete', 'aborted', 'failed')
+
+# Zeitfenster-Größe (fertige Profile) für den aktuellen Durchsatz
+THROUGHPUT_WINDOW = 50
+
+
+class BatchProgress:
+    """
+    Fortschritt eines laufenden Batch-Laufs.
+
+    record_result/record_error werden aus dem Analyse-Thread aufgerufen;
+    Abonnenten (subscribe) erhalten die Events über ihre asyncio-Queue.
+
+    Events:
+        snapshot: Aktueller Stand (erstes Event für jeden Abonnenten)
+        profile: Ein Profil ist fertig ({'profile_id', 'disc', 'pi', 'pi_category'})
+        profile_error: Ein Profil ist fehlgeschlagen ({'profile_id', 'error'})
+        progress: Aggregate (höchstens alle config.PROGRESS_EVENT_INTERVAL_SECONDS)
+        complete / aborted / failed: Lauf beendet ({'progress', 'result'})
+    """
+
+    def __init__(self, analysis_id: str, total: int, recent_size: int = 20):
+        """
+        Args:
+            analysis_id: Analyse-ID des Laufs
+            total: Anzahl Profile im Lauf
+            recent_size: Anzahl zuletzt fertiger Profile im Snapshot
+        """
+        self.analysis_id = analysis_id
+        self.total = total
+        self.status = 'running'
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+
+        self.completed = 0
+        self.errors = 0
+        self.disc_distribution: Counter = Counter()
+        self.pi_sum = 0.0
+        self.recent: deque = deque(maxlen=recent_size)
+        self.recent_errors: deque = deque(maxlen=recent_size)
+
+        self._completion_times: deque = deque(maxlen=THROUGHPUT_WINDOW)
+        self._last_progress_event = 0.0
+        self._final_event: Optional[Tuple[str, Dict[str, Any]]] = None
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Aufrufe aus dem Analyse-Thread
+    # ------------------------------------------------------------------
+
+    def record_result(self, result: ProfileAnalysisResult):
+        """Zählt ein fertiges Profil und aktualisiert die Aggregate"""
+        event = {
+            'profile_id': result.profile_id,
+            'disc': result.disc.primary_type,
+            'pi': round(result.purchase_intent.score, 1),
+            'pi_category': result.purchase_intent.category
+        }
+
+        with self._lock:
+            self.completed += 1
+            self.disc_distribution[result.disc.primary_type] += 1
+            self.pi_sum += result.purchase_intent.score
+            self.recent.append(event)
+            self._completion_times.append(time.time())
+
+        self._publish('profile', event)
+        self._publish_progress()
+
+    def record_error(self, profile_id: str, error: str):
+        """Zählt ein fehlgeschlagenes Profil"""
+        event = {'profile_id': profile_id, 'error': error}
+
+        with self._lock:
+            self.errors += 1
+            self.recent_errors.append(event)
+            self._completion_times.append(time.time())
+
+        self._publish('profile_error', event)
+        self._publish_progress()
+
+    def finish(self, status: str, result: Optional[Dict[str, Any]] = None):
+        """
+        Beendet den Lauf und sendet das abschließende Event.
+
+        Args:
+            status: 'complete', 'aborted' oder 'failed'
+            result: Ergebnis-Payload (z.B. Upload-Response oder {'detail': ...})
+        """
+        with self._lock:
+            self.status = status
+            self.finished_at = time.time()
+            self._final_event = (status, {'progress': self._snapshot_locked(), 'result': result})
+
+        self._publish(*self._final_event)
+        logger.info(f"Batch {self.analysis_id}: {status} ({self.completed}/{self.total}, {self.errors} Fehler)")
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """Fordert den Abbruch an (bereits laufende Profile werden noch gesichert)"""
+        self.cancel_event.set()
+        logger.info(f"Batch {self.analysis_id}: Abbruch angefordert")
+
+    # ------------------------------------------------------------------
+    # Abonnenten (Event-Loop)
+    # ------------------------------------------------------------------
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Registriert einen Abonnenten (im Event-Loop aufrufen).
+
+        Returns:
+            Queue mit (event, payload)-Tupeln, beginnend mit 'snapshot'
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            queue.put_nowait(('snapshot', self._snapshot_locked()))
+            if self._final_event:
+                queue.put_nowait(self._final_event)
+            else:
+                self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Entfernt einen Abonnenten"""
+        with self._lock:
+            self._subscribers = [(loop, q) for loop, q in self._subscribers if q is not queue]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aktueller Stand inkl. Durchsatz, ETA und Aggregaten"""
+        with self._lock:
+            return self._snapshot_locked()
+
+    def _snapshot_locked(self) -> Dict[str, Any]:
+        now = self.finished_at or time.time()
+        elapsed = now - self.started_at
+        processed = self.completed + self.errors
+
+        # Aktueller Durchsatz über die letzten fertigen Profile, sonst Gesamtdurchsatz
+        times = self._completion_times
+        if len(times) >= 2 and times[-1] > times[0]:
+            rate = (len(times) - 1) / (times[-1] - times[0])
+        else:
+            rate = processed / elapsed if elapsed > 0 else 0.0
+
+        remaining = max(self.total - processed, 0)
+        eta = remaining / rate if rate > 0 and self.status == 'running' else None
+
+        return {
+            'analysis_id': self.analysis_id,
+            'status': 'aborting' if self.status == 'running' and self.cancelled else self.status,
+            'total': self.total,
+            'completed': self.completed,
+            'errors': self.errors,
+            'percent': round(processed / self.total * 100, 1) if self.total else 100.0,
+            'elapsed_seconds': round(elapsed, 1),
+            'profiles_per_minute': round(rate * 60, 1),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'disc_distribution': dict(self.disc_distribution),
+            'mean_pi': round(self.pi_sum / self.completed, 1) if self.completed else None,
+            'recent': list(self.recent),
+            'recent_errors': list(self.recent_errors)
+        }
+
+    def _publish_progress(self):
+        """Sendet die Aggregate, höchstens alle PROGRESS_EVENT_INTERVAL_SECONDS"""
+        now = time.time()
+        processed = self.completed + self.errors
+        if now - self._last_progress_event < config.PROGRESS_EVENT_INTERVAL_SECONDS and processed < self.total:
+            return
+        self._last_progress_event = now
+        self._publish('progress', self.snapshot())
+
+    def _publish(self, event: str, payload: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (event, payload))
+            except RuntimeError:
+                # Event-Loop bereits geschlossen
+                self.unsubscribe(queue)
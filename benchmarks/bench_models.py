@@ -0,0 +1,188 @@
+"""
+PCBF 2.1 Framework - Benchmark Datenmodelle
+Misst Konstruktions- und Serialisierungskosten pro Profil für die
+bisherigen Pfade (verschachtelte Ergebnisse neu validieren, .dict() +
+json.dumps, Validierung pro Zeile) und die Pydantic-v2-Pfade
+(bereits validierte Instanzen übernehmen, model_dump_json,
+model_validate_json, TypeAdapter für Profil-Listen)
+
+Die letzte Zeile vergleicht zusätzlich model_construct mit dem
+validierenden Konstruktor.
+
+Aufruf:
+    python benchmarks/bench_models.py --profiles 5000 --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import (  # noqa: E402
+    ProfileInput, ProfileAnalysisResult, BioQualityResult, DISCResult, NEOResult,
+    RIASECResult, PersuasionResult, PurchaseIntentResult, CommunicationStrategy,
+    WarningMessage, validate_profiles
+)
+
+REASONING = "Die Bio zeigt klare Ergebnisorientierung und direkte Sprache. " * 4
+
+
+def _profile_rows(n: int) -> List[Dict]:
+    """Profil-Dictionaries wie aus csv_processor.parse_csv"""
+    return [
+        {
+            'id': f"lead-{i}",
+            'platform_name': 'LinkedIn',
+            'full_name': f"Max Mustermann {i}",
+            'bio': "CEO @ Beispiel GmbH | SaaS, Vertrieb, Skalierung | Speaker",
+            'categories': 'Business, Technology',
+            'followers': str(1000 + i),
+            'following': '512',
+            'posts': 'N/A',
+            'verified': False,
+            'business_account': True
+        }
+        for i in range(n)
+    ]
+
+
+def _agent_results() -> Dict:
+    """Validierte Teil-Ergebnisse wie von den Agenten geliefert"""
+    return {
+        'bio_quality': BioQualityResult(
+            score=72.0, word_count=12, has_job_title=True, has_company=True,
+            has_structure=True, emoji_count=0, category='medium'
+        ),
+        'disc': DISCResult(
+            primary_type='D', secondary_type='I', subtype='Di', archetype='Captain',
+            scores={'D': 0.45, 'I': 0.3, 'S': 0.1, 'C': 0.15}, confidence=70.0,
+            reasoning=REASONING
+        ),
+        'neo': NEOResult(
+            dimensions={'openness': 0.6, 'conscientiousness': 0.7, 'extraversion': 0.65,
+                        'agreeableness': 0.4, 'neuroticism': 0.3},
+            confidence=60.0, reasoning=REASONING
+        ),
+        'riasec': RIASECResult(
+            holland_code='ECI', scores={'R': 0.05, 'I': 0.15, 'A': 0.05, 'S': 0.1, 'E': 0.45, 'C': 0.2},
+            primary='E', confidence=65.0, source='mixed', reasoning=REASONING
+        ),
+        'persuasion': PersuasionResult(
+            scores={'authority': 0.35, 'social_proof': 0.2, 'scarcity': 0.1, 'reciprocity': 0.1,
+                    'consistency': 0.1, 'liking': 0.1, 'unity': 0.05},
+            primary='authority', confidence=68.0, reasoning=REASONING
+        ),
+        'purchase_intent': PurchaseIntentResult(
+            score=64.2, category='high',
+            contributing_factors={'riasec_fit': 0.7, 'behavior': 0.6, 'data_quality': 0.72},
+            reasoning=REASONING,
+            category_scores={'Software': 64.2, 'Training': 58.9, 'Daten': 61.0}
+        ),
+        'communication_strategy': CommunicationStrategy(
+            style='direkt', tone='professionell', content_focus='Ergebnisse',
+            persuasion_approach='Autorität', subject_line='Kurze Frage zu Ihrem Vertrieb',
+            message_body=REASONING, call_to_action='15 Minuten nächste Woche?'
+        ),
+        'warnings': [WarningMessage(level='info', message='Kurze Bio', affected_modules=['NEO'])]
+    }
+
+
+def _result_fields(i: int, parts: Dict) -> Dict:
+    """Alle Felder eines ProfileAnalysisResult"""
+    return {
+        'profile_id': f"lead-{i}",
+        'keywords_match_score': 40.0,
+        'overall_confidence': 66.3,
+        'processing_time_seconds': 3.2,
+        'api_calls_made': 5,
+        'degraded_agents': [],
+        'input_fingerprint': 'f' * 64,
+        'profile_string': 'DISC:Di(70%) | NEO:C=0.70,E=0.65(60%) | RIASEC:ECI(65%) | PI:64',
+        **parts
+    }
+
+
+def _best_of(func: Callable[[], None], repeat: int) -> float:
+    """Beste Laufzeit (Sekunden) aus repeat Durchläufen"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n: int, repeat: int) -> List[Dict]:
+    """
+    Führt alle Messungen durch.
+
+    Args:
+        n: Anzahl Profile pro Durchlauf
+        repeat: Durchläufe pro Messung (bester zählt)
+
+    Returns:
+        Liste von Messungen (Name, vorher/nachher in µs pro Profil)
+    """
+    rows = _profile_rows(n)
+    parts = _agent_results()
+    fields = [_result_fields(i, parts) for i in range(n)]
+    raw_parts = {
+        key: [w.model_dump() for w in value] if key == 'warnings' else value.model_dump()
+        for key, value in parts.items()
+    }
+    raw_fields = [_result_fields(i, raw_parts) for i in range(n)]
+    results = [ProfileAnalysisResult(**f) for f in fields]
+    payloads = [r.model_dump_json() for r in results]
+
+    def dict_dumps():
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            for r in results:
+                json.dumps(r.dict(), ensure_ascii=False, default=str)
+
+    cases = [
+        ('ProfileInput validieren',
+         lambda: [ProfileInput(**row) for row in rows],
+         lambda: validate_profiles(rows)),
+        ('ProfileAnalysisResult aufbauen',
+         lambda: [ProfileAnalysisResult(**f) for f in raw_fields],
+         lambda: [ProfileAnalysisResult(**f) for f in fields]),
+        ('Ergebnis serialisieren (JSON)',
+         dict_dumps,
+         lambda: [r.model_dump_json() for r in results]),
+        ('Ergebnis laden (JSON)',
+         lambda: [ProfileAnalysisResult(**json.loads(p)) for p in payloads],
+         lambda: [ProfileAnalysisResult.model_validate_json(p) for p in payloads]),
+        ('model_construct statt Konstruktor',
+         lambda: [ProfileAnalysisResult(**f) for f in fields],
+         lambda: [ProfileAnalysisResult.model_construct(**f) for f in fields]),
+    ]
+
+    measurements = []
+    for name, before, after in cases:
+        measurements.append({
+            'name': name,
+            'before_us': _best_of(before, repeat) / n * 1e6,
+            'after_us': _best_of(after, repeat) / n * 1e6
+        })
+    return measurements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PCBF Benchmark: Konstruktion/Serialisierung der Datenmodelle")
+    parser.add_argument('--profiles', type=int, default=5000, help="Profile pro Durchlauf")
+    parser.add_argument('--repeat', type=int, default=5, help="Durchläufe pro Messung")
+    args = parser.parse_args()
+
+    print(f"{'Messung':<34}{'vorher µs/Profil':>18}{'nachher µs/Profil':>19}{'Faktor':>9}")
+    for m in run(args.profiles, args.repeat):
+        factor = m['before_us'] / m['after_us'] if m['after_us'] else float('inf')
+        print(f"{m['name']:<34}{m['before_us']:>18.1f}{m['after_us']:>19.1f}{factor:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,418 @@
+"""
+PCBF 2.1 Framework - End-to-End-Durchsatz-Benchmark
+Startet einen lokalen Mock-LLM-Server (mock_llm_server.py) und misst für
+verschiedene Batch-Größen den Durchsatz von ProfileAnalyzer.analyze_batch
+bzw. des Endpoints POST /analyze (app_extended.py, per uvicorn), die
+Latenz-Perzentile (p50/p95/p99) pro Stufe und den Speicherbedarf.
+
+Stufen:
+    api_request       HTTP-Request an /analyze (nur --target api)
+    profile           analyze_profile komplett
+    agent.<Name>      ein Agent inkl. Retries (DISC, NEO, ...)
+    scheduler_wait    Warten auf einen Slot des LLM-Schedulers
+    llm_request       HTTP-Call an den LLM-Endpunkt inkl. Retries/Key-Wechsel
+    server            vom Mock-Server injizierte Latenz
+
+Die Ergebnisse werden als JSON geschrieben (--output), um sie über die
+Zeit zu vergleichen.
+
+Aufruf:
+    python benchmarks/bench_pipeline.py --sizes 10,100,1000 --latency lognormal:300:0.5
+    python benchmarks/bench_pipeline.py --target api --sizes 100,1000 --output bench.json
+    python benchmarks/bench_pipeline.py --sizes 100000 --latency fixed:5 --workers 32 --concurrency 128
+"""
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import platform
+import argparse
+import threading
+import subprocess
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests  # noqa: E402
+
+import config  # noqa: E402
+from analyzer import ProfileAnalyzer  # noqa: E402
+from llm_providers import LLMProvider, ProviderCall  # noqa: E402
+from llm_scheduler import LLMScheduler  # noqa: E402
+from models import ProfileInput  # noqa: E402
+from mock_llm_server import MockLLMServer  # noqa: E402
+
+ROLES = ['CEO', 'Gründer', 'Head of Sales', 'Data Engineer', 'Marketing Manager', 'Consultant']
+COMPANIES = ['Acme GmbH', 'Beispiel AG', 'Nordlicht Software', 'Datenwerk', 'Studio Süd']
+TOPICS = [
+    'Wir lieben Daten, Analyse und Qualität.', 'Community, Events und Inspiration.',
+    'Teamarbeit und Zuverlässigkeit zählen.', 'Ergebnisse, ROI und schnelle Entscheidungen.',
+    'Forschung und Innovation treiben uns an.', 'Speaker | Mentor | Netzwerker'
+]
+
+
+class StageStats:
+    """Latenz-Stichproben pro Stufe (thread-sicher)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = defaultdict(list)
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: summarize(values) for stage, values in sorted(self._samples.items())}
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Anzahl, Mittelwert und Perzentile (ms) einer Stichprobe in Sekunden"""
+    ordered = sorted(values)
+    if not ordered:
+        return {'count': 0}
+
+    def percentile(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 2)
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(ordered[-1] * 1000, 2)
+    }
+
+
+class _TimedProvider(LLMProvider):
+    """Misst die Dauer jedes Provider-Calls (Stufe llm_request)"""
+
+    def __init__(self, provider: LLMProvider, stats: StageStats):
+        super().__init__(provider.model)
+        self.name = provider.name
+        self.provider = provider
+        self.stats = stats
+        self.structured_output_supported = provider.structured_output_supported
+
+    @contextmanager
+    def request(self, payload: Dict[str, Any], stream: bool = False,
+                estimated_tokens: int = 0) -> Iterator[ProviderCall]:
+        with self.stats.measure('llm_request'):
+            with self.provider.request(payload, stream=stream, estimated_tokens=estimated_tokens) as call:
+                yield call
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return self.provider.get_metrics()
+
+
+class _TimedScheduler(LLMScheduler):
+    """Misst die Wartezeit auf einen Scheduler-Slot (Stufe scheduler_wait)"""
+
+    def __init__(self, stats: StageStats):
+        super().__init__()
+        self.stats = stats
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None, tenant: Optional[str] = None, tokens: int = 0):
+        start = time.perf_counter()
+        with super().slot(priority, tenant, tokens) as ticket:
+            self.stats.add('scheduler_wait', time.perf_counter() - start)
+            yield ticket
+
+
+class _TimedAnalyzer(ProfileAnalyzer):
+    """Misst Profile und Agenten (Stufen profile, agent.<Name>)"""
+
+    def __init__(self, stats: StageStats):
+        super().__init__()
+        self.stats = stats
+
+    def analyze_profile(self, *args, **kwargs):
+        with self.stats.measure('profile'):
+            return super().analyze_profile(*args, **kwargs)
+
+    def _run_agent_with_retry(self, agent_name: str, run, profile: ProfileInput, *args):
+        with self.stats.measure(f"agent.{agent_name}"):
+            return super()._run_agent_with_retry(agent_name, run, profile, *args)
+
+
+def synthetic_profiles(n: int, prefix: str) -> List[ProfileInput]:
+    """n unterschiedliche Profile (deterministisch, eindeutige IDs)"""
+    return [
+        ProfileInput(
+            id=f"{prefix}-{i}",
+            platform_name='LinkedIn',
+            full_name=f"Lead {i}",
+            bio=(f"{ROLES[i % len(ROLES)]} bei {COMPANIES[i % len(COMPANIES)]}. "
+                 f"{TOPICS[i % len(TOPICS)]} {TOPICS[(i // 7) % len(TOPICS)]} #{i}"),
+            followers=100 + i % 5000,
+            following=50 + i % 700,
+            business_account=i % 3 == 0
+        )
+        for i in range(n)
+    ]
+
+
+def _rss_mb() -> Optional[float]:
+    """Aktueller Resident-Set (MB, nur Linux)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Höchster Resident-Set des Prozesses bisher (MB)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2 ** 20 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def configure_llm(server: MockLLMServer, keys: int, concurrency: int, streaming: bool,
+                  stats: StageStats):
+    """
+    Richtet den LLM-Client auf den Mock-Server aus (vor der ersten Analyse aufrufen).
+
+    Es läuft der produktive Pfad: OpenAI-kompatibler Provider mit
+    Credential-Pool (keys Keys), Scheduler und Retry-Logik.
+    """
+    config.LLM_PROVIDER = 'openrouter'
+    config.LLM_PROVIDER_BY_PRIORITY = {}
+    config.LLM_CASSETTE_MODE = ''
+    config.LLM_ENDPOINTS = [
+        {'api_key': f"bench-key-{i}", 'base_url': server.url, 'name': f"bench-{i}"}
+        for i in range(keys)
+    ]
+    config.LLM_MAX_CONCURRENCY = concurrency
+    config.LLM_STREAMING = streaming
+
+    from llm_client import get_llm_client
+    client = get_llm_client()
+    client.provider = _TimedProvider(client.provider, stats)
+    client.scheduler = _TimedScheduler(stats)
+
+
+def run_batch(analyzer: ProfileAnalyzer, profiles: List[ProfileInput], workers: int,
+              keep_results: bool) -> Dict[str, int]:
+    """Ein Durchlauf über analyze_batch"""
+    errors = []
+    counts = {'profiles_ok': 0, 'degraded_profiles': 0}
+
+    def on_result(result):
+        counts['profiles_ok'] += 1
+        if result.degraded_agents:
+            counts['degraded_profiles'] += 1
+
+    analyzer.analyze_batch(profiles, [], 'Software', max_workers=workers, errors=errors,
+                           on_result=on_result, keep_results=keep_results)
+    counts['profile_errors'] = len(errors)
+    return counts
+
+
+def start_api(analyzer: ProfileAnalyzer) -> str:
+    """Startet app_extended per uvicorn in einem Hintergrund-Thread"""
+    import uvicorn
+    import app_extended
+
+    app_extended.analyzer = analyzer
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app_extended.app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def run_api(api_url: str, profiles: List[ProfileInput], clients: int, stats: StageStats) -> Dict[str, int]:
+    """Ein Durchlauf über POST /analyze (höchstens 100 Profile pro Request)"""
+    counts = {'profiles_ok': 0, 'degraded_profiles': 0, 'profile_errors': 0, 'request_errors': 0}
+    lock = threading.Lock()
+    session = requests.Session()
+
+    def post(chunk: List[ProfileInput]):
+        body = {'profiles': [p.model_dump() for p in chunk], 'product_category': 'Software'}
+        with stats.measure('api_request'):
+            response = session.post(f"{api_url}/analyze", json=body, timeout=3600)
+        with lock:
+            if response.status_code != 200:
+                counts['request_errors'] += 1
+                counts['profile_errors'] += len(chunk)
+                return
+            data = response.json()
+            counts['profiles_ok'] += len(data['results'])
+            counts['degraded_profiles'] += sum(1 for r in data['results'] if r['degraded_agents'])
+            counts['profile_errors'] += len(data['errors'])
+
+    chunks = [profiles[i:i + 100] for i in range(0, len(profiles), 100)]
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(post, chunks))
+    return counts
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    """
+    Führt alle Durchläufe aus.
+
+    Returns:
+        Ergebnis-Dokument (JSON-serialisierbar)
+    """
+    stats = StageStats()
+    server = MockLLMServer(args.latency, args.error_rate, args.rate_limit_rate, args.rpm,
+                           args.retry_after, seed=args.seed).start()
+    configure_llm(server, args.keys, args.concurrency, args.streaming, stats)
+    analyzer = _TimedAnalyzer(stats)
+    api_url = start_api(analyzer) if args.target == 'api' else None
+
+    document = {
+        'benchmark': 'pipeline',
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'settings': {
+            key: getattr(args, key) for key in (
+                'target', 'sizes', 'workers', 'api_clients', 'concurrency', 'keys', 'streaming',
+                'latency', 'error_rate', 'rate_limit_rate', 'rpm', 'retry_after', 'keep_results', 'seed'
+            )
+        },
+        'runs': []
+    }
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    for run_index, size in enumerate(args.sizes):
+        profiles = synthetic_profiles(size, f"bench{run_index}")
+        stats.reset()
+        server.reset()
+        if args.tracemalloc:
+            tracemalloc.reset_peak()
+        rss_before = _rss_mb()
+
+        start = time.perf_counter()
+        if api_url:
+            counts = run_api(api_url, profiles, args.api_clients, stats)
+        else:
+            counts = run_batch(analyzer, profiles, args.workers, args.keep_results)
+        wall = time.perf_counter() - start
+
+        server_metrics = server.get_metrics()
+        stages = stats.summary()
+        stages['server'] = summarize(server_metrics.pop('latencies'))
+        memory = {'rss_before_mb': rss_before, 'rss_after_mb': _rss_mb(), 'peak_rss_mb': _peak_rss_mb()}
+        if args.tracemalloc:
+            memory['python_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+
+        run = {
+            'batch_size': size,
+            'wall_seconds': round(wall, 3),
+            'profiles_per_second': round(size / wall, 2) if wall else None,
+            **counts,
+            'llm': {**server_metrics, 'requests_per_profile': round(server_metrics['requests'] / size, 2)},
+            'stages': stages,
+            'memory': memory
+        }
+        document['runs'].append(run)
+        _print_run(run)
+
+    server.stop()
+    return document
+
+
+def _print_run(run: Dict[str, Any]):
+    """Kurzfassung eines Durchlaufs"""
+    stages = run['stages']
+
+    def p(stage: str, key: str) -> str:
+        value = stages.get(stage, {}).get(key)
+        return f"{value:.0f}" if value is not None else '-'
+
+    print(f"{run['batch_size']:>8} Profile  {run['wall_seconds']:>9.2f}s  {run['profiles_per_second']:>8.2f}/s  "
+          f"Profil p50/p95 {p('profile', 'p50_ms')}/{p('profile', 'p95_ms')} ms  "
+          f"LLM p95 {p('llm_request', 'p95_ms')} ms  Slot p95 {p('scheduler_wait', 'p95_ms')} ms  "
+          f"Fehler {run['profile_errors']}  Peak-RSS {run['memory']['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PCBF Benchmark: End-to-End-Durchsatz mit Mock-LLM-Server")
+    parser.add_argument('--target', choices=['batch', 'api'], default='batch',
+                        help="analyze_batch direkt oder POST /analyze über HTTP")
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')], default=[10, 100, 1000],
+                        help="Batch-Größen, kommagetrennt (z.B. 10,100,1000,10000,100000)")
+    parser.add_argument('--workers', type=int, default=5, help="Parallele Profile in analyze_batch")
+    parser.add_argument('--api-clients', type=int, default=4, help="Parallele HTTP-Clients (--target api)")
+    parser.add_argument('--concurrency', type=int, default=config.LLM_MAX_CONCURRENCY,
+                        help="Parallele LLM-Calls (LLM_MAX_CONCURRENCY)")
+    parser.add_argument('--keys', type=int, default=1, help="API-Keys im Credential-Pool")
+    parser.add_argument('--streaming', action='store_true', help="LLM-Antworten per SSE lesen")
+    parser.add_argument('--latency', default='lognormal:300:0.5', help="Latenz-Verteilung des Mock-Servers (ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Anteil HTTP 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Anteil zufälliger HTTP 429")
+    parser.add_argument('--rpm', type=int, default=0, help="Request-Limit pro Key und Minute (0 = aus)")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After bei zufälligen 429 (s)")
+    parser.add_argument('--keep-results', action='store_true',
+                        help="Ergebnisse sammeln statt nur zu streamen (Speicher wie bei der API)")
+    parser.add_argument('--tracemalloc', action='store_true', help="Python-Heap-Peak messen (langsamer)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None,
+                        help="JSON-Datei (default: benchmark-pipeline-<Zeitstempel>.json)")
+    parser.add_argument('--verbose', action='store_true', help="INFO-Logs der Pipeline ausgeben")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.ERROR)
+
+    document = run_benchmark(args)
+    output = args.output or f"benchmark-pipeline-{datetime.now():%Y%m%d-%H%M%S}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    print(f"Ergebnisse: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""
+PCBF 2.1 Framework - Mock-LLM-Server für Benchmarks
+OpenAI-kompatibler Chat-Completions-Server (lokal, HTTP) mit einstellbarer
+Latenz-Verteilung, Fehlerrate und 429-Verhalten (zufällig oder als
+Request-Limit pro Key mit Retry-After). Antworten passen zum angefragten
+JSON-Schema (siehe llm_providers.mock_content), auch als SSE-Stream.
+
+Latenz-Angaben (Millisekunden):
+    fixed:50            immer 50 ms
+    uniform:20:200      gleichverteilt zwischen 20 und 200 ms
+    lognormal:150:0.6   Log-Normal mit Median 150 ms und Sigma 0.6
+    exponential:100     exponentiell mit Mittelwert 100 ms
+
+Aufruf (eigenständig, z.B. für die API oder Worker):
+    python benchmarks/mock_llm_server.py --port 8089 --latency lognormal:300:0.5 --rpm 600
+    LLM_PROVIDER=local LLM_LOCAL_BASE_URL=http://127.0.0.1:8089/v1 python3 app_extended.py
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import threading
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import mock_content  # noqa: E402
+from prompt_budget import estimate_tokens  # noqa: E402
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latenz-Verteilung aus einer Angabe wie 'lognormal:150:0.6'.
+
+    Args:
+        spec: Verteilung und Parameter in Millisekunden (siehe Modul-Docstring)
+
+    Returns:
+        Funktion (Random) -> Latenz in Sekunden
+    """
+    name, *params = spec.split(':')
+    values = [float(p) for p in params]
+    if name == 'fixed' and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if name == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if name == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1]) / 1000
+    if name == 'exponential' and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) / 1000 if values[0] else 0.0
+    raise ValueError(f"Ungültige Latenz-Angabe: {spec}")
+
+
+class MockLLMServer:
+    """
+    Chat-Completions-Server in einem Hintergrund-Thread.
+
+    Anfragen über dem Request-Limit pro Key bzw. mit Anteil rate_limit_rate
+    enden sofort mit 429; alle anderen warten die gezogene Latenz ab und
+    enden mit 500 (error_rate) oder einer gültigen Antwort.
+    """
+
+    def __init__(self, latency: str = 'lognormal:300:0.5', error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, requests_per_minute: int = 0,
+                 retry_after: float = 1.0, host: str = '127.0.0.1', port: int = 0, seed: int = 0):
+        """
+        Args:
+            latency: Latenz-Verteilung (siehe parse_latency)
+            error_rate: Anteil der Anfragen mit HTTP 500
+            rate_limit_rate: Anteil der Anfragen mit HTTP 429 (zufällig)
+            requests_per_minute: Request-Limit pro API-Key (0 = unbegrenzt)
+            retry_after: Retry-After in Sekunden bei zufälligen 429
+            host: Bind-Adresse
+            port: Port (0 = frei wählen)
+            seed: Seed für Latenzen und Fehler
+        """
+        self.latency_spec = latency
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows: Dict[str, deque] = defaultdict(deque)
+        self.reset()
+
+        self._httpd = ThreadingHTTPServer((host, port), _MockLLMHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Basis-URL inkl. /v1"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'MockLLMServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Bedient Anfragen im aktuellen Thread (bis stop())"""
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset(self):
+        """Setzt Zähler und Latenz-Stichproben zurück"""
+        with self._lock:
+            self.counts = {'requests': 0, 'ok': 0, 'errors': 0, 'rate_limited': 0}
+            self.latencies = []
+
+    def decide(self, api_key: str):
+        """
+        Ausgang einer Anfrage.
+
+        Returns:
+            Tuple (Latenz in Sekunden, Status, Header)
+        """
+        with self._lock:
+            self.counts['requests'] += 1
+            headers = {}
+
+            if self.requests_per_minute:
+                now = time.monotonic()
+                window = self._windows[api_key]
+                while window and now - window[0] >= 60:
+                    window.popleft()
+                headers['x-ratelimit-limit-requests'] = str(self.requests_per_minute)
+                if len(window) >= self.requests_per_minute:
+                    headers['x-ratelimit-remaining-requests'] = '0'
+                    headers['Retry-After'] = str(math.ceil(60 - (now - window[0])))
+                    self.counts['rate_limited'] += 1
+                    return 0.0, 429, headers
+                window.append(now)
+                headers['x-ratelimit-remaining-requests'] = str(self.requests_per_minute - len(window))
+
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                headers['Retry-After'] = str(math.ceil(self.retry_after))
+                self.counts['rate_limited'] += 1
+                return 0.0, 429, headers
+
+            delay = self.latency(self._random)
+            self.latencies.append(delay)
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.counts['errors'] += 1
+                return delay, 500, headers
+            self.counts['ok'] += 1
+            return delay, 200, headers
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counts, 'latencies': list(self.latencies)}
+
+
+class _MockLLMHandler(BaseHTTPRequestHandler):
+    """HTTP-Handler für POST .../chat/completions"""
+
+    protocol_version = 'HTTP/1.1'
+    # Header und Body getrennt geschrieben: ohne TCP_NODELAY ~40 ms Verzögerung (Nagle + Delayed ACK)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send(404, b'{"error": "not found"}')
+            return
+
+        mock: MockLLMServer = self.server.mock
+        api_key = self.headers.get('Authorization', '').split(' ')[-1]
+        delay, status, headers = mock.decide(api_key)
+        time.sleep(delay)
+
+        if status != 200:
+            message = 'rate limited' if status == 429 else 'mock error'
+            self._send(status, json.dumps({'error': {'message': message}}).encode('utf-8'), headers)
+            return
+
+        payload = json.loads(body)
+        content = mock_content(payload)
+        prompt_tokens = sum(estimate_tokens(m['content']) for m in payload['messages'])
+        completion_tokens = estimate_tokens(content)
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+
+        if payload.get('stream'):
+            chunks = [
+                {'choices': [{'delta': {'content': content[i:i + 16]}}]}
+                for i in range(0, len(content), 16)
+            ] + [{'choices': [], 'usage': usage}]
+            data = b''.join(b'data: ' + json.dumps(chunk).encode('utf-8') + b'\n\n' for chunk in chunks)
+            self._send(200, data + b'data: [DONE]\n\n', headers, 'text/event-stream')
+        else:
+            data = json.dumps({
+                'model': payload.get('model'),
+                'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                'usage': usage
+            }).encode('utf-8')
+            self._send(200, data, headers)
+
+    def _send(self, status: int, data: bytes, headers: Optional[Dict[str, str]] = None,
+              content_type: str = 'application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="PCBF Mock-LLM-Server (OpenAI-kompatibel)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', default='lognormal:300:0.5', help="Latenz-Verteilung in ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Anteil HTTP 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Anteil zufälliger HTTP 429")
+    parser.add_argument('--rpm', type=int, default=0, help="Request-Limit pro Key und Minute (0 = aus)")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After bei zufälligen 429 (s)")
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.latency, args.error_rate, args.rate_limit_rate, args.rpm,
+                           args.retry_after, args.host, args.port)
+    print(f"Mock-LLM-Server: {server.url} (Latenz {args.latency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+PCBF 2.1 Framework - ZIP-Bundle-Export
+Streamt alle Exporte einer Analyse (flache CSV, Modell-CSVs, NDJSON der
+vollständigen Ergebnisse, Validierungs-Zusammenfassung) als eine ZIP-Datei,
+Stück für Stück aus dem Checkpoint des Laufs
+"""
+import csv
+import json
+import logging
+import zipfile
+from datetime import datetime
+from io import StringIO
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import config
+from batch_checkpoint import BatchCheckpoint
+from models import ProfileAnalysisResult
+from profile_string_generator import ProfileStringGenerator
+from validation_protocol import ValidationProtocol, ValidationReport
+
+logger = logging.getLogger(__name__)
+
+# Zeilen pro komprimiertem Schreibvorgang
+ROWS_PER_BLOCK = 500
+
+# Blockgröße beim Kopieren vorhandener Dateien
+FILE_BLOCK_BYTES = 64 * 1024
+
+
+class _StreamSink:
+    """
+    Nicht-seekbares Schreibziel für zipfile.
+
+    zipfile schreibt dann Data Descriptors statt nachträglich Header zu
+    patchen; die geschriebenen Bytes können laufend abgeholt werden.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        """Gibt alle bisher geschriebenen Bytes zurück und leert den Puffer"""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+class ValidationSummary:
+    """Aggregiert ValidationReports zu einer Zusammenfassung (ohne Einzelberichte zu halten)"""
+
+    def __init__(self):
+        self.validated = 0
+        self.score_sum = 0.0
+        self.status_counts: Dict[str, int] = {}
+        self.check_counts: Dict[str, Dict[str, int]] = {}
+        self.failed_profiles: List[str] = []
+
+    def add(self, report: ValidationReport):
+        """
+        Übernimmt einen Validierungs-Bericht.
+
+        Args:
+            report: Finalisierter ValidationReport
+        """
+        self.validated += 1
+        self.score_sum += report.score
+        self.status_counts[report.overall_status] = self.status_counts.get(report.overall_status, 0) + 1
+
+        for check in report.checks:
+            counts = self.check_counts.setdefault(check.name, {})
+            counts[check.status] = counts.get(check.status, 0) + 1
+
+        if report.overall_status == 'FAIL' and len(self.failed_profiles) < 100:
+            self.failed_profiles.append(report.profile_id)
+
+    def to_dict(self) -> Dict:
+        """Konvertiert zu Dictionary"""
+        return {
+            'validated_profiles': self.validated,
+            'average_score': round(self.score_sum / self.validated, 2) if self.validated else None,
+            'status_counts': self.status_counts,
+            'checks': self.check_counts,
+            'failed_profiles': self.failed_profiles
+        }
+
+
+def _csv_blocks(headers: List[str], rows: Iterable[List]) -> Iterator[bytes]:
+    """Serialisiert CSV-Zeilen blockweise (UTF-8)"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % ROWS_PER_BLOCK == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _flat_rows(results: Iterable[ProfileAnalysisResult], headers: List[str]) -> Iterator[List]:
+    """Flache Zeilen wie profile_string_generator.export_to_csv"""
+    for result in results:
+        flat = ProfileStringGenerator.to_flat_dict(result)
+        yield [flat[key] for key in headers]
+
+
+def _ndjson_blocks(pairs: Iterable, validator: ValidationProtocol,
+                   summary: ValidationSummary) -> Iterator[bytes]:
+    """Serialisiert vollständige Ergebnisse als NDJSON und validiert sie nebenbei"""
+    lines = []
+    for profile, result in pairs:
+        summary.add(validator.validate(profile, result))
+        lines.append(result.model_dump_json())
+
+        if len(lines) >= ROWS_PER_BLOCK:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _file_blocks(path: str) -> Iterator[bytes]:
+    """Liest eine vorhandene Datei blockweise"""
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(FILE_BLOCK_BYTES)
+            if not block:
+                return
+            yield block
+
+
+def stream_checkpoint_bundle(checkpoint: BatchCheckpoint, model_files: Dict[str, str],
+                             chunk_bytes: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Erzeugt das ZIP-Bundle einer Analyse als Byte-Stream.
+
+    Die Ergebnisse werden direkt aus dem Checkpoint gelesen und jedes
+    ZIP-Mitglied blockweise komprimiert; sobald chunk_bytes komprimierte
+    Bytes anliegen, werden sie ausgegeben. Der Speicherbedarf ist damit
+    unabhängig von der Anzahl der Profile.
+
+    Args:
+        checkpoint: Checkpoint des Laufs
+        model_files: Modell-Name -> Pfad der fertigen Modell-CSV
+        chunk_bytes: Ausgabe-Blockgröße (default: config.EXPORT_ZIP_CHUNK_BYTES)
+
+    Returns:
+        Iterator über ZIP-Bytes
+    """
+    chunk_bytes = chunk_bytes or config.EXPORT_ZIP_CHUNK_BYTES
+    run_id = checkpoint.run_id
+    sink = _StreamSink()
+    validator = ValidationProtocol()
+    summary = ValidationSummary()
+
+    def write_member(zf: zipfile.ZipFile, name: str, blocks: Iterable[bytes]) -> Iterator[bytes]:
+        with zf.open(name, 'w', force_zip64=True) as member:
+            for block in blocks:
+                member.write(block)
+                if sink.size >= chunk_bytes:
+                    yield sink.drain()
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        headers = ProfileStringGenerator.get_csv_headers()
+        yield from write_member(
+            zf, f"pcbf_{run_id}.csv",
+            _csv_blocks(headers, _flat_rows(checkpoint.iter_results(), headers))
+        )
+
+        for model, path in model_files.items():
+            yield from write_member(zf, f"pcbf_{model}_{run_id}.csv", _file_blocks(path))
+
+        yield from write_member(
+            zf, f"pcbf_{run_id}_results.ndjson",
+            _ndjson_blocks(checkpoint.iter_profile_results(), validator, summary)
+        )
+
+        validation_summary = {
+            'analysis_id': run_id,
+            'generated_at': datetime.now().isoformat(),
+            **checkpoint.status(),
+            **summary.to_dict()
+        }
+        zf.writestr(
+            f"pcbf_{run_id}_validation_summary.json",
+            json.dumps(validation_summary, ensure_ascii=False, indent=2)
+        )
+
+    logger.info(f"ZIP-Bundle für {run_id} erstellt ({summary.validated} Profile)")
+    yield sink.drain()
@@ -0,0 +1,277 @@
+"""
+PCBF 2.1 Framework - Spaltenbasierter Export (Parquet / Arrow IPC)
+Typisierter Export mit festem Schema (Spalten wie get_csv_headers),
+aufgebaut aus Spalten-Puffern und in Row Groups geschrieben
+
+Benötigt pyarrow (optional, siehe requirements.txt).
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from models import ProfileAnalysisResult
+from profile_string_generator import ProfileStringGenerator
+from purchase_intent import pi_column
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file')
+}
+
+# Spalten-Extraktoren (gleiche Werte wie ProfileStringGenerator.to_flat_dict)
+_generator = ProfileStringGenerator()
+
+COLUMN_GETTERS: Dict[str, Callable[[ProfileAnalysisResult], Any]] = {
+    # Meta
+    'profile_id': lambda r: r.profile_id,
+    'timestamp': lambda r: r.timestamp,
+    'processing_time_seconds': lambda r: r.processing_time_seconds,
+
+    # Data Quality
+    'bio_quality_score': lambda r: r.bio_quality.score,
+    'bio_word_count': lambda r: r.bio_quality.word_count,
+    'bio_category': lambda r: r.bio_quality.category,
+    'keywords_match_score': lambda r: r.keywords_match_score,
+    'overall_confidence': lambda r: r.overall_confidence,
+
+    # DISC
+    'disc_primary': lambda r: r.disc.primary_type,
+    'disc_secondary': lambda r: r.disc.secondary_type or '',
+    'disc_subtype': lambda r: r.disc.subtype,
+    'disc_archetype': lambda r: r.disc.archetype,
+    'disc_confidence': lambda r: r.disc.confidence,
+    'disc_score_d': lambda r: r.disc.scores.get('D', 0),
+    'disc_score_i': lambda r: r.disc.scores.get('I', 0),
+    'disc_score_s': lambda r: r.disc.scores.get('S', 0),
+    'disc_score_c': lambda r: r.disc.scores.get('C', 0),
+
+    # NEO
+    'neo_openness': lambda r: r.neo.dimensions.get('openness', 0),
+    'neo_conscientiousness': lambda r: r.neo.dimensions.get('conscientiousness', 0),
+    'neo_extraversion': lambda r: r.neo.dimensions.get('extraversion', 0),
+    'neo_agreeableness': lambda r: r.neo.dimensions.get('agreeableness', 0),
+    'neo_neuroticism': lambda r: r.neo.dimensions.get('neuroticism', 0),
+    'neo_confidence': lambda r: r.neo.confidence,
+
+    # RIASEC
+    'riasec_holland_code': lambda r: r.riasec.holland_code,
+    'riasec_primary': lambda r: r.riasec.primary,
+    'riasec_confidence': lambda r: r.riasec.confidence,
+    'riasec_source': lambda r: r.riasec.source,
+    'riasec_score_r': lambda r: r.riasec.scores.get('R', 0),
+    'riasec_score_i': lambda r: r.riasec.scores.get('I', 0),
+    'riasec_score_a': lambda r: r.riasec.scores.get('A', 0),
+    'riasec_score_s': lambda r: r.riasec.scores.get('S', 0),
+    'riasec_score_e': lambda r: r.riasec.scores.get('E', 0),
+    'riasec_score_c': lambda r: r.riasec.scores.get('C', 0),
+
+    # Persuasion
+    'persuasion_primary': lambda r: r.persuasion.primary,
+    'persuasion_confidence': lambda r: r.persuasion.confidence,
+    'persuasion_authority': lambda r: r.persuasion.scores.get('authority', 0),
+    'persuasion_social_proof': lambda r: r.persuasion.scores.get('social_proof', 0),
+    'persuasion_scarcity': lambda r: r.persuasion.scores.get('scarcity', 0),
+    'persuasion_reciprocity': lambda r: r.persuasion.scores.get('reciprocity', 0),
+    'persuasion_consistency': lambda r: r.persuasion.scores.get('consistency', 0),
+    'persuasion_liking': lambda r: r.persuasion.scores.get('liking', 0),
+    'persuasion_unity': lambda r: r.persuasion.scores.get('unity', 0),
+
+    # Purchase Intent
+    'purchase_intent_score': lambda r: r.purchase_intent.score,
+    'purchase_intent_category': lambda r: r.purchase_intent.category,
+    **{
+        pi_column(category): (lambda r, c=category: r.purchase_intent.category_scores.get(c))
+        for category in config.PURCHASE_INTENT_PRODUCT_MAPPING
+    },
+
+    # Communication Strategy
+    'comm_style': lambda r: r.communication_strategy.style,
+    'comm_tone': lambda r: r.communication_strategy.tone,
+    'comm_content_focus': lambda r: r.communication_strategy.content_focus,
+    'comm_persuasion_approach': lambda r: r.communication_strategy.persuasion_approach,
+
+    # Warnings
+    'warnings_count': lambda r: len(r.warnings),
+    'has_critical_warnings': lambda r: any(w.level == 'critical' for w in r.warnings),
+
+    # Profil-Strings
+    'profile_string_compact': lambda r: _generator.generate_compact_string(r),
+    'profile_string_detailed': lambda r: _generator.generate_detailed_string(r)
+}
+
+_INT_COLUMNS = {'bio_word_count', 'warnings_count'}
+_BOOL_COLUMNS = {'has_critical_warnings'}
+_STRING_COLUMNS = {
+    'profile_id', 'bio_category', 'disc_primary', 'disc_secondary', 'disc_subtype',
+    'disc_archetype', 'riasec_holland_code', 'riasec_primary', 'riasec_source',
+    'persuasion_primary', 'purchase_intent_category', 'comm_style', 'comm_tone',
+    'comm_content_focus', 'comm_persuasion_approach',
+    'profile_string_compact', 'profile_string_detailed'
+}
+
+
+def _require_pyarrow():
+    """Importiert pyarrow (optionale Abhängigkeit)"""
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise ImportError("Parquet/Arrow-Export benötigt pyarrow (pip install pyarrow)")
+
+
+def get_arrow_schema():
+    """
+    Festes Arrow-Schema des Exports (Spalten-Reihenfolge wie get_csv_headers).
+
+    Returns:
+        pyarrow.Schema
+    """
+    pa = _require_pyarrow()
+
+    fields = []
+    for name in ProfileStringGenerator.get_csv_headers():
+        if name == 'timestamp':
+            arrow_type = pa.timestamp('us')
+        elif name in _INT_COLUMNS:
+            arrow_type = pa.int64()
+        elif name in _BOOL_COLUMNS:
+            arrow_type = pa.bool_()
+        elif name in _STRING_COLUMNS:
+            arrow_type = pa.string()
+        else:
+            arrow_type = pa.float64()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+class ColumnarResultWriter:
+    """
+    Schreibt Ergebnisse spaltenweise als Parquet- oder Arrow-IPC-Datei.
+
+    Werte werden in Spalten-Puffern gesammelt und je row_group_size
+    Ergebnisse als Row Group (bzw. Record Batch) geschrieben, sodass
+    Ergebnisse direkt beim Eintreffen exportiert werden können.
+    """
+
+    def __init__(self, output_file: str, format: str = 'parquet',
+                 row_group_size: Optional[int] = None):
+        """
+        Args:
+            output_file: Pfad zur Output-Datei
+            format: 'parquet' oder 'arrow'
+            row_group_size: Ergebnisse pro Row Group (default: config.EXPORT_ROW_GROUP_SIZE)
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unbekanntes Export-Format: {format}")
+
+        pa = _require_pyarrow()
+        self.output_file = output_file
+        self.format = format
+        self.row_group_size = row_group_size or config.EXPORT_ROW_GROUP_SIZE
+        self.schema = get_arrow_schema()
+        self.rows_written = 0
+
+        missing = set(self.schema.names) - set(COLUMN_GETTERS)
+        if missing:
+            raise ValueError(f"Kein Spalten-Extraktor für: {sorted(missing)}")
+
+        self._buffers: Dict[str, List[Any]] = {name: [] for name in self.schema.names}
+        self._getters = [(COLUMN_GETTERS[name], self._buffers[name]) for name in self.schema.names]
+
+        if format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(output_file, self.schema, compression='zstd')
+        else:
+            import pyarrow.ipc as ipc
+            self._sink = pa.OSFile(output_file, 'wb')
+            self._writer = ipc.new_file(self._sink, self.schema)
+
+    def write(self, result: ProfileAnalysisResult):
+        """
+        Übernimmt ein Ergebnis in die Spalten-Puffer.
+
+        Args:
+            result: Analyse-Ergebnis
+        """
+        for getter, buffer in self._getters:
+            buffer.append(getter(result))
+
+        if len(self._buffers['profile_id']) >= self.row_group_size:
+            self._flush()
+
+    def write_all(self, results: List[ProfileAnalysisResult]):
+        """Übernimmt mehrere Ergebnisse"""
+        for result in results:
+            self.write(result)
+
+    def _flush(self):
+        """Schreibt die gepufferten Zeilen als Row Group"""
+        rows = len(self._buffers['profile_id'])
+        if not rows:
+            return
+
+        pa = _require_pyarrow()
+        batch = pa.record_batch(
+            [pa.array(self._buffers[field.name], type=field.type) for field in self.schema],
+            schema=self.schema
+        )
+        self._writer.write_batch(batch)
+        self.rows_written += rows
+
+        for buffer in self._buffers.values():
+            buffer.clear()
+
+    def close(self) -> str:
+        """
+        Schreibt verbleibende Zeilen und schließt die Datei.
+
+        Returns:
+            Pfad zur erstellten Datei
+        """
+        self._flush()
+        self._writer.close()
+        if self.format == 'arrow':
+            self._sink.close()
+
+        logger.info(f"{self.format}-Export abgeschlossen: {self.output_file} ({self.rows_written} Profile)")
+        return self.output_file
+
+    def __enter__(self) -> 'ColumnarResultWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_to_parquet(results: List[ProfileAnalysisResult], output_file: str) -> str:
+    """
+    Exportiert Analyse-Ergebnisse als Parquet-Datei.
+
+    Args:
+        results: Liste von ProfileAnalysisResult
+        output_file: Pfad zur Output-Datei
+
+    Returns:
+        Pfad zur erstellten Datei
+    """
+    with ColumnarResultWriter(output_file, 'parquet') as writer:
+        writer.write_all(results)
+    return output_file
+
+
+def export_to_arrow(results: List[ProfileAnalysisResult], output_file: str) -> str:
+    """
+    Exportiert Analyse-Ergebnisse als Arrow-IPC-Datei.
+
+    Args:
+        results: Liste von ProfileAnalysisResult
+        output_file: Pfad zur Output-Datei
+
+    Returns:
+        Pfad zur erstellten Datei
+    """
+    with ColumnarResultWriter(output_file, 'arrow') as writer:
+        writer.write_all(results)
+    return output_file
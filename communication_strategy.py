@@ -2,7 +2,7 @@
 PCBF 2.1 Framework - Communication Strategy Generator
 """
 import logging
-from typing import Optional
+from typing import Callable, Dict, Optional
 from models import (
     DISCResult, NEOResult, RIASECResult, PersuasionResult,
     CommunicationStrategy
@@ -15,13 +15,37 @@ logger = logging.getLogger(__name__)
 class CommunicationStrategyGenerator:
     """Generiert personalisierte Kommunikationsstrategien"""
     
+    SYSTEM_PROMPT = """Du bist ein Experte für personalisierte B2B-Kommunikation.
+Erstelle eine personalisierte Outreach-Nachricht basierend auf dem psychologischen Profil des Empfängers.
+
+Die Nachricht sollte:
+- Kurz und prägnant sein (max. 150 Wörter)
+- Professionell und authentisch wirken
+- Auf die Persönlichkeit des Empfängers zugeschnitten sein
+- Einen klaren Call-to-Action enthalten
+
+Gib deine Nachricht als JSON zurück:
+{
+  "subject_line": "Betreffzeile (max. 60 Zeichen)",
+  "message_body": "Nachrichtentext",
+  "call_to_action": "Call-to-Action"
+}"""
+    
+    RESPONSE_SHAPE = {
+        'subject_line': str,
+        'message_body': str,
+        'call_to_action': str
+    }
+    
     def __init__(self):
         self.llm_client = get_llm_client()
     
     def generate(self, disc: DISCResult, neo: NEOResult, riasec: RIASECResult,
                  persuasion: PersuasionResult, product_category: str,
                  full_name: Optional[str] = None,
-                 company_name: Optional[str] = None) -> CommunicationStrategy:
+                 company_name: Optional[str] = None,
+                 on_message_delta: Optional[Callable[[Dict[str, str]], None]] = None,
+                 use_llm: bool = True) -> CommunicationStrategy:
         """
         Generiert personalisierte Kommunikationsstrategie.
         
@@ -33,9 +57,17 @@ class CommunicationStrategyGenerator:
             product_category: Produkt-Kategorie
             full_name: Name des Empfängers (optional)
             company_name: Unternehmensname (optional)
+            on_message_delta: Callback für progressives Rendern (optional).
+                Erhält bei jedem Streaming-Delta die bisherigen Texte von
+                subject_line, message_body und call_to_action.
+            use_llm: LLM-Nachricht generieren (False = Fallback-Vorlagen)
             
         Returns:
             CommunicationStrategy mit personalisierten Nachrichten
+            
+        Raises:
+            LLMUnavailableError: LLM-API nicht erreichbar
+            LLMResponseError: LLM-Antwort auch nach Reparatur ungültig
         """
         logger.info("Communication Strategy Generierung gestartet")
         
@@ -52,11 +84,13 @@ class CommunicationStrategyGenerator:
         persuasion_approach = self._determine_persuasion_approach(persuasion)
         
         # LLM-basierte Nachrichtengenerierung
-        message_result = self._generate_message(
-            style, tone, content_focus, persuasion_approach,
-            product_category, full_name, company_name,
-            disc, neo, riasec, persuasion
-        )
+        message_result = None
+        if use_llm:
+            message_result = self._generate_message(
+                style, tone, content_focus, persuasion_approach,
+                product_category, full_name, company_name,
+                disc, neo, riasec, persuasion, on_message_delta
+            )
         
         if message_result:
             subject_line = message_result.get('subject_line', '')
@@ -64,7 +98,8 @@ class CommunicationStrategyGenerator:
             call_to_action = message_result.get('call_to_action', '')
         else:
             # Fallback
-            logger.warning("LLM-Nachrichtengenerierung fehlgeschlagen - verwende Fallback")
+            if use_llm:
+                logger.warning("LLM-Nachrichtengenerierung fehlgeschlagen - verwende Fallback")
             subject_line = self._fallback_subject(style, product_category)
             message_body = self._fallback_message(style, tone, content_focus, product_category, full_name)
             call_to_action = self._fallback_cta(style)
@@ -135,25 +170,10 @@ class CommunicationStrategyGenerator:
                          persuasion_approach: str, product_category: str,
                          full_name: Optional[str], company_name: Optional[str],
                          disc: DISCResult, neo: NEOResult, riasec: RIASECResult,
-                         persuasion: PersuasionResult) -> Optional[dict]:
+                         persuasion: PersuasionResult,
+                         on_message_delta: Optional[Callable[[Dict[str, str]], None]] = None) -> Optional[dict]:
         """LLM-basierte Nachrichtengenerierung"""
         
-        system_prompt = """Du bist ein Experte für personalisierte B2B-Kommunikation.
-Erstelle eine personalisierte Outreach-Nachricht basierend auf dem psychologischen Profil des Empfängers.
-
-Die Nachricht sollte:
-- Kurz und prägnant sein (max. 150 Wörter)
-- Professionell und authentisch wirken
-- Auf die Persönlichkeit des Empfängers zugeschnitten sein
-- Einen klaren Call-to-Action enthalten
-
-Gib deine Nachricht als JSON zurück:
-{
-  "subject_line": "Betreffzeile (max. 60 Zeichen)",
-  "message_body": "Nachrichtentext",
-  "call_to_action": "Call-to-Action"
-}"""
-        
         recipient = full_name if full_name else "dem Empfänger"
         company = f" bei {company_name}" if company_name else ""
         
@@ -178,12 +198,21 @@ Erstelle eine Nachricht, die:
 
 Gib Betreffzeile, Nachrichtentext und CTA als JSON zurück."""
         
-        response = self.llm_client.call(prompt, system_prompt, temperature=0.7, max_tokens=1000)
+        on_delta = None
+        if on_message_delta:
+            def on_delta(delta, parser):
+                partial = {}
+                for field in self.RESPONSE_SHAPE:
+                    text = parser.partial_string_value(field)
+                    if text is not None:
+                        partial[field] = text
+                on_message_delta(partial)
         
-        if response['success']:
-            return self.llm_client.parse_json_response(response)
-        
-        return None
+        return self.llm_client.call_json(
+            prompt, self.SYSTEM_PROMPT, self.RESPONSE_SHAPE,
+            schema_name='outreach_message', temperature=0.7, max_tokens=1000,
+            on_delta=on_delta, raise_on_error=True
+        )
     
     def _fallback_subject(self, style: str, product_category: str) -> str:
         """Fallback-Betreffzeile"""
@@ -0,0 +1,553 @@
+"""
+PCBF 2.1 Framework - Kompakte Ergebnis-Batches
+Speichert große Mengen ProfileAnalysisResults spaltenweise in NumPy-Arrays
+(Scores), internierten Codes (Kategorien) und einem auslagerbaren
+Text-Store (Begründungen, Nachrichten); Ergebnisse werden erst beim
+Zugriff wieder als ProfileAnalysisResult materialisiert
+"""
+import json
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+import config
+from models import (
+    ProfileAnalysisResult, BioQualityResult, DISCResult, NEOResult, RIASECResult,
+    PersuasionResult, EnneagramResult, PurchaseIntentResult, CommunicationStrategy,
+    WarningMessage
+)
+from purchase_intent import RIASEC_TYPES
+
+logger = logging.getLogger(__name__)
+
+DISC_KEYS = ['D', 'I', 'S', 'C']
+NEO_KEYS = ['openness', 'conscientiousness', 'extraversion', 'agreeableness', 'neuroticism']
+PERSUASION_KEYS = ['authority', 'social_proof', 'scarcity', 'reciprocity', 'consistency', 'liking', 'unity']
+PI_FACTOR_KEYS = ['DISC', 'NEO', 'Persuasion', 'Enneagram', 'RIASEC', 'Behavior', 'Data_Quality']
+
+# Kategoriale Spalten (internierte Codes)
+CATEGORICAL_COLUMNS = [
+    'disc_primary', 'disc_secondary', 'disc_subtype', 'disc_archetype',
+    'riasec_holland_code', 'riasec_primary', 'riasec_source', 'persuasion_primary',
+    'pi_category', 'bio_category', 'comm_style', 'comm_tone', 'comm_content_focus',
+    'comm_persuasion_approach', 'degraded_agents', 'warnings', 'enneagram'
+]
+
+# Freitext-Spalten (Text-Store)
+TEXT_COLUMNS = [
+    'disc_reasoning', 'neo_reasoning', 'riasec_reasoning', 'persuasion_reasoning',
+    'pi_reasoning', 'subject_line', 'message_body', 'call_to_action',
+    'profile_string', 'input_fingerprint', 'overflow'
+]
+
+
+class SpillableTextStore:
+    """
+    Append-only Store für Freitexte.
+
+    Texte liegen zunächst im Speicher; überschreitet ihre Größe
+    spill_threshold_bytes, werden sie in eine temporäre Datei ausgelagert
+    und beim Zugriff per Offset gelesen.
+    """
+
+    _IN_MEMORY = -1
+    _NONE = -2
+
+    def __init__(self, spill_threshold_bytes: Optional[int] = None):
+        """
+        Args:
+            spill_threshold_bytes: Speicher-Grenze für Texte (default: config.COMPACT_TEXT_SPILL_BYTES)
+        """
+        self.spill_threshold_bytes = spill_threshold_bytes or config.COMPACT_TEXT_SPILL_BYTES
+        self._texts: Dict[int, str] = {}
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        self._memory_bytes = 0
+        self._file = None
+        self._file_size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Größe der im Speicher gehaltenen Texte (UTF-8)"""
+        return self._memory_bytes
+
+    @property
+    def spilled_bytes(self) -> int:
+        """Größe der ausgelagerten Texte"""
+        return self._file_size
+
+    def append(self, text: Optional[str]) -> int:
+        """
+        Speichert einen Text.
+
+        Args:
+            text: Text (oder None)
+
+        Returns:
+            Text-ID
+        """
+        text_id = len(self._offsets)
+        if text is None:
+            self._offsets.append(self._NONE)
+            self._lengths.append(0)
+            return text_id
+
+        self._texts[text_id] = text
+        self._offsets.append(self._IN_MEMORY)
+        self._lengths.append(0)
+        self._memory_bytes += len(text.encode('utf-8'))
+
+        if self._memory_bytes > self.spill_threshold_bytes:
+            self.spill()
+        return text_id
+
+    def get(self, text_id: int) -> Optional[str]:
+        """
+        Liest einen Text.
+
+        Args:
+            text_id: Text-ID
+
+        Returns:
+            Text (oder None)
+        """
+        with self._lock:
+            offset = self._offsets[text_id]
+            if offset == self._NONE:
+                return None
+            if offset == self._IN_MEMORY:
+                return self._texts[text_id]
+
+            self._file.seek(offset)
+            data = self._file.read(self._lengths[text_id])
+        return data.decode('utf-8')
+
+    def spill(self):
+        """Lagert alle Texte im Speicher in die temporäre Datei aus"""
+        if not self._texts:
+            return
+
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix='pcbf_texts_')
+            self._file.seek(self._file_size)
+
+            for text_id, text in self._texts.items():
+                data = text.encode('utf-8')
+                self._file.write(data)
+                self._offsets[text_id] = self._file_size
+                self._lengths[text_id] = len(data)
+                self._file_size += len(data)
+
+            self._file.flush()
+            logger.debug(f"Text-Store: {len(self._texts)} Texte ausgelagert ({self._memory_bytes} Bytes)")
+            self._texts = {}
+            self._memory_bytes = 0
+
+    def close(self):
+        """Schließt (und löscht) die temporäre Datei"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class _Interner:
+    """Bildet wiederkehrende Werte auf fortlaufende Codes ab"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+
+    def code(self, value: Any) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class CompactResultBatch:
+    """
+    Spaltenbasierter Container für viele ProfileAnalysisResults.
+
+    - Scores fester Dimension (4 DISC, 5 NEO, 6 RIASEC, 7 Persuasion,
+      PI-Faktoren/-Kategorien, Confidences) als zusammenhängende
+      float64-Arrays
+    - Kategoriale Werte (Typen, Archetypen, Stile, Warnungen) als
+      internierte uint32-Codes
+    - Freitexte im SpillableTextStore
+
+    Score-Dictionaries mit abweichenden Keys werden verlustfrei als JSON
+    im Text-Store abgelegt. batch[i] materialisiert ein
+    ProfileAnalysisResult, batch[a:b] liefert eine lazy View.
+    """
+
+    def __init__(self, capacity: int = 1024, spill_threshold_bytes: Optional[int] = None):
+        """
+        Args:
+            capacity: Initiale Kapazität (wächst bei Bedarf)
+            spill_threshold_bytes: Speicher-Grenze des Text-Stores
+        """
+        self.categories = list(config.PURCHASE_INTENT_PRODUCT_MAPPING.keys())
+        self._size = 0
+        self._capacity = max(1, capacity)
+
+        self._columns: Dict[str, np.ndarray] = {}
+        for name, dtype, width in self._column_specs():
+            shape = (self._capacity, width) if width else (self._capacity,)
+            self._columns[name] = np.zeros(shape, dtype=dtype)
+
+        self.profile_ids: List[str] = []
+        self._interners = {name: _Interner() for name in CATEGORICAL_COLUMNS}
+        self.texts = SpillableTextStore(spill_threshold_bytes)
+
+    def _column_specs(self) -> List[Tuple[str, Any, int]]:
+        """(Name, dtype, Breite) aller Array-Spalten (Breite 0 = 1D)"""
+        return [
+            ('disc_scores', np.float64, len(DISC_KEYS)),
+            ('neo_dimensions', np.float64, len(NEO_KEYS)),
+            ('riasec_scores', np.float64, len(RIASEC_TYPES)),
+            ('persuasion_scores', np.float64, len(PERSUASION_KEYS)),
+            ('pi_factors', np.float64, len(PI_FACTOR_KEYS)),
+            ('pi_category_scores', np.float64, len(self.categories)),
+            # disc, neo, riasec, persuasion
+            ('confidences', np.float64, 4),
+            ('pi_score', np.float64, 0),
+            ('bio_quality_score', np.float64, 0),
+            ('keywords_match_score', np.float64, 0),
+            ('overall_confidence', np.float64, 0),
+            ('processing_time_seconds', np.float64, 0),
+            # word_count, emoji_count
+            ('bio_counts', np.int32, 2),
+            # has_job_title, has_company, has_structure
+            ('bio_flags', np.bool_, 3),
+            ('api_calls_made', np.int32, 0),
+            ('timestamp', 'datetime64[us]', 0),
+            ('codes', np.uint32, len(CATEGORICAL_COLUMNS)),
+            ('text_ids', np.int64, len(TEXT_COLUMNS))
+        ]
+
+    @classmethod
+    def from_results(cls, results: Iterable[ProfileAnalysisResult], **kwargs) -> 'CompactResultBatch':
+        """
+        Baut einen Batch aus Ergebnissen.
+
+        Args:
+            results: ProfileAnalysisResults (auch Generator)
+
+        Returns:
+            CompactResultBatch
+        """
+        batch = cls(**kwargs)
+        batch.extend(results)
+        return batch
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self):
+        """Verdoppelt die Kapazität aller Array-Spalten"""
+        self._capacity *= 2
+        for name, array in self._columns.items():
+            grown = np.zeros((self._capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._columns[name] = grown
+
+    def append(self, result: ProfileAnalysisResult) -> int:
+        """
+        Übernimmt ein Ergebnis in den Batch.
+
+        Args:
+            result: Analyse-Ergebnis
+
+        Returns:
+            Index im Batch
+        """
+        if self._size == self._capacity:
+            self._grow()
+
+        i = self._size
+        c = self._columns
+        overflow = {}
+
+        c['disc_scores'][i] = self._pack(result.disc.scores, DISC_KEYS, 'disc.scores', overflow)
+        c['neo_dimensions'][i] = self._pack(result.neo.dimensions, NEO_KEYS, 'neo.dimensions', overflow)
+        c['riasec_scores'][i] = self._pack(result.riasec.scores, RIASEC_TYPES, 'riasec.scores', overflow)
+        c['persuasion_scores'][i] = self._pack(
+            result.persuasion.scores, PERSUASION_KEYS, 'persuasion.scores', overflow
+        )
+        c['pi_factors'][i] = self._pack(
+            result.purchase_intent.contributing_factors, PI_FACTOR_KEYS, 'pi.contributing_factors', overflow
+        )
+        c['pi_category_scores'][i] = self._pack(
+            result.purchase_intent.category_scores, self.categories, 'pi.category_scores', overflow
+        )
+        c['confidences'][i] = (
+            result.disc.confidence, result.neo.confidence,
+            result.riasec.confidence, result.persuasion.confidence
+        )
+
+        c['pi_score'][i] = result.purchase_intent.score
+        c['bio_quality_score'][i] = result.bio_quality.score
+        c['keywords_match_score'][i] = result.keywords_match_score
+        c['overall_confidence'][i] = result.overall_confidence
+        c['processing_time_seconds'][i] = (
+            np.nan if result.processing_time_seconds is None else result.processing_time_seconds
+        )
+        c['bio_counts'][i] = (result.bio_quality.word_count, result.bio_quality.emoji_count)
+        c['bio_flags'][i] = (
+            result.bio_quality.has_job_title, result.bio_quality.has_company, result.bio_quality.has_structure
+        )
+        c['api_calls_made'][i] = -1 if result.api_calls_made is None else result.api_calls_made
+        c['timestamp'][i] = np.datetime64(result.timestamp, 'us')
+
+        comm = result.communication_strategy
+        categorical = {
+            'disc_primary': result.disc.primary_type,
+            'disc_secondary': result.disc.secondary_type,
+            'disc_subtype': result.disc.subtype,
+            'disc_archetype': result.disc.archetype,
+            'riasec_holland_code': result.riasec.holland_code,
+            'riasec_primary': result.riasec.primary,
+            'riasec_source': result.riasec.source,
+            'persuasion_primary': result.persuasion.primary,
+            'pi_category': result.purchase_intent.category,
+            'bio_category': result.bio_quality.category,
+            'comm_style': comm.style,
+            'comm_tone': comm.tone,
+            'comm_content_focus': comm.content_focus,
+            'comm_persuasion_approach': comm.persuasion_approach,
+            'degraded_agents': tuple(result.degraded_agents),
+            'warnings': json.dumps([w.model_dump() for w in result.warnings], ensure_ascii=False),
+            'enneagram': result.enneagram.model_dump_json() if result.enneagram else None
+        }
+        c['codes'][i] = [self._interners[name].code(categorical[name]) for name in CATEGORICAL_COLUMNS]
+
+        texts = {
+            'disc_reasoning': result.disc.reasoning,
+            'neo_reasoning': result.neo.reasoning,
+            'riasec_reasoning': result.riasec.reasoning,
+            'persuasion_reasoning': result.persuasion.reasoning,
+            'pi_reasoning': result.purchase_intent.reasoning,
+            'subject_line': comm.subject_line,
+            'message_body': comm.message_body,
+            'call_to_action': comm.call_to_action,
+            'profile_string': result.profile_string,
+            'input_fingerprint': result.input_fingerprint,
+            'overflow': json.dumps(overflow, ensure_ascii=False) if overflow else None
+        }
+        c['text_ids'][i] = [self.texts.append(texts[name]) for name in TEXT_COLUMNS]
+
+        self.profile_ids.append(result.profile_id)
+        self._size += 1
+        return i
+
+    def extend(self, results: Iterable[ProfileAnalysisResult]):
+        """Übernimmt mehrere Ergebnisse"""
+        for result in results:
+            self.append(result)
+
+    @staticmethod
+    def _pack(scores: Dict[str, float], keys: List[str], path: str,
+              overflow: Dict[str, Dict[str, float]]) -> List[float]:
+        """Score-Dictionary als Array-Zeile (abweichende Keys -> Overflow-JSON)"""
+        if len(scores) != len(keys) or any(key not in scores for key in keys):
+            overflow[path] = scores
+            return [np.nan] * len(keys)
+        return [scores[key] for key in keys]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Gibt eine Array-Spalte zurück (View, ohne Kopie).
+
+        Args:
+            name: Spaltenname (z.B. 'pi_score', 'riasec_scores')
+
+        Returns:
+            NumPy-Array mit len(self) Zeilen
+        """
+        return self._columns[name][:self._size]
+
+    def categorical(self, name: str, index: int) -> Any:
+        """Dekodierter Wert einer kategorialen Spalte"""
+        code = self._columns['codes'][index, CATEGORICAL_COLUMNS.index(name)]
+        return self._interners[name].values[code]
+
+    def text(self, name: str, index: int) -> Optional[str]:
+        """Freitext einer Zeile"""
+        return self.texts.get(int(self._columns['text_ids'][index, TEXT_COLUMNS.index(name)]))
+
+    def degraded_agents(self) -> Dict[str, List[str]]:
+        """Profil-ID -> degradierte Agenten (nur betroffene Profile)"""
+        column = CATEGORICAL_COLUMNS.index('degraded_agents')
+        values = self._interners['degraded_agents'].values
+        return {
+            self.profile_ids[i]: list(values[code])
+            for i, code in enumerate(self._columns['codes'][:self._size, column])
+            if values[code]
+        }
+
+    def materialize(self, index: int) -> ProfileAnalysisResult:
+        """
+        Baut das ProfileAnalysisResult einer Zeile.
+
+        Args:
+            index: Index im Batch
+
+        Returns:
+            ProfileAnalysisResult
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+
+        c = self._columns
+        codes = c['codes'][index]
+        text_ids = c['text_ids'][index]
+
+        def cat(name):
+            return self._interners[name].values[codes[CATEGORICAL_COLUMNS.index(name)]]
+
+        def txt(name):
+            return self.texts.get(int(text_ids[TEXT_COLUMNS.index(name)]))
+
+        overflow_json = txt('overflow')
+        overflow = json.loads(overflow_json) if overflow_json else {}
+
+        def unpack(column, keys, path):
+            if path in overflow:
+                return overflow[path]
+            return dict(zip(keys, c[column][index].tolist()))
+
+        confidences = c['confidences'][index].tolist()
+        bio_counts = c['bio_counts'][index].tolist()
+        bio_flags = c['bio_flags'][index].tolist()
+        processing_time = float(c['processing_time_seconds'][index])
+        api_calls = int(c['api_calls_made'][index])
+        enneagram = cat('enneagram')
+
+        return ProfileAnalysisResult(
+            profile_id=self.profile_ids[index],
+            timestamp=c['timestamp'][index].item(),
+            bio_quality=BioQualityResult(
+                score=float(c['bio_quality_score'][index]),
+                word_count=bio_counts[0],
+                has_job_title=bio_flags[0],
+                has_company=bio_flags[1],
+                has_structure=bio_flags[2],
+                emoji_count=bio_counts[1],
+                category=cat('bio_category')
+            ),
+            keywords_match_score=float(c['keywords_match_score'][index]),
+            overall_confidence=float(c['overall_confidence'][index]),
+            disc=DISCResult(
+                primary_type=cat('disc_primary'),
+                secondary_type=cat('disc_secondary'),
+                subtype=cat('disc_subtype'),
+                archetype=cat('disc_archetype'),
+                scores=unpack('disc_scores', DISC_KEYS, 'disc.scores'),
+                confidence=confidences[0],
+                reasoning=txt('disc_reasoning')
+            ),
+            neo=NEOResult(
+                dimensions=unpack('neo_dimensions', NEO_KEYS, 'neo.dimensions'),
+                confidence=confidences[1],
+                reasoning=txt('neo_reasoning')
+            ),
+            riasec=RIASECResult(
+                holland_code=cat('riasec_holland_code'),
+                scores=unpack('riasec_scores', RIASEC_TYPES, 'riasec.scores'),
+                primary=cat('riasec_primary'),
+                confidence=confidences[2],
+                source=cat('riasec_source'),
+                reasoning=txt('riasec_reasoning')
+            ),
+            persuasion=PersuasionResult(
+                scores=unpack('persuasion_scores', PERSUASION_KEYS, 'persuasion.scores'),
+                primary=cat('persuasion_primary'),
+                confidence=confidences[3],
+                reasoning=txt('persuasion_reasoning')
+            ),
+            enneagram=EnneagramResult.model_validate_json(enneagram) if enneagram else None,
+            purchase_intent=PurchaseIntentResult(
+                score=float(c['pi_score'][index]),
+                category=cat('pi_category'),
+                contributing_factors=unpack('pi_factors', PI_FACTOR_KEYS, 'pi.contributing_factors'),
+                reasoning=txt('pi_reasoning'),
+                category_scores=unpack('pi_category_scores', self.categories, 'pi.category_scores')
+            ),
+            communication_strategy=CommunicationStrategy(
+                style=cat('comm_style'),
+                tone=cat('comm_tone'),
+                content_focus=cat('comm_content_focus'),
+                persuasion_approach=cat('comm_persuasion_approach'),
+                subject_line=txt('subject_line'),
+                message_body=txt('message_body'),
+                call_to_action=txt('call_to_action')
+            ),
+            warnings=[WarningMessage(**w) for w in json.loads(cat('warnings'))],
+            processing_time_seconds=None if np.isnan(processing_time) else processing_time,
+            api_calls_made=None if api_calls < 0 else api_calls,
+            degraded_agents=list(cat('degraded_agents')),
+            input_fingerprint=txt('input_fingerprint'),
+            profile_string=txt('profile_string')
+        )
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[ProfileAnalysisResult, 'CompactResultView']:
+        if isinstance(key, slice):
+            return CompactResultView(self, range(*key.indices(self._size)))
+        return self.materialize(key)
+
+    def __iter__(self) -> Iterator[ProfileAnalysisResult]:
+        for index in range(self._size):
+            yield self.materialize(index)
+
+    def select(self, indices: Sequence[int]) -> 'CompactResultView':
+        """Lazy View auf ausgewählte Zeilen"""
+        return CompactResultView(self, indices)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Speicherverbrauch des Batches.
+
+        Returns:
+            Dictionary mit Bytes für Arrays, Text-Store (Speicher/ausgelagert)
+        """
+        return {
+            'arrays_bytes': sum(array[:self._size].nbytes for array in self._columns.values()),
+            'text_memory_bytes': self.texts.memory_bytes,
+            'text_spilled_bytes': self.texts.spilled_bytes,
+            'interned_values': sum(len(i.values) for i in self._interners.values())
+        }
+
+    def close(self):
+        """Gibt ausgelagerte Texte frei"""
+        self.texts.close()
+
+
+class CompactResultView:
+    """Lazy View auf Zeilen eines CompactResultBatch (materialisiert beim Zugriff)"""
+
+    def __init__(self, batch: CompactResultBatch, indices: Sequence[int]):
+        self.batch = batch
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, position: int) -> ProfileAnalysisResult:
+        return self.batch.materialize(self.indices[position])
+
+    def __iter__(self) -> Iterator[ProfileAnalysisResult]:
+        for index in self.indices:
+            yield self.batch.materialize(index)
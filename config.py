@@ -2,13 +2,53 @@
 PCBF 2.1 Framework - Konfigurationsdatei
 """
 import os
+import json
 from typing import Dict, List
 
 # API-Konfiguration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Credential-Pool: mehrere Keys (kommagetrennt) oder Endpunkte mit eigenen Limits, z.B.
+# [{"api_key": "...", "base_url": "...", "requests_per_minute": 500, "tokens_per_minute": 0, "weight": 1}]
+OPENROUTER_API_KEYS = [key.strip() for key in os.getenv("OPENROUTER_API_KEYS", "").split(",") if key.strip()]
+LLM_ENDPOINTS: List[Dict] = json.loads(os.getenv("LLM_ENDPOINTS", "[]"))
+LLM_KEY_REQUESTS_PER_MINUTE = int(os.getenv("LLM_KEY_REQUESTS_PER_MINUTE", "0"))  # 0 = unbekannt
+LLM_KEY_TOKENS_PER_MINUTE = int(os.getenv("LLM_KEY_TOKENS_PER_MINUTE", "0"))
+LLM_KEY_RATE_LIMIT_COOLDOWN_SECONDS = 10  # nach 429, verdoppelt bei Wiederholung
+LLM_KEY_UNAUTHORIZED_COOLDOWN_SECONDS = 600  # nach 401/403
 DEFAULT_MODEL = "gpt-4.1-mini"
 
+# LLM-Provider: 'openrouter'/'openai' (OpenAI-kompatibel, Credential-Pool),
+# 'local' (lokaler OpenAI-kompatibler Server, z.B. llama.cpp/vLLM), 'mock' (offline, deterministisch)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openrouter")
+# Abweichender Provider je Prioritätsklasse, z.B. Bulk-Vorscoring lokal: LLM_BULK_PROVIDER=local
+LLM_PROVIDER_BY_PRIORITY = {'bulk': os.getenv("LLM_BULK_PROVIDER", "")}
+LLM_LOCAL_BASE_URL = os.getenv("LLM_LOCAL_BASE_URL", "http://localhost:8080/v1")
+LLM_LOCAL_MODEL = os.getenv("LLM_LOCAL_MODEL", "")  # leer = DEFAULT_MODEL
+LLM_LOCAL_API_KEY = os.getenv("LLM_LOCAL_API_KEY", "")
+LLM_LOCAL_TIMEOUT_SECONDS = 300
+LLM_MOCK_LATENCY_SECONDS = float(os.getenv("LLM_MOCK_LATENCY_SECONDS", "0"))
+
+# Record/Replay-Kassette für LLM-Traffic: '' (aus), 'record' oder 'replay'
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "/home/ubuntu/pcbf_framework/llm_cassette.db")
+LLM_CASSETTE_REPLAY_LATENCY = os.getenv("LLM_CASSETTE_REPLAY_LATENCY", "false").lower() == "true"
+
+# Structured Outputs (JSON-Schema via response_format) anfordern
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+# Anzahl gezielter Reparatur-Rückfragen bei ungültiger JSON-Antwort
+LLM_JSON_REPAIR_ATTEMPTS = 1
+
+# Streaming (SSE) - JSON wird inkrementell geparst, der Stream endet,
+# sobald das Antwort-Objekt vollständig ist
+LLM_STREAMING = os.getenv("LLM_STREAMING", "false").lower() == "true"
+
+# Scores-Only-Modus: Agenten fordern nur Scores an und brechen den Stream
+# ab, sobald das Score-Objekt geschlossen ist (kein Reasoning-Text)
+LLM_SCORES_ONLY = os.getenv("LLM_SCORES_ONLY", "false").lower() == "true"
+
 # Datenqualitäts-Schwellenwerte
 BIO_QUALITY_THRESHOLDS = {
     "high": 80,
@@ -16,6 +56,87 @@ BIO_QUALITY_THRESHOLDS = {
     "low": 40
 }
 
+# Job-Titel-Indikatoren (Bio-Qualität, Satz-Ranking bei Bio-Kürzung)
+JOB_TITLE_KEYWORDS = [
+    'CEO', 'CTO', 'CFO', 'Manager', 'Director', 'Consultant', 
+    'Engineer', 'Developer', 'Designer', 'Analyst', 'Specialist',
+    'Gründer', 'Founder', 'Geschäftsführer', 'Leiter', 'Head'
+]
+
+# Agent-Retries: fehlgeschlagene Agenten werden einzeln wiederholt
+# (exponentielles Backoff), danach als degradiert markiert (Keyword-Scores)
+AGENT_RETRY_ATTEMPTS = 2
+AGENT_RETRY_BACKOFF_SECONDS = 1.0
+
+# Prompt-Budget: maximale (geschätzte) Tokens der Bio pro Agent-Prompt
+PROMPT_BIO_TOKEN_BUDGET = int(os.getenv("PROMPT_BIO_TOKEN_BUDGET", "400"))
+
+# Prompt-Version: bei Änderungen an Prompts/Scoring erhöhen, damit
+# gespeicherte Ergebnisse (Input-Fingerprint) neu berechnet werden
+PROMPT_VERSION = "2026.10-1"
+
+# Ergebnis-Store (SQLite) für inkrementelle Re-Analyse
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "/home/ubuntu/pcbf_framework/results.db")
+
+# Spaltenbasierter Export (Parquet/Arrow): Ergebnisse pro Row Group
+EXPORT_ROW_GROUP_SIZE = 10000
+
+# ZIP-Bundle-Export: komprimierte Bytes pro gestreamtem Block
+EXPORT_ZIP_CHUNK_BYTES = 256 * 1024
+
+# JSON-Antworten ab dieser Größe komprimieren (brotli/gzip je nach Accept-Encoding)
+JSON_COMPRESS_MIN_BYTES = 16 * 1024
+
+# Kompakte Ergebnis-Batches: Freitexte ab dieser Größe in Temp-Datei auslagern
+COMPACT_TEXT_SPILL_BYTES = int(os.getenv("COMPACT_TEXT_SPILL_BYTES", str(64 * 1024 * 1024)))
+
+# CSV-Parser: Blockgröße und Worker-Prozesse für große Uploads
+CSV_PARSE_CHUNK_BYTES = int(os.getenv("CSV_PARSE_CHUNK_BYTES", str(4 * 1024 * 1024)))
+CSV_PARSE_WORKERS = int(os.getenv("CSV_PARSE_WORKERS", str(os.cpu_count() or 1)))
+# Obergrenze für entpackte Uploads (.gz/.zip/.zst), schützt vor Dekompressionsbomben
+CSV_MAX_DECOMPRESSED_BYTES = int(os.getenv("CSV_MAX_DECOMPRESSED_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Progressive Ergebnisse (Server-Sent Events)
+SSE_KEEPALIVE_SECONDS = 15
+PROGRESSIVE_SESSION_TTL_SECONDS = 600
+
+# Live-Fortschritt von Batch-Läufen (CSV-UI)
+PROGRESS_EVENT_INTERVAL_SECONDS = 0.5
+PROGRESS_RETENTION_SECONDS = 3600
+# Ergebnisse im Speicher der CSV-UI (danach aus dem Checkpoint neu geladen)
+ANALYSIS_RESULTS_RETENTION_SECONDS = int(os.getenv("ANALYSIS_RESULTS_RETENTION_SECONDS", "3600"))
+
+# LLM-Scheduler: parallele Calls, Prioritätsklassen (interactive, api_batch, bulk)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_PRIORITY_WEIGHTS = {'interactive': 8, 'api_batch': 3, 'bulk': 1}
+LLM_PRIORITY_RESERVED = {'interactive': 2}
+LLM_DEFAULT_PRIORITY = 'api_batch'
+LLM_INTERACTIVE_MAX_PROFILES = 1  # API-Requests bis zu dieser Größe laufen als 'interactive'
+
+# Mandanten-Fairness im LLM-Scheduler (Deficit Round Robin, Limits 0 = unbegrenzt)
+LLM_DEFAULT_TENANT = 'default'
+LLM_TENANT_QUANTUM_TOKENS = 2000
+LLM_TENANT_MAX_CONCURRENCY = int(os.getenv("LLM_TENANT_MAX_CONCURRENCY", "0"))
+LLM_TENANT_TOKENS_PER_MINUTE = int(os.getenv("LLM_TENANT_TOKENS_PER_MINUTE", "0"))
+# Abweichende Limits pro Mandant, z.B. {"team-a": {"max_concurrency": 4, "tokens_per_minute": 200000}}
+LLM_TENANT_LIMITS: Dict[str, Dict[str, int]] = json.loads(os.getenv("LLM_TENANT_LIMITS", "{}"))
+
+# Verteilte Verarbeitung: Work-Queue (sqlite:///pfad oder redis://host:port/db) und Worker
+WORK_QUEUE_PATH = os.getenv("WORK_QUEUE_PATH", "/home/ubuntu/pcbf_framework/work_queue.db")
+WORK_QUEUE_URL = os.getenv("WORK_QUEUE_URL", f"sqlite:///{WORK_QUEUE_PATH}")
+WORK_QUEUE_PREFIX = os.getenv("WORK_QUEUE_PREFIX", "pcbf:")
+WORK_LEASE_SECONDS = int(os.getenv("WORK_LEASE_SECONDS", "120"))
+WORK_MAX_ATTEMPTS = 3
+WORK_LLM_PRIORITY = 'bulk'
+# Abgeschlossene Jobs (Ergebnisse, Fehler, Profile) werden danach gelöscht
+WORK_JOB_RETENTION_SECONDS = int(os.getenv("WORK_JOB_RETENTION_SECONDS", "86400"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "8"))
+WORKER_POLL_SECONDS = 1.0
+WORKER_MAX_BACKOFF_SECONDS = 30.0
+
+# Batch-Checkpoints (fortsetzbare Läufe)
+BATCH_CHECKPOINT_DIR = os.getenv("BATCH_CHECKPOINT_DIR", "/home/ubuntu/pcbf_framework/checkpoints")
+
 # Confidence-Schwellenwerte
 CONFIDENCE_THRESHOLDS = {
     "high": 80,
@@ -0,0 +1,303 @@
+"""
+PCBF 2.1 Framework - Credential-Pool für LLM-Endpunkte
+Verteilt Calls auf mehrere API-Keys/Endpunkte mit eigenem Limiter-Zustand,
+gewichtet nach verbleibendem Spielraum; Keys mit 401/403/429 werden
+vorübergehend aus der Auswahl genommen
+"""
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Rate-Limit-Header (OpenRouter: x-ratelimit-*, OpenAI-kompatibel: *-requests/*-tokens)
+REMAINING_HEADERS = ('x-ratelimit-remaining-requests', 'x-ratelimit-remaining')
+LIMIT_HEADERS = ('x-ratelimit-limit-requests', 'x-ratelimit-limit')
+REMAINING_TOKENS_HEADER = 'x-ratelimit-remaining-tokens'
+LIMIT_TOKENS_HEADER = 'x-ratelimit-limit-tokens'
+
+# Obergrenze für die Sperrzeit nach wiederholten 429
+MAX_RATE_LIMIT_COOLDOWN_SECONDS = 300
+
+
+def _header_number(headers: Mapping[str, str], names) -> Optional[float]:
+    """Erster vorhandener Header als Zahl (None = fehlt/ungültig)"""
+    for name in ((names,) if isinstance(names, str) else names):
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class Credential:
+    """
+    Ein API-Key an einem Endpunkt mit eigenem Limiter-Zustand.
+
+    Zählt Requests und Tokens der letzten Minute gegen die konfigurierten
+    Limits und übernimmt die Rate-Limit-Header des Providers, sofern vorhanden.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, name: Optional[str] = None,
+                 requests_per_minute: int = 0, tokens_per_minute: int = 0, weight: float = 1.0):
+        """
+        Args:
+            api_key: API-Key
+            base_url: Endpunkt (default: config.OPENROUTER_BASE_URL)
+            name: Anzeigename für Logs/Metriken (default: maskierter Key)
+            requests_per_minute: Request-Limit des Keys (0 = unbekannt)
+            tokens_per_minute: Token-Limit des Keys (0 = unbekannt)
+            weight: Relatives Gewicht bei der Auswahl
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or config.OPENROUTER_BASE_URL).rstrip('/')
+        self.name = name or f"…{api_key[-4:]}"
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.weight = weight
+
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.evicted_until = 0.0
+        self.eviction_reason: Optional[str] = None
+        self.consecutive_rate_limits = 0
+
+        self._window: deque = deque()  # [Zeitpunkt, Tokens] der letzten Minute
+        self._provider_remaining: Optional[float] = None  # Anteil laut Header (0-1)
+        self._provider_seen_at = 0.0
+
+    def usage_last_minute(self, now: float):
+        """Requests und Tokens der letzten Minute"""
+        while self._window and now - self._window[0][0] >= 60:
+            self._window.popleft()
+        return len(self._window), sum(tokens for _, tokens in self._window)
+
+    def headroom(self, now: float, tokens: int) -> float:
+        """
+        Verbleibender Spielraum (0-1) für einen weiteren Call.
+
+        Minimum aus Request-, Token- und Provider-Limit; ohne bekannte Limits 1.
+        """
+        requests, used_tokens = self.usage_last_minute(now)
+        fractions = []
+        if self.requests_per_minute:
+            fractions.append(1 - (requests + 1) / self.requests_per_minute)
+        if self.tokens_per_minute:
+            fractions.append(1 - (used_tokens + tokens) / self.tokens_per_minute)
+        if self._provider_remaining is not None and now - self._provider_seen_at < 60:
+            fractions.append(self._provider_remaining)
+        return max(min(fractions), 0.0) if fractions else 1.0
+
+    def evicted(self, now: float) -> bool:
+        return now < self.evicted_until
+
+    def record_request(self, now: float, tokens: int) -> List[Any]:
+        """Bucht einen Call (Eintrag kann später mit dem tatsächlichen Verbrauch korrigiert werden)"""
+        entry = [now, tokens]
+        self._window.append(entry)
+        self.in_flight += 1
+        self.requests += 1
+        return entry
+
+    def record_headers(self, headers: Mapping[str, str], now: float):
+        """Übernimmt den verbleibenden Anteil aus den Rate-Limit-Headern"""
+        fractions = []
+        remaining, limit = _header_number(headers, REMAINING_HEADERS), _header_number(headers, LIMIT_HEADERS)
+        if remaining is not None and limit:
+            fractions.append(remaining / limit)
+        remaining, limit = (_header_number(headers, REMAINING_TOKENS_HEADER),
+                            _header_number(headers, LIMIT_TOKENS_HEADER))
+        if remaining is not None and limit:
+            fractions.append(remaining / limit)
+        if fractions:
+            self._provider_remaining = max(min(fractions), 0.0)
+            self._provider_seen_at = now
+
+    def evict(self, seconds: float, reason: str, now: float):
+        """Nimmt den Key für seconds aus der Auswahl"""
+        self.evicted_until = now + seconds
+        self.eviction_reason = reason
+        logger.warning(f"LLM-Key {self.name} für {seconds:.0f}s gesperrt ({reason})")
+
+    def get_metrics(self, now: float) -> Dict[str, Any]:
+        requests, tokens = self.usage_last_minute(now)
+        return {
+            'base_url': self.base_url,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'failures': self.failures,
+            'requests_last_minute': requests,
+            'tokens_last_minute': tokens,
+            'headroom': round(self.headroom(now, 0), 3),
+            'evicted_for_seconds': round(max(self.evicted_until - now, 0), 1),
+            'eviction_reason': self.eviction_reason if self.evicted(now) else None
+        }
+
+
+class KeyLease(NamedTuple):
+    """Für einen Call vergebener Key (mit Buchung im Limiter-Fenster)"""
+    credential: Credential
+    entry: List[Any]
+
+
+class CredentialPool:
+    """
+    Pool von Credentials, aus dem jeder LLM-Call einen Key bezieht.
+
+    Auswahl zufällig, gewichtet nach Spielraum x Gewicht / (1 + laufende
+    Calls); gesperrte Keys (401/403/429) werden übersprungen, solange es
+    andere gibt.
+    """
+
+    def __init__(self, credentials: List[Credential]):
+        """
+        Args:
+            credentials: Credentials des Pools (mindestens eines)
+        """
+        if not credentials:
+            raise ValueError("OPENROUTER_API_KEY nicht gesetzt!")
+        self.credentials = credentials
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def acquire(self, tokens: int = 0, exclude: Optional[List[Credential]] = None) -> KeyLease:
+        """
+        Wählt einen Key für einen Call und bucht ihn.
+
+        Args:
+            tokens: Geschätzte Tokens des Calls
+            exclude: In diesem Call bereits fehlgeschlagene Keys (optional)
+
+        Returns:
+            KeyLease (nach dem Call mit release() freigeben)
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [c for c in self.credentials if not exclude or c not in exclude] or self.credentials
+            available = [c for c in candidates if not c.evicted(now)]
+            if available:
+                weights = [c.headroom(now, tokens) * c.weight / (1 + c.in_flight) for c in available]
+                if sum(weights) > 0:
+                    credential = self._random.choices(available, weights)[0]
+                else:
+                    # Alle am Limit: geringste Auslastung
+                    credential = min(available, key=lambda c: c.in_flight)
+            else:
+                # Alle gesperrt: den Key, dessen Sperre zuerst endet
+                credential = min(candidates, key=lambda c: c.evicted_until)
+
+            return KeyLease(credential, credential.record_request(now, tokens))
+
+    def release(self, lease: KeyLease, status_code: Optional[int] = None,
+                headers: Optional[Mapping[str, str]] = None, tokens_used: Optional[int] = None):
+        """
+        Gibt einen Key nach dem Call frei und aktualisiert seinen Zustand.
+
+        Args:
+            lease: Key aus acquire()
+            status_code: HTTP-Status der Antwort (None = keine Antwort)
+            headers: Response-Header (Rate-Limit-Angaben)
+            tokens_used: Tatsächlicher Token-Verbrauch (optional)
+        """
+        credential = lease.credential
+        with self._lock:
+            now = time.monotonic()
+            credential.in_flight -= 1
+            if tokens_used is not None:
+                lease.entry[1] = tokens_used
+            if headers is not None:
+                credential.record_headers(headers, now)
+
+            if status_code in (401, 403):
+                credential.failures += 1
+                credential.evict(config.LLM_KEY_UNAUTHORIZED_COOLDOWN_SECONDS, f"HTTP {status_code}", now)
+            elif status_code == 429:
+                credential.failures += 1
+                credential.consecutive_rate_limits += 1
+                retry_after = _header_number(headers or {}, 'retry-after')
+                cooldown = retry_after or min(
+                    config.LLM_KEY_RATE_LIMIT_COOLDOWN_SECONDS * 2 ** (credential.consecutive_rate_limits - 1),
+                    MAX_RATE_LIMIT_COOLDOWN_SECONDS
+                )
+                credential.evict(cooldown, "HTTP 429", now)
+            elif status_code is not None and status_code < 400:
+                credential.consecutive_rate_limits = 0
+
+    def has_alternative(self, exclude: List[Credential]) -> bool:
+        """Gibt es einen nicht gesperrten Key außerhalb von exclude?"""
+        with self._lock:
+            now = time.monotonic()
+            return any(c not in exclude and not c.evicted(now) for c in self.credentials)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Zustand aller Keys (maskiert).
+
+        Returns:
+            Dictionary Key-Name -> Kennzahlen
+        """
+        with self._lock:
+            now = time.monotonic()
+            return {c.name: c.get_metrics(now) for c in self.credentials}
+
+
+def load_credentials() -> List[Credential]:
+    """
+    Liest die Credentials aus der Konfiguration.
+
+    Reihenfolge: config.LLM_ENDPOINTS (Key, Endpunkt und Limits je Eintrag),
+    sonst config.OPENROUTER_API_KEYS bzw. config.OPENROUTER_API_KEY am
+    Standard-Endpunkt.
+
+    Returns:
+        Liste von Credentials (leer, wenn kein Key konfiguriert ist)
+    """
+    if config.LLM_ENDPOINTS:
+        return [
+            Credential(
+                api_key=endpoint['api_key'],
+                base_url=endpoint.get('base_url'),
+                name=endpoint.get('name'),
+                requests_per_minute=endpoint.get('requests_per_minute', config.LLM_KEY_REQUESTS_PER_MINUTE),
+                tokens_per_minute=endpoint.get('tokens_per_minute', config.LLM_KEY_TOKENS_PER_MINUTE),
+                weight=endpoint.get('weight', 1.0)
+            )
+            for endpoint in config.LLM_ENDPOINTS
+        ]
+
+    keys = config.OPENROUTER_API_KEYS or ([config.OPENROUTER_API_KEY] if config.OPENROUTER_API_KEY else [])
+    return [
+        Credential(key, requests_per_minute=config.LLM_KEY_REQUESTS_PER_MINUTE,
+                   tokens_per_minute=config.LLM_KEY_TOKENS_PER_MINUTE)
+        for key in keys
+    ]
+
+
+# Singleton-Instanz
+_credential_pool = None
+_credential_pool_lock = threading.Lock()
+
+
+def get_credential_pool() -> CredentialPool:
+    """
+    Gibt Singleton-Instanz des Credential-Pools zurück.
+
+    Returns:
+        CredentialPool-Instanz
+    """
+    global _credential_pool
+    with _credential_pool_lock:
+        if _credential_pool is None:
+            _credential_pool = CredentialPool(load_credentials())
+    return _credential_pool
@@ -0,0 +1,421 @@
+"""
+PCBF 2.1 Framework - CSV-Parser für Lead-Listen
+Teilt CSV-Daten an sicheren Datensatz-Grenzen (auch bei Zeilenumbrüchen
+in gequoteten Bios) und parst die Blöcke parallel in einem Prozess-Pool;
+komprimierte Uploads (.gz/.zip/.zst) werden dabei gestreamt entpackt
+"""
+import csv
+import gzip
+import logging
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+import config
+from models import ProfileInput, validate_profiles
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_BYTES = 1024 * 1024
+
+# Fehler beim Entpacken, die als ValueError gemeldet werden
+DECOMPRESS_ERRORS = (OSError, EOFError, zipfile.BadZipFile) + ((zstandard.ZstdError,) if zstandard else ())
+
+# Magic Bytes der unterstützten Kompressionsformate
+COMPRESSION_MAGIC = {
+    'gzip': b'\x1f\x8b',
+    'zip': b'PK\x03\x04',
+    'zstd': b'\x28\xb5\x2f\xfd'
+}
+COMPRESSION_SUFFIXES = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.zip': 'zip',
+    '.zst': 'zstd',
+    '.zstd': 'zstd'
+}
+
+
+def parse_int(value) -> Optional[int]:
+    """Parst Integer-Wert"""
+    if value is None or value == '' or value == 'NULL':
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_bool(value) -> bool:
+    """Parst Boolean-Wert"""
+    if value is None or value == '' or value == 'NULL':
+        return False
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.lower() in ['true', '1', 'yes']
+    return bool(value)
+
+
+def map_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Bildet eine CSV-Zeile auf die Felder von ProfileInput ab.
+
+    Args:
+        row: Zeile aus csv.DictReader
+
+    Returns:
+        Dictionary für ProfileInput
+    """
+    return {
+        'id': row.get('lead_uuid') or row.get('lead_id', 'unknown'),
+        'platform_name': row.get('platform_name') or 'Unknown',
+        'full_name': row.get('full_name', ''),
+        'bio': row.get('bio', ''),
+        'categories': row.get('categories', None),
+        'followers': parse_int(row.get('followers')),
+        'following': parse_int(row.get('following')),
+        'posts': parse_int(row.get('posts')),
+        'verified': parse_bool(row.get('verified')),
+        'business_account': parse_bool(row.get('business_account'))
+    }
+
+
+def detect_compression(head: bytes, filename: Optional[str] = None) -> Optional[str]:
+    """
+    Erkennt das Kompressionsformat anhand der Magic Bytes bzw. Dateiendung.
+
+    Args:
+        head: Erste Bytes der Datei (leer, wenn nicht verfügbar)
+        filename: Dateiname des Uploads (optional)
+
+    Returns:
+        'gzip', 'zip', 'zstd' oder None (unkomprimiert)
+    """
+    for name, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return name
+
+    if filename and not head:
+        for suffix, name in COMPRESSION_SUFFIXES.items():
+            if filename.lower().endswith(suffix):
+                return name
+    return None
+
+
+def _read_blocks(stream, block_bytes: int) -> Iterator[bytes]:
+    while True:
+        block = stream.read(block_bytes)
+        if not block:
+            return
+        yield block
+
+
+def _open_zip_member(fileobj):
+    """Öffnet die (erste) CSV-Datei eines ZIP-Archivs als Stream"""
+    archive = zipfile.ZipFile(fileobj)
+    members = [info for info in archive.infolist() if not info.is_dir()]
+    csv_members = [info for info in members if info.filename.lower().endswith('.csv')]
+    if not members:
+        raise ValueError("ZIP-Archiv enthält keine Datei")
+    member = (csv_members or members)[0]
+    logger.info(f"Lese '{member.filename}' aus ZIP-Archiv")
+    return archive.open(member)
+
+
+def iter_upload_blocks(fileobj, filename: Optional[str] = None,
+                       block_bytes: int = READ_BLOCK_BYTES) -> Iterator[bytes]:
+    """
+    Liest eine (ggf. komprimierte) CSV-Datei blockweise und entpackt dabei.
+
+    Das Format wird an den Magic Bytes erkannt; ist die Datei nicht
+    seekable, entscheidet die Dateiendung. ZIP-Archive müssen seekable
+    sein und liefern ihre erste CSV-Datei. Entpackt werden höchstens
+    config.CSV_MAX_DECOMPRESSED_BYTES.
+
+    Args:
+        fileobj: Binärer Datei-Stream (z.B. UploadFile.file)
+        filename: Dateiname des Uploads (optional)
+        block_bytes: Größe der gelesenen Blöcke
+
+    Returns:
+        Iterator über unkomprimierte CSV-Bytes
+
+    Raises:
+        ValueError: wenn das Format nicht gelesen werden kann oder die
+            entpackte Datei config.CSV_MAX_DECOMPRESSED_BYTES überschreitet
+    """
+    head = b''
+    if getattr(fileobj, 'seekable', lambda: False)():
+        position = fileobj.tell()
+        head = fileobj.read(4)
+        fileobj.seek(position)
+
+    compression = detect_compression(head, filename)
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError("Zstandard-Dateien benötigen das Paket 'zstandard'")
+
+    stream = fileobj
+    try:
+        if compression == 'gzip':
+            stream = gzip.GzipFile(fileobj=fileobj, mode='rb')
+        elif compression == 'zip':
+            stream = _open_zip_member(fileobj)
+        elif compression == 'zstd':
+            stream = zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+
+        if compression is None:
+            yield from _read_blocks(stream, block_bytes)
+            return
+
+        limit = config.CSV_MAX_DECOMPRESSED_BYTES
+        total = 0
+        # Abbruch beim ersten Block über dem Limit (Rest wird nicht entpackt)
+        for block in _read_blocks(stream, block_bytes):
+            total += len(block)
+            if total > limit:
+                raise ValueError(f"Entpackte Datei größer als {limit // (1024 * 1024)} MB")
+            yield block
+    except DECOMPRESS_ERRORS as e:
+        raise ValueError(f"Datei konnte nicht entpackt werden ({compression}): {e}")
+    finally:
+        if stream is not fileobj:
+            stream.close()
+
+
+def sniff_encoding(sample: bytes) -> str:
+    """
+    Bestimmt den Zeichensatz einer CSV-Datei.
+
+    UTF-8 wird bevorzugt; Exporte aus Excel & Co. sind sonst meist
+    Windows-1252 (Latin-1 mit €, Anführungszeichen etc.).
+
+    Args:
+        sample: Bytes, die an einer Zeichen-Grenze enden
+
+    Returns:
+        'utf-8', 'cp1252' oder 'latin-1'
+    """
+    for encoding in ('utf-8', 'cp1252'):
+        try:
+            sample.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def _decode(chunk: bytes, encoding: str) -> str:
+    try:
+        return chunk.decode(encoding)
+    except UnicodeDecodeError:
+        fallback = sniff_encoding(chunk)
+        logger.warning(f"CSV-Block ist kein gültiges {encoding}, lese als {fallback}")
+        return chunk.decode(fallback)
+
+
+def find_record_boundary(data, start: int, target: int) -> int:
+    """
+    Sucht das erste Datensatz-Ende ab target.
+
+    Ein Zeilenumbruch beendet einen Datensatz nur außerhalb von Quotes;
+    da Quotes in Feldern verdoppelt werden, entscheidet die Parität der
+    Anführungszeichen seit start (start muss eine Datensatz-Grenze sein).
+
+    Args:
+        data: CSV-Bytes
+        start: Beginn eines Datensatzes
+        target: Frühestmögliche Position des Datensatz-Endes
+
+    Returns:
+        Position direkt nach dem Zeilenumbruch, -1 wenn keiner gefunden
+    """
+    inside = data.count(b'"', start, target) % 2 == 1
+    position = target
+    while True:
+        newline = data.find(b'\n', position)
+        if newline == -1:
+            return -1
+        if data.count(b'"', position, newline) % 2:
+            inside = not inside
+        if not inside:
+            return newline + 1
+        position = newline + 1
+
+
+def iter_record_chunks(blocks: Iterable[bytes], chunk_bytes: int) -> Iterator[bytes]:
+    """
+    Fasst einen Byte-Stream zu Blöcken aus vollständigen Datensätzen zusammen.
+
+    Args:
+        blocks: CSV-Daten in beliebig geschnittenen Stücken
+        chunk_bytes: Mindestgröße eines Blocks
+
+    Returns:
+        Iterator über Blöcke, die jeweils an einer Datensatz-Grenze enden
+    """
+    buffer = bytearray()
+    for block in blocks:
+        buffer += block
+        while len(buffer) >= chunk_bytes:
+            end = find_record_boundary(buffer, 0, chunk_bytes)
+            if end == -1:
+                break
+            yield bytes(buffer[:end])
+            del buffer[:end]
+
+    if buffer:
+        yield bytes(buffer)
+
+
+def parse_chunk(chunk: bytes, fieldnames: List[str], encoding: str,
+                first_row: int) -> Tuple[List[ProfileInput], List[Dict[str, Any]], int]:
+    """
+    Parst einen Block vollständiger Datensätze (läuft im Worker-Prozess).
+
+    Args:
+        chunk: CSV-Bytes ohne Header
+        fieldnames: Spaltennamen aus dem Header
+        encoding: Zeichensatz der Datei
+        first_row: Zeilennummer des ersten Datensatzes (Header = 1)
+
+    Returns:
+        (Profile, Zeilen-Fehler, Anzahl Datensätze)
+    """
+    reader = csv.DictReader(StringIO(_decode(chunk, encoding)), fieldnames=fieldnames)
+    rows = []
+    row_numbers = []
+    errors = []
+    record = 0
+
+    while True:
+        row_number = first_row + record
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            errors.append({'row': row_number, 'lead_id': None, 'error': f"CSV-Fehler: {e}"})
+            record += 1
+            continue
+
+        record += 1
+        try:
+            rows.append(map_row(row))
+            row_numbers.append(row_number)
+        except Exception as e:
+            errors.append({'row': row_number, 'lead_id': None, 'error': str(e)})
+
+    # Ein Validierungs-Aufruf für den Block; bei Fehlern nur die betroffenen Zeilen aussortieren
+    try:
+        profiles = validate_profiles(rows)
+    except ValidationError as e:
+        invalid: Dict[int, List[str]] = {}
+        for error in e.errors():
+            position = error['loc'][0]
+            field = '.'.join(str(part) for part in error['loc'][1:])
+            invalid.setdefault(position, []).append(f"{field}: {error['msg']}")
+
+        for position, messages in sorted(invalid.items()):
+            errors.append({
+                'row': row_numbers[position],
+                'lead_id': rows[position].get('id'),
+                'error': '; '.join(messages)
+            })
+        profiles = validate_profiles([row for i, row in enumerate(rows) if i not in invalid])
+
+    return profiles, errors, record
+
+
+def parse_profiles(blocks: Iterable[bytes], encoding: Optional[str] = None,
+                   errors: Optional[List[Dict[str, Any]]] = None,
+                   workers: Optional[int] = None,
+                   chunk_bytes: Optional[int] = None) -> List[ProfileInput]:
+    """
+    Parst eine CSV-Lead-Liste zu ProfileInput-Objekten.
+
+    Die Daten werden an Datensatz-Grenzen in Blöcke geteilt und in einem
+    Prozess-Pool geparst und validiert; die Reihenfolge der Zeilen bleibt
+    erhalten. Besteht die Datei aus nur einem Block, wird ohne Pool geparst.
+
+    Args:
+        blocks: CSV-Daten (Bytes, z.B. [datei_inhalt] oder ein Stream)
+        encoding: Zeichensatz der Datei (default: aus dem ersten Block erkannt)
+        errors: Liste, in die Zeilen-Fehler eingetragen werden (optional)
+        workers: Anzahl Worker-Prozesse (default: config.CSV_PARSE_WORKERS)
+        chunk_bytes: Blockgröße (default: config.CSV_PARSE_CHUNK_BYTES)
+
+    Returns:
+        Liste von ProfileInput-Objekten
+    """
+    workers = workers or config.CSV_PARSE_WORKERS
+    chunks = iter_record_chunks(blocks, chunk_bytes or config.CSV_PARSE_CHUNK_BYTES)
+
+    first = next(chunks, b'')
+    if first.startswith(b'\xef\xbb\xbf'):
+        first = first[3:]
+        encoding = encoding or 'utf-8'
+    encoding = encoding or sniff_encoding(first)
+    if encoding != 'utf-8':
+        logger.info(f"CSV-Zeichensatz: {encoding}")
+    header_end = find_record_boundary(first, 0, 0)
+    if header_end == -1:
+        header_end = len(first)
+
+    header = next(csv.reader(StringIO(first[:header_end].decode(encoding))), [])
+    fieldnames = [name.strip() for name in header]
+    first = first[header_end:]
+
+    profiles: List[ProfileInput] = []
+    row_errors: List[Dict[str, Any]] = []
+    next_row = 2
+
+    second = next(chunks, None)
+    if second is None:
+        chunk_profiles, chunk_errors, _ = parse_chunk(first, fieldnames, encoding, next_row)
+        profiles.extend(chunk_profiles)
+        row_errors.extend(chunk_errors)
+    else:
+        # Zeilennummern sind erst nach dem Parsen bekannt: Fehler relativ zum Block sammeln
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+
+            def collect():
+                nonlocal next_row
+                chunk_profiles, chunk_errors, records = pending.popleft().result()
+                for error in chunk_errors:
+                    error['row'] += next_row
+                profiles.extend(chunk_profiles)
+                row_errors.extend(chunk_errors)
+                next_row += records
+
+            for chunk in _chain(first, second, chunks):
+                pending.append(executor.submit(parse_chunk, chunk, fieldnames, encoding, 0))
+                if len(pending) >= workers * 2:
+                    collect()
+
+            while pending:
+                collect()
+
+    for error in row_errors:
+        logger.warning(f"CSV-Zeile {error['row']} übersprungen: {error['error']}")
+    if errors is not None:
+        errors.extend(row_errors)
+
+    logger.info(f"{len(profiles)} Profile aus CSV extrahiert ({len(row_errors)} fehlerhafte Zeilen)")
+    return profiles
+
+
+def _chain(first: bytes, second: bytes, rest: Iterator[bytes]) -> Iterator[bytes]:
+    yield first
+    yield second
+    yield from rest
@@ -2,13 +2,21 @@
 PCBF 2.1 Framework - CSV Processor
 Verarbeitet CSV-Rohdaten und führt Batch-Analyse durch
 """
+import os
 import csv
+import uuid
 import logging
-from typing import List, Dict
-from io import StringIO
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
 
+import config
 from models import ProfileInput
+from csv_parser import parse_profiles, iter_upload_blocks
+from purchase_intent import pi_column
 from analyzer import ProfileAnalyzer
+from batch_checkpoint import BatchCheckpoint
+from batch_progress import BatchProgress
+from result_store import ResultStore
+from compact_results import CompactResultBatch
 
 logger = logging.getLogger(__name__)
 
@@ -18,68 +26,55 @@ class CSVProcessor:
     
     def __init__(self):
         self.analyzer = ProfileAnalyzer()
+        self.result_store = ResultStore()
     
-    def parse_csv(self, csv_content: str) -> List[ProfileInput]:
+    def parse_csv(self, csv_content: Union[str, bytes],
+                  errors: Optional[List[Dict[str, Any]]] = None) -> List[ProfileInput]:
         """
         Parst CSV-Inhalt und erstellt ProfileInput-Objekte.
         
+        Große Dateien werden an Datensatz-Grenzen geteilt und parallel
+        geparst (siehe csv_parser); die Reihenfolge bleibt erhalten.
+        
         Args:
-            csv_content: CSV-Datei als String
+            csv_content: CSV-Datei als String oder Bytes (Zeichensatz wird erkannt)
+            errors: Liste, in die fehlerhafte Zeilen eingetragen werden (optional)
             
         Returns:
             Liste von ProfileInput-Objekten
         """
-        profiles = []
+        if isinstance(csv_content, str):
+            return parse_profiles([csv_content.encode('utf-8')], encoding='utf-8', errors=errors)
         
-        reader = csv.DictReader(StringIO(csv_content))
+        return parse_profiles([csv_content], errors=errors)
+    
+    def parse_csv_file(self, fileobj: BinaryIO, filename: Optional[str] = None,
+                       errors: Optional[List[Dict[str, Any]]] = None) -> List[ProfileInput]:
+        """
+        Parst eine CSV-Datei direkt aus einem Stream.
         
-        for row in reader:
-            try:
-                # Profile Input erstellen
-                profile = ProfileInput(
-                    id=row.get('lead_uuid') or row.get('lead_id', 'unknown'),
-                    platform_name=row.get('platform_name') or 'Unknown',
-                    full_name=row.get('full_name', ''),
-                    bio=row.get('bio', ''),
-                    categories=row.get('categories', None),
-                    followers=self._parse_int(row.get('followers')),
-                    following=self._parse_int(row.get('following')),
-                    posts=self._parse_int(row.get('posts')),
-                    verified=self._parse_bool(row.get('verified')),
-                    business_account=self._parse_bool(row.get('business_account'))
-                )
-                
-                profiles.append(profile)
-                
-            except Exception as e:
-                logger.error(f"Fehler beim Parsen von Zeile: {str(e)}")
-                continue
+        .csv.gz, .zip und .zst werden beim Lesen entpackt, ohne die
+        Datei vollständig in den Speicher zu laden.
         
-        logger.info(f"{len(profiles)} Profile aus CSV extrahiert")
-        return profiles
-    
-    def _parse_int(self, value) -> int:
-        """Parst Integer-Wert"""
-        if value is None or value == '' or value == 'NULL':
-            return None
-        try:
-            return int(value)
-        except:
-            return None
-    
-    def _parse_bool(self, value) -> bool:
-        """Parst Boolean-Wert"""
-        if value is None or value == '' or value == 'NULL':
-            return False
-        if isinstance(value, bool):
-            return value
-        if isinstance(value, str):
-            return value.lower() in ['true', '1', 'yes']
-        return bool(value)
+        Args:
+            fileobj: Binärer Datei-Stream
+            filename: Dateiname (für die Formaterkennung, optional)
+            errors: Liste, in die fehlerhafte Zeilen eingetragen werden (optional)
+            
+        Returns:
+            Liste von ProfileInput-Objekten
+            
+        Raises:
+            ValueError: wenn die Datei nicht entpackt werden kann
+        """
+        return parse_profiles(iter_upload_blocks(fileobj, filename), errors=errors)
     
     def analyze_batch(self, profiles: List[ProfileInput], 
                      target_keywords: List[str] = None,
-                     product_category: str = "Software") -> List[Dict]:
+                     product_category: str = "Software",
+                     errors: Optional[List[Dict[str, str]]] = None,
+                     checkpoint: Optional[BatchCheckpoint] = None,
+                     stats: Optional[Dict] = None) -> List[Dict]:
         """
         Führt Batch-Analyse durch.
         
@@ -87,6 +82,9 @@ class CSVProcessor:
             profiles: Liste von ProfileInput
             target_keywords: Target Keywords
             product_category: Produkt-Kategorie
+            errors: Liste, in die Profil-Fehler eingetragen werden (optional)
+            checkpoint: Checkpoint für fortsetzbare Läufe (optional)
+            stats: Dictionary für Wiederverwendungs-Statistiken (optional)
             
         Returns:
             Liste von Analyse-Ergebnissen als Dictionaries
@@ -98,7 +96,11 @@ class CSVProcessor:
             target_keywords=target_keywords or [],
             product_category=product_category,
             include_enneagram=False,
-            max_workers=5
+            max_workers=5,
+            errors=errors,
+            checkpoint=checkpoint,
+            result_store=self.result_store,
+            stats=stats
         )
         
         # Zu Dictionaries konvertieren
@@ -110,6 +112,114 @@ class CSVProcessor:
         logger.info(f"Batch-Analyse abgeschlossen: {len(results_dicts)} Ergebnisse")
         return results_dicts
     
+    def analyze_batch_compact(self, profiles: List[ProfileInput],
+                              target_keywords: List[str] = None,
+                              product_category: str = "Software",
+                              errors: Optional[List[Dict[str, str]]] = None,
+                              checkpoint: Optional[BatchCheckpoint] = None,
+                              stats: Optional[Dict] = None,
+                              model_exports: Optional['ModelExportFiles'] = None,
+                              progress: Optional[BatchProgress] = None) -> CompactResultBatch:
+        """
+        Führt Batch-Analyse durch und sammelt Ergebnisse in einem CompactResultBatch.
+        
+        Für große Lead-Listen: Ergebnisse werden direkt beim Eintreffen
+        spaltenweise abgelegt, statt als Pydantic-Objekte und Dictionaries.
+        Mit model_exports werden zusätzlich die Modell-CSVs fortgeschrieben
+        (close() übernimmt der Aufrufer).
+        
+        Args:
+            profiles: Liste von ProfileInput
+            target_keywords: Target Keywords
+            product_category: Produkt-Kategorie
+            errors: Liste, in die Profil-Fehler eingetragen werden (optional)
+            checkpoint: Checkpoint für fortsetzbare Läufe (optional)
+            stats: Dictionary für Wiederverwendungs-Statistiken (optional)
+            model_exports: Inkrementelle Modell-Exporte (optional)
+            progress: Live-Fortschritt; liefert auch das Abbruch-Signal (optional)
+            
+        Returns:
+            CompactResultBatch
+        """
+        batch = CompactResultBatch(capacity=len(profiles))
+        
+        def on_result(result):
+            batch.append(result)
+            if model_exports:
+                model_exports.write(self._result_to_dict(result))
+            if progress:
+                progress.record_result(result)
+        
+        self.analyzer.analyze_batch(
+            profiles=profiles,
+            target_keywords=target_keywords or [],
+            product_category=product_category,
+            include_enneagram=False,
+            max_workers=5,
+            errors=errors,
+            checkpoint=checkpoint,
+            result_store=self.result_store,
+            stats=stats,
+            on_result=on_result,
+            keep_results=False,
+            on_error=progress.record_error if progress else None,
+            cancel_event=progress.cancel_event if progress else None
+        )
+        
+        logger.info(f"Batch-Analyse abgeschlossen: {len(batch)} Ergebnisse ({batch.memory_usage()})")
+        return batch
+    
+    def resume_batch(self, checkpoint: BatchCheckpoint,
+                     errors: Optional[List[Dict[str, str]]] = None,
+                     progress: Optional[BatchProgress] = None) -> CompactResultBatch:
+        """
+        Setzt einen abgebrochenen Batch-Lauf fort.
+        
+        Args:
+            checkpoint: Checkpoint des Laufs
+            errors: Liste, in die Profil-Fehler eingetragen werden (optional)
+            progress: Live-Fortschritt; liefert auch das Abbruch-Signal (optional)
+            
+        Returns:
+            Alle Ergebnisse des Laufs als CompactResultBatch
+        """
+        self.analyzer.resume_batch(
+            checkpoint,
+            max_workers=5,
+            errors=errors,
+            on_result=progress.record_result if progress else None,
+            on_error=progress.record_error if progress else None,
+            cancel_event=progress.cancel_event if progress else None
+        )
+        return self.load_checkpoint_results(checkpoint)
+    
+    def load_checkpoint_results(self, checkpoint: BatchCheckpoint) -> CompactResultBatch:
+        """Lädt die gesicherten Ergebnisse eines Checkpoints als CompactResultBatch"""
+        return CompactResultBatch.from_results(checkpoint.iter_results())
+    
+    def write_model_exports(self, results: Iterable, directory: str) -> 'ModelExportFiles':
+        """
+        Schreibt die Modell-Exporte für bereits vorliegende Ergebnisse (z.B. nach Resume).
+        
+        Args:
+            results: Ergebnisse (z.B. CompactResultBatch oder Checkpoint-Iterator)
+            directory: Zielverzeichnis
+            
+        Returns:
+            Geschlossene ModelExportFiles (Vorschau und Zeilenzahlen)
+        """
+        # Eigener Temp-Name: kollidiert nicht mit den '.partial'-Dateien eines laufenden Uploads
+        model_exports = ModelExportFiles(directory, partial_suffix=f".{uuid.uuid4().hex[:8]}.tmp")
+        for result_dict in self.iter_result_dicts(results):
+            model_exports.write(result_dict)
+        model_exports.close()
+        return model_exports
+    
+    def iter_result_dicts(self, results: Iterable) -> Iterator[Dict]:
+        """Konvertiert Ergebnisse einzeln zu Dictionaries (z.B. aus einem CompactResultBatch)"""
+        for result in results:
+            yield self._result_to_dict(result)
+    
     def _result_to_dict(self, result) -> Dict:
         """Konvertiert ProfileAnalysisResult zu Dictionary"""
         return {
@@ -167,14 +277,94 @@ class CSVProcessor:
             # Purchase Intent
             'pi_score': result.purchase_intent.score,
             'pi_category': result.purchase_intent.category,
+            **{
+                pi_column(category): result.purchase_intent.category_scores.get(category)
+                for category in config.PURCHASE_INTENT_PRODUCT_MAPPING
+            },
             
             # Overall
             'overall_confidence': result.overall_confidence,
-            'warnings': len(result.warnings)
+            'warnings': len(result.warnings),
+            'degraded_agents': ','.join(result.degraded_agents)
         }
 
 
-def extract_model_data(results: List[Dict], model: str) -> List[Dict]:
+MODEL_NAMES = ('disc', 'neo', 'persuasion', 'riasec')
+
+
+def project_model_row(result: Dict, model: str) -> Optional[Dict]:
+    """
+    Projiziert ein Analyse-Ergebnis auf die Spalten eines Psychologisierungs-Modells.
+    
+    Args:
+        result: Analyse-Ergebnis als Dictionary (siehe CSVProcessor._result_to_dict)
+        model: Modell-Name (disc/neo/persuasion/riasec)
+        
+    Returns:
+        Dictionary mit Modell-spezifischen Daten (None bei unbekanntem Modell)
+    """
+    if model == 'disc':
+        return {
+            'lead_id': result['lead_id'],
+            'primary_type': result['disc_primary'],
+            'secondary_type': result['disc_secondary'],
+            'subtype': result['disc_subtype'],
+            'archetype': result['disc_archetype'],
+            'score_d': result['disc_score_d'],
+            'score_i': result['disc_score_i'],
+            'score_s': result['disc_score_s'],
+            'score_c': result['disc_score_c'],
+            'confidence': result['disc_confidence'],
+            'reasoning': result['disc_reasoning']
+        }
+    
+    elif model == 'neo':
+        return {
+            'lead_id': result['lead_id'],
+            'openness': result['neo_openness'],
+            'conscientiousness': result['neo_conscientiousness'],
+            'extraversion': result['neo_extraversion'],
+            'agreeableness': result['neo_agreeableness'],
+            'neuroticism': result['neo_neuroticism'],
+            'confidence': result['neo_confidence'],
+            'reasoning': result['neo_reasoning']
+        }
+    
+    elif model == 'persuasion':
+        return {
+            'lead_id': result['lead_id'],
+            'score_authority': result['pers_authority'],
+            'score_social_proof': result['pers_social_proof'],
+            'score_scarcity': result['pers_scarcity'],
+            'score_reciprocity': result['pers_reciprocity'],
+            'score_consistency': result['pers_consistency'],
+            'score_liking': result['pers_liking'],
+            'score_unity': result['pers_unity'],
+            'primary_principle': result['pers_primary'],
+            'confidence': result['pers_confidence'],
+            'reasoning': result['pers_reasoning']
+        }
+    
+    elif model == 'riasec':
+        return {
+            'lead_id': result['lead_id'],
+            'holland_code': result['riasec_holland_code'],
+            'score_r': result['riasec_score_r'],
+            'score_i': result['riasec_score_i'],
+            'score_a': result['riasec_score_a'],
+            'score_s': result['riasec_score_s'],
+            'score_e': result['riasec_score_e'],
+            'score_c': result['riasec_score_c'],
+            'primary_dim': result['riasec_primary'],
+            'confidence': result['riasec_confidence'],
+            'source': result['riasec_source'],
+            'reasoning': result['riasec_reasoning']
+        }
+    
+    return None
+
+
+def extract_model_data(results: Iterable[Dict], model: str) -> List[Dict]:
     """
     Extrahiert Daten für spezifisches Psychologisierungs-Modell.
     
@@ -185,68 +375,10 @@ def extract_model_data(results: List[Dict], model: str) -> List[Dict]:
     Returns:
         Liste von Dictionaries mit Modell-spezifischen Daten
     """
-    extracted = []
+    if model not in MODEL_NAMES:
+        return []
     
-    for result in results:
-        if model == 'disc':
-            extracted.append({
-                'lead_id': result['lead_id'],
-                'primary_type': result['disc_primary'],
-                'secondary_type': result['disc_secondary'],
-                'subtype': result['disc_subtype'],
-                'archetype': result['disc_archetype'],
-                'score_d': result['disc_score_d'],
-                'score_i': result['disc_score_i'],
-                'score_s': result['disc_score_s'],
-                'score_c': result['disc_score_c'],
-                'confidence': result['disc_confidence'],
-                'reasoning': result['disc_reasoning']
-            })
-        
-        elif model == 'neo':
-            extracted.append({
-                'lead_id': result['lead_id'],
-                'openness': result['neo_openness'],
-                'conscientiousness': result['neo_conscientiousness'],
-                'extraversion': result['neo_extraversion'],
-                'agreeableness': result['neo_agreeableness'],
-                'neuroticism': result['neo_neuroticism'],
-                'confidence': result['neo_confidence'],
-                'reasoning': result['neo_reasoning']
-            })
-        
-        elif model == 'persuasion':
-            extracted.append({
-                'lead_id': result['lead_id'],
-                'score_authority': result['pers_authority'],
-                'score_social_proof': result['pers_social_proof'],
-                'score_scarcity': result['pers_scarcity'],
-                'score_reciprocity': result['pers_reciprocity'],
-                'score_consistency': result['pers_consistency'],
-                'score_liking': result['pers_liking'],
-                'score_unity': result['pers_unity'],
-                'primary_principle': result['pers_primary'],
-                'confidence': result['pers_confidence'],
-                'reasoning': result['pers_reasoning']
-            })
-        
-        elif model == 'riasec':
-            extracted.append({
-                'lead_id': result['lead_id'],
-                'holland_code': result['riasec_holland_code'],
-                'score_r': result['riasec_score_r'],
-                'score_i': result['riasec_score_i'],
-                'score_a': result['riasec_score_a'],
-                'score_s': result['riasec_score_s'],
-                'score_e': result['riasec_score_e'],
-                'score_c': result['riasec_score_c'],
-                'primary_dim': result['riasec_primary'],
-                'confidence': result['riasec_confidence'],
-                'source': result['riasec_source'],
-                'reasoning': result['riasec_reasoning']
-            })
-    
-    return extracted
+    return [project_model_row(result, model) for result in results]
 
 
 def export_model_to_csv(data: List[Dict], output_file: str):
@@ -267,3 +399,70 @@ def export_model_to_csv(data: List[Dict], output_file: str):
     
     logger.info(f"Modell-Daten exportiert: {output_file}")
 
+
+
+class ModelExportFiles:
+    """
+    Schreibt die Modell-Exporte (disc/neo/persuasion/riasec) inkrementell als CSV-Dateien.
+    
+    Jedes Ergebnis wird beim Eintreffen einmal auf alle Modelle projiziert und
+    angehängt. Die Dateien entstehen als '.partial' und werden bei close()
+    umbenannt; eine vorhandene Datei ist damit immer vollständig und kann
+    direkt ausgeliefert werden. Die ersten preview_size Zeilen pro Modell
+    bleiben für die Vorschau im Speicher.
+    """
+    
+    def __init__(self, directory: str, preview_size: int = 10, partial_suffix: str = '.partial'):
+        """
+        Args:
+            directory: Zielverzeichnis (z.B. Checkpoint-Verzeichnis des Laufs)
+            preview_size: Zeilen pro Modell für die Vorschau
+            partial_suffix: Endung der Dateien bis close()
+        """
+        self.directory = directory
+        self.preview_size = preview_size
+        self.partial_suffix = partial_suffix
+        self.previews: Dict[str, List[Dict]] = {model: [] for model in MODEL_NAMES}
+        self.counts: Dict[str, int] = {model: 0 for model in MODEL_NAMES}
+        self._files = {}
+        self._writers = {}
+        
+        os.makedirs(directory, exist_ok=True)
+    
+    @staticmethod
+    def path(directory: str, model: str) -> str:
+        """Pfad der fertigen Export-Datei eines Modells"""
+        return os.path.join(directory, f"model_{model}.csv")
+    
+    def write(self, result: Dict):
+        """
+        Hängt ein Ergebnis an alle Modell-Dateien an.
+        
+        Args:
+            result: Analyse-Ergebnis als Dictionary (siehe CSVProcessor._result_to_dict)
+        """
+        for model in MODEL_NAMES:
+            row = project_model_row(result, model)
+            
+            writer = self._writers.get(model)
+            if writer is None:
+                f = open(self.path(self.directory, model) + self.partial_suffix, 'w', newline='', encoding='utf-8')
+                writer = csv.DictWriter(f, fieldnames=list(row.keys()))
+                writer.writeheader()
+                self._files[model] = f
+                self._writers[model] = writer
+            
+            writer.writerow(row)
+            self.counts[model] += 1
+            if len(self.previews[model]) < self.preview_size:
+                self.previews[model].append(row)
+    
+    def close(self):
+        """Schließt die Dateien und gibt sie zum Download frei"""
+        for model, f in self._files.items():
+            f.close()
+            os.replace(f.name, self.path(self.directory, model))
+        
+        self._files = {}
+        self._writers = {}
+        logger.info(f"Modell-Exporte geschrieben: {self.directory} ({self.counts['disc']} Profile)")
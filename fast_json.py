@@ -0,0 +1,208 @@
+"""
+PCBF 2.1 Framework - Schnelle JSON-Serialisierung
+orjson-basierte Serialisierung (Fallback: json), Einbetten bereits
+serialisierter Ergebnisse, Server-Sent-Events und Response-Klasse mit gzip/brotli
+"""
+import re
+import gzip
+import asyncio
+import json
+import uuid
+import logging
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import anyio
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+
+import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+class RawJSON:
+    """
+    Bereits serialisiertes JSON, das unverändert eingebettet wird
+    (z.B. result_json aus dem ResultStore).
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data.encode('utf-8') if isinstance(data, str) else data
+
+
+def _default(obj: Any) -> Any:
+    """Serialisiert Typen, die orjson/json nicht kennen"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):  # numpy
+        return obj.tolist()
+    return str(obj)
+
+
+def _dumps_plain(obj: Any, default) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, default=default).encode('utf-8')
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialisiert ein Objekt als UTF-8-JSON.
+
+    Pydantic-Modelle, datetime und numpy-Werte werden unterstützt;
+    RawJSON-Werte werden ohne erneutes Parsen eingebettet.
+
+    Args:
+        obj: Zu serialisierendes Objekt
+
+    Returns:
+        JSON als Bytes
+    """
+    raws: List[bytes] = []
+    token = None
+
+    def default(value):
+        nonlocal token
+        if isinstance(value, RawJSON):
+            token = token or uuid.uuid4().hex
+            raws.append(value.data)
+            return f"__pcbf_raw_{token}_{len(raws) - 1}__"
+        return _default(value)
+
+    data = _dumps_plain(obj, default)
+    if not raws:
+        return data
+
+    # Platzhalter-Strings durch das vorserialisierte JSON ersetzen
+    pattern = re.compile(rb'"__pcbf_raw_' + token.encode() + rb'_(\d+)__"')
+    return pattern.sub(lambda m: raws[int(m.group(1))], data)
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Serialisiert ein Objekt als JSON-Lines-Zeile (mit Zeilenumbruch)"""
+    return dumps(obj) + b'\n'
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """
+    Formatiert ein Server-Sent-Event mit JSON-Daten.
+
+    Args:
+        event: Event-Typ (EventSource: addEventListener(event, ...))
+        data: Zu serialisierende Daten
+
+    Returns:
+        SSE-Frame als Bytes
+    """
+    return b'event: ' + event.encode('utf-8') + b'\ndata: ' + dumps(data) + b'\n\n'
+
+
+async def sse_stream(queue, terminal_events: Iterable[str]) -> AsyncIterator[bytes]:
+    """
+    Liefert (event, payload)-Tupel einer asyncio-Queue als SSE-Frames.
+
+    Bei Leerlauf wird alle config.SSE_KEEPALIVE_SECONDS ein Kommentar
+    gesendet, damit Proxies die Verbindung offen halten.
+
+    Args:
+        queue: asyncio.Queue mit (event, payload)-Tupeln
+        terminal_events: Events, nach denen der Stream endet
+
+    Returns:
+        Async-Iterator über SSE-Frames (für StreamingResponse)
+    """
+    while True:
+        try:
+            event, payload = await asyncio.wait_for(queue.get(), timeout=config.SSE_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield b': keepalive\n\n'
+            continue
+
+        yield sse_event(event, payload)
+        if event in terminal_events:
+            return
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Wählt die Kompression anhand des Accept-Encoding-Headers.
+
+    Args:
+        accept_encoding: Header-Wert (z.B. 'gzip, deflate, br')
+
+    Returns:
+        'br', 'gzip' oder None
+    """
+    if not accept_encoding:
+        return None
+
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Komprimiert Bytes mit 'br' oder 'gzip'"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-Response mit orjson-Serialisierung.
+
+    Antworten ab config.JSON_COMPRESS_MIN_BYTES werden je nach
+    Accept-Encoding des Requests mit brotli oder gzip komprimiert.
+    Als default_response_class der Apps sowie direkt für große
+    Antworten (umgeht die Serialisierung über response_model).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+    async def __call__(self, scope, receive, send):
+        if len(self.body) >= config.JSON_COMPRESS_MIN_BYTES and 'content-encoding' not in self.headers:
+            request_headers = dict(scope.get('headers') or [])
+            encoding = negotiate_encoding(request_headers.get(b'accept-encoding', b'').decode('latin-1'))
+            if encoding:
+                self.body = await anyio.to_thread.run_sync(compress, self.body, encoding)
+                self.headers['content-encoding'] = encoding
+                self.headers['content-length'] = str(len(self.body))
+                self.headers.add_vary_header('Accept-Encoding')
+
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,380 @@
+"""
+PCBF 2.1 Framework - Toleranter JSON-Parser für LLM-Antworten
+Extrahiert JSON aus Freitext/Markdown und parst inkrementell (Chunk für Chunk)
+"""
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+_SMART_QUOTES = {'“': '"', '”': '"', '„': '"'}
+
+
+class IncrementalJSONParser:
+    """
+    Inkrementeller Parser für ein JSON-Objekt in einem Textstrom.
+
+    Text vor dem ersten '{' (z.B. Markdown-Fences oder Einleitungssätze)
+    wird ignoriert. Der Parser verfolgt Verschachtelung und Strings und
+    merkt sich für jeden Top-Level-Key die Textspanne seines Werts, sobald
+    dieser vollständig ist. Dadurch kann ein Aufrufer abbrechen, sobald
+    z.B. das "scores"-Objekt geschlossen wurde.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+        # Top-Level-Key-Tracking
+        self._expect_key = False
+        self._current_key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self._value_spans: Dict[str, Tuple[int, int]] = {}
+
+    @property
+    def is_complete(self) -> bool:
+        """True, sobald das Wurzel-Objekt geschlossen wurde"""
+        return self._end is not None
+
+    @property
+    def completed_keys(self) -> List[str]:
+        """Top-Level-Keys, deren Wert vollständig vorliegt"""
+        return list(self._value_spans.keys())
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Verarbeitet den nächsten Text-Chunk.
+
+        Args:
+            chunk: Neuer Text (z.B. ein SSE-Delta)
+
+        Returns:
+            True, wenn das Wurzel-Objekt vollständig ist
+        """
+        if self.is_complete or not chunk:
+            return self.is_complete
+
+        self.buffer += chunk
+        text = self.buffer
+
+        while self._pos < len(text):
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+
+            if self._start is None:
+                if ch == '{':
+                    self._start = i
+                    self._depth = 1
+                    self._expect_key = True
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key_start is not None:
+                        self._current_key = text[self._key_start + 1:i]
+                        self._key_start = None
+                    elif self._depth == 1 and self._value_start is not None:
+                        # String-Wert auf Top-Level abgeschlossen
+                        self._close_value(i + 1)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = i
+                    self._expect_key = False
+                elif self._depth == 1 and self._current_key is not None and self._value_start is None:
+                    self._value_start = i
+                continue
+
+            if ch in '{[':
+                if self._depth == 1 and self._current_key is not None and self._value_start is None:
+                    self._value_start = i
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._close_value(i + 1)
+                elif self._depth == 0:
+                    if self._value_start is not None:
+                        # Primitiver Wert direkt vor '}'
+                        self._close_value(i)
+                    self._end = i + 1
+                    return True
+            elif self._depth == 1:
+                if ch == ',':
+                    if self._value_start is not None:
+                        self._close_value(i)
+                    self._expect_key = True
+                    self._current_key = None
+                elif ch == ':':
+                    pass
+                elif not ch.isspace() and self._current_key is not None and self._value_start is None:
+                    # Zahl, true/false/null
+                    self._value_start = i
+
+        return False
+
+    def _close_value(self, end: int):
+        """Merkt sich die Spanne eines vollständigen Top-Level-Werts"""
+        if self._current_key is not None and self._value_start is not None:
+            self._value_spans[self._current_key] = (self._value_start, end)
+        self._value_start = None
+        self._current_key = None
+
+    def get_value(self, key: str) -> Any:
+        """
+        Gibt den geparsten Wert eines vollständigen Top-Level-Keys zurück.
+
+        Args:
+            key: Top-Level-Key
+
+        Returns:
+            Geparster Wert oder None
+        """
+        span = self._value_spans.get(key)
+        if span is None:
+            return None
+        raw = self.buffer[span[0]:span[1]].strip()
+        return loads_tolerant(raw)
+
+    def partial_string_value(self, key: str) -> Optional[str]:
+        """
+        Gibt den (ggf. noch unvollständigen) Text eines Top-Level-String-Werts zurück.
+
+        Ermöglicht progressives Rendern, z.B. eines Nachrichtentexts,
+        während das LLM noch generiert.
+
+        Args:
+            key: Top-Level-Key
+
+        Returns:
+            Bisheriger Text oder None, falls der Wert noch nicht begonnen hat
+        """
+        if key in self._value_spans:
+            value = self.get_value(key)
+            return value if isinstance(value, str) else None
+
+        if (self._current_key != key or self._value_start is None
+                or self.buffer[self._value_start] != '"'):
+            return None
+
+        raw = self.buffer[self._value_start:]
+        if self._escape:
+            raw = raw[:-1]
+        value = loads_tolerant(raw + '"')
+        return value if isinstance(value, str) else None
+
+    def partial_result(self, keys: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Baut ein Dictionary aus allen (oder den angegebenen) vollständigen Keys.
+
+        Args:
+            keys: Gewünschte Keys (default: alle vollständigen)
+
+        Returns:
+            Dictionary mit geparsten Werten
+        """
+        result = {}
+        for key in (keys if keys is not None else self.completed_keys):
+            if key in self._value_spans:
+                value = self.get_value(key)
+                if value is not None:
+                    result[key] = value
+        return result
+
+    def result(self) -> Optional[Any]:
+        """
+        Gibt das geparste Wurzel-Objekt zurück.
+
+        Bei unvollständigem Text (z.B. abgeschnitten durch max_tokens)
+        wird versucht, das Objekt tolerant zu schließen.
+        """
+        if self._start is None:
+            return None
+        raw = self.buffer[self._start:self._end] if self.is_complete else self.buffer[self._start:]
+        parsed = loads_tolerant(raw)
+        if parsed is None and not self.is_complete:
+            parsed = loads_tolerant(_close_open_structures(raw))
+        return parsed
+
+
+def loads_tolerant(raw: str) -> Optional[Any]:
+    """
+    json.loads mit typischen LLM-Reparaturen (Trailing Commas, Smart Quotes).
+
+    Args:
+        raw: JSON-Text
+
+    Returns:
+        Geparste Daten oder None
+    """
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    repaired = raw
+    for bad, good in _SMART_QUOTES.items():
+        repaired = repaired.replace(bad, good)
+    repaired = _TRAILING_COMMA_PATTERN.sub(r'\1', repaired)
+
+    try:
+        return json.loads(repaired)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+def _close_open_structures(raw: str) -> str:
+    """Schließt offene Strings/Klammern eines abgeschnittenen JSON-Texts"""
+    stack = []
+    in_string = False
+    escape = False
+    for ch in raw:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]' and stack:
+            stack.pop()
+
+    closed = raw
+    if in_string:
+        closed += '"'
+    closed = closed.rstrip().rstrip(',')
+    # Abgeschnittene Zahlen/Literale sind unzuverlässig -> null
+    closed = re.sub(r':\s*[-+.\w]*$', ': null', closed)
+    return closed + ''.join(reversed(stack))
+
+
+def extract_json(text: Optional[str]) -> Optional[Any]:
+    """
+    Extrahiert das erste JSON-Objekt aus einer LLM-Antwort.
+
+    Funktioniert mit reinem JSON, Markdown-Code-Blöcken und JSON mit
+    umgebendem Freitext.
+
+    Args:
+        text: LLM-Antworttext
+
+    Returns:
+        Geparste Daten oder None
+    """
+    if not text:
+        return None
+
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    parsed = parser.result()
+    if parsed is not None:
+        return parsed
+
+    # Fallback: JSON-Array oder reines JSON ohne Objekt
+    return loads_tolerant(text.strip().strip('`'))
+
+
+def schema_from_shape(shape: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Leitet ein JSON-Schema aus einer erwarteten Antwort-Struktur ab.
+
+    Die Struktur ist ein Dictionary aus Feldnamen und Python-Typen
+    (str/float/int/bool) oder verschachtelten Dictionaries, z.B.
+    {'scores': {'D': float, 'I': float}, 'reasoning': str}.
+
+    Args:
+        shape: Erwartete Struktur
+
+    Returns:
+        JSON-Schema (strict-kompatibel: alle Felder required)
+    """
+    type_names = {str: 'string', float: 'number', int: 'integer', bool: 'boolean'}
+
+    properties = {}
+    for key, value in shape.items():
+        if isinstance(value, dict):
+            properties[key] = schema_from_shape(value)
+        else:
+            properties[key] = {'type': type_names[value]}
+
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': list(shape.keys()),
+        'additionalProperties': False
+    }
+
+
+def format_example(fields: Dict[str, str], keys: Optional[List[str]] = None) -> str:
+    """
+    Baut das JSON-Beispiel für den Ausgabeformat-Block eines Prompts.
+
+    Args:
+        fields: Feldname -> Beispielwert (als JSON-Text, z.B. '"Begründung"')
+        keys: Nur diese Felder aufnehmen (default: alle, Reihenfolge aus fields)
+
+    Returns:
+        Mehrzeiliges JSON-Beispiel
+    """
+    lines = [f'  "{key}": {value}' for key, value in fields.items()
+             if keys is None or key in keys]
+    return '{\n' + ',\n'.join(lines) + '\n}'
+
+
+def shape_errors(data: Any, shape: Dict[str, Any], path: str = '') -> List[str]:
+    """
+    Prüft geparste Daten gegen eine erwartete Struktur.
+
+    Args:
+        data: Geparste Daten
+        shape: Erwartete Struktur (siehe schema_from_shape)
+        path: Pfad-Präfix für Fehlermeldungen
+
+    Returns:
+        Liste von Fehlerbeschreibungen (leer = gültig)
+    """
+    if not isinstance(data, dict):
+        return [f"{path or 'Antwort'} ist kein JSON-Objekt"]
+
+    errors = []
+    for key, expected in shape.items():
+        field = f"{path}.{key}" if path else key
+        if key not in data:
+            errors.append(f"Feld '{field}' fehlt")
+            continue
+
+        value = data[key]
+        if isinstance(expected, dict):
+            errors.extend(shape_errors(value, expected, field))
+        elif expected is float:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors.append(f"Feld '{field}' muss eine Zahl sein")
+        elif expected is int:
+            if isinstance(value, bool) or not isinstance(value, int):
+                errors.append(f"Feld '{field}' muss eine Ganzzahl sein")
+        elif not isinstance(value, expected):
+            errors.append(f"Feld '{field}' hat falschen Typ ({type(value).__name__})")
+
+    return errors
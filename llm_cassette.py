@@ -0,0 +1,324 @@
+"""
+PCBF 2.1 Framework - Record/Replay-Kassette für LLM-Traffic
+Zeichnet jedes Request/Response-Paar samt Latenz in einer indizierten
+SQLite-Datei auf und spielt es offline wieder ab, z.B. um einen
+Produktions-Batch zu reproduzieren oder Pipeline-Änderungen ohne Live-Calls
+zu benchmarken (siehe config.LLM_CASSETTE_MODE)
+"""
+import io
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+
+import requests
+
+import config
+from llm_providers import LLMProvider, ProviderCall
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """Request ist in der Kassette nicht aufgezeichnet (Replay-Modus)"""
+    pass
+
+
+class Interaction(NamedTuple):
+    """Aufgezeichnete Antwort auf einen Request"""
+    status_code: int
+    content_type: str
+    body: bytes
+    latency_ms: float
+
+
+def request_key(payload: Dict[str, Any]) -> str:
+    """
+    Schlüssel eines Requests (Hash des kanonischen Request-Bodys).
+
+    Args:
+        payload: Request-Body im OpenAI-Format
+
+    Returns:
+        SHA-256 als Hex-String
+    """
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """
+    Kassetten-Datei (SQLite, Index über Request-Schlüssel und Wiederholung).
+
+    Identische Requests werden in Aufnahme-Reihenfolge nummeriert und beim
+    Abspielen in derselben Reihenfolge ausgeliefert; darüber hinaus wird die
+    letzte Aufnahme wiederholt.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Öffnet (bzw. erstellt) die Kassette.
+
+        Args:
+            path: Pfad zur SQLite-Datei (default: config.LLM_CASSETTE_PATH)
+        """
+        self.path = path or config.LLM_CASSETTE_PATH
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            '''CREATE TABLE IF NOT EXISTS interactions (
+                request_key TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                request_json TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                content_type TEXT,
+                body BLOB NOT NULL,
+                latency_ms REAL NOT NULL,
+                recorded_at REAL NOT NULL,
+                PRIMARY KEY (request_key, seq)
+            )'''
+        )
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self._conn.commit()
+
+        self._record_seq: Dict[str, int] = {}
+        self._replay_seq: Dict[str, int] = {}
+
+    def record(self, payload: Dict[str, Any], interaction: Interaction):
+        """
+        Zeichnet eine Antwort auf.
+
+        Args:
+            payload: Request-Body
+            interaction: Antwort (Status, Body, Latenz)
+        """
+        key = request_key(payload)
+        with self._lock:
+            if key not in self._record_seq:
+                row = self._conn.execute(
+                    'SELECT COALESCE(MAX(seq) + 1, 0) FROM interactions WHERE request_key = ?', (key,)
+                ).fetchone()
+                self._record_seq[key] = row[0]
+            seq = self._record_seq[key]
+            self._record_seq[key] = seq + 1
+            self._conn.execute(
+                'INSERT INTO interactions VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, seq, json.dumps(payload, ensure_ascii=False), interaction.status_code,
+                 interaction.content_type, interaction.body, interaction.latency_ms, time.time())
+            )
+            self._conn.commit()
+
+    def replay(self, payload: Dict[str, Any]) -> Optional[Interaction]:
+        """
+        Nächste Aufnahme für einen Request.
+
+        Args:
+            payload: Request-Body
+
+        Returns:
+            Interaction oder None, wenn der Request nicht aufgezeichnet ist
+        """
+        key = request_key(payload)
+        with self._lock:
+            seq = self._replay_seq.get(key, 0)
+            row = self._conn.execute(
+                '''SELECT status_code, content_type, body, latency_ms FROM interactions
+                   WHERE request_key = ? AND seq <= ? ORDER BY seq DESC LIMIT 1''',
+                (key, seq)
+            ).fetchone()
+            if row is None:
+                return None
+            self._replay_seq[key] = seq + 1
+            return Interaction(row[0], row[1] or '', bytes(row[2]), row[3])
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM interactions').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _TeeRaw:
+    """Reicht den Response-Body eines Streams durch und behält eine Kopie"""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.chunks = []
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None):
+        if hasattr(self._raw, 'stream'):
+            chunks = self._raw.stream(amt, decode_content=decode_content)
+        else:
+            chunks = iter(lambda: self._raw.read(amt), b'')
+        for chunk in chunks:
+            self.chunks.append(chunk)
+            yield chunk
+
+    def read(self, amt: Optional[int] = None, **kwargs) -> bytes:
+        chunk = self._raw.read(amt, **kwargs)
+        self.chunks.append(chunk)
+        return chunk
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class CassetteProvider(LLMProvider):
+    """
+    Provider im Record- oder Replay-Modus.
+
+    record: leitet an den eigentlichen Provider weiter und zeichnet die
+    (ggf. per Stream gelesene) Antwort samt Latenz auf.
+    replay: liefert die Antworten aus der Kassette, optional mit den
+    Original-Latenzen; nicht aufgezeichnete Requests schlagen fehl.
+    """
+
+    def __init__(self, name: str, cassette: Cassette, mode: str,
+                 provider: Optional[LLMProvider] = None, replay_latency: Optional[bool] = None):
+        """
+        Args:
+            name: Name des aufgezeichneten Providers (z.B. 'openrouter')
+            cassette: Kassette
+            mode: 'record' oder 'replay'
+            provider: Eigentlicher Provider (nur record)
+            replay_latency: Original-Latenzen abwarten (default: config.LLM_CASSETTE_REPLAY_LATENCY)
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unbekannter Kassetten-Modus: {mode}")
+        if mode == 'record' and provider is None:
+            raise ValueError("Record-Modus benötigt einen Provider")
+
+        super().__init__(provider.model if provider else cassette.get_meta(f"model:{name}"))
+        self.name = name
+        self.cassette = cassette
+        self.mode = mode
+        self.provider = provider
+        self.replay_latency = config.LLM_CASSETTE_REPLAY_LATENCY if replay_latency is None else replay_latency
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if provider:
+            self.structured_output_supported = provider.structured_output_supported
+            cassette.set_meta(f"model:{name}", provider.model or '')
+
+    @contextmanager
+    def request(self, payload: Dict[str, Any], stream: bool = False,
+                estimated_tokens: int = 0) -> Iterator[ProviderCall]:
+        if self.mode == 'replay':
+            with self._replay(payload) as call:
+                yield call
+        else:
+            with self._record(payload, stream, estimated_tokens) as call:
+                yield call
+
+    @contextmanager
+    def _record(self, payload: Dict[str, Any], stream: bool,
+                estimated_tokens: int) -> Iterator[ProviderCall]:
+        start_time = time.time()
+        try:
+            with self.provider.request(payload, stream=stream, estimated_tokens=estimated_tokens) as call:
+                # Ohne Stream hat requests den Body bereits gelesen
+                tee = _TeeRaw(call.response.raw) if stream else None
+                if tee:
+                    call.response.raw = tee
+                yield call
+        except requests.exceptions.HTTPError as e:
+            # Fehlerantworten (z.B. 400 ohne response_format) ebenfalls aufzeichnen
+            if e.response is not None:
+                self._store(payload, e.response.status_code, e.response.headers.get('Content-Type', ''),
+                            e.response.content, start_time)
+            raise
+
+        # Bei vorzeitig beendeten Streams nur der gelesene Teil
+        body = b''.join(tee.chunks) if tee else call.response.content
+        self._store(payload, call.response.status_code, call.response.headers.get('Content-Type', ''),
+                    body, start_time)
+
+    def _store(self, payload: Dict[str, Any], status_code: int, content_type: str,
+               body: bytes, start_time: float):
+        latency_ms = (time.time() - start_time) * 1000
+        self.cassette.record(payload, Interaction(status_code, content_type, body, latency_ms))
+        with self._lock:
+            self.recorded += 1
+
+    @contextmanager
+    def _replay(self, payload: Dict[str, Any]) -> Iterator[ProviderCall]:
+        interaction = self.cassette.replay(payload)
+        if interaction is None:
+            with self._lock:
+                self.misses += 1
+            raise CassetteMissError(f"Request nicht in Kassette {self.cassette.path} ({request_key(payload)[:12]})")
+        with self._lock:
+            self.replayed += 1
+
+        if self.replay_latency:
+            time.sleep(interaction.latency_ms / 1000)
+
+        response = requests.Response()
+        response.status_code = interaction.status_code
+        response.headers['Content-Type'] = interaction.content_type
+        response.raw = io.BytesIO(interaction.body)
+        response.encoding = 'utf-8'
+        response.reason = 'Cassette'
+        response.url = 'cassette://' + self.name
+        response.raise_for_status()
+        yield ProviderCall(response)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = {
+            **super().get_metrics(),
+            'cassette': self.cassette.path,
+            'mode': self.mode,
+            'recorded': self.recorded,
+            'replayed': self.replayed,
+            'misses': self.misses
+        }
+        if self.provider:
+            metrics['provider'] = self.provider.get_metrics()
+        return metrics
+
+
+# Kassetten pro Pfad (alle Provider eines Prozesses teilen sich eine Datei)
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: Optional[str] = None) -> Cassette:
+    """
+    Gibt die (geteilte) Kassette zum Pfad zurück.
+
+    Args:
+        path: Pfad zur Kassette (default: config.LLM_CASSETTE_PATH)
+
+    Returns:
+        Cassette-Instanz
+    """
+    path = path or config.LLM_CASSETTE_PATH
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+            logger.info(f"LLM-Kassette geöffnet: {path} ({len(_cassettes[path])} Aufnahmen)")
+    return _cassettes[path]
@@ -1,50 +1,74 @@
 """
-PCBF 2.1 Framework - LLM Client für OpenRouter API
+PCBF 2.1 Framework - LLM Client (OpenRouter, lokaler Server oder Mock, siehe llm_providers)
 """
 import time
 import json
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Callable, List, Optional, Tuple
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import config
+from json_parser import IncrementalJSONParser, extract_json, schema_from_shape, shape_errors
+from llm_scheduler import current_priority, get_llm_scheduler
+from credential_pool import Credential, CredentialPool
+from llm_providers import LLMProvider, OpenAICompatibleProvider, get_provider
+from prompt_budget import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
 
+class LLMUnavailableError(Exception):
+    """LLM-API nicht erreichbar bzw. Call fehlgeschlagen (nicht: ungültiges JSON)"""
+    pass
+
+
+class LLMResponseError(Exception):
+    """LLM-Antwort auch nach Reparatur-Rückfrage kein gültiges JSON"""
+    pass
+
+
 class LLMClient:
-    """Client für OpenRouter API mit Retry-Logik"""
+    """Client für Chat-Completion-APIs (OpenRouter, lokaler Server oder Mock) mit Retry-Logik"""
     
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None,
+                 credentials: Optional[CredentialPool] = None,
+                 provider: Optional[LLMProvider] = None):
         """
         Initialisiert LLM-Client.
         
         Args:
-            api_key: OpenRouter API-Key (default: aus config)
+            api_key: OpenRouter API-Key (default: Credential-Pool aus config)
             model: Modell-Name (default: aus config)
+            credentials: Credential-Pool (default: get_credential_pool())
+            provider: LLM-Provider (default: get_provider(), d.h. config.LLM_PROVIDER)
         """
-        self.api_key = api_key or config.OPENROUTER_API_KEY
-        self.base_url = config.OPENROUTER_BASE_URL
+        if api_key:
+            credentials = CredentialPool([Credential(api_key)])
+        if credentials:
+            provider = OpenAICompatibleProvider(credentials)
+        self.provider = provider or get_provider()
         self.model = model or config.DEFAULT_MODEL
         
-        if not self.api_key:
-            raise ValueError("OPENROUTER_API_KEY nicht gesetzt!")
+        # Prozessweiter Scheduler (Prioritätsklassen, begrenzte Parallelität)
+        self.scheduler = get_llm_scheduler()
         
-        # Session mit Retry-Logik
-        self.session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["POST"]
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("https://", adapter)
-        self.session.mount("http://", adapter)
+        # JSON-Metriken (jeder Parse-Fehler ist bezahlter, verlorener Call)
+        self._metrics_lock = threading.Lock()
+        self._json_metrics = {
+            'json_requests': 0,
+            'json_parse_failures': 0,
+            'json_repairs_attempted': 0,
+            'json_repairs_succeeded': 0,
+            'json_final_failures': 0,
+            'wasted_tokens': 0,
+            'stream_early_exits': 0,
+            'prompt_compactions': 0,
+            'prompt_tokens_saved': 0
+        }
     
     def call(self, prompt: str, system_prompt: Optional[str] = None, 
-             temperature: float = 0.7, max_tokens: int = 2000) -> Dict[str, Any]:
+             temperature: float = 0.7, max_tokens: int = 2000,
+             response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Ruft LLM-API auf.
         
@@ -53,60 +77,127 @@ class LLMClient:
             system_prompt: System-Prompt (optional)
             temperature: Temperatur (0-1)
             max_tokens: Maximale Token-Anzahl
+            response_format: Structured-Output-Format (optional, z.B. JSON-Schema)
             
         Returns:
             Dictionary mit Response und Metadaten
         """
-        start_time = time.time()
-        
         # Messages zusammenstellen
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
+        return self._chat(messages, temperature, max_tokens, response_format)
+    
+    def _chat(self, messages: List[Dict[str, str]], temperature: float,
+              max_tokens: int, response_format: Optional[Dict[str, Any]] = None,
+              stream: bool = False,
+              on_delta: Optional[Callable[[str, IncrementalJSONParser], None]] = None,
+              stop_when: Optional[Callable[[IncrementalJSONParser], bool]] = None) -> Dict[str, Any]:
+        """
+        Sendet eine Chat-Completion-Anfrage mit vorbereiteten Messages.
+        
+        Der Call wartet auf einen Slot des LLM-Schedulers (Prioritätsklasse
+        und Mandant aus dem aktuellen Kontext, siehe llm_scheduler.llm_priority
+        und llm_tenant).
+        
+        Bei stream=True wird die Antwort per SSE gelesen. on_delta erhält
+        jeden Text-Delta samt inkrementellem JSON-Parser; stop_when kann den
+        Stream vorzeitig beenden (z.B. sobald das Score-Objekt geschlossen ist).
+        """
+        estimated_tokens = sum(estimate_tokens(m['content']) for m in messages) + max_tokens
+        with self.scheduler.slot(tokens=estimated_tokens) as ticket:
+            result = self._post_chat(messages, temperature, max_tokens, response_format,
+                                     stream, on_delta, stop_when, estimated_tokens=estimated_tokens)
+            ticket.tokens_used = result.get('usage', {}).get('total_tokens')
+            return result
+    
+    def _post_chat(self, messages: List[Dict[str, str]], temperature: float,
+                   max_tokens: int, response_format: Optional[Dict[str, Any]] = None,
+                   stream: bool = False,
+                   on_delta: Optional[Callable[[str, IncrementalJSONParser], None]] = None,
+                   stop_when: Optional[Callable[[IncrementalJSONParser], bool]] = None,
+                   estimated_tokens: int = 0) -> Dict[str, Any]:
+        """
+        Führt die Chat-Completion-Anfrage aus (innerhalb eines Scheduler-Slots).
+        
+        Der Provider ergibt sich aus der Prioritätsklasse des Calls (siehe
+        config.LLM_PROVIDER_BY_PRIORITY), sonst der Provider des Clients.
+        """
+        start_time = time.time()
+        prompt = messages[-1]['content']
+        provider = self._provider()
+        model = provider.model or self.model
+        
         # Request-Body
         payload = {
-            "model": self.model,
+            "model": model,
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens
         }
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        if response_format and provider.structured_output_supported:
+            payload["response_format"] = response_format
+        
+        if stream:
+            payload["stream"] = True
         
         try:
-            logger.debug(f"LLM API-Aufruf: Model={self.model}, Prompt-Länge={len(prompt)}")
-            
-            response = self.session.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60
-            )
+            logger.debug(f"LLM API-Aufruf: Provider={provider.name}, Model={model}, Prompt-Länge={len(prompt)}")
             
-            response.raise_for_status()
+            with provider.request(payload, stream=stream, estimated_tokens=estimated_tokens) as call:
+                early_exit = False
+                if stream:
+                    content, usage, early_exit = self._read_stream(call.response, on_delta, stop_when)
+                else:
+                    result = call.response.json()
+                    # Response extrahieren
+                    content = result['choices'][0]['message']['content']
+                    usage = result.get('usage', {})
+                call.tokens_used = usage.get('total_tokens')
             
-            result = response.json()
             latency_ms = (time.time() - start_time) * 1000
             
-            # Response extrahieren
-            content = result['choices'][0]['message']['content']
-            
             logger.debug(f"LLM API-Erfolg: Latenz={latency_ms:.0f}ms, Response-Länge={len(content)}")
             
             return {
                 'success': True,
                 'content': content,
                 'latency_ms': latency_ms,
-                'model': self.model,
-                'usage': result.get('usage', {}),
-                'error': None
+                'model': model,
+                'usage': usage,
+                'error': None,
+                'early_exit': early_exit
             }
             
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response is not None else None
+            
+            # Provider unterstützt response_format nicht -> ohne wiederholen
+            # (nur wenn die Fehlermeldung das belegt; andere 400er sind echte Fehler)
+            if ("response_format" in payload and status_code == 400
+                    and self._rejects_response_format(e.response)):
+                logger.warning(f"Structured Outputs von {model} ({provider.name}) abgelehnt - verwende JSON-Extraktion")
+                provider.structured_output_supported = False
+                return self._post_chat(messages, temperature, max_tokens,
+                                       stream=stream, on_delta=on_delta, stop_when=stop_when,
+                                       estimated_tokens=estimated_tokens)
+            
+            latency_ms = (time.time() - start_time) * 1000
+            error_msg = f"LLM API-Fehler: {str(e)}"
+            logger.error(error_msg)
+            
+            return {
+                'success': False,
+                'content': None,
+                'latency_ms': latency_ms,
+                'model': model,
+                'usage': {},
+                'error': error_msg
+            }
+        
         except requests.exceptions.RequestException as e:
             latency_ms = (time.time() - start_time) * 1000
             error_msg = f"LLM API-Fehler: {str(e)}"
@@ -116,7 +207,7 @@ class LLMClient:
                 'success': False,
                 'content': None,
                 'latency_ms': latency_ms,
-                'model': self.model,
+                'model': model,
                 'usage': {},
                 'error': error_msg
             }
@@ -130,11 +221,216 @@ class LLMClient:
                 'success': False,
                 'content': None,
                 'latency_ms': latency_ms,
-                'model': self.model,
+                'model': model,
                 'usage': {},
                 'error': error_msg
             }
     
+    @staticmethod
+    def _rejects_response_format(response: requests.Response) -> bool:
+        """Prüft, ob eine 400-Antwort response_format/json_schema bemängelt"""
+        try:
+            body = response.text.lower()
+        except Exception:
+            return False
+        return 'response_format' in body or 'json_schema' in body
+    
+    def _provider(self) -> LLMProvider:
+        """Provider für den aktuellen Call (ggf. abweichend je Prioritätsklasse)"""
+        name = config.LLM_PROVIDER_BY_PRIORITY.get(current_priority())
+        return get_provider(name) if name else self.provider
+    
+    def effective_model(self) -> Tuple[str, str]:
+        """
+        Provider und Modell, die ein Call im aktuellen Kontext verwenden würde.
+        
+        Returns:
+            Tuple (Provider-Name, Modell)
+        """
+        provider = self._provider()
+        return provider.name, provider.model or self.model
+    
+    def _read_stream(self, response: requests.Response,
+                     on_delta: Optional[Callable[[str, IncrementalJSONParser], None]],
+                     stop_when: Optional[Callable[[IncrementalJSONParser], bool]]):
+        """
+        Liest eine SSE-Antwort (chat.completion.chunk) inkrementell.
+        
+        Returns:
+            Tuple (content, usage, early_exit)
+        """
+        parser = IncrementalJSONParser()
+        parts = []
+        usage = {}
+        early_exit = False
+        
+        # SSE ohne charset würde von requests als ISO-8859-1 dekodiert
+        response.encoding = 'utf-8'
+        
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                
+                chunk = json.loads(data)
+                if chunk.get('usage'):
+                    usage = chunk['usage']
+                
+                choices = chunk.get('choices') or []
+                delta = choices[0].get('delta', {}).get('content') if choices else None
+                if not delta:
+                    continue
+                
+                parts.append(delta)
+                parser.feed(delta)
+                
+                if on_delta:
+                    on_delta(delta, parser)
+                
+                if stop_when and stop_when(parser):
+                    # Vor dem Schließen des Wurzel-Objekts = Rest übersprungen
+                    early_exit = not parser.is_complete
+                    break
+        finally:
+            # Schließt die Verbindung auch bei vorzeitigem Abbruch
+            response.close()
+        
+        return ''.join(parts), usage, early_exit
+    
+    def call_json(self, prompt: str, system_prompt: Optional[str],
+                  shape: Dict[str, Any], schema_name: str = "response",
+                  temperature: float = 0.3, max_tokens: int = 2000,
+                  required_keys: Optional[List[str]] = None,
+                  on_delta: Optional[Callable[[str, IncrementalJSONParser], None]] = None,
+                  tokens_saved: int = 0, raise_on_error: bool = False) -> Optional[Dict]:
+        """
+        Ruft LLM-API auf und gibt eine strukturell gültige JSON-Antwort zurück.
+        
+        Fordert Structured Output (JSON-Schema aus der erwarteten Struktur) an,
+        extrahiert das JSON tolerant und stellt bei ungültiger Antwort genau
+        eine gezielte Reparatur-Rückfrage.
+        
+        Bei aktivem Streaming (config.LLM_STREAMING oder on_delta) endet der
+        Call, sobald alle benötigten Top-Level-Keys vollständig sind.
+        
+        Der System-Prompt sollte eine Klassenkonstante des Agents sein: nur
+        ein byte-identischer Prefix über alle Calls wird vom Provider gecacht;
+        profilabhängige Daten gehören in den User-Prompt.
+        
+        Args:
+            prompt: User-Prompt
+            system_prompt: System-Prompt (optional)
+            shape: Erwartete Struktur, z.B. {'scores': {'D': float}, 'reasoning': str}
+            schema_name: Name des Schemas für response_format
+            temperature: Temperatur (0-1)
+            max_tokens: Maximale Token-Anzahl
+            required_keys: Nur diese Top-Level-Keys anfordern (z.B. ['scores'])
+            on_delta: Callback für Streaming-Deltas (delta, parser)
+            tokens_saved: Durch Prompt-Kürzung eingesparte Tokens (für Metriken)
+            raise_on_error: Exception statt None bei API-Fehler bzw. ungültiger Antwort
+            
+        Returns:
+            Geparste JSON-Daten oder None bei Fehler
+            
+        Raises:
+            LLMUnavailableError: API-Fehler (auch bei der Reparatur-Rückfrage) und raise_on_error=True
+            LLMResponseError: Antwort nach Reparatur weiterhin ungültig und raise_on_error=True
+        """
+        if required_keys:
+            shape = {key: shape[key] for key in required_keys}
+        
+        if tokens_saved > 0:
+            self._record_json_metric('prompt_compactions')
+            self._record_json_metric('prompt_tokens_saved', tokens_saved)
+            logger.debug(f"Prompt-Budget ({schema_name}): {tokens_saved} Tokens eingespart")
+        
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": schema_name,
+                "strict": True,
+                "schema": schema_from_shape(shape)
+            }
+        }
+        
+        stream = config.LLM_STREAMING or on_delta is not None
+        keys = list(shape.keys())
+        
+        def stop_when(parser: IncrementalJSONParser) -> bool:
+            return parser.is_complete or all(key in parser.completed_keys for key in keys)
+        
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        response = self._chat(messages, temperature, max_tokens, response_format,
+                              stream=stream, on_delta=on_delta,
+                              stop_when=stop_when if stream else None)
+        if not response['success']:
+            if raise_on_error:
+                raise LLMUnavailableError(response['error'])
+            return None
+        
+        self._record_json_metric('json_requests')
+        
+        data = self._extract_response_json(response, keys)
+        errors = shape_errors(data, shape)
+        if not errors:
+            return data
+        
+        self._record_json_metric('json_parse_failures')
+        self._record_json_metric('wasted_tokens', response['usage'].get('total_tokens', 0))
+        logger.warning(f"Ungültige JSON-Antwort ({schema_name}): {'; '.join(errors)}")
+        
+        # Gezielte Reparatur-Rückfrage
+        for _ in range(config.LLM_JSON_REPAIR_ATTEMPTS):
+            self._record_json_metric('json_repairs_attempted')
+            repair_messages = messages + [
+                {"role": "assistant", "content": response['content'] or ""},
+                {"role": "user", "content": (
+                    "Deine Antwort ist kein gültiges JSON gemäß dem geforderten Format. "
+                    f"Probleme: {'; '.join(errors)}. "
+                    "Antworte ausschließlich mit dem korrigierten JSON-Objekt."
+                )}
+            ]
+            response = self._chat(repair_messages, 0.0, max_tokens, response_format,
+                                  stream=stream, stop_when=stop_when if stream else None)
+            if not response['success']:
+                if raise_on_error:
+                    raise LLMUnavailableError(response['error'])
+                break
+            
+            data = self._extract_response_json(response, keys)
+            errors = shape_errors(data, shape)
+            if not errors:
+                self._record_json_metric('json_repairs_succeeded')
+                return data
+            
+            self._record_json_metric('wasted_tokens', response['usage'].get('total_tokens', 0))
+        
+        self._record_json_metric('json_final_failures')
+        logger.error(f"JSON-Antwort ({schema_name}) nach Reparatur weiterhin ungültig")
+        if raise_on_error:
+            raise LLMResponseError(f"JSON-Antwort ({schema_name}) ungültig: {'; '.join(errors)}")
+        return None
+    
+    def _extract_response_json(self, response: Dict[str, Any], keys: List[str]) -> Optional[Any]:
+        """Extrahiert JSON aus einer (ggf. vorzeitig beendeten) Antwort"""
+        if not response.get('early_exit'):
+            return extract_json(response['content'])
+        
+        # Stream wurde nach den benötigten Keys abgebrochen -> nachfolgender
+        # Text (z.B. Reasoning) wird ignoriert
+        self._record_json_metric('stream_early_exits')
+        parser = IncrementalJSONParser()
+        parser.feed(response['content'] or '')
+        return parser.partial_result(keys)
+    
     def parse_json_response(self, response: Dict[str, Any]) -> Optional[Dict]:
         """
         Parst JSON aus LLM-Response.
@@ -148,19 +444,41 @@ class LLMClient:
         if not response['success'] or not response['content']:
             return None
         
-        content = response['content'].strip()
+        data = extract_json(response['content'])
+        if data is None:
+            logger.error(f"JSON-Parse-Fehler\nContent: {response['content'][:200]}...")
+        return data
+    
+    def _record_json_metric(self, name: str, value: int = 1):
+        """Erhöht einen JSON-Metrik-Zähler (thread-safe)"""
+        with self._metrics_lock:
+            self._json_metrics[name] += value
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Gibt JSON-Parse-, Prompt-Budget-, Scheduler- und Credential-Metriken zurück.
         
-        # JSON-Block extrahieren (falls in Markdown-Code-Block)
-        if '```json' in content:
-            content = content.split('```json')[1].split('```')[0].strip()
-        elif '```' in content:
-            content = content.split('```')[1].split('```')[0].strip()
+        Returns:
+            Dictionary mit Zählern und Fehlerraten
+        """
+        with self._metrics_lock:
+            metrics = dict(self._json_metrics)
         
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON-Parse-Fehler: {str(e)}\nContent: {content[:200]}...")
-            return None
+        requests_total = metrics['json_requests']
+        metrics['parse_failure_rate'] = (
+            metrics['json_parse_failures'] / requests_total if requests_total else 0.0
+        )
+        metrics['final_failure_rate'] = (
+            metrics['json_final_failures'] / requests_total if requests_total else 0.0
+        )
+        metrics['structured_output_supported'] = self.provider.structured_output_supported
+        metrics['scheduler'] = self.scheduler.get_metrics()
+        metrics['provider'] = self.provider.get_metrics()
+        metrics['provider_by_priority'] = {
+            priority: get_provider(name).get_metrics()
+            for priority, name in config.LLM_PROVIDER_BY_PRIORITY.items() if name
+        }
+        return metrics
 
 
 # Singleton-Instanz
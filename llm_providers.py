@@ -0,0 +1,347 @@
+"""
+PCBF 2.1 Framework - LLM-Provider
+Transport der Chat-Completion-Anfragen: OpenAI-kompatible APIs (OpenRouter,
+mit Credential-Pool), lokale OpenAI-kompatible Server (llama.cpp, vLLM, ...)
+ohne API-Kosten und Rate-Limit sowie ein deterministischer Mock für
+Offline-Tests der gesamten Pipeline
+"""
+import io
+import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+from credential_pool import Credential, CredentialPool, KeyLease, get_credential_pool
+from prompt_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderCall:
+    """
+    Laufende Anfrage an einen Provider.
+
+    response ist eine requests.Response (bei stream=True noch ungelesen);
+    tokens_used kann mit dem tatsächlichen Verbrauch gesetzt werden.
+    """
+    __slots__ = ('response', 'tokens_used')
+
+    def __init__(self, response: requests.Response):
+        self.response = response
+        self.tokens_used: Optional[int] = None
+
+
+class LLMProvider:
+    """
+    Schnittstelle der Provider.
+
+    request() liefert die HTTP-Antwort einer Chat-Completion-Anfrage
+    (OpenAI-Format, ggf. als SSE-Stream); HTTP-Fehler werden als
+    requests.exceptions.HTTPError geworfen.
+    """
+
+    name = 'base'
+
+    def __init__(self, model: Optional[str] = None):
+        """
+        Args:
+            model: Modell, das statt des Client-Modells angefragt wird (optional)
+        """
+        self.model = model or None
+        # Structured Outputs (response_format) - wird deaktiviert, falls
+        # das Modell/der Server den Parameter ablehnt
+        self.structured_output_supported = config.LLM_STRUCTURED_OUTPUT
+
+    @contextmanager
+    def request(self, payload: Dict[str, Any], stream: bool = False,
+                estimated_tokens: int = 0) -> Iterator[ProviderCall]:
+        """
+        Sendet eine Chat-Completion-Anfrage.
+
+        Args:
+            payload: Request-Body im OpenAI-Format
+            stream: Antwort als SSE-Stream lesen
+            estimated_tokens: Geschätzte Tokens (für Limiter)
+
+        Returns:
+            ProviderCall (Antwort ist bis zum Ende des Blocks gültig)
+        """
+        raise NotImplementedError
+        yield
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Kennzahlen des Providers"""
+        return {'name': self.name, 'model': self.model}
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    OpenAI-kompatible Chat-Completions-API (default: OpenRouter).
+
+    Jeder Call bezieht einen Key aus dem Credential-Pool; bei 401/403/429
+    wird der Key gesperrt und die Anfrage mit einem anderen Key wiederholt.
+    """
+
+    name = 'openrouter'
+
+    def __init__(self, credentials: Optional[CredentialPool] = None, model: Optional[str] = None,
+                 timeout: float = 60):
+        """
+        Args:
+            credentials: Credential-Pool (default: get_credential_pool())
+            model: Abweichendes Modell (optional)
+            timeout: Timeout pro Request in Sekunden
+        """
+        super().__init__(model)
+        self.credentials = credentials or get_credential_pool()
+        self.timeout = timeout
+
+        # Session mit Retry-Logik; bei mehreren Keys wird 429 nicht mit
+        # demselben Key wiederholt, sondern auf einen anderen Key ausgewichen
+        self.session = requests.Session()
+        single_key = len(self.credentials) == 1
+        retry_strategy = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504] if single_key else [500, 502, 503, 504],
+            allowed_methods=["POST"],
+            respect_retry_after_header=single_key
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @contextmanager
+    def request(self, payload: Dict[str, Any], stream: bool = False,
+                estimated_tokens: int = 0) -> Iterator[ProviderCall]:
+        failed = []
+        while True:
+            lease = self.credentials.acquire(estimated_tokens, exclude=failed)
+            response = None
+            try:
+                response = self.session.post(
+                    f"{lease.credential.base_url}/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {lease.credential.api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    json=payload,
+                    timeout=self.timeout,
+                    stream=stream
+                )
+                response.raise_for_status()
+                break
+            except requests.exceptions.HTTPError:
+                self._release(lease, response)
+                # Key gesperrt/ungültig -> mit einem anderen Key wiederholen
+                if response.status_code in (401, 403, 429):
+                    failed.append(lease.credential)
+                    if self.credentials.has_alternative(failed):
+                        logger.warning(f"LLM-Key gesperrt (HTTP {response.status_code}) - weiche auf anderen Key aus")
+                        continue
+                raise
+            except Exception:
+                self._release(lease, response)
+                raise
+
+        call = ProviderCall(response)
+        try:
+            yield call
+        finally:
+            self._release(lease, response, call.tokens_used)
+            response.close()
+
+    def _release(self, lease: KeyLease, response: Optional[requests.Response],
+                 tokens_used: Optional[int] = None):
+        """Gibt den Key an den Pool zurück (Status, Rate-Limit-Header, Verbrauch)"""
+        self.credentials.release(
+            lease,
+            status_code=response.status_code if response is not None else None,
+            headers=response.headers if response is not None else None,
+            tokens_used=tokens_used
+        )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**super().get_metrics(), 'credentials': self.credentials.get_metrics()}
+
+
+class LocalProvider(OpenAICompatibleProvider):
+    """
+    Lokaler OpenAI-kompatibler Server (z.B. llama.cpp, vLLM, Ollama).
+
+    Keine API-Kosten und kein Rate-Limit; gedacht u.a. für Bulk-Vorscoring
+    (siehe config.LLM_PROVIDER_BY_PRIORITY).
+    """
+
+    name = 'local'
+
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None,
+                 api_key: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            base_url: Server-URL inkl. /v1 (default: config.LLM_LOCAL_BASE_URL)
+            model: Modell des Servers (default: config.LLM_LOCAL_MODEL)
+            api_key: Key, falls der Server einen verlangt (default: config.LLM_LOCAL_API_KEY)
+            timeout: Timeout pro Request (default: config.LLM_LOCAL_TIMEOUT_SECONDS)
+        """
+        credential = Credential(
+            api_key or config.LLM_LOCAL_API_KEY or 'local',
+            base_url or config.LLM_LOCAL_BASE_URL,
+            name='local'
+        )
+        super().__init__(
+            CredentialPool([credential]),
+            model=model or config.LLM_LOCAL_MODEL,
+            timeout=timeout or config.LLM_LOCAL_TIMEOUT_SECONDS
+        )
+
+
+class MockProvider(LLMProvider):
+    """
+    Deterministischer Offline-Provider.
+
+    Erzeugt zu jedem JSON-Schema (response_format) eine gültige Antwort,
+    deren Werte nur vom Prompt abhängen (gleicher Prompt = gleiche Antwort);
+    Zahlen liegen zwischen 0.05 und 0.95. Unterstützt Streaming (SSE).
+    """
+
+    name = 'mock'
+
+    def __init__(self, latency_seconds: Optional[float] = None, model: Optional[str] = None):
+        """
+        Args:
+            latency_seconds: Simulierte Antwortzeit pro Call (default: config.LLM_MOCK_LATENCY_SECONDS)
+            model: Modellname in den Antworten (optional)
+        """
+        super().__init__(model)
+        self.latency_seconds = config.LLM_MOCK_LATENCY_SECONDS if latency_seconds is None else latency_seconds
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def request(self, payload: Dict[str, Any], stream: bool = False,
+                estimated_tokens: int = 0) -> Iterator[ProviderCall]:
+        with self._lock:
+            self.requests += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        content = mock_content(payload)
+        prompt_tokens = sum(estimate_tokens(m['content']) for m in payload['messages'])
+        completion_tokens = estimate_tokens(content)
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+
+        if stream:
+            chunks = [
+                {'choices': [{'delta': {'content': content[i:i + 16]}}]}
+                for i in range(0, len(content), 16)
+            ] + [{'choices': [], 'usage': usage}]
+            body = b''.join(b'data: ' + json.dumps(chunk).encode('utf-8') + b'\n\n' for chunk in chunks)
+            body += b'data: [DONE]\n\n'
+            content_type = 'text/event-stream'
+        else:
+            body = json.dumps({
+                'model': payload.get('model'),
+                'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                'usage': usage
+            }).encode('utf-8')
+            content_type = 'application/json'
+
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = content_type
+        response.raw = io.BytesIO(body)
+        response.encoding = 'utf-8'
+        yield ProviderCall(response)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**super().get_metrics(), 'requests': self.requests}
+
+
+def mock_content(payload: Dict[str, Any]) -> str:
+    """
+    Deterministische Antwort für einen Request-Body.
+
+    Args:
+        payload: Request-Body im OpenAI-Format
+
+    Returns:
+        JSON passend zum Schema aus response_format, sonst ein kurzer Text
+    """
+    seed = hashlib.sha256(payload['messages'][-1]['content'].encode('utf-8')).hexdigest()
+    schema = (payload.get('response_format') or {}).get('json_schema', {}).get('schema')
+    if schema is None:
+        return f"Mock-Antwort {seed[:8]}"
+    return json.dumps(_mock_value(schema, seed, ''), ensure_ascii=False)
+
+
+def _mock_value(schema: Dict[str, Any], seed: str, path: str) -> Any:
+    """Wert zu einem JSON-Schema, abgeleitet aus Seed und Feldpfad"""
+    schema_type = schema.get('type')
+    if schema_type == 'object':
+        return {key: _mock_value(sub, seed, f"{path}.{key}") for key, sub in schema.get('properties', {}).items()}
+    if schema_type == 'array':
+        return [_mock_value(schema.get('items', {}), seed, f"{path}[0]")]
+
+    digest = int(hashlib.sha256(f"{seed}{path}".encode('utf-8')).hexdigest()[:8], 16)
+    if schema_type == 'number':
+        return round(0.05 + 0.9 * digest / 0xFFFFFFFF, 3)
+    if schema_type == 'integer':
+        return digest % 100
+    if schema_type == 'boolean':
+        return digest % 2 == 0
+    return f"Mock {path.lstrip('.')}"
+
+
+PROVIDERS = {
+    'openrouter': OpenAICompatibleProvider,
+    'openai': OpenAICompatibleProvider,
+    'local': LocalProvider,
+    'mock': MockProvider
+}
+
+# Provider-Instanzen pro Name
+_providers: Dict[str, LLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: Optional[str] = None) -> LLMProvider:
+    """
+    Gibt die (geteilte) Provider-Instanz zum Namen zurück.
+
+    Bei gesetztem config.LLM_CASSETTE_MODE wird der Provider aufgezeichnet
+    bzw. aus der Kassette abgespielt (siehe llm_cassette).
+
+    Args:
+        name: 'openrouter'/'openai', 'local' oder 'mock' (default: config.LLM_PROVIDER)
+
+    Returns:
+        LLMProvider-Instanz
+    """
+    name = name or config.LLM_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unbekannter LLM-Provider: {name}")
+    with _providers_lock:
+        if name not in _providers:
+            if config.LLM_CASSETTE_MODE:
+                from llm_cassette import CassetteProvider, get_cassette
+                # Replay braucht keinen echten Provider (und keinen API-Key)
+                provider = PROVIDERS[name]() if config.LLM_CASSETTE_MODE == 'record' else None
+                _providers[name] = CassetteProvider(name, get_cassette(), config.LLM_CASSETTE_MODE, provider)
+                logger.info(f"LLM-Provider '{name}' im Kassetten-Modus '{config.LLM_CASSETTE_MODE}'")
+            else:
+                _providers[name] = PROVIDERS[name]()
+                logger.info(f"LLM-Provider '{name}' initialisiert")
+    return _providers[name]
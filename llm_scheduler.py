@@ -0,0 +1,417 @@
+"""
+PCBF 2.1 Framework - LLM-Scheduler mit Prioritätsklassen
+Verteilt die begrenzten parallelen LLM-Calls gewichtet fair auf interaktive
+Anfragen, API-Batches und Bulk-Läufe (CSV, CLI); interaktive Calls haben
+reservierte Slots und warten nie hinter einem großen Batch. Innerhalb einer
+Klasse wechseln sich die Mandanten (Teams) per Deficit Round Robin ab
+"""
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+API_BATCH = 'api_batch'
+BULK = 'bulk'
+
+# Reihenfolge = Vorrang bei gleichem Fairness-Stand
+PRIORITY_CLASSES = (INTERACTIVE, API_BATCH, BULK)
+
+# Anzahl Wartezeiten pro Klasse für das p95
+WAIT_SAMPLE_SIZE = 1000
+
+# Wartende Calls prüfen Token-Limits spätestens nach dieser Zeit erneut
+TOKEN_LIMIT_RECHECK_SECONDS = 1.0
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar('llm_priority', default=None)
+_current_tenant: contextvars.ContextVar = contextvars.ContextVar('llm_tenant', default=None)
+
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """
+    Setzt die Prioritätsklasse für alle LLM-Calls im Block.
+
+    Die Klasse gilt für den aktuellen Thread bzw. Task und wird mit
+    submit_with_context an Worker-Threads weitergegeben.
+
+    Args:
+        priority: INTERACTIVE, API_BATCH oder BULK
+    """
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unbekannte LLM-Priorität: {priority}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    """Prioritätsklasse des aktuellen Kontexts (default: config.LLM_DEFAULT_PRIORITY)"""
+    return _current_priority.get() or config.LLM_DEFAULT_PRIORITY
+
+
+@contextmanager
+def llm_tenant(tenant: Optional[str]) -> Iterator[None]:
+    """
+    Setzt den Mandanten (Team/Owner) für alle LLM-Calls im Block.
+
+    Calls verschiedener Mandanten werden innerhalb einer Prioritätsklasse
+    abwechselnd bedient; Limits pro Mandant siehe config.LLM_TENANT_LIMITS.
+
+    Args:
+        tenant: Mandanten-Schlüssel (None = config.LLM_DEFAULT_TENANT)
+    """
+    token = _current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def current_tenant() -> str:
+    """Mandant des aktuellen Kontexts (default: config.LLM_DEFAULT_TENANT)"""
+    return _current_tenant.get() or config.LLM_DEFAULT_TENANT
+
+
+def priority_for_request(profile_count: int) -> str:
+    """
+    Prioritätsklasse eines API-Requests nach Anzahl Profile.
+
+    Args:
+        profile_count: Anzahl Profile im Request
+
+    Returns:
+        INTERACTIVE bis config.LLM_INTERACTIVE_MAX_PROFILES, sonst API_BATCH
+    """
+    return INTERACTIVE if profile_count <= config.LLM_INTERACTIVE_MAX_PROFILES else API_BATCH
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """
+    executor.submit, das LLM-Priorität und Mandant in den Worker-Thread übernimmt.
+
+    Returns:
+        Future
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class _Ticket:
+    __slots__ = ('priority', 'tenant', 'tokens', 'tokens_used', 'enqueued_at', 'granted', 'usage_entry')
+
+    def __init__(self, priority: str, tenant: str, tokens: int):
+        self.priority = priority
+        self.tenant = tenant
+        self.tokens = tokens
+        self.tokens_used: Optional[int] = None
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.usage_entry: Optional[list] = None
+
+
+class _TenantState:
+    """Laufende Calls und Token-Verbrauch (gleitende Minute) eines Mandanten"""
+    __slots__ = ('in_flight', 'granted', 'usage')
+
+    def __init__(self):
+        self.in_flight = 0
+        self.granted = 0
+        self.usage: deque = deque()  # [Zeitpunkt, Tokens]
+
+    def tokens_last_minute(self, now: float) -> int:
+        while self.usage and now - self.usage[0][0] >= 60:
+            self.usage.popleft()
+        return sum(tokens for _, tokens in self.usage)
+
+
+class LLMScheduler:
+    """
+    Vergibt LLM-Slots nach Prioritätsklassen und Mandanten.
+
+    Höchstens max_concurrency Calls laufen gleichzeitig. Wartende Klassen
+    werden nach Gewicht bedient (Stride-Scheduling: eine Klasse mit Gewicht 8
+    erhält bei Konkurrenz 8x so viele Slots wie eine mit Gewicht 1); reservierte
+    Slots einer Klasse bleiben für sie frei, solange sie sie nicht belegt.
+
+    Innerhalb einer Klasse werden die Mandanten per Deficit Round Robin
+    abwechselnd bedient (Guthaben in geschätzten Tokens): ein kleiner Upload
+    wartet so nie hinter allen Calls eines großen. Pro Mandant lassen sich
+    parallele Calls und Tokens pro Minute begrenzen.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None,
+                 weights: Optional[Dict[str, float]] = None,
+                 reserved: Optional[Dict[str, int]] = None,
+                 tenant_limits: Optional[Dict[str, Dict[str, int]]] = None,
+                 quantum_tokens: Optional[int] = None):
+        """
+        Args:
+            max_concurrency: Maximale parallele LLM-Calls (default: config)
+            weights: Gewicht pro Klasse (default: config.LLM_PRIORITY_WEIGHTS)
+            reserved: Reservierte Slots pro Klasse (default: config.LLM_PRIORITY_RESERVED)
+            tenant_limits: Limits pro Mandant ({'max_concurrency', 'tokens_per_minute'},
+                0 = unbegrenzt; default: config.LLM_TENANT_LIMITS, sonst die
+                Default-Limits aus config)
+            quantum_tokens: Guthaben pro Runde im Deficit Round Robin
+                (default: config.LLM_TENANT_QUANTUM_TOKENS)
+        """
+        self.max_concurrency = max_concurrency or config.LLM_MAX_CONCURRENCY
+        self.weights = dict(weights or config.LLM_PRIORITY_WEIGHTS)
+        self.reserved = dict(reserved if reserved is not None else config.LLM_PRIORITY_RESERVED)
+        self.tenant_limits = dict(tenant_limits if tenant_limits is not None else config.LLM_TENANT_LIMITS)
+        self.quantum_tokens = quantum_tokens or config.LLM_TENANT_QUANTUM_TOKENS
+
+        if sum(self.reserved.values()) >= self.max_concurrency:
+            raise ValueError("Reservierte LLM-Slots müssen kleiner als max_concurrency sein")
+
+        self._cond = threading.Condition()
+        # Pro Klasse: Warteschlange je Mandant, Runden-Reihenfolge, Guthaben
+        self._queues: Dict[str, Dict[str, deque]] = {p: {} for p in PRIORITY_CLASSES}
+        self._rounds: Dict[str, deque] = {p: deque() for p in PRIORITY_CLASSES}
+        self._deficit: Dict[str, Dict[str, float]] = {p: {} for p in PRIORITY_CLASSES}
+        self._tenants: Dict[str, _TenantState] = {}
+        self._in_flight = {p: 0 for p in PRIORITY_CLASSES}
+        self._pass = {p: 0.0 for p in PRIORITY_CLASSES}
+        self._virtual_time = 0.0
+        self._granted = {p: 0 for p in PRIORITY_CLASSES}
+        self._wait_total = {p: 0.0 for p in PRIORITY_CLASSES}
+        self._wait_max = {p: 0.0 for p in PRIORITY_CLASSES}
+        self._waits = {p: deque(maxlen=WAIT_SAMPLE_SIZE) for p in PRIORITY_CLASSES}
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None, tenant: Optional[str] = None,
+             tokens: int = 0) -> Iterator[_Ticket]:
+        """
+        Belegt einen LLM-Slot für die Dauer des Blocks (blockiert bis zur Vergabe).
+
+        Args:
+            priority: Prioritätsklasse (default: current_priority())
+            tenant: Mandant (default: current_tenant())
+            tokens: Geschätzte Tokens des Calls (Prompt + max_tokens); der
+                tatsächliche Verbrauch kann über ticket.tokens_used gemeldet werden
+
+        Returns:
+            Ticket des Calls
+        """
+        priority = priority or current_priority()
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unbekannte LLM-Priorität: {priority}")
+
+        ticket = _Ticket(priority, tenant or current_tenant(), max(int(tokens), 1))
+        self._acquire(ticket)
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def tenant_limit(self, tenant: str, key: str) -> int:
+        """Limit eines Mandanten ('max_concurrency' oder 'tokens_per_minute', 0 = unbegrenzt)"""
+        limits = self.tenant_limits.get(tenant, {})
+        if key in limits:
+            return limits[key]
+        if key == 'max_concurrency':
+            return config.LLM_TENANT_MAX_CONCURRENCY
+        return config.LLM_TENANT_TOKENS_PER_MINUTE
+
+    def _acquire(self, ticket: _Ticket):
+        priority, tenant = ticket.priority, ticket.tenant
+        with self._cond:
+            if not self._rounds[priority] and not self._in_flight[priority]:
+                # Eine zuvor inaktive Klasse startet beim aktuellen Fairness-Stand
+                # (kein Nachholen angesparter Slots)
+                self._pass[priority] = max(self._pass[priority], self._virtual_time)
+            self._tenants.setdefault(tenant, _TenantState())
+            queue = self._queues[priority].setdefault(tenant, deque())
+            if not queue:
+                self._rounds[priority].append(tenant)
+            queue.append(ticket)
+            self._dispatch()
+
+            while not ticket.granted:
+                # Mit Timeout: Token-Limits werden frei, ohne dass ein Call endet
+                self._cond.wait(timeout=TOKEN_LIMIT_RECHECK_SECONDS)
+                if not ticket.granted:
+                    self._dispatch()
+
+            waited = time.monotonic() - ticket.enqueued_at
+            self._wait_total[priority] += waited
+            self._wait_max[priority] = max(self._wait_max[priority], waited)
+            self._waits[priority].append(waited)
+
+        if waited > 1.0:
+            logger.debug(f"LLM-Slot ({priority}, {tenant}) nach {waited:.1f}s vergeben")
+
+    def _release(self, ticket: _Ticket):
+        with self._cond:
+            self._in_flight[ticket.priority] -= 1
+            self._tenants[ticket.tenant].in_flight -= 1
+            if ticket.tokens_used is not None and ticket.usage_entry is not None:
+                # Schätzung durch den gemeldeten Verbrauch ersetzen
+                ticket.usage_entry[1] = ticket.tokens_used
+            self._dispatch()
+
+    def _has_capacity(self, priority: str) -> bool:
+        """Darf die Klasse einen weiteren Slot belegen? (unter Lock)"""
+        busy = sum(self._in_flight.values())
+        held_back = sum(
+            max(self.reserved.get(other, 0) - self._in_flight[other], 0)
+            for other in PRIORITY_CLASSES if other != priority
+        )
+        return busy + held_back < self.max_concurrency
+
+    def _tenant_ready(self, priority: str, tenant: str, now: float) -> bool:
+        """Hält der nächste Call des Mandanten dessen Limits ein? (unter Lock)"""
+        state = self._tenants[tenant]
+        max_concurrency = self.tenant_limit(tenant, 'max_concurrency')
+        if max_concurrency and state.in_flight >= max_concurrency:
+            return False
+
+        tokens_per_minute = self.tenant_limit(tenant, 'tokens_per_minute')
+        if tokens_per_minute:
+            used = state.tokens_last_minute(now)
+            # Ein einzelner Call über dem Limit darf laufen, sobald das Fenster leer ist
+            if used and used + self._queues[priority][tenant][0].tokens > tokens_per_minute:
+                return False
+        return True
+
+    def _next_ticket(self, priority: str, now: float) -> Optional[_Ticket]:
+        """
+        Wählt per Deficit Round Robin den nächsten Call der Klasse (unter Lock).
+
+        Returns:
+            Ticket oder None, wenn kein Mandant seine Limits einhält
+        """
+        rounds = self._rounds[priority]
+        ready = {tenant for tenant in rounds if self._tenant_ready(priority, tenant, now)}
+        if not ready:
+            return None
+
+        deficit = self._deficit[priority]
+        while True:
+            tenant = rounds[0]
+            if tenant not in ready:
+                rounds.rotate(-1)
+                continue
+
+            queue = self._queues[priority][tenant]
+            ticket = queue[0]
+            if deficit.get(tenant, 0.0) < ticket.tokens:
+                deficit[tenant] = deficit.get(tenant, 0.0) + self.quantum_tokens
+                rounds.rotate(-1)
+                continue
+
+            deficit[tenant] -= ticket.tokens
+            queue.popleft()
+            if not queue:
+                # Leere Warteschlange: Mandant verlässt die Runde ohne Restguthaben
+                rounds.popleft()
+                del self._queues[priority][tenant]
+                deficit.pop(tenant, None)
+            return ticket
+
+    def _dispatch(self):
+        """Vergibt freie Slots an wartende Tickets (unter Lock)"""
+        granted = False
+        now = time.monotonic()
+        blocked = set()
+        while True:
+            candidates = [p for p in PRIORITY_CLASSES
+                          if self._rounds[p] and p not in blocked and self._has_capacity(p)]
+            if not candidates:
+                break
+
+            priority = min(candidates, key=lambda p: (self._pass[p], PRIORITY_CLASSES.index(p)))
+            ticket = self._next_ticket(priority, now)
+            if ticket is None:
+                # Alle Mandanten der Klasse am Limit - andere Klassen dürfen nachrücken
+                blocked.add(priority)
+                continue
+
+            ticket.granted = True
+            state = self._tenants[ticket.tenant]
+            state.in_flight += 1
+            state.granted += 1
+            ticket.usage_entry = [now, ticket.tokens]
+            state.usage.append(ticket.usage_entry)
+            self._in_flight[priority] += 1
+            self._granted[priority] += 1
+            self._virtual_time = self._pass[priority]
+            self._pass[priority] += 1.0 / self.weights.get(priority, 1.0)
+            granted = True
+
+        if granted:
+            self._cond.notify_all()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Gibt Warteschlangen-Tiefe, laufende Calls und Wartezeiten pro Klasse
+        sowie Auslastung pro Mandant zurück.
+
+        Returns:
+            Dictionary mit Konfiguration und Kennzahlen je Prioritätsklasse und Mandant
+        """
+        with self._cond:
+            now = time.monotonic()
+            classes = {}
+            for p in PRIORITY_CLASSES:
+                waits = sorted(self._waits[p])
+                granted = self._granted[p]
+                queued = [t for q in self._queues[p].values() for t in q]
+                classes[p] = {
+                    'queue_depth': len(queued),
+                    'in_flight': self._in_flight[p],
+                    'granted': granted,
+                    'oldest_wait_ms': round((now - min(t.enqueued_at for t in queued)) * 1000, 1) if queued else 0.0,
+                    'wait_ms_mean': round(self._wait_total[p] / granted * 1000, 1) if granted else 0.0,
+                    'wait_ms_p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+                    'wait_ms_max': round(self._wait_max[p] * 1000, 1)
+                }
+
+            tenants = {
+                tenant: {
+                    'queue_depth': sum(len(self._queues[p].get(tenant, ())) for p in PRIORITY_CLASSES),
+                    'in_flight': state.in_flight,
+                    'granted': state.granted,
+                    'tokens_last_minute': state.tokens_last_minute(now),
+                    'max_concurrency': self.tenant_limit(tenant, 'max_concurrency'),
+                    'tokens_per_minute': self.tenant_limit(tenant, 'tokens_per_minute')
+                }
+                for tenant, state in self._tenants.items()
+            }
+
+            return {
+                'max_concurrency': self.max_concurrency,
+                'weights': self.weights,
+                'reserved': self.reserved,
+                'in_flight': sum(self._in_flight.values()),
+                'classes': classes,
+                'tenants': tenants
+            }
+
+
+# Singleton-Instanz
+_llm_scheduler = None
+_llm_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Gibt Singleton-Instanz des LLM-Schedulers zurück.
+
+    Returns:
+        LLMScheduler-Instanz
+    """
+    global _llm_scheduler
+    with _llm_scheduler_lock:
+        if _llm_scheduler is None:
+            _llm_scheduler = LLMScheduler()
+    return _llm_scheduler
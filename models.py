@@ -2,7 +2,7 @@
 PCBF 2.1 Framework - Datenmodelle
 """
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 from datetime import datetime
 
 
@@ -29,7 +29,8 @@ class ProfileInput(BaseModel):
     signup_date: Optional[str] = Field(None, description="Registrierungsdatum")
     last_post: Optional[str] = Field(None, description="Letzter Post (oft N/A)")
 
-    @validator('followers', 'following', 'posts', 'likes', pre=True)
+    @field_validator('followers', 'following', 'posts', 'likes', mode='before')
+    @classmethod
     def parse_int_or_none(cls, v):
         """Konvertiert String-Werte zu Int oder None"""
         if v is None or v == 'N/A' or v == '' or v == 'NULL':
@@ -40,6 +41,26 @@ class ProfileInput(BaseModel):
             return None
 
 
+# Einmal aufgebauter Validator für Profil-Listen (CSV-Import, Checkpoints)
+PROFILE_LIST_ADAPTER = TypeAdapter(List[ProfileInput])
+
+
+def validate_profiles(rows: List[Dict[str, Any]]) -> List[ProfileInput]:
+    """
+    Validiert viele Profil-Dictionaries in einem Aufruf.
+    
+    Args:
+        rows: Profil-Daten als Dictionaries
+        
+    Returns:
+        Liste von ProfileInput
+        
+    Raises:
+        ValidationError: wenn mindestens eine Zeile ungültig ist
+    """
+    return PROFILE_LIST_ADAPTER.validate_python(rows)
+
+
 class AnalysisRequest(BaseModel):
     """Request-Modell für Analyse-API"""
     profiles: List[ProfileInput] = Field(..., description="Liste der zu analysierenden Profile")
@@ -55,6 +76,10 @@ class AnalysisRequest(BaseModel):
         default=False, 
         description="Enneagram-Analyse einbeziehen (optional, niedrige Confidence)"
     )
+    tenant: Optional[str] = Field(
+        default=None,
+        description="Mandant/Team für faire LLM-Verteilung zwischen parallelen Batches"
+    )
 
 
 class BioQualityResult(BaseModel):
@@ -127,6 +152,10 @@ class PurchaseIntentResult(BaseModel):
         description="Beitragende Faktoren mit Gewichtung"
     )
     reasoning: Optional[str] = Field(None, description="Begründung des Scores")
+    category_scores: Dict[str, float] = Field(
+        default={},
+        description="Purchase Intent Score je Produkt-Kategorie"
+    )
 
 
 class CommunicationStrategy(BaseModel):
@@ -174,6 +203,14 @@ class ProfileAnalysisResult(BaseModel):
     # Metadaten
     processing_time_seconds: Optional[float] = Field(None, description="Verarbeitungszeit in Sekunden")
     api_calls_made: Optional[int] = Field(None, description="Anzahl API-Aufrufe")
+    degraded_agents: List[str] = Field(
+        default=[],
+        description="Agenten, die nach Retries nur Fallback-Ergebnisse liefern (Retry empfohlen)"
+    )
+    input_fingerprint: Optional[str] = Field(
+        None,
+        description="Fingerprint der Inputs (Profil, Keywords, Kategorie, Modell, Prompt-Version)"
+    )
     
     # Kompakter Profil-String für externe Tools
     profile_string: Optional[str] = Field(None, description="Kompakter Profil-String (z.B. DISC:D | NEO:C=0.92,E=0.88 | RIASEC:IEC | PI:82)")
@@ -186,6 +223,48 @@ class AnalysisResponse(BaseModel):
     total_profiles: int = Field(..., description="Anzahl analysierter Profile")
     total_processing_time_seconds: float = Field(..., description="Gesamt-Verarbeitungszeit")
     errors: List[Dict[str, str]] = Field(default=[], description="Fehler bei der Verarbeitung")
+    agents_to_retry: Dict[str, List[str]] = Field(
+        default={},
+        description="Profil-ID -> degradierte Agenten, die erneut ausgeführt werden sollten"
+    )
+    reuse: Dict[str, Any] = Field(
+        default={},
+        description="Wiederverwendung gespeicherter Ergebnisse (reused, analyzed, reuse_ratio)"
+    )
+
+
+class RescoreRequest(BaseModel):
+    """Request-Modell für Purchase-Intent-Neuberechnung gespeicherter Ergebnisse"""
+    profile_ids: Optional[List[str]] = Field(
+        default=None,
+        description="Profil-IDs im Ergebnis-Store (default: alle)"
+    )
+    product_category: str = Field(..., description="Neue Produkt-Kategorie")
+    target_keywords: Optional[List[str]] = Field(
+        default=None,
+        description="Neue Ziel-Keywords (None = Keywords-Match-Score beibehalten)"
+    )
+    product_mapping: Optional[Dict[str, Dict[str, float]]] = Field(
+        default=None,
+        description="Alternative RIASEC-Gewichte je Produkt-Kategorie"
+    )
+    recompute_profile_string: bool = Field(
+        default=True,
+        description="Kompakten Profil-String neu generieren"
+    )
+
+
+class RetryRequest(BaseModel):
+    """Request-Modell für die Wiederholung degradierter Agenten gespeicherter Ergebnisse"""
+    profile_ids: List[str] = Field(..., description="Profil-IDs im Ergebnis-Store (z.B. aus agents_to_retry)")
+    product_category: Optional[str] = Field(
+        default="Software",
+        description="Produkt-Kategorie für Purchase Intent (wie bei der Analyse)"
+    )
+    tenant: Optional[str] = Field(
+        default=None,
+        description="Mandant/Team für faire LLM-Verteilung zwischen parallelen Batches"
+    )
 
 
 class AgentLogEntry(BaseModel):
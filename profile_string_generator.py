@@ -4,7 +4,9 @@ Erstellt kompakte String-Repräsentationen von Profilen für externe Tools
 """
 import logging
 from typing import Dict, List, Optional
+import config
 from models import ProfileAnalysisResult, DISCResult, NEOResult, RIASECResult, PersuasionResult
+from purchase_intent import pi_column
 
 logger = logging.getLogger(__name__)
 
@@ -254,6 +256,10 @@ class ProfileStringGenerator:
             # Purchase Intent
             'purchase_intent_score': result.purchase_intent.score,
             'purchase_intent_category': result.purchase_intent.category,
+            **{
+                pi_column(category): result.purchase_intent.category_scores.get(category)
+                for category in config.PURCHASE_INTENT_PRODUCT_MAPPING
+            },
             
             # Communication Strategy
             'comm_style': result.communication_strategy.style,
@@ -400,14 +406,14 @@ def export_to_json_lines(results: List[ProfileAnalysisResult],
     Returns:
         Pfad zur erstellten Datei
     """
-    import json
+    from fast_json import dumps_line
     
     generator = ProfileStringGenerator()
     
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with open(output_file, 'wb') as f:
         for result in results:
             flat = generator.to_flat_dict(result)
-            f.write(json.dumps(flat, ensure_ascii=False) + '\n')
+            f.write(dumps_line(flat))
     
     logger.info(f"JSON-Lines-Export abgeschlossen: {output_file} ({len(results)} Profile)")
     
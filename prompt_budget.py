@@ -0,0 +1,137 @@
+"""
+PCBF 2.1 Framework - Prompt-Budget
+Lokale Token-Schätzung und extraktive Bio-Kürzung auf ein Token-Budget
+"""
+import re
+import math
+import logging
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Set
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]', re.UNICODE)
+_SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+|\n+|\s*[•|]\s*')
+
+
+class CompactedBio(NamedTuple):
+    """Ergebnis der Bio-Kürzung"""
+    text: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Schätzt die Token-Anzahl lokal (ohne Tokenizer-Abhängigkeit).
+
+    Näherung für BPE-Tokenizer: ein Token pro Satzzeichen und ca. vier
+    Zeichen pro Token innerhalb von Wörtern (deutsche Komposita werden
+    dadurch nicht unterschätzt).
+
+    Args:
+        text: Beliebiger Text
+
+    Returns:
+        Geschätzte Token-Anzahl
+    """
+    if not text:
+        return 0
+    return sum(math.ceil(len(tok) / 4) for tok in _TOKEN_PATTERN.findall(text))
+
+
+@lru_cache(maxsize=1)
+def _signal_keywords() -> Set[str]:
+    """Alle Keywords, die für die Analyse-Agenten Signal tragen"""
+    keywords = set()
+    for mapping in (config.DISC_KEYWORDS, config.OCEAN_KEYWORDS,
+                    config.RIASEC_KEYWORDS, config.PERSUASION_KEYWORDS):
+        for words in mapping.values():
+            keywords.update(w.lower() for w in words)
+    keywords.update(kw.lower() for kw in config.JOB_TITLE_KEYWORDS)
+    return keywords
+
+
+def _split_sentences(bio: str) -> List[str]:
+    """Zerlegt Bio in Sätze/Zeilen/Aufzählungspunkte"""
+    return [s.strip() for s in _SENTENCE_SPLIT_PATTERN.split(bio) if s and s.strip()]
+
+
+def _sentence_score(sentence: str, position: int, keywords: Set[str]) -> float:
+    """Bewertet einen Satz nach Keyword-Dichte und Position"""
+    sentence_lower = sentence.lower()
+    hits = sum(1 for kw in keywords if kw in sentence_lower)
+    words = max(1, len(sentence.split()))
+
+    # Keyword-Dichte + absolute Treffer (lange, informative Sätze nicht bestrafen)
+    score = hits / words * 5 + hits * 0.5
+
+    # Die ersten Zeilen enthalten meist Jobtitel/Unternehmen
+    if position == 0:
+        score += 2.0
+    elif position < 3:
+        score += 1.0
+
+    return score
+
+
+@lru_cache(maxsize=4096)
+def compact_bio(bio: str, max_tokens: Optional[int] = None) -> CompactedBio:
+    """
+    Kürzt eine Bio extraktiv auf ein Token-Budget.
+
+    Sätze werden nach Keyword-Signal und Position gerankt, die besten
+    bis zum Budget ausgewählt und in Originalreihenfolge zusammengesetzt.
+    Gecacht, da dieselbe Bio an mehrere Agenten geht.
+
+    Args:
+        bio: Profilbeschreibung
+        max_tokens: Token-Budget (default: config.PROMPT_BIO_TOKEN_BUDGET)
+
+    Returns:
+        CompactedBio mit gekürztem Text und Token-Zahlen
+    """
+    budget = max_tokens or config.PROMPT_BIO_TOKEN_BUDGET
+    original_tokens = estimate_tokens(bio)
+
+    if original_tokens <= budget:
+        return CompactedBio(bio, original_tokens, original_tokens)
+
+    sentences = _split_sentences(bio)
+    keywords = _signal_keywords()
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: _sentence_score(sentences[i], i, keywords),
+        reverse=True
+    )
+
+    selected = []
+    used = 0
+    for i in ranked:
+        tokens = estimate_tokens(sentences[i])
+        if used + tokens > budget:
+            continue
+        selected.append(i)
+        used += tokens
+
+    if selected:
+        text = ' '.join(sentences[i] for i in sorted(selected))
+    else:
+        # Einzelner Satz größer als das Budget -> Wortgrenze abschneiden
+        words = []
+        for word in bio.split():
+            used += estimate_tokens(word)
+            if used > budget:
+                break
+            words.append(word)
+        text = ' '.join(words)
+
+    compacted = CompactedBio(text, original_tokens, estimate_tokens(text))
+    logger.debug(f"Bio gekürzt: {compacted.original_tokens} -> {compacted.tokens} Tokens")
+    return compacted
@@ -2,7 +2,10 @@
 PCBF 2.1 Framework - Purchase Intent Berechnung
 """
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
 import config
 from models import (
     DISCResult, NEOResult, RIASECResult, PersuasionResult,
@@ -11,6 +14,103 @@ from models import (
 
 logger = logging.getLogger(__name__)
 
+# Zeilen-Reihenfolge der Gewichtsmatrix (RIASEC-Scores x Produkt-Kategorien)
+RIASEC_TYPES = ['R', 'I', 'A', 'S', 'E', 'C']
+
+# Gewichte der Einzelbeiträge (auch für die vektorisierte Neuberechnung, siehe rescoring)
+DISC_ADJUSTMENTS = {
+    'D': +12,  # Dominant: Entscheidungsfreudig
+    'I': +8,   # Influencer: Innovationsbereit
+    'S': -3,   # Supporter: Vorsichtig
+    'C': -6    # Analyst: Skeptisch
+}
+
+# NEO-Dimension -> Gewicht (Reihenfolge = Summationsreihenfolge)
+NEO_WEIGHTS = {
+    'conscientiousness': 20,  # Qualitätsfokus
+    'openness': 15            # Innovationsbereitschaft
+}
+
+# Persuasion-Prinzip -> Gewicht: Authority/Social Proof erhöhen Intent,
+# Reciprocity/Liking moderat, Consistency/Unity neutral, Scarcity (Default) skeptisch
+PERSUASION_MULTIPLIERS = {
+    'authority': 25, 'social_proof': 25,
+    'reciprocity': 20, 'liking': 20,
+    'consistency': 15, 'unity': 15
+}
+PERSUASION_DEFAULT_MULTIPLIER = 10
+
+# Verhalten: Extraversion (aus NEO) = aktiver, DISC-I oder DISC-D = kaufbereiter
+BEHAVIOR_EXTRAVERSION_WEIGHT = 10
+BEHAVIOR_ACTIVE_DISC_TYPES = ('I', 'D')
+BEHAVIOR_ACTIVE_DISC_BONUS = 5
+
+# RIASEC: Match-Score (0-1) auf -15 bis +15 normalisiert, Anteil 25%
+RIASEC_MATCH_SCALE = 30
+RIASEC_WEIGHT = 0.25
+
+# Datenqualität (10%): Bio-Qualität 60%, Keywords-Match 40%
+DATA_QUALITY_SCALE = 20
+DATA_QUALITY_WEIGHT = 0.10
+BIO_QUALITY_SHARE = 0.6
+KEYWORDS_MATCH_SHARE = 0.4
+
+
+def riasec_match(riasec_scores: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    RIASEC-Match für alle Kategorien (Scores x Gewichtsmatrix).
+
+    Summiert in fester RIASEC_TYPES-Reihenfolge statt per BLAS, damit ein
+    einzelnes Ergebnis und jede Zeile einer Ergebnis-Matrix bitgleich sind.
+
+    Args:
+        riasec_scores: Scores in RIASEC_TYPES-Reihenfolge (6 oder n x 6)
+        weights: Gewichtsmatrix (6 x Kategorien, siehe category_weight_matrix)
+
+    Returns:
+        Match-Scores (Kategorien bzw. n x Kategorien)
+    """
+    match = 0.0
+    for i in range(len(RIASEC_TYPES)):
+        match = match + riasec_scores[..., i, None] * weights[i]
+    return match
+
+
+def compute_riasec_contribution(match_score, confidence):
+    """
+    RIASEC-Beitrag aus Match-Score und Confidence.
+
+    Funktioniert für Skalare und NumPy-Arrays (gleiche Rechenreihenfolge,
+    damit Calculator und rescoring bitgleiche Scores liefern).
+
+    Args:
+        match_score: Gewichteter RIASEC-Match (0-1)
+        confidence: RIASEC-Confidence (0-100)
+    """
+    return (match_score - 0.5) * RIASEC_MATCH_SCALE * RIASEC_WEIGHT * (confidence / 100.0)
+
+
+def compute_data_quality_contribution(bio_quality_score, keywords_match_score):
+    """
+    Datenqualitäts-Beitrag (Skalare oder NumPy-Arrays).
+
+    Args:
+        bio_quality_score: Bio-Qualitäts-Score (0-100)
+        keywords_match_score: Keywords-Match-Score (0-100)
+    """
+    bio_contribution = (
+        (bio_quality_score / 100.0 - 0.5) * DATA_QUALITY_SCALE * DATA_QUALITY_WEIGHT * BIO_QUALITY_SHARE
+    )
+    keywords_contribution = (
+        (keywords_match_score / 100.0 - 0.5) * DATA_QUALITY_SCALE * DATA_QUALITY_WEIGHT * KEYWORDS_MATCH_SHARE
+    )
+    return bio_contribution + keywords_contribution
+
+
+def pi_column(category: str) -> str:
+    """Export-Spaltenname für den PI-Score einer Produkt-Kategorie"""
+    return f"pi_{category.lower()}"
+
 
 class PurchaseIntentCalculator:
     """Berechnet Purchase Intent Score basierend auf psychologischem Profil"""
@@ -63,8 +163,14 @@ class PurchaseIntentCalculator:
         else:
             contributing_factors['Enneagram'] = 0.0
         
-        # 5. RIASEC (25%)
-        riasec_contribution = self._calculate_riasec_contribution(riasec, product_category)
+        # Score vor RIASEC (Basis für die Kategorie-Matrix)
+        base_score = score
+        
+        # 5. RIASEC (25%) - einmal für alle Kategorien, die gewählte daraus
+        categories = list(config.PURCHASE_INTENT_PRODUCT_MAPPING.keys())
+        scored_categories = categories if product_category in categories else categories + [product_category]
+        riasec_contributions = self._riasec_contributions(riasec, scored_categories)
+        riasec_contribution = float(riasec_contributions[scored_categories.index(product_category)])
         score += riasec_contribution
         contributing_factors['RIASEC'] = riasec_contribution
         
@@ -96,25 +202,118 @@ class PurchaseIntentCalculator:
         # Reasoning generieren
         reasoning = self._generate_reasoning(score, category, contributing_factors, product_category)
         
+        # PI für alle Produkt-Kategorien (gleiche Rechnung wie score)
+        category_scores = self._category_scores(
+            base_score, riasec_contributions[:len(categories)], behavior_contribution,
+            data_quality_contribution, categories
+        )
+        
         logger.info(f"Purchase Intent Score: {score:.1f} ({category})")
         
         return PurchaseIntentResult(
             score=score,
             category=category,
             contributing_factors=contributing_factors,
-            reasoning=reasoning
+            reasoning=reasoning,
+            category_scores=category_scores
         )
     
+    def calculate_categories(self, disc: DISCResult, neo: NEOResult, riasec: RIASECResult,
+                             persuasion: PersuasionResult, bio_quality_score: float,
+                             keywords_match_score: float, categories: Optional[List[str]] = None,
+                             enneagram: Optional[EnneagramResult] = None,
+                             product_mapping: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, float]:
+        """
+        Berechnet Purchase Intent Scores für mehrere Produkt-Kategorien in einem Durchgang.
+        
+        Args:
+            disc: DISC-Ergebnis
+            neo: NEO-Ergebnis
+            riasec: RIASEC-Ergebnis
+            persuasion: Persuasion-Ergebnis
+            bio_quality_score: Bio-Qualitäts-Score
+            keywords_match_score: Keywords-Match-Score
+            categories: Produkt-Kategorien (default: alle aus dem Mapping)
+            enneagram: Enneagram-Ergebnis (optional)
+            product_mapping: Alternative RIASEC-Gewichte (optional)
+            
+        Returns:
+            Dictionary Kategorie -> Score (0-100)
+        """
+        base_score = 50.0
+        base_score += self._calculate_disc_contribution(disc)
+        base_score += self._calculate_neo_contribution(neo)
+        base_score += self._calculate_persuasion_contribution(persuasion)
+        if enneagram:
+            base_score += self._calculate_enneagram_contribution(enneagram)
+        
+        categories = categories or list((product_mapping or config.PURCHASE_INTENT_PRODUCT_MAPPING).keys())
+        return self._category_scores(
+            base_score, self._riasec_contributions(riasec, categories, product_mapping),
+            self._calculate_behavior_contribution(disc, neo),
+            self._calculate_data_quality_contribution(bio_quality_score, keywords_match_score),
+            categories
+        )
+    
+    def calculate_matrix(self, results: List, categories: Optional[List[str]] = None,
+                         product_mapping: Optional[Dict[str, Dict[str, float]]] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Berechnet die Leads x Kategorien PI-Matrix für gespeicherte Ergebnisse.
+        
+        Args:
+            results: Liste von ProfileAnalysisResult
+            categories: Produkt-Kategorien (default: alle aus dem Mapping)
+            product_mapping: Alternative RIASEC-Gewichte (optional)
+            
+        Returns:
+            Tuple (Kategorien, Matrix der Form len(results) x len(Kategorien))
+        """
+        from rescoring import ScoreMatrix
+        
+        categories = categories or list((product_mapping or config.PURCHASE_INTENT_PRODUCT_MAPPING).keys())
+        return categories, ScoreMatrix(results).category_scores(categories, product_mapping)
+    
+    @staticmethod
+    def category_weight_matrix(categories: List[str],
+                               product_mapping: Optional[Dict[str, Dict[str, float]]] = None) -> np.ndarray:
+        """
+        Baut die RIASEC-Gewichtsmatrix (6 x Kategorien).
+        
+        Unbekannte Kategorien erhalten die Software-Gewichte (wie calculate).
+        
+        Args:
+            categories: Produkt-Kategorien
+            product_mapping: Alternative RIASEC-Gewichte (default: config.PURCHASE_INTENT_PRODUCT_MAPPING)
+            
+        Returns:
+            Gewichtsmatrix in RIASEC_TYPES-Reihenfolge
+        """
+        mapping = product_mapping or config.PURCHASE_INTENT_PRODUCT_MAPPING
+        default_weights = mapping.get('Software') or config.PURCHASE_INTENT_PRODUCT_MAPPING['Software']
+        
+        weights = np.zeros((len(RIASEC_TYPES), len(categories)))
+        for j, category in enumerate(categories):
+            for riasec_type, weight in mapping.get(category, default_weights).items():
+                weights[RIASEC_TYPES.index(riasec_type), j] = weight
+        return weights
+    
+    def _riasec_contributions(self, riasec: RIASECResult, categories: List[str],
+                              product_mapping: Optional[Dict[str, Dict[str, float]]] = None) -> np.ndarray:
+        """RIASEC-Beitrag (25%) je Kategorie: Match mit der Gewichtsmatrix, Confidence-gewichtet"""
+        weights = self.category_weight_matrix(categories, product_mapping)
+        riasec_scores = np.array([riasec.scores.get(t, 0.0) for t in RIASEC_TYPES])
+        return compute_riasec_contribution(riasec_match(riasec_scores, weights), riasec.confidence)
+    
+    def _category_scores(self, base_score: float, riasec_contributions: np.ndarray,
+                         behavior_contribution: float, data_quality_contribution: float,
+                         categories: List[str]) -> Dict[str, float]:
+        """PI-Scores aller Kategorien (Reihenfolge der Beiträge wie calculate)"""
+        scores = base_score + riasec_contributions + behavior_contribution + data_quality_contribution
+        return dict(zip(categories, np.clip(scores, 0.0, 100.0).tolist()))
+    
     def _calculate_disc_contribution(self, disc: DISCResult) -> float:
         """DISC-Beitrag zum Purchase Intent (15%)"""
-        disc_adjustments = {
-            'D': +12,  # Dominant: Entscheidungsfreudig
-            'I': +8,   # Influencer: Innovationsbereit
-            'S': -3,   # Supporter: Vorsichtig
-            'C': -6    # Analyst: Skeptisch
-        }
-        
-        adjustment = disc_adjustments.get(disc.primary_type, 0)
+        adjustment = DISC_ADJUSTMENTS.get(disc.primary_type, 0)
         
         # Confidence-Gewichtung
         confidence_factor = disc.confidence / 100.0
@@ -125,13 +324,9 @@ class PurchaseIntentCalculator:
         """NEO-Beitrag zum Purchase Intent (15%)"""
         contribution = 0.0
         
-        # Conscientiousness (Qualitätsfokus)
-        c_score = neo.dimensions.get('conscientiousness', 0.5)
-        contribution += (c_score - 0.5) * 20 * 0.15
-        
-        # Openness (Innovationsbereitschaft)
-        o_score = neo.dimensions.get('openness', 0.5)
-        contribution += (o_score - 0.5) * 15 * 0.15
+        # Conscientiousness (Qualitätsfokus), Openness (Innovationsbereitschaft)
+        for dimension, weight in NEO_WEIGHTS.items():
+            contribution += (neo.dimensions.get(dimension, 0.5) - 0.5) * weight * 0.15
         
         # Confidence-Gewichtung
         confidence_factor = neo.confidence / 100.0
@@ -142,19 +337,8 @@ class PurchaseIntentCalculator:
         """Persuasion-Beitrag zum Purchase Intent (20%)"""
         # Primary Prinzip
         primary_score = persuasion.scores.get(persuasion.primary, 0.5)
-        
-        # Authority und Social Proof erhöhen Intent
-        if persuasion.primary in ['authority', 'social_proof']:
-            contribution = (primary_score - 0.5) * 25 * 0.20
-        # Reciprocity und Liking moderat
-        elif persuasion.primary in ['reciprocity', 'liking']:
-            contribution = (primary_score - 0.5) * 20 * 0.20
-        # Consistency und Unity neutral
-        elif persuasion.primary in ['consistency', 'unity']:
-            contribution = (primary_score - 0.5) * 15 * 0.20
-        # Scarcity kann negativ sein (Skepsis)
-        else:
-            contribution = (primary_score - 0.5) * 10 * 0.20
+        multiplier = PERSUASION_MULTIPLIERS.get(persuasion.primary, PERSUASION_DEFAULT_MULTIPLIER)
+        contribution = (primary_score - 0.5) * multiplier * 0.20
         
         # Confidence-Gewichtung
         confidence_factor = persuasion.confidence / 100.0
@@ -183,55 +367,24 @@ class PurchaseIntentCalculator:
         
         return adjustment * 0.05 * confidence_factor
     
-    def _calculate_riasec_contribution(self, riasec: RIASECResult, 
-                                      product_category: str) -> float:
-        """RIASEC-Beitrag zum Purchase Intent (25%)"""
-        
-        # Produkt-Kategorie-Match
-        if product_category in config.PURCHASE_INTENT_PRODUCT_MAPPING:
-            product_weights = config.PURCHASE_INTENT_PRODUCT_MAPPING[product_category]
-        else:
-            # Default: Software
-            product_weights = config.PURCHASE_INTENT_PRODUCT_MAPPING['Software']
-        
-        # Match-Score berechnen
-        match_score = 0.0
-        for riasec_type, weight in product_weights.items():
-            match_score += riasec.scores.get(riasec_type, 0.0) * weight
-        
-        # Normalisieren auf -15 bis +15
-        contribution = (match_score - 0.5) * 30 * 0.25
-        
-        # Confidence-Gewichtung
-        confidence_factor = riasec.confidence / 100.0
-        
-        return contribution * confidence_factor
-    
     def _calculate_behavior_contribution(self, disc: DISCResult, neo: NEOResult) -> float:
         """Verhaltens-Beitrag zum Purchase Intent (10%)"""
         contribution = 0.0
         
         # Extraversion (aus NEO) = aktiver
         e_score = neo.dimensions.get('extraversion', 0.5)
-        contribution += (e_score - 0.5) * 10 * 0.10
+        contribution += (e_score - 0.5) * BEHAVIOR_EXTRAVERSION_WEIGHT * 0.10
         
         # DISC-I oder DISC-D = kaufbereiter
-        if disc.primary_type in ['I', 'D']:
-            contribution += 5 * 0.10
+        if disc.primary_type in BEHAVIOR_ACTIVE_DISC_TYPES:
+            contribution += BEHAVIOR_ACTIVE_DISC_BONUS * 0.10
         
         return contribution
     
     def _calculate_data_quality_contribution(self, bio_quality_score: float,
                                             keywords_match_score: float) -> float:
         """Datenqualitäts-Beitrag zum Purchase Intent (10%)"""
-        
-        # Bio-Qualität (60%)
-        bio_contribution = (bio_quality_score / 100.0 - 0.5) * 20 * 0.10 * 0.6
-        
-        # Keywords-Match (40%)
-        keywords_contribution = (keywords_match_score / 100.0 - 0.5) * 20 * 0.10 * 0.4
-        
-        return bio_contribution + keywords_contribution
+        return compute_data_quality_contribution(bio_quality_score, keywords_match_score)
     
     def _generate_reasoning(self, score: float, category: str,
                            contributing_factors: Dict[str, float],
@@ -0,0 +1,323 @@
+"""
+PCBF 2.1 Framework - Purchase-Intent-Neuberechnung
+Berechnet Purchase Intent für gespeicherte Agenten-Ergebnisse neu (andere
+Produkt-Kategorie, Keywords oder Gewichte) - vektorisiert, ohne LLM-Calls
+"""
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import config
+from models import ProfileInput, ProfileAnalysisResult, PurchaseIntentResult, WarningMessage
+from purchase_intent import (
+    PurchaseIntentCalculator, RIASEC_TYPES, DISC_ADJUSTMENTS, NEO_WEIGHTS,
+    PERSUASION_MULTIPLIERS, PERSUASION_DEFAULT_MULTIPLIER,
+    BEHAVIOR_EXTRAVERSION_WEIGHT, BEHAVIOR_ACTIVE_DISC_TYPES, BEHAVIOR_ACTIVE_DISC_BONUS,
+    compute_riasec_contribution, compute_data_quality_contribution, riasec_match
+)
+from profile_string_generator import ProfileStringGenerator
+from utils import calculate_keywords_match_score, calculate_overall_confidence, generate_warnings
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreMatrix:
+    """
+    Spaltenweise Agenten-Scores einer Ergebnis-Liste.
+
+    Alle kategorie-unabhängigen Beiträge werden einmal beim Aufbau
+    berechnet; score() wertet danach nur noch RIASEC-Match und
+    Datenqualität als Array-Operationen aus. Die Rechenreihenfolge
+    entspricht exakt PurchaseIntentCalculator.calculate (gleiche Floats).
+    """
+
+    def __init__(self, results: List[ProfileAnalysisResult]):
+        """
+        Args:
+            results: Gespeicherte Analyse-Ergebnisse
+        """
+        self.profile_ids = [r.profile_id for r in results]
+        n = len(results)
+        calculator = PurchaseIntentCalculator()
+
+        disc_adjustment = np.array([DISC_ADJUSTMENTS.get(r.disc.primary_type, 0) for r in results], dtype=float)
+        disc_confidence = np.array([r.disc.confidence for r in results], dtype=float)
+        self.disc_is_active = np.array(
+            [r.disc.primary_type in BEHAVIOR_ACTIVE_DISC_TYPES for r in results], dtype=bool
+        )
+
+        neo_dimensions = {
+            dimension: np.array([r.neo.dimensions.get(dimension, 0.5) for r in results], dtype=float)
+            for dimension in NEO_WEIGHTS
+        }
+        neo_e = np.array([r.neo.dimensions.get('extraversion', 0.5) for r in results], dtype=float)
+        neo_confidence = np.array([r.neo.confidence for r in results], dtype=float)
+
+        persuasion_score = np.array(
+            [r.persuasion.scores.get(r.persuasion.primary, 0.5) for r in results], dtype=float
+        )
+        persuasion_multiplier = np.array(
+            [PERSUASION_MULTIPLIERS.get(r.persuasion.primary, PERSUASION_DEFAULT_MULTIPLIER) for r in results],
+            dtype=float
+        )
+        persuasion_confidence = np.array([r.persuasion.confidence for r in results], dtype=float)
+
+        self.riasec_scores = np.array(
+            [[r.riasec.scores.get(t, 0.0) for t in RIASEC_TYPES] for r in results], dtype=float
+        ).reshape(n, len(RIASEC_TYPES))
+        self.riasec_confidence = np.array([r.riasec.confidence for r in results], dtype=float)
+
+        self.has_enneagram = np.array([r.enneagram is not None for r in results], dtype=bool)
+        self.bio_quality = np.array([r.bio_quality.score for r in results], dtype=float)
+        self.keywords_match = np.array([r.keywords_match_score for r in results], dtype=float)
+
+        # Kategorie-unabhängige Beiträge
+        self.disc_contribution = disc_adjustment * 0.15 * (disc_confidence / 100.0)
+
+        neo_contribution = 0.0
+        for dimension, weight in NEO_WEIGHTS.items():
+            neo_contribution = neo_contribution + (neo_dimensions[dimension] - 0.5) * weight * 0.15
+        self.neo_contribution = neo_contribution * (neo_confidence / 100.0)
+
+        self.persuasion_contribution = (
+            (persuasion_score - 0.5) * persuasion_multiplier * 0.20 * (persuasion_confidence / 100.0)
+        )
+
+        self.enneagram_contribution = np.array(
+            [calculator._calculate_enneagram_contribution(r.enneagram) if r.enneagram else 0.0
+             for r in results], dtype=float
+        )
+
+        behavior = 0.0 + (neo_e - 0.5) * BEHAVIOR_EXTRAVERSION_WEIGHT * 0.10
+        self.behavior_contribution = np.where(
+            self.disc_is_active, behavior + BEHAVIOR_ACTIVE_DISC_BONUS * 0.10, behavior
+        )
+
+    def __len__(self) -> int:
+        return len(self.profile_ids)
+
+    def riasec_contribution(self, product_category: str,
+                            product_mapping: Optional[Dict[str, Dict[str, float]]] = None) -> np.ndarray:
+        """
+        RIASEC-Beitrag für eine Produkt-Kategorie.
+
+        Args:
+            product_category: Produkt-Kategorie
+            product_mapping: Alternative Gewichte (default: config.PURCHASE_INTENT_PRODUCT_MAPPING)
+
+        Returns:
+            Array mit RIASEC-Beiträgen
+        """
+        # Gleiche Gewichtsmatrix und Summation wie PurchaseIntentCalculator
+        weights = PurchaseIntentCalculator.category_weight_matrix([product_category], product_mapping)
+        match_score = riasec_match(self.riasec_scores, weights)
+        return compute_riasec_contribution(match_score[:, 0], self.riasec_confidence)
+
+    def data_quality_contribution(self, keywords_match: Optional[np.ndarray] = None) -> np.ndarray:
+        """Datenqualitäts-Beitrag (optional mit neu berechnetem Keywords-Match)"""
+        keywords_match = self.keywords_match if keywords_match is None else keywords_match
+        return compute_data_quality_contribution(self.bio_quality, keywords_match)
+
+    def score(self, product_category: str,
+              product_mapping: Optional[Dict[str, Dict[str, float]]] = None,
+              keywords_match: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Berechnet Purchase-Intent-Scores für alle Ergebnisse.
+
+        Args:
+            product_category: Produkt-Kategorie
+            product_mapping: Alternative Gewichte (optional)
+            keywords_match: Neu berechnete Keywords-Match-Scores (optional)
+
+        Returns:
+            Dictionary mit 'score' und allen Beiträgen als Arrays
+        """
+        riasec = self.riasec_contribution(product_category, product_mapping)
+        data_quality = self.data_quality_contribution(keywords_match)
+
+        score = self._base_score() + riasec
+        score = score + self.behavior_contribution
+        score = score + data_quality
+
+        return {
+            'score': np.clip(score, 0.0, 100.0),
+            'DISC': self.disc_contribution,
+            'NEO': self.neo_contribution,
+            'Persuasion': self.persuasion_contribution,
+            'Enneagram': self.enneagram_contribution,
+            'RIASEC': riasec,
+            'Behavior': self.behavior_contribution,
+            'Data_Quality': data_quality
+        }
+
+    def category_scores(self, categories: Optional[List[str]] = None,
+                        product_mapping: Optional[Dict[str, Dict[str, float]]] = None,
+                        keywords_match: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Berechnet die Leads x Kategorien PI-Matrix in einem Durchgang.
+
+        Der RIASEC-Beitrag ist ein Matrix-Produkt der RIASEC-Scores (n x 6)
+        mit der Gewichtsmatrix (6 x Kategorien).
+
+        Args:
+            categories: Produkt-Kategorien (default: alle aus dem Mapping)
+            product_mapping: Alternative Gewichte (optional)
+            keywords_match: Neu berechnete Keywords-Match-Scores (optional)
+
+        Returns:
+            Matrix der Form len(self) x len(categories)
+        """
+        categories = categories or list((product_mapping or config.PURCHASE_INTENT_PRODUCT_MAPPING).keys())
+        weights = PurchaseIntentCalculator.category_weight_matrix(categories, product_mapping)
+
+        riasec = compute_riasec_contribution(
+            riasec_match(self.riasec_scores, weights), self.riasec_confidence[:, None]
+        )
+        scores = self._base_score()[:, None] + riasec
+        scores = scores + self.behavior_contribution[:, None]
+        scores = scores + self.data_quality_contribution(keywords_match)[:, None]
+
+        return np.clip(scores, 0.0, 100.0)
+
+    def _base_score(self) -> np.ndarray:
+        """Score vor RIASEC-Beitrag (Reihenfolge wie PurchaseIntentCalculator.calculate)"""
+        score = 50.0 + self.disc_contribution
+        score = score + self.neo_contribution
+        score = score + self.persuasion_contribution
+        return np.where(self.has_enneagram, score + self.enneagram_contribution, score)
+
+
+def pi_category(score: float) -> str:
+    """Purchase-Intent-Kategorie (Schwellen wie PurchaseIntentCalculator)"""
+    if score > 80:
+        return 'very_high'
+    elif score > 60:
+        return 'high'
+    elif score > 40:
+        return 'medium'
+    return 'low'
+
+
+def rescore_results(results: List[ProfileAnalysisResult], product_category: str,
+                    target_keywords: Optional[List[str]] = None,
+                    profiles: Optional[Dict[str, ProfileInput]] = None,
+                    product_mapping: Optional[Dict[str, Dict[str, float]]] = None,
+                    recompute_profile_string: bool = False) -> List[ProfileAnalysisResult]:
+    """
+    Berechnet Purchase Intent für gespeicherte Ergebnisse neu.
+
+    Die Agenten-Ergebnisse bleiben unverändert; die Communication Strategy
+    wird nicht neu generiert (erfordert LLM). Neue Keywords benötigen die
+    Input-Profile (Bio/Kategorien) - Ergebnisse ohne Profil behalten ihren
+    Keywords-Match-Score.
+
+    Args:
+        results: Gespeicherte Analyse-Ergebnisse
+        product_category: Neue Produkt-Kategorie
+        target_keywords: Neue Ziel-Keywords (optional)
+        profiles: Input-Profile nach Profil-ID (für target_keywords)
+        product_mapping: Alternative RIASEC-Gewichte je Kategorie (optional)
+        recompute_profile_string: Kompakten Profil-String neu generieren
+
+    Returns:
+        Neue ProfileAnalysisResults (Kopien, Fingerprint zurückgesetzt)
+    """
+    if not results:
+        return []
+
+    matrix = ScoreMatrix(results)
+
+    keywords_match = None
+    if target_keywords is not None:
+        profiles = profiles or {}
+        keywords_match = np.array([
+            calculate_keywords_match_score(
+                profiles[r.profile_id].bio, profiles[r.profile_id].categories, target_keywords
+            ) if r.profile_id in profiles else r.keywords_match_score
+            for r in results
+        ], dtype=float)
+
+    scored = matrix.score(product_category, product_mapping, keywords_match)
+    factor_names = [name for name in scored if name != 'score']
+
+    categories = list((product_mapping or config.PURCHASE_INTENT_PRODUCT_MAPPING).keys())
+    category_matrix = matrix.category_scores(categories, product_mapping, keywords_match)
+
+    calculator = PurchaseIntentCalculator()
+    generator = ProfileStringGenerator()
+    rescored = []
+
+    for i, result in enumerate(results):
+        score = float(scored['score'][i])
+        category = pi_category(score)
+        contributing_factors = {name: float(scored[name][i]) for name in factor_names}
+
+        updated = result.model_copy(deep=True)
+        updated.purchase_intent = PurchaseIntentResult(
+            score=score,
+            category=category,
+            contributing_factors=contributing_factors,
+            reasoning=calculator._generate_reasoning(score, category, contributing_factors, product_category),
+            category_scores=dict(zip(categories, category_matrix[i].tolist()))
+        )
+        updated.input_fingerprint = None
+
+        if keywords_match is not None and result.profile_id in profiles:
+            profile = profiles[result.profile_id]
+            categories_available = bool(profile.categories and profile.categories != 'None')
+            updated.keywords_match_score = float(keywords_match[i])
+            updated.overall_confidence = calculate_overall_confidence(
+                result.bio_quality.score, categories_available, updated.keywords_match_score
+            )
+            updated.warnings = [
+                WarningMessage(**w)
+                for w in generate_warnings(result.bio_quality.model_dump(), updated.overall_confidence, categories_available)
+            ]
+
+        if recompute_profile_string:
+            updated.profile_string = generator.generate_compact_string(updated)
+
+        rescored.append(updated)
+
+    logger.info(f"Purchase Intent für {len(rescored)} Ergebnisse neu berechnet (Kategorie: {product_category})")
+    return rescored
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from result_store import ResultStore
+    from utils import setup_logging
+
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Purchase Intent für gespeicherte Ergebnisse neu berechnen")
+    parser.add_argument('--category', required=True, help="Neue Produkt-Kategorie")
+    parser.add_argument('--keywords', help="Neue Ziel-Keywords (kommagetrennt)")
+    parser.add_argument('--mapping', help="JSON-Datei mit alternativen RIASEC-Gewichten")
+    parser.add_argument('--profile-strings', action='store_true', help="Profil-String neu generieren")
+    parser.add_argument('--output', required=True, help="Ausgabe-Datei (JSON Lines)")
+    args = parser.parse_args()
+
+    store = ResultStore()
+    ids = store.profile_ids()
+    keywords = [kw.strip() for kw in args.keywords.split(',') if kw.strip()] if args.keywords else None
+    mapping = None
+    if args.mapping:
+        with open(args.mapping, encoding='utf-8') as f:
+            mapping = json.load(f)
+
+    stored = store.get_many(ids)
+    rescored_results = rescore_results(
+        [stored[pid] for pid in ids if pid in stored],
+        args.category,
+        target_keywords=keywords,
+        profiles=store.get_profiles(ids) if keywords is not None else None,
+        product_mapping=mapping,
+        recompute_profile_string=args.profile_strings
+    )
+
+    from profile_string_generator import export_to_json_lines
+    export_to_json_lines(rescored_results, args.output)
+    print(f"{len(rescored_results)} Ergebnisse neu bewertet -> {args.output}")
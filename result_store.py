@@ -0,0 +1,190 @@
+"""
+PCBF 2.1 Framework - Ergebnis-Store
+Speichert Analyse-Ergebnisse pro Profil-ID (SQLite) für inkrementelle
+Re-Analyse wiederholt hochgeladener Lead-Listen
+"""
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import config
+from models import ProfileInput, ProfileAnalysisResult
+
+logger = logging.getLogger(__name__)
+
+
+class ResultStore:
+    """
+    Persistenter Store für ProfileAnalysisResults.
+
+    Ein Eintrag pro Profil-ID (letztes Ergebnis gewinnt). Ob ein Eintrag
+    wiederverwendet werden kann, entscheidet der Input-Fingerprint des
+    Ergebnisses (siehe utils.compute_input_fingerprint). Das Input-Profil
+    wird mitgespeichert, damit z.B. der Keywords-Match-Score ohne
+    erneuten Upload neu berechnet werden kann (siehe rescoring.py).
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Öffnet (bzw. erstellt) den Store.
+
+        Args:
+            db_path: Pfad zur SQLite-Datei (default: config.RESULT_STORE_PATH)
+        """
+        self.db_path = db_path or config.RESULT_STORE_PATH
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            '''CREATE TABLE IF NOT EXISTS results (
+                profile_id TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                result_json TEXT NOT NULL,
+                profile_json TEXT,
+                updated_at TEXT NOT NULL
+            )'''
+        )
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(results)')]
+        if 'profile_json' not in columns:
+            self._conn.execute('ALTER TABLE results ADD COLUMN profile_json TEXT')
+        self._conn.commit()
+
+    def get_fingerprints(self, profile_ids: List[str]) -> Dict[str, str]:
+        """
+        Lädt die gespeicherten Fingerprints (ohne Ergebnis-JSON zu parsen).
+
+        Args:
+            profile_ids: Profil-IDs
+
+        Returns:
+            Dictionary Profil-ID -> Fingerprint
+        """
+        fingerprints = {}
+        with self._lock:
+            for chunk in _chunks(list(set(profile_ids)), 500):
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT profile_id, fingerprint FROM results WHERE profile_id IN ({placeholders})',
+                    chunk
+                ).fetchall()
+                fingerprints.update(rows)
+        return fingerprints
+
+    def get_many(self, profile_ids: List[str]) -> Dict[str, ProfileAnalysisResult]:
+        """
+        Lädt gespeicherte Ergebnisse.
+
+        Args:
+            profile_ids: Profil-IDs
+
+        Returns:
+            Dictionary Profil-ID -> ProfileAnalysisResult (fehlende IDs fehlen)
+        """
+        results = {}
+        with self._lock:
+            for chunk in _chunks(list(set(profile_ids)), 500):
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT profile_id, result_json FROM results WHERE profile_id IN ({placeholders})',
+                    chunk
+                ).fetchall()
+                for profile_id, result_json in rows:
+                    results[profile_id] = ProfileAnalysisResult.model_validate_json(result_json)
+        return results
+
+    def get_many_json(self, profile_ids: List[str]) -> Dict[str, bytes]:
+        """
+        Lädt gespeicherte Ergebnisse als serialisiertes JSON (ohne Parsen).
+
+        Zum direkten Einbetten in API-Antworten (siehe fast_json.RawJSON).
+
+        Args:
+            profile_ids: Profil-IDs
+
+        Returns:
+            Dictionary Profil-ID -> Ergebnis-JSON (UTF-8)
+        """
+        results = {}
+        with self._lock:
+            for chunk in _chunks(list(set(profile_ids)), 500):
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT profile_id, result_json FROM results WHERE profile_id IN ({placeholders})',
+                    chunk
+                ).fetchall()
+                for profile_id, result_json in rows:
+                    results[profile_id] = result_json.encode('utf-8')
+        return results
+
+    def get_profiles(self, profile_ids: List[str]) -> Dict[str, ProfileInput]:
+        """
+        Lädt die mitgespeicherten Input-Profile.
+
+        Args:
+            profile_ids: Profil-IDs
+
+        Returns:
+            Dictionary Profil-ID -> ProfileInput (Einträge ohne Profil fehlen)
+        """
+        profiles = {}
+        with self._lock:
+            for chunk in _chunks(list(set(profile_ids)), 500):
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT profile_id, profile_json FROM results '
+                    f'WHERE profile_json IS NOT NULL AND profile_id IN ({placeholders})',
+                    chunk
+                ).fetchall()
+                for profile_id, profile_json in rows:
+                    profiles[profile_id] = ProfileInput.model_validate_json(profile_json)
+        return profiles
+
+    def profile_ids(self) -> List[str]:
+        """Alle gespeicherten Profil-IDs"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT profile_id FROM results ORDER BY profile_id')]
+
+    def put(self, result: ProfileAnalysisResult, profile: Optional[ProfileInput] = None,
+            reusable: bool = True):
+        """
+        Speichert (bzw. ersetzt) das Ergebnis eines Profils.
+
+        Args:
+            result: Analyse-Ergebnis
+            profile: Input-Profil (optional, für Neuberechnungen)
+            reusable: False = ohne Fingerprint speichern, d.h. nicht wiederverwenden
+                (z.B. Ergebnisse mit degradierten Agenten, siehe /retry)
+        """
+        result_json = result.model_dump_json()
+        profile_json = profile.model_dump_json() if profile else None
+        fingerprint = result.input_fingerprint if reusable else None
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO results (profile_id, fingerprint, result_json, profile_json, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (result.profile_id, fingerprint, result_json, profile_json,
+                 datetime.utcnow().isoformat())
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        """Anzahl gespeicherter Ergebnisse"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def close(self):
+        """Schließt die Datenbankverbindung"""
+        with self._lock:
+            self._conn.close()
+
+
+def _chunks(items: List[str], size: int):
+    """Teilt eine Liste in Blöcke (SQLite-Limit für Parameter)"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
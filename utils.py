@@ -65,12 +65,7 @@ def calculate_bio_quality(bio: Optional[str]) -> Dict:
     
     # 2. Informationsdichte (30 Punkte)
     # Job-Titel vorhanden?
-    job_keywords = [
-        'CEO', 'CTO', 'CFO', 'Manager', 'Director', 'Consultant', 
-        'Engineer', 'Developer', 'Designer', 'Analyst', 'Specialist',
-        'Gründer', 'Founder', 'Geschäftsführer', 'Leiter', 'Head'
-    ]
-    has_job_title = any(kw.lower() in bio.lower() for kw in job_keywords)
+    has_job_title = any(kw.lower() in bio.lower() for kw in config.JOB_TITLE_KEYWORDS)
     if has_job_title:
         score += 10
     
@@ -429,3 +424,47 @@ def sanitize_for_logging(data: Dict) -> Dict:
     
     return sanitized
 
+
+
+# Profil-Felder, die in Agenten/Purchase Intent/Communication einfließen
+FINGERPRINT_PROFILE_FIELDS = [
+    'bio', 'categories', 'followers', 'following',
+    'verified', 'business_account', 'full_name', 'nickname'
+]
+
+
+def compute_input_fingerprint(profile, target_keywords: List[str], product_category: str,
+                              include_enneagram: bool, model: str,
+                              provider: Optional[str] = None) -> str:
+    """
+    Berechnet einen Fingerprint aller Inputs, die ein Analyse-Ergebnis beeinflussen.
+    
+    Gleicher Fingerprint = Ergebnis kann wiederverwendet werden. Enthält
+    neben den Profil-Feldern auch Provider, Modell und config.PROMPT_VERSION,
+    damit Prompt-/Modell-/Provider-Änderungen gespeicherte Ergebnisse invalidieren.
+    
+    Args:
+        profile: ProfileInput
+        target_keywords: Ziel-Keywords
+        product_category: Produkt-Kategorie
+        include_enneagram: Enneagram einbeziehen
+        model: LLM-Modell
+        provider: LLM-Provider (z.B. 'openrouter', 'local', 'mock')
+        
+    Returns:
+        SHA-256-Hex-Digest
+    """
+    import hashlib
+    import json
+    
+    payload = {
+        'profile': {field: getattr(profile, field) for field in FINGERPRINT_PROFILE_FIELDS},
+        'target_keywords': sorted(kw.lower() for kw in (target_keywords or [])),
+        'product_category': product_category,
+        'include_enneagram': include_enneagram,
+        'model': model,
+        'provider': provider,
+        'prompt_version': config.PROMPT_VERSION
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
@@ -2,19 +2,25 @@
 PCBF 2.1 Framework - Validation Web UI
 Web-Interface für manuelle Validierung von Analyse-Ergebnissen
 """
+import time
+import uuid
+import asyncio
 import logging
 import json
 from datetime import datetime
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
 
+import config
 from fastapi import FastAPI, HTTPException, Form, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
 from models import ProfileInput, AnalysisRequest
 from analyzer import ProfileAnalyzer
 from validation_protocol import ValidationProtocol
+from fast_json import sse_stream
+from llm_scheduler import llm_priority, INTERACTIVE
 from utils import setup_logging
 
 # Logging konfigurieren
@@ -44,6 +50,9 @@ validator = ValidationProtocol()
 # Speicher für Validierungs-Historie
 validation_history = []
 
+# Laufende progressive Analysen: session_id -> {'queue', 'created'}
+progressive_sessions: Dict[str, Dict[str, Any]] = {}
+
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -70,60 +79,24 @@ async def validate_profile(request: Request):
         profile_data = data.get('profile', {})
         profile = ProfileInput(**profile_data)
         
-        # Analyse durchführen
+        # Analyse durchführen (interaktiv: Vorrang vor laufenden Batches)
         logger.info(f"Starte Analyse für Profil {profile.id}")
-        result = analyzer.analyze_profile(
-            profile=profile,
-            target_keywords=data.get('target_keywords', []),
-            product_category=data.get('product_category', 'Software'),
-            include_enneagram=False
-        )
+        with llm_priority(INTERACTIVE):
+            result = analyzer.analyze_profile(
+                profile=profile,
+                target_keywords=data.get('target_keywords', []),
+                product_category=data.get('product_category', 'Software'),
+                include_enneagram=False
+            )
         
         # Validierung durchführen
-        logger.info(f"Starte Validierung für Profil {profile.id}")
-        validation_report = validator.validate(profile, result)
-        
-        # In Historie speichern
-        validation_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'profile_id': profile.id,
-            'status': validation_report.overall_status,
-            'score': validation_report.score
-        })
+        validation_report = _validate_and_record(profile, result)
         
         # Response
         return {
             'success': True,
             'profile_id': profile.id,
-            'analysis': {
-                'profile_string': result.profile_string,
-                'disc': {
-                    'primary': result.disc.primary_type,
-                    'archetype': result.disc.archetype,
-                    'scores': result.disc.scores,
-                    'confidence': result.disc.confidence
-                },
-                'neo': {
-                    'dimensions': result.neo.dimensions,
-                    'confidence': result.neo.confidence
-                },
-                'riasec': {
-                    'holland_code': result.riasec.holland_code,
-                    'scores': result.riasec.scores,
-                    'confidence': result.riasec.confidence
-                },
-                'persuasion': {
-                    'primary': result.persuasion.primary,
-                    'scores': result.persuasion.scores,
-                    'confidence': result.persuasion.confidence
-                },
-                'purchase_intent': {
-                    'score': result.purchase_intent.score,
-                    'category': result.purchase_intent.category
-                },
-                'overall_confidence': result.overall_confidence,
-                'processing_time': result.processing_time_seconds
-            },
+            'analysis': _analysis_payload(result),
             'validation': validation_report.to_dict()
         }
         
@@ -132,6 +105,168 @@ async def validate_profile(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/validate-progressive")
+async def validate_profile_progressive(request: Request):
+    """
+    Startet eine progressive Analyse.
+    
+    Antwortet sofort mit den Keyword-basierten Ergebnissen aller Agenten;
+    die LLM-Ergebnisse werden über /api/validate-progressive/{session_id}/events
+    (Server-Sent Events) nachgeliefert, sobald der jeweilige Agent fertig ist.
+    
+    Request Body wie /api/validate.
+    """
+    try:
+        data = await request.json()
+        profile = ProfileInput(**data.get('profile', {}))
+        target_keywords = data.get('target_keywords', [])
+        product_category = data.get('product_category', 'Software')
+        
+        preview = analyzer.analyze_profile_keywords(profile, target_keywords, product_category)
+    except Exception as e:
+        logger.error(f"Fehler bei progressiver Validierung: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    _prune_progressive_sessions()
+    
+    session_id = uuid.uuid4().hex
+    queue: asyncio.Queue = asyncio.Queue()
+    progressive_sessions[session_id] = {'queue': queue, 'created': time.time()}
+    
+    loop = asyncio.get_running_loop()
+    
+    def publish(event: str, payload: Dict[str, Any]):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, payload))
+    
+    loop.run_in_executor(
+        None, _run_progressive_analysis, profile, target_keywords, product_category, preview, publish
+    )
+    
+    logger.info(f"Progressive Analyse {session_id} für Profil {profile.id} gestartet")
+    
+    return {
+        'success': True,
+        'profile_id': profile.id,
+        'session_id': session_id,
+        'stage': 'keywords',
+        'events_url': f"/api/validate-progressive/{session_id}/events",
+        'analysis': _analysis_payload(preview)
+    }
+
+
+@app.get("/api/validate-progressive/{session_id}/events")
+async def progressive_events(session_id: str):
+    """
+    Server-Sent Events einer progressiven Analyse.
+    
+    Events:
+        agent: LLM-Ergebnis eines Agenten übernommen ({'agent', 'analysis'})
+        complete: Vollständige Analyse inkl. Validierung ({'analysis', 'validation'})
+        error: Analyse fehlgeschlagen ({'detail'})
+    """
+    session = progressive_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session nicht gefunden")
+    
+    async def stream():
+        try:
+            async for frame in sse_stream(session['queue'], ('complete', 'error')):
+                yield frame
+        finally:
+            progressive_sessions.pop(session_id, None)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _run_progressive_analysis(profile: ProfileInput, target_keywords, product_category: str,
+                              preview, publish: Callable[[str, Dict[str, Any]], None]):
+    """Führt die LLM-Analyse aus und veröffentlicht jedes Agenten-Ergebnis (läuft im Thread-Pool)"""
+    current = preview
+    
+    def on_agent_result(agent_name: str, agent_result):
+        nonlocal current
+        current = analyzer.apply_agent_result(current, agent_name, agent_result, product_category)
+        publish('agent', {'agent': agent_name, 'analysis': _analysis_payload(current)})
+    
+    try:
+        with llm_priority(INTERACTIVE):
+            result = analyzer.analyze_profile(
+                profile=profile,
+                target_keywords=target_keywords,
+                product_category=product_category,
+                include_enneagram=False,
+                on_agent_result=on_agent_result
+            )
+        validation_report = _validate_and_record(profile, result)
+        publish('complete', {
+            'profile_id': profile.id,
+            'analysis': _analysis_payload(result),
+            'validation': validation_report.to_dict()
+        })
+    except Exception as e:
+        logger.error(f"Fehler bei progressiver Analyse für {profile.id}: {str(e)}", exc_info=True)
+        publish('error', {'detail': str(e)})
+
+
+def _prune_progressive_sessions():
+    """Entfernt Sessions, deren Events nie abgeholt wurden"""
+    cutoff = time.time() - config.PROGRESSIVE_SESSION_TTL_SECONDS
+    for session_id in [sid for sid, s in progressive_sessions.items() if s['created'] < cutoff]:
+        progressive_sessions.pop(session_id, None)
+
+
+def _validate_and_record(profile: ProfileInput, result):
+    """Validiert ein Analyse-Ergebnis und speichert es in der Historie"""
+    logger.info(f"Starte Validierung für Profil {profile.id}")
+    validation_report = validator.validate(profile, result)
+    
+    validation_history.append({
+        'timestamp': datetime.now().isoformat(),
+        'profile_id': profile.id,
+        'status': validation_report.overall_status,
+        'score': validation_report.score
+    })
+    
+    return validation_report
+
+
+def _analysis_payload(result) -> Dict[str, Any]:
+    """Analyse-Teil der Response (für /api/validate und progressive Events)"""
+    return {
+        'profile_string': result.profile_string,
+        'disc': {
+            'primary': result.disc.primary_type,
+            'archetype': result.disc.archetype,
+            'scores': result.disc.scores,
+            'confidence': result.disc.confidence
+        },
+        'neo': {
+            'dimensions': result.neo.dimensions,
+            'confidence': result.neo.confidence
+        },
+        'riasec': {
+            'holland_code': result.riasec.holland_code,
+            'scores': result.riasec.scores,
+            'confidence': result.riasec.confidence
+        },
+        'persuasion': {
+            'primary': result.persuasion.primary,
+            'scores': result.persuasion.scores,
+            'confidence': result.persuasion.confidence
+        },
+        'purchase_intent': {
+            'score': result.purchase_intent.score,
+            'category': result.purchase_intent.category
+        },
+        'overall_confidence': result.overall_confidence,
+        'processing_time': result.processing_time_seconds
+    }
+
+
 @app.get("/api/history")
 async def get_history():
     """Gibt Validierungs-Historie zurück"""
@@ -627,7 +762,8 @@ HTML_TEMPLATE = """
             };
             
             try {
-                const response = await fetch('/api/validate', {
+                // Sofort-Ergebnis aus Keyword-Scores, LLM-Ergebnisse folgen per SSE
+                const response = await fetch('/api/validate-progressive', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json'
@@ -637,25 +773,66 @@ HTML_TEMPLATE = """
                 
                 const data = await response.json();
                 
-                if (data.success) {
-                    displayResults(data);
-                    loadStats();
-                } else {
+                if (!data.success) {
                     alert('Fehler: ' + (data.detail || 'Unbekannter Fehler'));
+                    finishValidation();
+                    return;
                 }
+                
+                document.getElementById('loadingState').style.display = 'none';
+                displayPreliminary(data.analysis, 'Keyword-Vorschau – LLM-Analyse läuft...');
+                
+                const events = new EventSource(data.events_url);
+                const done = [];
+                
+                events.addEventListener('agent', (event) => {
+                    const payload = JSON.parse(event.data);
+                    done.push(payload.agent);
+                    displayPreliminary(payload.analysis, `LLM-Ergebnisse: ${done.join(', ')} – weitere folgen...`);
+                });
+                
+                events.addEventListener('complete', (event) => {
+                    events.close();
+                    displayResults(JSON.parse(event.data));
+                    loadStats();
+                    finishValidation();
+                });
+                
+                events.addEventListener('error', (event) => {
+                    events.close();
+                    const detail = event.data ? JSON.parse(event.data).detail : 'Verbindung unterbrochen';
+                    alert('Fehler bei der Validierung: ' + detail);
+                    finishValidation();
+                });
             } catch (error) {
                 alert('Fehler bei der Validierung: ' + error.message);
-            } finally {
-                document.getElementById('validateBtn').disabled = false;
-                document.getElementById('loadingState').style.display = 'none';
+                finishValidation();
             }
         });
         
+        function finishValidation() {
+            document.getElementById('validateBtn').disabled = false;
+            document.getElementById('loadingState').style.display = 'none';
+        }
+        
+        // Vorläufige Ergebnisse anzeigen (noch ohne Validierung)
+        function displayPreliminary(analysis, stageText) {
+            const statusBadge = document.getElementById('statusBadge');
+            statusBadge.className = 'status-badge status-review';
+            statusBadge.textContent = 'VORLÄUFIG';
+            
+            document.getElementById('scoreDisplay').textContent = '';
+            document.getElementById('checksList').innerHTML =
+                `<div class="check-message">${stageText}</div>`;
+            
+            displayAnalysis(analysis);
+            document.getElementById('resultSection').classList.add('show');
+        }
+        
         // Ergebnisse anzeigen
         function displayResults(data) {
             const resultSection = document.getElementById('resultSection');
             const validation = data.validation;
-            const analysis = data.analysis;
             
             // Status Badge
             const statusBadge = document.getElementById('statusBadge');
@@ -666,10 +843,30 @@ HTML_TEMPLATE = """
             document.getElementById('scoreDisplay').textContent = 
                 `${validation.score.toFixed(1)}/100`;
             
-            // Profil-String
+            displayAnalysis(data.analysis);
+            
+            // Checks-Liste
+            const checksList = document.getElementById('checksList');
+            checksList.innerHTML = '<h3 style="margin-bottom: 15px;">Validierungs-Checks:</h3>';
+            
+            validation.checks.forEach(check => {
+                const checkItem = document.createElement('div');
+                checkItem.className = `check-item ${check.status.toLowerCase()}`;
+                checkItem.innerHTML = `
+                    <div class="check-name">${check.status} - ${check.name}</div>
+                    <div class="check-message">${check.message}</div>
+                `;
+                checksList.appendChild(checkItem);
+            });
+            
+            // Anzeigen
+            resultSection.classList.add('show');
+        }
+        
+        // Profil-String und Analyse-Grid
+        function displayAnalysis(analysis) {
             document.getElementById('profileString').textContent = analysis.profile_string;
             
-            // Analyse-Grid
             const analysisGrid = document.getElementById('analysisGrid');
             analysisGrid.innerHTML = `
                 <div class="analysis-card">
@@ -693,23 +890,6 @@ HTML_TEMPLATE = """
                     <div class="analysis-detail">${analysis.purchase_intent.category}</div>
                 </div>
             `;
-            
-            // Checks-Liste
-            const checksList = document.getElementById('checksList');
-            checksList.innerHTML = '<h3 style="margin-bottom: 15px;">Validierungs-Checks:</h3>';
-            
-            validation.checks.forEach(check => {
-                const checkItem = document.createElement('div');
-                checkItem.className = `check-item ${check.status.toLowerCase()}`;
-                checkItem.innerHTML = `
-                    <div class="check-name">${check.status} - ${check.name}</div>
-                    <div class="check-message">${check.message}</div>
-                `;
-                checksList.appendChild(checkItem);
-            });
-            
-            // Anzeigen
-            resultSection.classList.add('show');
         }
         
         // Initial Stats laden
@@ -2,19 +2,29 @@
 PCBF 2.1 Framework - Validation UI mit CSV-Upload
 Erweiterte Web-UI für CSV-Upload und Batch-Analyse
 """
+import os
+import asyncio
 import logging
 import json
 import time
+import uuid
 from datetime import datetime
-from typing import List, Dict
-from io import BytesIO
+from typing import List, Dict, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from csv_processor import CSVProcessor, extract_model_data, export_model_to_csv
+from csv_processor import CSVProcessor, ModelExportFiles, MODEL_NAMES, extract_model_data, export_model_to_csv
+from batch_checkpoint import BatchCheckpoint, list_checkpoints, RESULTS_FILE
+from batch_progress import BatchProgress, TERMINAL_EVENTS
+from compact_results import CompactResultBatch
+from columnar_export import ColumnarResultWriter, FORMATS as COLUMNAR_FORMATS
+from bundle_export import stream_checkpoint_bundle
+from fast_json import FastJSONResponse, sse_stream
+from llm_scheduler import llm_priority, llm_tenant, BULK
 from utils import setup_logging
+import config
 
 # Logging konfigurieren
 setup_logging()
@@ -24,7 +34,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="PCBF 2.1 CSV Validation UI",
     version="2.1.2",
-    description="CSV-Upload und Batch-Analyse mit Modell-Gruppierung"
+    description="CSV-Upload und Batch-Analyse mit Modell-Gruppierung",
+    default_response_class=FastJSONResponse
 )
 
 # CORS
@@ -39,8 +50,12 @@ app.add_middleware(
 # Globale Instanzen
 csv_processor = CSVProcessor()
 
-# Speicher für Analyse-Ergebnisse
-analysis_results = {}
+# Speicher für Analyse-Ergebnisse (Cache, jederzeit aus dem Checkpoint ladbar)
+analysis_results: Dict[str, CompactResultBatch] = {}
+analysis_results_accessed: Dict[str, float] = {}
+
+# Live-Fortschritt laufender (und kürzlich beendeter) Batch-Läufe
+batch_progress: Dict[str, BatchProgress] = {}
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -51,74 +66,191 @@ async def root():
 
 @app.post("/api/upload-csv")
 async def upload_csv(
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    live: bool = Form(False),
+    tenant: Optional[str] = Form(None)
 ):
     """
     Lädt CSV hoch und führt Batch-Analyse durch.
     
     Args:
         file: CSV-Datei
-        target_keywords: Kommagetrennte Keywords
-        product_category: Produkt-Kategorie
+        live: True = sofort mit der Analyse-ID antworten; Fortschritt und
+            Ergebnis kommen über /api/progress/{analysis_id} (SSE)
+        tenant: Mandant/Team; parallele Uploads verschiedener Mandanten
+            teilen sich die LLM-Kapazität fair (default: config.LLM_DEFAULT_TENANT)
         
     Returns:
-        Analyse-Ergebnisse gruppiert nach Modellen
+        Analyse-Ergebnisse gruppiert nach Modellen (live: Analyse-ID und Progress-URL)
     """
     try:
         # CSV lesen
-        contents = await file.read()
-        csv_content = contents.decode('utf-8')
-        
         logger.info(f"CSV hochgeladen: {file.filename}")
         
-        # Profile extrahieren
-        profiles = csv_processor.parse_csv(csv_content)
+        # Profile direkt aus dem Upload-Stream extrahieren (.csv/.csv.gz/.zip/.zst);
+        # fehlerhafte Zeilen werden mit Zeilennummer gemeldet. Parsen und Checkpoint
+        # laufen im Thread-Pool (blockieren sonst die Fortschritts-Streams anderer Läufe)
+        parse_errors = []
+        loop = asyncio.get_running_loop()
+        try:
+            checkpoint, profiles = await loop.run_in_executor(
+                None, _prepare_csv_batch, file, tenant, parse_errors
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # Analyse-ID = Run-ID des Checkpoints (eindeutig, auch bei gleichzeitigen Uploads)
+        analysis_id = checkpoint.run_id
+        
+        _prune_batch_progress()
+        progress = BatchProgress(analysis_id, len(profiles))
+        batch_progress[analysis_id] = progress
+        
+        # Analyse im Thread-Pool, damit Fortschritts-Events parallel ausgeliefert werden
+        analysis = loop.run_in_executor(
+            None, _run_csv_analysis, analysis_id, checkpoint, profiles, parse_errors, progress
+        )
         
-        if not profiles:
-            raise HTTPException(status_code=400, detail="Keine Profile in CSV gefunden")
+        if live:
+            return {
+                'success': True,
+                'analysis_id': analysis_id,
+                'total_profiles': len(profiles),
+                'parse_errors': parse_errors,
+                'progress_url': f"/api/progress/{analysis_id}",
+                'abort_url': f"/api/progress/{analysis_id}/abort"
+            }
         
-        logger.info(f"{len(profiles)} Profile extrahiert")
+        return await analysis
         
-        # Batch-Analyse (ohne Keywords und Kategorie)
-        results = csv_processor.analyze_batch(
-            profiles=profiles,
-            target_keywords=[],
-            product_category='Software'
-        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Fehler bei CSV-Upload: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _prepare_csv_batch(file: UploadFile, tenant: Optional[str],
+                       parse_errors: List[Dict]) -> Tuple[BatchCheckpoint, List]:
+    """
+    Extrahiert die Profile eines Uploads und legt den Checkpoint an (läuft im Thread-Pool).
+    
+    Raises:
+        ValueError: Datei nicht lesbar oder keine Profile gefunden
+    """
+    profiles = csv_processor.parse_csv_file(file.file, file.filename, errors=parse_errors)
+    if not profiles:
+        raise ValueError("Keine Profile in CSV gefunden")
+    
+    logger.info(f"{len(profiles)} Profile extrahiert")
+    
+    # Checkpoint anlegen (Lauf ist nach Absturz/Redeploy fortsetzbar)
+    checkpoint = BatchCheckpoint.create(profiles, [], 'Software', tenant=tenant)
+    return checkpoint, profiles
+
+
+@app.get("/api/progress/{analysis_id}")
+async def progress_events(analysis_id: str):
+    """
+    Live-Fortschritt eines Batch-Laufs als Server-Sent Events.
+    
+    Events: snapshot, profile, profile_error, progress und zum Schluss
+    complete/aborted (Payload 'result' wie /api/upload-csv) oder failed.
+    """
+    progress = batch_progress.get(analysis_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Kein laufender oder kürzlich beendeter Batch")
+    
+    queue = progress.subscribe()
+    
+    async def stream():
+        try:
+            async for frame in sse_stream(queue, TERMINAL_EVENTS):
+                yield frame
+        finally:
+            progress.unsubscribe(queue)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.post("/api/progress/{analysis_id}/abort")
+async def abort_batch(analysis_id: str):
+    """
+    Bricht einen laufenden Batch-Lauf ab.
+    
+    Bereits laufende Profile werden noch gesichert; der Checkpoint bleibt
+    offen und kann über /api/batches/{analysis_id}/resume fortgesetzt werden.
+    """
+    progress = batch_progress.get(analysis_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Batch nicht gefunden")
+    if progress.status != 'running':
+        raise HTTPException(status_code=409, detail=f"Batch ist bereits beendet ({progress.status})")
+    
+    progress.cancel()
+    return {'success': True, 'analysis_id': analysis_id, 'status': 'aborting'}
+
+
+def _run_csv_analysis(analysis_id: str, checkpoint: BatchCheckpoint, profiles,
+                      parse_errors: List[Dict], progress: BatchProgress) -> Dict:
+    """Führt die Batch-Analyse eines Uploads aus (läuft im Thread-Pool)"""
+    try:
+        # Batch-Analyse (ohne Keywords und Kategorie), Modell-CSVs werden mitgeschrieben
+        errors = []
+        reuse_stats = {}
+        model_exports = ModelExportFiles(checkpoint.path)
+        try:
+            with llm_priority(BULK), llm_tenant(checkpoint.tenant):
+                results = csv_processor.analyze_batch_compact(
+                    profiles=profiles,
+                    target_keywords=[],
+                    product_category='Software',
+                    errors=errors,
+                    checkpoint=checkpoint,
+                    stats=reuse_stats,
+                    model_exports=model_exports,
+                    progress=progress
+                )
+        finally:
+            model_exports.close()
         
         # Ergebnisse speichern
-        analysis_id = str(int(time.time()))
-        analysis_results[analysis_id] = results
-        
-        # Nach Modellen gruppieren
-        disc_data = extract_model_data(results, 'disc')
-        neo_data = extract_model_data(results, 'neo')
-        persuasion_data = extract_model_data(results, 'persuasion')
-        riasec_data = extract_model_data(results, 'riasec')
+        _store_analysis_results(analysis_id, results)
         
         logger.info(f"Analyse abgeschlossen: {len(results)} Profile")
         
-        return {
+        response = {
             'success': True,
             'analysis_id': analysis_id,
             'total_profiles': len(results),
-            'models': {
-                'disc': disc_data[:10],  # Erste 10 für Vorschau
-                'neo': neo_data[:10],
-                'persuasion': persuasion_data[:10],
-                'riasec': riasec_data[:10]
-            },
+            'models': model_exports.previews,  # Erste 10 für Vorschau
             'summary': {
-                'disc_count': len(disc_data),
-                'neo_count': len(neo_data),
-                'persuasion_count': len(persuasion_data),
-                'riasec_count': len(riasec_data)
-            }
+                f'{model}_count': model_exports.counts[model] for model in MODEL_NAMES
+            },
+            'reuse': reuse_stats,
+            'errors': errors,
+            'parse_errors': parse_errors,
+            'agents_to_retry': results.degraded_agents(),
+            'aborted': progress.cancelled
         }
-        
     except Exception as e:
-        logger.error(f"Fehler bei CSV-Upload: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        progress.finish('failed', {'detail': str(e)})
+        raise
+    
+    progress.finish('aborted' if progress.cancelled else 'complete', response)
+    return response
+
+
+def _prune_batch_progress():
+    """Entfernt Fortschritts-Daten länger beendeter Läufe (und alte Ergebnisse im Speicher)"""
+    cutoff = time.time() - config.PROGRESS_RETENTION_SECONDS
+    for analysis_id in [a for a, p in batch_progress.items() if p.finished_at and p.finished_at < cutoff]:
+        batch_progress.pop(analysis_id, None)
+    _prune_analysis_results()
 
 
 @app.get("/api/export/{analysis_id}/{model}")
@@ -133,33 +265,24 @@ async def export_model(analysis_id: str, model: str):
     Returns:
         CSV-Datei
     """
+    if model not in MODEL_NAMES:
+        raise HTTPException(status_code=404, detail="Keine Daten für Modell")
+    
     try:
-        if analysis_id not in analysis_results:
-            raise HTTPException(status_code=404, detail="Analyse nicht gefunden")
-        
-        results = analysis_results[analysis_id]
-        model_data = extract_model_data(results, model)
+        checkpoint = BatchCheckpoint(analysis_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Analyse nicht gefunden")
+    
+    try:
+        output_file = (await _ensure_model_exports(checkpoint))[model]
         
-        if not model_data:
+        if not os.path.exists(output_file):
             raise HTTPException(status_code=404, detail="Keine Daten für Modell")
         
-        # CSV erstellen
-        output = BytesIO()
-        
-        import csv
-        fieldnames = model_data[0].keys()
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(model_data)
-        
-        output.seek(0)
-        
-        filename = f"pcbf_{model}_{analysis_id}.csv"
-        
-        return StreamingResponse(
-            output,
+        return FileResponse(
+            path=output_file,
             media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            filename=f"pcbf_{model}_{analysis_id}.csv"
         )
         
     except HTTPException:
@@ -169,27 +292,262 @@ async def export_model(analysis_id: str, model: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/export-columnar/{analysis_id}/{format}")
+async def export_columnar(analysis_id: str, format: str):
+    """
+    Exportiert alle Ergebnisse einer Analyse als Parquet- oder Arrow-Datei.
+    
+    Args:
+        analysis_id: Analyse-ID
+        format: parquet/arrow
+        
+    Returns:
+        Parquet-/Arrow-Datei
+    """
+    if format not in COLUMNAR_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Format: {format}")
+    
+    try:
+        checkpoint = BatchCheckpoint(analysis_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Analyse nicht gefunden")
+    
+    _ensure_not_running(analysis_id)
+    extension, media_type = COLUMNAR_FORMATS[format]
+    
+    try:
+        loop = asyncio.get_running_loop()
+        output_file = await loop.run_in_executor(None, _build_columnar_export, checkpoint, format)
+        
+        return FileResponse(
+            path=output_file,
+            media_type=media_type,
+            filename=f"pcbf_{analysis_id}{extension}"
+        )
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        logger.error(f"Fehler bei {format}-Export: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _build_columnar_export(checkpoint: BatchCheckpoint, format: str) -> str:
+    """
+    Parquet-/Arrow-Datei eines Laufs (läuft im Thread-Pool).
+    
+    Die Datei wird einmal erzeugt und wiederverwendet, solange results.jsonl
+    nicht neuer ist (z.B. nach einem Resume). Geschrieben wird unter einem
+    eindeutigen Temp-Namen, sodass parallele Anfragen sich nicht stören.
+    
+    Returns:
+        Pfad der Export-Datei
+    """
+    extension, _ = COLUMNAR_FORMATS[format]
+    output_file = os.path.join(checkpoint.path, f"export{extension}")
+    results_file = os.path.join(checkpoint.path, RESULTS_FILE)
+    if os.path.exists(output_file) and os.path.getmtime(output_file) >= os.path.getmtime(results_file):
+        return output_file
+    
+    tmp_file = f"{output_file}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with ColumnarResultWriter(tmp_file, format) as writer:
+            writer.write_all(checkpoint.iter_results())
+        os.replace(tmp_file, output_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return output_file
+
+
+@app.get("/api/export-bundle/{analysis_id}")
+async def export_bundle(analysis_id: str):
+    """
+    Streamt alle Exporte einer Analyse als ZIP.
+    
+    Enthält die flache CSV aller Ergebnisse, die vier Modell-CSVs, die
+    vollständigen Ergebnisse als NDJSON und die Validierungs-Zusammenfassung.
+    
+    Args:
+        analysis_id: Analyse-ID
+        
+    Returns:
+        ZIP-Datei (gestreamt)
+    """
+    try:
+        checkpoint = BatchCheckpoint(analysis_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Analyse nicht gefunden")
+    
+    model_files = {
+        model: path for model, path in (await _ensure_model_exports(checkpoint)).items()
+        if os.path.exists(path)
+    }
+    
+    return StreamingResponse(
+        stream_checkpoint_bundle(checkpoint, model_files),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=pcbf_{analysis_id}.zip"}
+    )
+
+
 @app.get("/api/results/{analysis_id}")
 async def get_results(analysis_id: str):
     """Gibt vollständige Ergebnisse zurück"""
-    if analysis_id not in analysis_results:
-        raise HTTPException(status_code=404, detail="Analyse nicht gefunden")
-    
-    results = analysis_results[analysis_id]
+    results = _get_analysis_results(analysis_id)
+    result_dicts = list(csv_processor.iter_result_dicts(results))
     
     return {
         'success': True,
         'analysis_id': analysis_id,
         'total_profiles': len(results),
         'models': {
-            'disc': extract_model_data(results, 'disc'),
-            'neo': extract_model_data(results, 'neo'),
-            'persuasion': extract_model_data(results, 'persuasion'),
-            'riasec': extract_model_data(results, 'riasec')
+            'disc': extract_model_data(result_dicts, 'disc'),
+            'neo': extract_model_data(result_dicts, 'neo'),
+            'persuasion': extract_model_data(result_dicts, 'persuasion'),
+            'riasec': extract_model_data(result_dicts, 'riasec')
         }
     }
 
 
+@app.get("/api/batches")
+async def list_batches():
+    """Listet alle Batch-Checkpoints mit Fortschritt"""
+    return {'success': True, 'batches': list_checkpoints()}
+
+
+@app.post("/api/batches/{analysis_id}/resume")
+async def resume_batch(analysis_id: str):
+    """
+    Setzt einen abgebrochenen Batch-Lauf ab dem Checkpoint fort.
+    
+    Der Lauf wird im Hintergrund fortgesetzt; Fortschritt und Ergebnis
+    liefert /api/progress/{analysis_id}.
+    
+    Args:
+        analysis_id: Analyse-ID (= Run-ID des Checkpoints)
+        
+    Returns:
+        Status des Laufs und Progress-URL
+    """
+    _ensure_not_running(analysis_id)
+    
+    try:
+        checkpoint = BatchCheckpoint(analysis_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Checkpoint nicht gefunden")
+    
+    try:
+        status = checkpoint.status()
+        
+        _prune_batch_progress()
+        progress = BatchProgress(analysis_id, status['pending'])
+        batch_progress[analysis_id] = progress
+        
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(None, _run_csv_resume, analysis_id, checkpoint, progress)
+        
+        return {
+            'success': True,
+            **status,
+            'progress_url': f"/api/progress/{analysis_id}",
+            'abort_url': f"/api/progress/{analysis_id}/abort"
+        }
+    except Exception as e:
+        logger.error(f"Fehler beim Fortsetzen von {analysis_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _run_csv_resume(analysis_id: str, checkpoint: BatchCheckpoint, progress: BatchProgress) -> Dict:
+    """Setzt einen Batch-Lauf fort und schreibt die Modell-Exporte neu (läuft im Thread-Pool)"""
+    try:
+        errors = []
+        with llm_priority(BULK), llm_tenant(checkpoint.tenant):
+            results = csv_processor.resume_batch(checkpoint, errors=errors, progress=progress)
+        _store_analysis_results(analysis_id, results)
+        model_exports = csv_processor.write_model_exports(results, checkpoint.path)
+        
+        logger.info(f"Fortsetzung abgeschlossen: {len(results)} Profile")
+        
+        response = {
+            'success': True,
+            'analysis_id': analysis_id,
+            'total_profiles': len(results),
+            'models': model_exports.previews,
+            'summary': {
+                f'{model}_count': model_exports.counts[model] for model in MODEL_NAMES
+            },
+            'errors': errors,
+            'agents_to_retry': results.degraded_agents(),
+            'aborted': progress.cancelled
+        }
+    except Exception as e:
+        logger.error(f"Fehler beim Fortsetzen von {analysis_id}: {str(e)}", exc_info=True)
+        progress.finish('failed', {'detail': str(e)})
+        raise
+    
+    progress.finish('aborted' if progress.cancelled else 'complete', response)
+    return response
+
+
+def _ensure_not_running(analysis_id: str):
+    """Wirft 409, solange der Lauf im Hintergrund noch läuft"""
+    progress = batch_progress.get(analysis_id)
+    if progress is not None and progress.status == 'running':
+        raise HTTPException(status_code=409, detail="Batch läuft noch")
+
+
+async def _ensure_model_exports(checkpoint: BatchCheckpoint) -> Dict[str, str]:
+    """
+    Pfade der Modell-CSVs eines Laufs.
+    
+    Die Dateien werden beim Upload geschrieben; fehlen sie (z.B. nach einem
+    Abbruch), werden sie einmalig aus dem Checkpoint erzeugt (im Thread-Pool).
+    Während der Lauf noch aktiv ist: 409.
+    """
+    _ensure_not_running(checkpoint.run_id)
+    
+    paths = {model: ModelExportFiles.path(checkpoint.path, model) for model in MODEL_NAMES}
+    if not all(os.path.exists(path) for path in paths.values()):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, csv_processor.write_model_exports, checkpoint.iter_results(), checkpoint.path
+        )
+    return paths
+
+
+def _get_analysis_results(analysis_id: str) -> CompactResultBatch:
+    """Ergebnisse aus dem Speicher, sonst aus dem Checkpoint (z.B. nach Neustart)"""
+    _prune_analysis_results()
+    if analysis_id in analysis_results:
+        analysis_results_accessed[analysis_id] = time.time()
+        return analysis_results[analysis_id]
+    
+    try:
+        checkpoint = BatchCheckpoint(analysis_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Analyse nicht gefunden")
+    
+    results = csv_processor.load_checkpoint_results(checkpoint)
+    _store_analysis_results(analysis_id, results)
+    return results
+
+
+def _store_analysis_results(analysis_id: str, results: CompactResultBatch):
+    """Legt Ergebnisse im Speicher ab (ersetzte Batches gibt der GC frei)"""
+    analysis_results[analysis_id] = results
+    analysis_results_accessed[analysis_id] = time.time()
+
+
+def _prune_analysis_results():
+    """Schließt und entfernt länger nicht abgerufene Ergebnisse (inkl. ausgelagerter Texte)"""
+    cutoff = time.time() - config.ANALYSIS_RESULTS_RETENTION_SECONDS
+    for analysis_id in [a for a, t in list(analysis_results_accessed.items()) if t < cutoff]:
+        analysis_results_accessed.pop(analysis_id, None)
+        results = analysis_results.pop(analysis_id, None)
+        if results is not None:
+            results.close()
+
+
 # HTML Template
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -342,6 +700,70 @@ HTML_TEMPLATE = """
             margin: 0 auto 20px;
         }
         
+        .progress-card {
+            display: none;
+            background: white;
+            border-radius: 15px;
+            padding: 25px;
+            margin-top: 25px;
+            text-align: left;
+        }
+        
+        .progress-card.show {
+            display: block;
+        }
+        
+        .progress-bar {
+            height: 12px;
+            background: #eee;
+            border-radius: 6px;
+            overflow: hidden;
+            margin-bottom: 20px;
+        }
+        
+        .progress-fill {
+            height: 100%;
+            width: 0;
+            background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+            transition: width 0.3s;
+        }
+        
+        .disc-distribution {
+            display: flex;
+            gap: 10px;
+            margin-top: 20px;
+        }
+        
+        .disc-bar {
+            flex: 1;
+            text-align: center;
+            font-size: 13px;
+            color: #666;
+        }
+        
+        .disc-bar-fill {
+            background: #667eea;
+            border-radius: 4px 4px 0 0;
+            margin: 0 auto 5px;
+            width: 60%;
+        }
+        
+        .recent-profiles {
+            margin-top: 20px;
+            font-size: 13px;
+            color: #444;
+            max-height: 160px;
+            overflow-y: auto;
+        }
+        
+        .recent-profiles .failed {
+            color: #c0392b;
+        }
+        
+        .btn-abort {
+            background: #c0392b;
+        }
+        
         @keyframes spin {
             0% { transform: rotate(0deg); }
             100% { transform: rotate(360deg); }
@@ -504,12 +926,15 @@ HTML_TEMPLATE = """
                 <div class="upload-area" id="uploadArea">
                     <div class="upload-icon">📁</div>
                     <div class="upload-text">CSV-Datei hier ablegen oder klicken zum Auswählen</div>
-                    <div class="upload-hint">Unterstützt: raw-data-pcbf.csv Format</div>
-                    <input type="file" id="fileInput" accept=".csv" style="display: none;">
+                    <div class="upload-hint">Unterstützt: raw-data-pcbf.csv Format (auch .csv.gz, .zip, .zst)</div>
+                    <input type="file" id="fileInput" accept=".csv,.gz,.zip,.zst" style="display: none;">
                 </div>
                 
                 <div id="fileName" style="margin-top: 15px; color: #667eea; font-weight: 600;"></div>
                 
+                <input type="text" id="tenantInput" placeholder="Team (optional)"
+                       style="margin-top: 15px; padding: 10px; border: 1px solid #ddd; border-radius: 8px; width: 240px;">
+                
                 <button type="submit" class="btn" id="analyzeBtn" style="margin-top: 20px;">
                     🚀 Analysieren
                 </button>
@@ -519,8 +944,38 @@ HTML_TEMPLATE = """
         <!-- Loading -->
         <div class="loading" id="loadingSection">
             <div class="spinner"></div>
-            <p style="color: white; font-size: 18px;">Analyse läuft...</p>
+            <p style="color: white; font-size: 18px;" id="loadingText">Analyse läuft...</p>
             <p style="color: white; font-size: 14px; margin-top: 10px;">Dies kann einige Minuten dauern</p>
+            
+            <!-- Live-Fortschritt -->
+            <div class="progress-card" id="progressCard">
+                <div class="progress-bar"><div class="progress-fill" id="progressFill"></div></div>
+                <div class="summary-grid">
+                    <div class="summary-item">
+                        <div class="summary-value" id="progressCount">0 / 0</div>
+                        <div class="summary-label">Profile fertig</div>
+                    </div>
+                    <div class="summary-item">
+                        <div class="summary-value" id="progressRate">–</div>
+                        <div class="summary-label">Profile / Minute</div>
+                    </div>
+                    <div class="summary-item">
+                        <div class="summary-value" id="progressEta">–</div>
+                        <div class="summary-label">Restzeit</div>
+                    </div>
+                    <div class="summary-item">
+                        <div class="summary-value" id="progressErrors">0</div>
+                        <div class="summary-label">Fehler</div>
+                    </div>
+                    <div class="summary-item">
+                        <div class="summary-value" id="progressPi">–</div>
+                        <div class="summary-label">Ø Purchase Intent</div>
+                    </div>
+                </div>
+                <div class="disc-distribution" id="discDistribution"></div>
+                <div class="recent-profiles" id="recentProfiles"></div>
+                <button class="btn btn-abort" id="abortBtn" onclick="abortAnalysis()">⏹ Analyse abbrechen</button>
+            </div>
         </div>
         
         <!-- Results Section -->
@@ -592,6 +1047,10 @@ HTML_TEMPLATE = """
                 <button class="export-btn" onclick="exportModel('riasec')">📥 RIASEC als CSV exportieren</button>
                 <div id="riasecTable"></div>
             </div>
+            
+            <button class="export-btn" onclick="exportColumnar('parquet')">📦 Alle Ergebnisse als Parquet</button>
+            <button class="export-btn" onclick="exportColumnar('arrow')">📦 Alle Ergebnisse als Arrow</button>
+            <button class="export-btn" onclick="exportBundle()">🗜️ Alle Exporte als ZIP</button>
         </div>
     </div>
     
@@ -631,8 +1090,8 @@ HTML_TEMPLATE = """
         });
         
         function handleFile(file) {
-            if (!file.name.endsWith('.csv')) {
-                alert('Bitte nur CSV-Dateien hochladen');
+            if (!/\.(csv|gz|zip|zst)$/i.test(file.name)) {
+                alert('Bitte nur CSV-Dateien hochladen (.csv, .csv.gz, .zip, .zst)');
                 return;
             }
             selectedFile = file;
@@ -652,9 +1111,14 @@ HTML_TEMPLATE = """
             document.getElementById('uploadSection').style.display = 'none';
             document.getElementById('loadingSection').classList.add('show');
             
-            // FormData erstellen
+            // FormData erstellen (live: Antwort sofort, Fortschritt per SSE)
             const formData = new FormData();
             formData.append('file', selectedFile);
+            formData.append('live', 'true');
+            const tenant = document.getElementById('tenantInput').value.trim();
+            if (tenant) {
+                formData.append('tenant', tenant);
+            }
             
             try {
                 const response = await fetch('/api/upload-csv', {
@@ -666,7 +1130,7 @@ HTML_TEMPLATE = """
                 
                 if (data.success) {
                     currentAnalysisId = data.analysis_id;
-                    displayResults(data);
+                    watchProgress(data);
                 } else {
                     alert('Fehler: ' + (data.detail || 'Unbekannter Fehler'));
                     resetUI();
@@ -679,9 +1143,105 @@ HTML_TEMPLATE = """
         
         function resetUI() {
             document.getElementById('loadingSection').classList.remove('show');
+            document.getElementById('progressCard').classList.remove('show');
             document.getElementById('uploadSection').style.display = 'block';
         }
         
+        // Live-Fortschritt
+        let progressEvents = null;
+        
+        function watchProgress(data) {
+            document.getElementById('progressCard').classList.add('show');
+            document.getElementById('abortBtn').disabled = false;
+            document.getElementById('recentProfiles').innerHTML = '';
+            
+            progressEvents = new EventSource(data.progress_url);
+            
+            progressEvents.addEventListener('snapshot', (event) => {
+                const snapshot = JSON.parse(event.data);
+                renderProgress(snapshot);
+                snapshot.recent.forEach(addRecentProfile);
+            });
+            progressEvents.addEventListener('progress', (event) => {
+                renderProgress(JSON.parse(event.data));
+            });
+            progressEvents.addEventListener('profile', (event) => {
+                addRecentProfile(JSON.parse(event.data));
+            });
+            progressEvents.addEventListener('profile_error', (event) => {
+                addRecentProfile(JSON.parse(event.data));
+            });
+            
+            const finish = (event) => {
+                progressEvents.close();
+                const payload = JSON.parse(event.data);
+                renderProgress(payload.progress);
+                document.getElementById('progressCard').classList.remove('show');
+                
+                if (event.type === 'failed') {
+                    alert('Fehler bei der Analyse: ' + payload.result.detail);
+                    resetUI();
+                    return;
+                }
+                if (event.type === 'aborted') {
+                    alert(`Analyse abgebrochen nach ${payload.progress.completed} Profilen – über /api/batches fortsetzbar`);
+                }
+                displayResults(payload.result);
+            };
+            progressEvents.addEventListener('complete', finish);
+            progressEvents.addEventListener('aborted', finish);
+            progressEvents.addEventListener('failed', finish);
+        }
+        
+        function renderProgress(p) {
+            const done = p.completed + p.errors;
+            document.getElementById('progressFill').style.width = `${p.percent}%`;
+            document.getElementById('progressCount').textContent = `${done} / ${p.total}`;
+            document.getElementById('progressRate').textContent = p.profiles_per_minute.toFixed(1);
+            document.getElementById('progressEta').textContent = formatDuration(p.eta_seconds);
+            document.getElementById('progressErrors').textContent = p.errors;
+            document.getElementById('progressPi').textContent = p.mean_pi === null ? '–' : p.mean_pi.toFixed(1);
+            document.getElementById('loadingText').textContent =
+                p.status === 'aborting' ? 'Analyse wird abgebrochen...' : `Analyse läuft... ${p.percent}%`;
+            
+            const types = ['D', 'I', 'S', 'C'];
+            const max = Math.max(1, ...types.map(t => p.disc_distribution[t] || 0));
+            document.getElementById('discDistribution').innerHTML = types.map(t => {
+                const count = p.disc_distribution[t] || 0;
+                return `<div class="disc-bar">
+                    <div class="disc-bar-fill" style="height: ${Math.round(count / max * 60)}px"></div>
+                    ${t}: ${count}
+                </div>`;
+            }).join('');
+        }
+        
+        function addRecentProfile(item) {
+            const list = document.getElementById('recentProfiles');
+            const row = document.createElement('div');
+            if (item.error) {
+                row.className = 'failed';
+                row.textContent = `✗ ${item.profile_id}: ${item.error}`;
+            } else {
+                row.textContent = `✓ ${item.profile_id} – DISC ${item.disc}, PI ${item.pi} (${item.pi_category})`;
+            }
+            list.prepend(row);
+            while (list.children.length > 50) {
+                list.removeChild(list.lastChild);
+            }
+        }
+        
+        function formatDuration(seconds) {
+            if (seconds === null || seconds === undefined) return '–';
+            const minutes = Math.floor(seconds / 60);
+            return minutes > 0 ? `${minutes} min ${Math.round(seconds % 60)} s` : `${Math.round(seconds)} s`;
+        }
+        
+        async function abortAnalysis() {
+            if (!currentAnalysisId || !confirm('Laufende Analyse wirklich abbrechen?')) return;
+            document.getElementById('abortBtn').disabled = true;
+            await fetch(`/api/progress/${currentAnalysisId}/abort`, { method: 'POST' });
+        }
+        
         function displayResults(data) {
             document.getElementById('loadingSection').classList.remove('show');
             document.getElementById('resultsSection').classList.add('show');
@@ -763,6 +1323,24 @@ HTML_TEMPLATE = """
             
             window.location.href = `/api/export/${currentAnalysisId}/${model}`;
         }
+        
+        function exportColumnar(format) {
+            if (!currentAnalysisId) {
+                alert('Keine Analyse verfügbar');
+                return;
+            }
+            
+            window.location.href = `/api/export-columnar/${currentAnalysisId}/${format}`;
+        }
+        
+        function exportBundle() {
+            if (!currentAnalysisId) {
+                alert('Keine Analyse verfügbar');
+                return;
+            }
+            
+            window.location.href = `/api/export-bundle/${currentAnalysisId}`;
+        }
     </script>
 </body>
 </html>
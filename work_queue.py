@@ -0,0 +1,659 @@
+"""
+PCBF 2.1 Framework - Work-Queue für verteilte Analyse
+Die API legt Jobs als einzelne Profil-Arbeitseinheiten ab, Worker-Prozesse
+(worker.py, beliebig viele Knoten) holen sie mit Lease ab und schreiben die
+Ergebnisse zurück. Backends: SQLite (ein Knoten / gemeinsames Volume) und
+Redis-Protokoll (Redis, Valkey, KeyDB, ...)
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+import config
+from models import ProfileInput, ProfileAnalysisResult
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Fehlermeldung für Einheiten, deren Lease zu oft abgelaufen ist (Worker-Absturz)
+LEASE_EXPIRED_ERROR = "Lease mehrfach abgelaufen (Worker abgestürzt?)"
+
+# Abstand zwischen zwei Aufräumläufen abgeschlossener Jobs (SQLite)
+PURGE_INTERVAL_SECONDS = 60
+
+
+class WorkUnit(NamedTuple):
+    """Eine Arbeitseinheit (ein Profil eines Jobs)"""
+    job_id: str
+    index: int
+    profile_json: str
+    attempts: int
+
+    @property
+    def unit_id(self) -> str:
+        return f"{self.job_id}:{self.index}"
+
+    def profile(self) -> ProfileInput:
+        return ProfileInput.model_validate_json(self.profile_json)
+
+
+class WorkQueue:
+    """
+    Schnittstelle der Work-Queue-Backends (Queue und Ergebnis-Store).
+
+    Arbeitseinheiten werden mit Lease vergeben: läuft der Lease ab, ohne dass
+    der Worker ihn verlängert (extend_leases) oder die Einheit abschließt,
+    wird sie erneut ausgeliefert. Nach max_attempts Auslieferungen gilt sie
+    als fehlgeschlagen. Zwischen Jobs wird reihum vergeben, damit ein kleiner
+    Job nicht hinter einem großen wartet.
+
+    Abgeschlossene Jobs werden nach config.WORK_JOB_RETENTION_SECONDS samt
+    Ergebnissen gelöscht (danach liefert job_status None).
+    """
+
+    def __init__(self, lease_seconds: Optional[float] = None, max_attempts: Optional[int] = None):
+        """
+        Args:
+            lease_seconds: Lease-Dauer (default: config.WORK_LEASE_SECONDS)
+            max_attempts: Maximale Auslieferungen pro Einheit (default: config.WORK_MAX_ATTEMPTS)
+        """
+        self.lease_seconds = lease_seconds or config.WORK_LEASE_SECONDS
+        self.max_attempts = max_attempts or config.WORK_MAX_ATTEMPTS
+
+    def enqueue_job(self, profiles: List[ProfileInput], target_keywords: List[str],
+                    product_category: str, include_enneagram: bool = False,
+                    tenant: Optional[str] = None, priority: Optional[str] = None) -> str:
+        """
+        Legt einen Job an und stellt alle Profile als Arbeitseinheiten ein.
+
+        Args:
+            profiles: Profile des Jobs
+            target_keywords: Ziel-Keywords
+            product_category: Produkt-Kategorie
+            include_enneagram: Enneagram einbeziehen
+            tenant: Mandant (siehe llm_scheduler.llm_tenant)
+            priority: LLM-Prioritätsklasse der Worker-Calls (default: config.WORK_LLM_PRIORITY)
+
+        Returns:
+            Job-ID
+        """
+        job_id = uuid.uuid4().hex[:12]
+        params = {
+            'job_id': job_id,
+            'created_at': datetime.utcnow().isoformat(),
+            'total_profiles': len(profiles),
+            'target_keywords': target_keywords,
+            'product_category': product_category,
+            'include_enneagram': include_enneagram,
+            'tenant': tenant,
+            'priority': priority or config.WORK_LLM_PRIORITY
+        }
+        self._enqueue(job_id, params, [profile.model_dump_json() for profile in profiles])
+        logger.info(f"Job {job_id} eingestellt ({len(profiles)} Profile)")
+        return job_id
+
+    def _enqueue(self, job_id: str, params: Dict[str, Any], payloads: List[str]):
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[WorkUnit]:
+        """
+        Holt bis zu limit Arbeitseinheiten mit Lease (reihum über die Jobs).
+
+        Args:
+            worker_id: ID des Workers (Lease-Inhaber)
+            limit: Maximale Anzahl Einheiten
+
+        Returns:
+            Liste von WorkUnits (leer, wenn nichts ansteht)
+        """
+        raise NotImplementedError
+
+    def extend_leases(self, worker_id: str, units: List[WorkUnit]):
+        """Verlängert die Leases laufender Einheiten (Heartbeat des Workers)"""
+        raise NotImplementedError
+
+    def complete(self, worker_id: str, unit: WorkUnit, result: ProfileAnalysisResult) -> bool:
+        """
+        Speichert das Ergebnis einer Einheit.
+
+        Nur der aktuelle Lease-Inhaber kann abschließen: wurde die Einheit
+        nach abgelaufenem Lease neu vergeben oder bereits endgültig als
+        fehlgeschlagen markiert, wird das Ergebnis verworfen.
+
+        Returns:
+            True, wenn das Ergebnis übernommen wurde
+        """
+        raise NotImplementedError
+
+    def fail(self, worker_id: str, unit: WorkUnit, error: str):
+        """Gibt eine Einheit nach Fehler zurück (erneut einstellen bis max_attempts)"""
+        raise NotImplementedError
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Parameter eines Jobs (None = unbekannt)"""
+        raise NotImplementedError
+
+    def job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fortschritt eines Jobs.
+
+        Returns:
+            Dictionary mit Parametern sowie completed/failed/pending/status
+            (None = unbekannter Job)
+        """
+        raise NotImplementedError
+
+    def job_results_json(self, job_id: str) -> List[bytes]:
+        """Ergebnis-JSON aller fertigen Einheiten in Profil-Reihenfolge (ohne Parsen)"""
+        raise NotImplementedError
+
+    def job_errors(self, job_id: str) -> List[Dict[str, str]]:
+        """Endgültig fehlgeschlagene Profile ({'profile_id', 'error'})"""
+        raise NotImplementedError
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Wartende und vergebene Einheiten über alle Jobs"""
+        raise NotImplementedError
+
+    def close(self):
+        """Schließt die Verbindung zum Backend"""
+
+    def _status(self, params: Dict[str, Any], completed: int, failed: int) -> Dict[str, Any]:
+        total = params['total_profiles']
+        pending = max(total - completed - failed, 0)
+        return {
+            **params,
+            'status': 'running' if pending else 'completed',
+            'completed': completed,
+            'failed': failed,
+            'pending': pending
+        }
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Work-Queue in einer SQLite-Datei (WAL).
+
+    Für einen Knoten mit mehreren Worker-Prozessen oder mehrere Knoten mit
+    gemeinsamem Volume; die Vergabe läuft in einer IMMEDIATE-Transaktion.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, **kwargs):
+        """
+        Args:
+            db_path: Pfad zur SQLite-Datei (default: config.WORK_QUEUE_PATH)
+            **kwargs: lease_seconds, max_attempts (siehe WorkQueue)
+        """
+        super().__init__(**kwargs)
+        self.db_path = db_path or config.WORK_QUEUE_PATH
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                     isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            '''CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                params_json TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )'''
+        )
+        self._conn.execute(
+            '''CREATE TABLE IF NOT EXISTS units (
+                job_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                profile_json TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result_json TEXT,
+                error TEXT,
+                PRIMARY KEY (job_id, idx)
+            )'''
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS units_status ON units (status, job_id)')
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(jobs)')]
+        if 'finished_at' not in columns:
+            self._conn.execute('ALTER TABLE jobs ADD COLUMN finished_at REAL')
+        self._next_purge = 0.0
+
+    def _enqueue(self, job_id: str, params: Dict[str, Any], payloads: List[str]):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute(
+                    'INSERT INTO jobs (job_id, params_json, created_at, finished_at) VALUES (?, ?, ?, ?)',
+                    (job_id, json.dumps(params), params['created_at'], None if payloads else time.time())
+                )
+                self._conn.executemany(
+                    'INSERT INTO units (job_id, idx, profile_json) VALUES (?, ?, ?)',
+                    ((job_id, index, payload) for index, payload in enumerate(payloads))
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[WorkUnit]:
+        now = time.time()
+        claimable = "(status = 'pending' OR (status = 'leased' AND lease_expires < ?))"
+        units = []
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                if now >= self._next_purge:
+                    self._purge_finished_jobs(now)
+                    self._next_purge = now + PURGE_INTERVAL_SECONDS
+
+                # Reihum: zuerst Jobs mit den wenigsten laufenden Einheiten
+                jobs = [row[0] for row in self._conn.execute(
+                    '''SELECT job_id FROM units WHERE status IN ('pending', 'leased')
+                       GROUP BY job_id
+                       ORDER BY SUM(status = 'leased' AND lease_expires >= ?), MIN(rowid)''',
+                    (now,)
+                )]
+                candidates = {
+                    job_id: self._conn.execute(
+                        f'SELECT idx, profile_json, attempts FROM units '
+                        f'WHERE job_id = ? AND {claimable} ORDER BY idx LIMIT ?',
+                        (job_id, now, limit)
+                    ).fetchall()
+                    for job_id in jobs
+                }
+
+                while len(units) < limit and any(candidates.values()):
+                    for job_id in jobs:
+                        if candidates[job_id] and len(units) < limit:
+                            index, profile_json, attempts = candidates[job_id].pop(0)
+                            units.append(WorkUnit(job_id, index, profile_json, attempts + 1))
+
+                expired = [unit for unit in units if unit.attempts > self.max_attempts]
+                for unit in expired:
+                    self._conn.execute(
+                        "UPDATE units SET status = 'failed', error = ?, lease_owner = NULL "
+                        "WHERE job_id = ? AND idx = ?",
+                        (LEASE_EXPIRED_ERROR, unit.job_id, unit.index)
+                    )
+                    self._mark_finished(unit.job_id, now)
+                units = [unit for unit in units if unit.attempts <= self.max_attempts]
+                self._conn.executemany(
+                    "UPDATE units SET status = 'leased', attempts = ?, lease_owner = ?, lease_expires = ? "
+                    "WHERE job_id = ? AND idx = ?",
+                    [(unit.attempts, worker_id, now + self.lease_seconds, unit.job_id, unit.index)
+                     for unit in units]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+        for unit in expired:
+            logger.warning(f"Einheit {unit.unit_id}: {LEASE_EXPIRED_ERROR}")
+        return units
+
+    def extend_leases(self, worker_id: str, units: List[WorkUnit]):
+        if not units:
+            return
+        expires = time.time() + self.lease_seconds
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE units SET lease_expires = ? "
+                "WHERE job_id = ? AND idx = ? AND status = 'leased' AND lease_owner = ?",
+                [(expires, unit.job_id, unit.index, worker_id) for unit in units]
+            )
+
+    def complete(self, worker_id: str, unit: WorkUnit, result: ProfileAnalysisResult) -> bool:
+        with self._lock:
+            accepted = self._conn.execute(
+                "UPDATE units SET status = 'done', result_json = ?, error = NULL, "
+                "lease_owner = NULL, lease_expires = NULL "
+                "WHERE job_id = ? AND idx = ? AND status = 'leased' AND lease_owner = ?",
+                (result.model_dump_json(), unit.job_id, unit.index, worker_id)
+            ).rowcount > 0
+            if accepted:
+                self._mark_finished(unit.job_id, time.time())
+        return accepted
+
+    def fail(self, worker_id: str, unit: WorkUnit, error: str):
+        final = unit.attempts >= self.max_attempts
+        with self._lock:
+            self._conn.execute(
+                "UPDATE units SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE job_id = ? AND idx = ? AND status = 'leased' AND lease_owner = ?",
+                ('failed' if final else 'pending', error, unit.job_id, unit.index, worker_id)
+            )
+            if final:
+                self._mark_finished(unit.job_id, time.time())
+
+    def _mark_finished(self, job_id: str, now: float):
+        """Setzt den Abschlusszeitpunkt, sobald keine Einheit des Jobs mehr offen ist"""
+        self._conn.execute(
+            "UPDATE jobs SET finished_at = ? WHERE job_id = ? AND finished_at IS NULL "
+            "AND NOT EXISTS (SELECT 1 FROM units WHERE job_id = ? AND status IN ('pending', 'leased'))",
+            (now, job_id, job_id)
+        )
+
+    def _purge_finished_jobs(self, now: float):
+        """Löscht Jobs, die seit mehr als config.WORK_JOB_RETENTION_SECONDS abgeschlossen sind"""
+        cutoff = now - config.WORK_JOB_RETENTION_SECONDS
+        self._conn.execute(
+            'DELETE FROM units WHERE job_id IN (SELECT job_id FROM jobs WHERE finished_at < ?)', (cutoff,)
+        )
+        purged = self._conn.execute('DELETE FROM jobs WHERE finished_at < ?', (cutoff,)).rowcount
+        if purged:
+            logger.info(f"{purged} abgeschlossene Jobs gelöscht")
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT params_json FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        params = self.job(job_id)
+        if params is None:
+            return None
+        with self._lock:
+            counts = dict(self._conn.execute(
+                'SELECT status, COUNT(*) FROM units WHERE job_id = ? GROUP BY status', (job_id,)
+            ).fetchall())
+        return self._status(params, counts.get('done', 0), counts.get('failed', 0))
+
+    def job_results_json(self, job_id: str) -> List[bytes]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result_json FROM units WHERE job_id = ? AND status = 'done' ORDER BY idx", (job_id,)
+            ).fetchall()
+        return [row[0].encode('utf-8') for row in rows]
+
+    def job_errors(self, job_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT profile_json, error FROM units WHERE job_id = ? AND status = 'failed' ORDER BY idx",
+                (job_id,)
+            ).fetchall()
+        return [{'profile_id': json.loads(profile_json)['id'], 'error': error} for profile_json, error in rows]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            pending, leased = self._conn.execute(
+                "SELECT SUM(status = 'pending' OR (status = 'leased' AND lease_expires < ?)), "
+                "SUM(status = 'leased' AND lease_expires >= ?) FROM units",
+                (now, now)
+            ).fetchone()
+        return {'backend': 'sqlite', 'pending': pending or 0, 'leased': leased or 0}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Vergabe reihum über die Jobs: abgelaufene Leases zurück in ihre Job-Queue,
+# dann pro Einheit den nächsten Job der Rotation bedienen.
+# KEYS: jobs (Rotation), leases (ZSET), owners (HASH), attempts (HASH)
+# ARGV: now, expires, worker_id, limit, key_prefix
+_REDIS_CLAIM_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, unit_id in ipairs(expired) do
+    local job_id = string.match(unit_id, '^(.*):%d+$')
+    redis.call('ZREM', KEYS[2], unit_id)
+    redis.call('HDEL', KEYS[3], unit_id)
+    if redis.call('LPUSH', ARGV[5] .. 'queue:' .. job_id, unit_id) == 1 then
+        redis.call('RPUSH', KEYS[1], job_id)
+    end
+end
+local claimed = {}
+while #claimed < tonumber(ARGV[4]) * 2 do
+    local job_id = redis.call('LPOP', KEYS[1])
+    if not job_id then break end
+    local unit_id = redis.call('LPOP', ARGV[5] .. 'queue:' .. job_id)
+    if unit_id then
+        if redis.call('LLEN', ARGV[5] .. 'queue:' .. job_id) > 0 then
+            redis.call('RPUSH', KEYS[1], job_id)
+        end
+        redis.call('ZADD', KEYS[2], ARGV[2], unit_id)
+        redis.call('HSET', KEYS[3], unit_id, ARGV[3])
+        table.insert(claimed, unit_id)
+        table.insert(claimed, redis.call('HINCRBY', KEYS[4], unit_id, 1))
+    end
+end
+return claimed
+"""
+
+# KEYS: leases, owners; ARGV: expires, worker_id, unit_ids...
+_REDIS_EXTEND_SCRIPT = """
+for i = 3, #ARGV do
+    if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[2] then
+        redis.call('ZADD', KEYS[1], 'XX', ARGV[1], ARGV[i])
+    end
+end
+return 0
+"""
+
+# Abschluss nur durch den Lease-Inhaber; Ergebnis und Fehler schließen sich aus.
+# Ist der Job vollständig, laufen seine Schlüssel nach der Aufbewahrungsdauer ab.
+# KEYS: leases, owners, attempts, results, errors, job, units, job queue
+# ARGV: unit_id, worker_id, index, value, 'result' | 'error', retention_seconds
+_REDIS_FINISH_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+if ARGV[5] == 'result' then
+    redis.call('HSET', KEYS[4], ARGV[3], ARGV[4])
+    redis.call('HDEL', KEYS[5], ARGV[3])
+else
+    redis.call('HSET', KEYS[5], ARGV[3], ARGV[4])
+    redis.call('HDEL', KEYS[4], ARGV[3])
+end
+local params = redis.call('GET', KEYS[6])
+if params then
+    local total = cjson.decode(params)['total_profiles']
+    if redis.call('HLEN', KEYS[4]) + redis.call('HLEN', KEYS[5]) >= total then
+        for i = 4, 8 do
+            redis.call('EXPIRE', KEYS[i], ARGV[6])
+        end
+    end
+end
+return 1
+"""
+
+# KEYS: leases, owners, jobs, job queue; ARGV: unit_id, worker_id, job_id
+_REDIS_REQUEUE_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+if redis.call('RPUSH', KEYS[4], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[3], ARGV[3])
+end
+return 1
+"""
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    Work-Queue über das Redis-Protokoll (benötigt das Paket 'redis').
+
+    Schlüssel (Präfix config.WORK_QUEUE_PREFIX):
+        jobs: Rotation der Jobs mit wartenden Einheiten
+        queue:<job>: Wartende Einheiten eines Jobs ('<job>:<index>')
+        leases / owners / attempts: Vergebene Einheiten (ZSET Ablaufzeit, Inhaber, Auslieferungen)
+        job:<job>, units:<job>, results:<job>, errors:<job>: Parameter, Profile, Ergebnisse, Fehler
+    Vergabe, Lease-Verlängerung und Abschluss laufen atomar als Lua-Skripte;
+    die Schlüssel abgeschlossener Jobs erhalten ein TTL.
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: Optional[str] = None, **kwargs):
+        """
+        Args:
+            url: redis://host:port/db (default: config.WORK_QUEUE_URL)
+            prefix: Schlüssel-Präfix (default: config.WORK_QUEUE_PREFIX)
+            **kwargs: lease_seconds, max_attempts (siehe WorkQueue)
+        """
+        if redis is None:
+            raise ImportError("Redis-Work-Queue benötigt das Paket 'redis' (pip install redis)")
+        super().__init__(**kwargs)
+        self.prefix = prefix if prefix is not None else config.WORK_QUEUE_PREFIX
+        self._redis = redis.Redis.from_url(url or config.WORK_QUEUE_URL)
+        self._claim = self._redis.register_script(_REDIS_CLAIM_SCRIPT)
+        self._extend = self._redis.register_script(_REDIS_EXTEND_SCRIPT)
+        self._requeue = self._redis.register_script(_REDIS_REQUEUE_SCRIPT)
+        self._finish_script = self._redis.register_script(_REDIS_FINISH_SCRIPT)
+
+    def _key(self, *parts: str) -> str:
+        return self.prefix + ':'.join(parts)
+
+    def _enqueue(self, job_id: str, params: Dict[str, Any], payloads: List[str]):
+        unit_ids = [f"{job_id}:{index}" for index in range(len(payloads))]
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.set(self._key('job', job_id), json.dumps(params))
+        if payloads:
+            pipe.hset(self._key('units', job_id), mapping=dict(zip(range(len(payloads)), payloads)))
+            pipe.rpush(self._key('queue', job_id), *unit_ids)
+            pipe.rpush(self._key('jobs'), job_id)
+        else:
+            pipe.expire(self._key('job', job_id), config.WORK_JOB_RETENTION_SECONDS)
+        pipe.execute()
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[WorkUnit]:
+        now = time.time()
+        claimed = self._claim(
+            keys=[self._key('jobs'), self._key('leases'), self._key('owners'), self._key('attempts')],
+            args=[now, now + self.lease_seconds, worker_id, limit, self.prefix]
+        )
+
+        units = []
+        for unit_id, attempts in zip(claimed[::2], claimed[1::2]):
+            job_id, index = unit_id.decode().rsplit(':', 1)
+            unit = WorkUnit(job_id, int(index), '', int(attempts))
+            if unit.attempts > self.max_attempts:
+                logger.warning(f"Einheit {unit.unit_id}: {LEASE_EXPIRED_ERROR}")
+                self._finish(worker_id, unit, error=LEASE_EXPIRED_ERROR)
+                continue
+            profile_json = self._redis.hget(self._key('units', job_id), index)
+            units.append(unit._replace(profile_json=profile_json.decode('utf-8')))
+        return units
+
+    def extend_leases(self, worker_id: str, units: List[WorkUnit]):
+        if units:
+            self._extend(
+                keys=[self._key('leases'), self._key('owners')],
+                args=[time.time() + self.lease_seconds, worker_id] + [unit.unit_id for unit in units]
+            )
+
+    def _finish(self, worker_id: str, unit: WorkUnit, result_json: Optional[str] = None,
+                error: Optional[str] = None) -> bool:
+        """Schließt eine Einheit mit Ergebnis oder endgültigem Fehler ab (nur Lease-Inhaber)"""
+        job_id = unit.job_id
+        return bool(self._finish_script(
+            keys=[self._key('leases'), self._key('owners'), self._key('attempts'),
+                  self._key('results', job_id), self._key('errors', job_id), self._key('job', job_id),
+                  self._key('units', job_id), self._key('queue', job_id)],
+            args=[unit.unit_id, worker_id, unit.index,
+                  result_json if result_json is not None else error,
+                  'result' if result_json is not None else 'error',
+                  config.WORK_JOB_RETENTION_SECONDS]
+        ))
+
+    def complete(self, worker_id: str, unit: WorkUnit, result: ProfileAnalysisResult) -> bool:
+        return self._finish(worker_id, unit, result_json=result.model_dump_json())
+
+    def fail(self, worker_id: str, unit: WorkUnit, error: str):
+        if unit.attempts >= self.max_attempts:
+            self._finish(worker_id, unit, error=error)
+            return
+        self._requeue(
+            keys=[self._key('leases'), self._key('owners'), self._key('jobs'), self._key('queue', unit.job_id)],
+            args=[unit.unit_id, worker_id, unit.job_id]
+        )
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        params = self._redis.get(self._key('job', job_id))
+        return json.loads(params) if params else None
+
+    def job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        params = self.job(job_id)
+        if params is None:
+            return None
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hlen(self._key('results', job_id))
+        pipe.hlen(self._key('errors', job_id))
+        completed, failed = pipe.execute()
+        return self._status(params, completed, failed)
+
+    def job_results_json(self, job_id: str) -> List[bytes]:
+        results = self._redis.hgetall(self._key('results', job_id))
+        return [results[index] for index in sorted(results, key=int)]
+
+    def job_errors(self, job_id: str) -> List[Dict[str, str]]:
+        errors = self._redis.hgetall(self._key('errors', job_id))
+        if not errors:
+            return []
+        indices = sorted(errors, key=int)
+        profiles = self._redis.hmget(self._key('units', job_id), indices)
+        return [
+            {'profile_id': json.loads(profile_json)['id'], 'error': errors[index].decode('utf-8')}
+            for index, profile_json in zip(indices, profiles)
+        ]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        job_ids = [job_id.decode() for job_id in self._redis.lrange(self._key('jobs'), 0, -1)]
+        pipe = self._redis.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.llen(self._key('queue', job_id))
+        pending = sum(pipe.execute()) if job_ids else 0
+        return {'backend': 'redis', 'pending': pending, 'leased': self._redis.zcard(self._key('leases'))}
+
+    def close(self):
+        self._redis.close()
+
+
+def open_work_queue(url: Optional[str] = None) -> WorkQueue:
+    """
+    Öffnet das Work-Queue-Backend zur URL.
+
+    Args:
+        url: sqlite:///pfad/queue.db oder redis://host:port/db
+            (default: config.WORK_QUEUE_URL)
+
+    Returns:
+        WorkQueue
+    """
+    url = url or config.WORK_QUEUE_URL
+    scheme = urlparse(url).scheme
+    if scheme == 'sqlite':
+        return SQLiteWorkQueue(url[len('sqlite:///'):] or None)
+    if scheme in ('redis', 'rediss', 'unix'):
+        return RedisWorkQueue(url)
+    raise ValueError(f"Unbekanntes Work-Queue-Backend: {url}")
+
+
+# Singleton-Instanz
+_work_queue = None
+
+
+def get_work_queue() -> WorkQueue:
+    """
+    Gibt Singleton-Instanz der Work-Queue zurück (config.WORK_QUEUE_URL).
+
+    Returns:
+        WorkQueue-Instanz
+    """
+    global _work_queue
+    if _work_queue is None:
+        _work_queue = open_work_queue()
+    return _work_queue
@@ -0,0 +1,202 @@
+"""
+PCBF 2.1 Framework - Analyse-Worker
+Holt Profil-Arbeitseinheiten aus der Work-Queue, analysiert sie und schreibt
+die Ergebnisse zurück. Beliebig viele Worker-Prozesse (auch auf mehreren
+Knoten) können dieselbe Queue abarbeiten; der Durchsatz wächst mit der
+Anzahl Worker bis zum Rate-Limit des LLM-Providers.
+
+Starten:
+    python3 worker.py                       # ein Prozess
+    python3 worker.py --processes 4         # vier Prozesse auf diesem Knoten
+"""
+import os
+import time
+import socket
+import signal
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import config
+from analyzer import ProfileAnalyzer
+from llm_scheduler import llm_priority, llm_tenant
+from work_queue import WorkQueue, WorkUnit, open_work_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Arbeitet Einheiten der Work-Queue ab.
+
+    Bis zu concurrency Profile laufen parallel; ein Heartbeat-Thread
+    verlängert deren Leases. Stirbt der Prozess, laufen die Leases ab und
+    die Einheiten werden an andere Worker ausgeliefert.
+    """
+
+    def __init__(self, queue: Optional[WorkQueue] = None, concurrency: Optional[int] = None,
+                 worker_id: Optional[str] = None, analyzer: Optional[ProfileAnalyzer] = None):
+        """
+        Args:
+            queue: Work-Queue (default: open_work_queue())
+            concurrency: Parallel analysierte Profile (default: config.WORKER_CONCURRENCY)
+            worker_id: Lease-Inhaber (default: Hostname und PID)
+            analyzer: ProfileAnalyzer (default: neue Instanz)
+        """
+        self.queue = queue or open_work_queue()
+        self.concurrency = concurrency or config.WORKER_CONCURRENCY
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.analyzer = analyzer or ProfileAnalyzer()
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self.failed = 0
+
+        self._active: Dict[str, WorkUnit] = {}
+        self._active_lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._finished = threading.Event()
+
+    def run(self, idle_exit_seconds: Optional[float] = None):
+        """
+        Arbeitet Einheiten ab, bis stop() aufgerufen wird.
+
+        Args:
+            idle_exit_seconds: Beenden, wenn so lange nichts ansteht (None = nie)
+        """
+        logger.info(f"Worker {self.worker_id} gestartet ({self.concurrency} parallel)")
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+
+        idle_since = time.time()
+        backoff = config.WORKER_POLL_SECONDS
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while not self.stop_event.is_set():
+                with self._active_lock:
+                    free = self.concurrency - len(self._active)
+                try:
+                    units = self.queue.claim(self.worker_id, free) if free > 0 else []
+                except Exception as e:
+                    # Backend nicht erreichbar: laufende Profile weiterführen, später erneut
+                    logger.error(f"Work-Queue nicht erreichbar, neuer Versuch in {backoff:.1f}s: {str(e)}")
+                    self.stop_event.wait(backoff)
+                    backoff = min(backoff * 2, config.WORKER_MAX_BACKOFF_SECONDS)
+                    continue
+                backoff = config.WORKER_POLL_SECONDS
+
+                for unit in units:
+                    with self._active_lock:
+                        self._active[unit.unit_id] = unit
+                    executor.submit(self._process, unit)
+
+                if units:
+                    idle_since = time.time()
+                    continue
+                with self._active_lock:
+                    busy = bool(self._active)
+                if (not busy and idle_exit_seconds is not None
+                        and time.time() - idle_since >= idle_exit_seconds):
+                    break
+                self.stop_event.wait(config.WORKER_POLL_SECONDS)
+
+        # Executor hat auf laufende Profile gewartet; danach Heartbeat beenden
+        self._finished.set()
+        logger.info(f"Worker {self.worker_id} beendet: {self.processed} Profile, {self.failed} Fehler")
+
+    def stop(self):
+        """Nimmt keine neuen Einheiten mehr an; laufende werden noch abgeschlossen"""
+        self.stop_event.set()
+
+    def _process(self, unit: WorkUnit):
+        """Analysiert eine Einheit und meldet Ergebnis bzw. Fehler an die Queue"""
+        try:
+            job = self._job(unit.job_id)
+            with llm_priority(job['priority']), llm_tenant(job.get('tenant')):
+                result = self.analyzer.analyze_profile(
+                    profile=unit.profile(),
+                    target_keywords=job['target_keywords'],
+                    product_category=job['product_category'],
+                    include_enneagram=job['include_enneagram']
+                )
+            if not self.queue.complete(self.worker_id, unit, result):
+                logger.warning(f"Einheit {unit.unit_id}: Lease verloren, Ergebnis verworfen")
+            with self._active_lock:
+                self.processed += 1
+        except Exception as e:
+            logger.error(f"Einheit {unit.unit_id} fehlgeschlagen (Versuch {unit.attempts}): {str(e)}")
+            with self._active_lock:
+                self.failed += 1
+            try:
+                self.queue.fail(self.worker_id, unit, str(e))
+            except Exception as queue_error:
+                # Lease läuft ab, die Einheit wird erneut ausgeliefert
+                logger.error(f"Einheit {unit.unit_id} konnte nicht zurückgegeben werden: {queue_error}")
+        finally:
+            with self._active_lock:
+                self._active.pop(unit.unit_id, None)
+
+    def _job(self, job_id: str) -> Dict[str, Any]:
+        """Job-Parameter (pro Worker gecacht)"""
+        if job_id not in self._jobs:
+            job = self.queue.job(job_id)
+            if job is None:
+                raise KeyError(f"Job {job_id} nicht gefunden")
+            self._jobs[job_id] = job
+        return self._jobs[job_id]
+
+    def _heartbeat(self):
+        """Verlängert die Leases laufender Einheiten (alle lease_seconds / 3)"""
+        interval = self.queue.lease_seconds / 3
+        while not self._finished.wait(interval):
+            with self._active_lock:
+                units = list(self._active.values())
+            try:
+                self.queue.extend_leases(self.worker_id, units)
+            except Exception as e:
+                logger.warning(f"Lease-Verlängerung fehlgeschlagen: {str(e)}")
+
+
+def run_worker(concurrency: Optional[int] = None, queue_url: Optional[str] = None):
+    """Startet einen Worker im aktuellen Prozess (beendet sich bei SIGTERM/SIGINT geordnet)"""
+    worker = Worker(open_work_queue(queue_url), concurrency)
+
+    def shutdown(signum, frame):
+        logger.info(f"Signal {signum}: Worker {worker.worker_id} beendet laufende Profile")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    worker.run()
+    worker.queue.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils import setup_logging
+
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="PCBF Analyse-Worker")
+    parser.add_argument('--processes', type=int, default=1, help="Worker-Prozesse auf diesem Knoten")
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help="Parallel analysierte Profile pro Prozess (default: WORKER_CONCURRENCY)")
+    parser.add_argument('--queue', default=None, help="Work-Queue-URL (default: WORK_QUEUE_URL)")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker(args.concurrency, args.queue)
+    else:
+        processes = [
+            multiprocessing.Process(target=run_worker, args=(args.concurrency, args.queue))
+            for _ in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            # SIGINT erreicht auch die Kind-Prozesse; sie beenden laufende Profile
+            for process in processes:
+                process.join()